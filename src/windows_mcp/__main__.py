@@ -3,12 +3,21 @@ from fastmcp.client.transports import StreamableHttpTransport
 from fastmcp.server.providers.proxy import ProxyClient
 from windows_mcp.desktop.service import Desktop, Size
 from windows_mcp.watchdog.service import WatchDog
+from windows_mcp.tree.app_profiles import load_app_profiles
+from windows_mcp.tree.serializer import paginate
+from windows_mcp.tree.config import (
+    SNAPSHOT_PROPERTY_IDS,
+    TRAVERSAL_MODES,
+    UIA_CONNECTION_TIMEOUT_MS,
+    UIA_TRANSACTION_TIMEOUT_MS,
+)
 from contextlib import asynccontextmanager
 from fastmcp.utilities.types import Image
 from dataclasses import dataclass, field
 from windows_mcp.auth import AuthClient
 from mcp.types import ToolAnnotations
 from fastmcp import FastMCP, Context
+from fastmcp.tools import ToolResult
 from windows_mcp import filesystem
 from dotenv import load_dotenv
 from textwrap import dedent
@@ -17,6 +26,7 @@ from typing import Literal
 from enum import Enum
 import logging
 import asyncio
+import json
 import click
 import time
 import os
@@ -56,15 +66,41 @@ async def lifespan(app: FastMCP):
     desktop = Desktop()
     watchdog = WatchDog()
     screen_size = desktop.get_screen_size()
+    # Fail fast on providers that stopped answering instead of blocking a traversal worker
+    if not uia.SetAutomationTimeouts(UIA_CONNECTION_TIMEOUT_MS, UIA_TRANSACTION_TIMEOUT_MS):
+        logger.warning("UI Automation timeouts are not supported on this system")
+    traversal_mode = os.getenv("TRAVERSAL_MODE", desktop.tree.traversal_mode).lower()
+    if traversal_mode in TRAVERSAL_MODES:
+        desktop.tree.traversal_mode = traversal_mode
+    else:
+        logger.warning(f"Ignoring unknown TRAVERSAL_MODE {traversal_mode!r}")
+    # Profiles of the user come first, so they win over the bundled ones for the same app
+    app_profiles_path = os.getenv("APP_PROFILES")
+    if app_profiles_path:
+        try:
+            desktop.tree.app_profiles = (
+                load_app_profiles(app_profiles_path) + desktop.tree.app_profiles
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring APP_PROFILES {app_profiles_path!r}: {e}")
     watchdog.set_focus_callback(desktop.tree._on_focus_change)
+    watchdog.set_structure_callback(desktop.tree._on_structure_change)
+    watchdog.set_property_callback(
+        desktop.tree._on_property_change, property_ids=SNAPSHOT_PROPERTY_IDS
+    )
 
     try:
         watchdog.start()
         await asyncio.sleep(1)  # Simulate startup latency
+        # Events are flowing now, unchanged windows can be reused between snapshots
+        desktop.tree.window_cache.enable()
         yield
     finally:
         if watchdog:
             watchdog.stop()
+        if desktop:
+            desktop.tree.window_cache.disable()
+            desktop.tree.shutdown()
         if analytics:
             await analytics.close()
 
@@ -77,11 +113,12 @@ def _resolve_element_location(
 ) -> tuple[int, int]:
     """Find a UI element by name and return its center coordinates.
 
-    Uses Windows UI Automation to locate the element. Optionally scoped
-    to a specific window by title (substring match).
+    Looks the name up in the last snapshot first (exact, case-insensitive, then
+    closest match) and uses Windows UI Automation to locate the element otherwise.
+    Optionally scoped to a top-level window by title (substring match).
 
     Args:
-        element_name: The Name property of the UI element to find (exact match).
+        element_name: The Name property of the UI element to find.
         window_title: Window title substring to scope the search.
 
     Returns:
@@ -90,8 +127,15 @@ def _resolve_element_location(
     Raises:
         ValueError: If the element or window cannot be found.
     """
+    # Elements of the last snapshot are known already, UIA is searched on a miss only
+    if desktop is not None:
+        location = desktop.get_coordinates_from_name(element_name, window_title)
+        if location is not None:
+            return location
+
+    # Both searches run inside UI Automation as single FindFirst calls (see uia.conditions)
     if window_title:
-        search_root = uia.WindowControl(SubName=window_title)
+        search_root = uia.WindowControl(searchDepth=1, SubName=window_title)
         if not search_root.Exists(maxSearchSeconds=3):
             raise ValueError(
                 f"Window matching '{window_title}' not found. "
@@ -225,7 +269,7 @@ def file_tool(
 
 @mcp.tool(
     name='Snapshot',
-    description='Captures complete desktop state including: system language, focused/opened windows, interactive elements (buttons, text fields, links, menus with coordinates), and scrollable areas. Set use_vision=True to include screenshot. Set use_dom=True for browser content to get web page elements instead of browser UI. Always call this first to understand the current desktop state before taking actions.',
+    description='Captures complete desktop state including: system language, focused/opened windows, interactive elements (buttons, text fields, links, menus with coordinates), and scrollable areas. Set use_vision=True to include screenshot. Set use_dom=True for browser content to get web page elements instead of browser UI. Set max_ms to bound the capture time; windows not traversed in time, skipped or cut short are listed as truncated with the reason. Long lists are summarized by their first and last visible items. Elements keep the same id across snapshots; set diff=True to only get the elements added (+), changed (~) or removed (-) since the previous snapshot. To capture less and faster: scope="focused" only traverses the focused window and its popups and menus, window (a window handle or part of its title) only that window and its popups, and region=[left, top, right, bottom] only the elements inside that part of the screen. The focused window is traversed first and sent right away as a progress notification, the other windows follow as they are traversed. Elements are ranked, the focused element and its window first. Set max_tokens or max_bytes to only get the elements that fit and a cursor: pass the cursor back to get the next page of the same Snapshot without capturing again. Set format="json" for compact JSON or format="structured" for structured content. Always call this first to understand the current desktop state before taking actions.',
     annotations=ToolAnnotations(
         title="Snapshot",
         readOnlyHint=True,
@@ -235,25 +279,49 @@ def file_tool(
     ),
 )
 @with_analytics(analytics, "State-Tool")
-def state_tool(use_vision:bool|str=False,use_dom:bool|str=False, ctx: Context = None):
+async def state_tool(use_vision:bool|str=False,use_dom:bool|str=False,max_ms:int|str|None=None,diff:bool|str=False,scope:Literal['desktop','focused']='desktop',window:str|int|None=None,region:list[int]|None=None,format:Literal['text','json','structured']='text',max_tokens:int|str|None=None,max_bytes:int|str|None=None,cursor:str|None=None, ctx: Context = None):
     try:
         use_vision = use_vision is True or (isinstance(use_vision, str) and use_vision.lower() == 'true')
         use_dom = use_dom is True or (isinstance(use_dom, str) and use_dom.lower() == 'true')
-        
+        diff = diff is True or (isinstance(diff, str) and diff.lower() == 'true')
+        max_ms = int(max_ms) if max_ms not in (None, '') else None
+        max_tokens = int(max_tokens) if max_tokens not in (None, '') else None
+        max_bytes = int(max_bytes) if max_bytes not in (None, '') else None
+        if diff and format != 'text':
+            raise ValueError("diff=True is only available in the text format")
+
+        if cursor:
+            # Next page of the last Snapshot, nothing is captured again
+            if desktop.desktop_state is None or desktop.desktop_state.tree_state is None:
+                raise ValueError("No Snapshot to page through, take a Snapshot first")
+            page = paginate(desktop.desktop_state.tree_state,cursor=cursor,max_tokens=max_tokens,max_bytes=max_bytes,format=format)
+            more = page.next_page_to_string()
+            if format != 'text':
+                data = page.to_dict()
+                content = [json.dumps(data,separators=(',',':'),ensure_ascii=False)]
+                return ToolResult(content=content,structured_content=data) if format == 'structured' else content
+            return [f"List of Interactive Elements:\n{page.interactive_elements_to_string()}\n\nList of Scrollable Elements:\n{page.scrollable_elements_to_string()}"+(f"\n\nMore Elements:\n{more}" if more else '')]
+
         # Calculate scale factor to cap resolution at 1080p (1920x1080)
         scale_width = MAX_IMAGE_WIDTH / screen_size.width if screen_size.width > MAX_IMAGE_WIDTH else 1.0
         scale_height = MAX_IMAGE_HEIGHT / screen_size.height if screen_size.height > MAX_IMAGE_HEIGHT else 1.0
         scale = min(scale_width, scale_height)
-        
-        desktop_state=desktop.get_state(use_vision=use_vision,use_dom=use_dom,as_bytes=False,scale=scale)
-        
-        interactive_elements=desktop_state.tree_state.interactive_elements_to_string()
-        scrollable_elements=desktop_state.tree_state.scrollable_elements_to_string()
-        windows=desktop_state.windows_to_string()
-        active_window=desktop_state.active_window_to_string()
-        active_desktop=desktop_state.active_desktop_to_string()
-        all_desktops=desktop_state.desktops_to_string()
-        
+
+        window = window if window not in (None, '') else None
+        if region is not None and len(region) != 4:
+            raise ValueError("Region must be a list of exactly 4 integers [left, top, right, bottom]")
+        # Every window is sent as a progress notification when in, the focused window first
+        loop = asyncio.get_running_loop()
+        notifications = []
+        def on_window(progress):
+            if ctx is not None:
+                notifications.append(asyncio.run_coroutine_threadsafe(ctx.report_progress(progress=progress.done,total=progress.total,message=progress.to_string()),loop))
+        desktop_state=await asyncio.to_thread(desktop.get_state,use_vision=use_vision,use_dom=use_dom,as_bytes=False,scale=scale,max_ms=max_ms,diff=diff,scope=scope,window=window,region=region,on_window=on_window)
+        # Progress must not arrive after the result
+        await asyncio.gather(*(asyncio.wrap_future(notification) for notification in notifications),return_exceptions=True)
+        page = paginate(desktop_state.tree_state,max_tokens=max_tokens,max_bytes=max_bytes,format=format)
+        more = page.next_page_to_string()
+
         # Convert screenshot to bytes for vision response
         screenshot_bytes = None
         if use_vision and desktop_state.screenshot is not None:
@@ -261,9 +329,34 @@ def state_tool(use_vision:bool|str=False,use_dom:bool|str=False, ctx: Context =
             desktop_state.screenshot.save(buffered, format="PNG")
             screenshot_bytes = buffered.getvalue()
             buffered.close()
+
+        if format != 'text':
+            data = {**desktop_state.to_dict(), **page.to_dict()}
+            content = [json.dumps(data,separators=(',',':'),ensure_ascii=False)]+([Image(data=screenshot_bytes,format='png')] if screenshot_bytes else [])
+            return ToolResult(content=content,structured_content=data) if format == 'structured' else content
+
+        # The first snapshot has nothing to compare with and is listed in full
+        tree_diff=desktop_state.tree_diff
+        if tree_diff is not None and not tree_diff.is_initial:
+            interactive_title='Changed Interactive Elements (since the last Snapshot)'
+            scrollable_title='Changed Scrollable Elements (since the last Snapshot)'
+            interactive_elements=tree_diff.interactive_elements_to_string()
+            scrollable_elements=tree_diff.scrollable_elements_to_string()
+            more=''
+        else:
+            interactive_title='List of Interactive Elements'
+            scrollable_title='List of Scrollable Elements'
+            interactive_elements=page.interactive_elements_to_string()
+            scrollable_elements=page.scrollable_elements_to_string()
+        truncated_windows=desktop_state.tree_state.truncated_windows_to_string()
+        list_summaries=desktop_state.tree_state.list_summaries_to_string()
+        windows=desktop_state.windows_to_string()
+        active_window=desktop_state.active_window_to_string()
+        active_desktop=desktop_state.active_desktop_to_string()
+        all_desktops=desktop_state.desktops_to_string()
     except Exception as e:
         return [f'Error capturing desktop state: {str(e)}. Please try again.']
-    
+
     return [dedent(f'''
     Active Desktop:
     {active_desktop}
@@ -277,11 +370,57 @@ def state_tool(use_vision:bool|str=False,use_dom:bool|str=False, ctx: Context =
     Opened Windows:
     {windows}
 
-    List of Interactive Elements:
+    {interactive_title}:
     {interactive_elements or "No interactive elements found."}
 
-    List of Scrollable Elements:
-    {scrollable_elements or 'No scrollable elements found.'}''')]+([Image(data=screenshot_bytes,format='png')] if use_vision and screenshot_bytes else [])
+    {scrollable_title}:
+    {scrollable_elements or 'No scrollable elements found.'}''')+(f'''
+
+Truncated Windows (elements missing):
+{truncated_windows}''' if truncated_windows else '')+(f'''
+
+Summarized Lists (only the first and last visible items are listed, Scroll with the list id and an item name or position reaches the others):
+{list_summaries}''' if list_summaries else '')+(f'''
+
+More Elements:
+{more}''' if more else '')]+([Image(data=screenshot_bytes,format='png')] if use_vision and screenshot_bytes else [])
+
+@mcp.tool(
+    name="Query",
+    description=(
+        "Finds elements of the last Snapshot by structure instead of listing everything, "
+        "answered in milliseconds from the traversal of the Snapshot without capturing again. "
+        "The selector is CSS-like: a control type (Edit, Button, CheckBox, Window, ... or * for any) "
+        "with optional [name=...], [id=...] (automation id), [class=...] or [window=...] tests, "
+        "using = (equals), *= (contains), ^= (starts with) or $= (ends with), "
+        "and :focused, :checked, :unchecked or :interactive; "
+        "a space between selectors means inside, > means directly inside. "
+        "Example: 'Window[name=\"Save As\"] Edit' or 'Window[name*=Settings] CheckBox:unchecked'. "
+        "Returns id (the label for Click, Type, Scroll when listed in the Snapshot), window, control type, name and coordinates."
+    ),
+    annotations=ToolAnnotations(
+        title="Query",
+        readOnlyHint=True,
+        destructiveHint=False,
+        idempotentHint=True,
+        openWorldHint=False,
+    ),
+)
+@with_analytics(analytics, "Query-Tool")
+def query_tool(selector: str, limit: int = 50, ctx: Context = None) -> str:
+    try:
+        # One more than asked for tells whether the list is complete
+        matches = desktop.query(selector, limit=limit + 1)
+    except Exception as e:
+        return f"Error querying elements: {str(e)}"
+    if not matches:
+        return f"No elements match {selector}."
+    rows = ["# id|window|control_type|name|coords"]
+    rows.extend(match.to_string() for match in matches[:limit])
+    if len(matches) > limit:
+        rows.append(f"Only the first {limit} matches are listed, narrow the selector or raise limit.")
+    return "\n".join(rows)
+
 
 @mcp.tool(
     name="Click",
@@ -289,7 +428,9 @@ def state_tool(use_vision:bool|str=False,use_dom:bool|str=False, ctx: Context =
         "Performs mouse clicks at specified coordinates [x, y]. "
         "Supports button types: 'left' for selection/activation, 'right' for context menus, 'middle'. "
         "Supports clicks: 0=hover only (no click), 1=single click (select/focus), 2=double click (open/activate). "
-        "Optionally: pass element_name to find and click a UI element by its accessible name "
+        "Optionally: pass label, an element id from the last Snapshot, to click that element "
+        "directly (with loc too, loc is clicked only if it lands on that element), "
+        "or element_name to find and click a UI element by its accessible name "
         "(using Windows UI Automation), no coordinates needed. "
         "Use window_title to scope the search to a specific window."
     ),
@@ -308,26 +449,41 @@ def click_tool(
     clicks: int = 1,
     element_name: str | None = None,
     window_title: str | None = None,
+    label: str | None = None,
     ctx: Context = None,
 ) -> str:
-    if element_name:
+    if loc is not None and len(loc) != 2:
+        raise ValueError("Location must be a list of exactly 2 integers [x, y]")
+    if label is not None and loc is not None:
+        # Misclicks cost a round trip, check the target before sending input
+        desktop.verify_click_target((loc[0], loc[1]), label)
+        x, y = loc[0], loc[1]
+    elif label is not None:
+        x, y = desktop.get_coordinates_from_label(label)
+        loc = [x, y]
+    elif element_name:
         x, y = _resolve_element_location(element_name, window_title)
         loc = [x, y]
     elif loc is None:
-        raise ValueError("Either loc [x, y] or element_name must be provided.")
-    elif len(loc) != 2:
-        raise ValueError("Location must be a list of exactly 2 integers [x, y]")
+        raise ValueError("Either loc [x, y], label or element_name must be provided.")
     else:
         x, y = loc[0], loc[1]
     desktop.click(loc=loc, button=button, clicks=clicks)
     num_clicks = {0: "Hover", 1: "Single", 2: "Double"}
-    source = f" (element: '{element_name}')" if element_name else ""
+    if label is not None:
+        source = f" (label: {label})"
+    elif element_name:
+        source = f" (element: '{element_name}')"
+    elif (hit := desktop.get_element_at((x, y))) is not None:
+        source = f" (on element {hit.label}: '{hit.node.name}')"
+    else:
+        source = ""
     return f"{num_clicks.get(clicks)} {button} clicked at ({x},{y}){source}."
 
 
 @mcp.tool(
     name="Type",
-    description="Types text at specified coordinates [x, y]. Set clear=True to clear existing text first, False to append. Set press_enter=True to submit after typing. Set caret_position to 'start' (beginning), 'end' (end), or 'idle' (default).",
+    description="Types text at specified coordinates [x, y], or into the element with the given label (an element id from the last Snapshot). Set clear=True to clear existing text first, False to append. Set press_enter=True to submit after typing. Set caret_position to 'start' (beginning), 'end' (end), or 'idle' (default).",
     annotations=ToolAnnotations(
         title="Type",
         readOnlyHint=False,
@@ -338,16 +494,23 @@ def click_tool(
 )
 @with_analytics(analytics, "Type-Tool")
 def type_tool(
-    loc: list[int],
     text: str,
+    loc: list[int] | None = None,
     clear: bool | str = False,
     caret_position: Literal["start", "idle", "end"] = "idle",
     press_enter: bool | str = False,
+    label: str | None = None,
     ctx: Context = None,
 ) -> str:
-    if len(loc) != 2:
+    if label is not None:
+        x, y = desktop.get_coordinates_from_label(label)
+        loc = [x, y]
+    elif loc is None:
+        raise ValueError("Either loc [x, y] or label must be provided.")
+    elif len(loc) != 2:
         raise ValueError("Location must be a list of exactly 2 integers [x, y]")
-    x, y = loc[0], loc[1]
+    else:
+        x, y = loc[0], loc[1]
     desktop.type(
         loc=loc,
         text=text,
@@ -360,7 +523,7 @@ def type_tool(
 
 @mcp.tool(
     name="Scroll",
-    description="Scrolls at coordinates [x, y] or current mouse position if loc=None. Type: vertical (default) or horizontal. Direction: up/down for vertical, left/right for horizontal. wheel_times controls amount (1 wheel ≈ 3-5 lines). Use for navigating long content, lists, and web pages.",
+    description="Scrolls at coordinates [x, y], over the element with the given label (an element id from the last Snapshot), or at the current mouse position if neither is given. Type: vertical (default) or horizontal. Direction: up/down for vertical, left/right for horizontal. wheel_times controls amount (1 wheel ≈ 3-5 lines). Use for navigating long content, lists, and web pages. With label set to a list and item set to the name or 0-based position of one of its items, that item is brought into view instead, even in summarized or virtualized lists.",
     annotations=ToolAnnotations(
         title="Scroll",
         readOnlyHint=False,
@@ -375,8 +538,17 @@ def scroll_tool(
     type: Literal["horizontal", "vertical"] = "vertical",
     direction: Literal["up", "down", "left", "right"] = "down",
     wheel_times: int = 1,
+    label: str | None = None,
+    item: str | int | None = None,
     ctx: Context = None,
 ) -> str:
+    if item is not None:
+        if label is None:
+            raise ValueError("item needs the label of the list it belongs to.")
+        name, (x, y) = desktop.scroll_item_into_view(label, item)
+        return f"Scrolled item '{name}' of list {label} into view at ({x},{y})."
+    if label is not None:
+        loc = list(desktop.get_coordinates_from_label(label))
     if loc and len(loc) != 2:
         raise ValueError("Location must be a list of exactly 2 integers [x, y]")
     response = desktop.scroll(loc, type, direction, wheel_times)
@@ -395,7 +567,8 @@ def scroll_tool(
         "Moves mouse cursor to coordinates [x, y]. "
         "Set drag=True to perform a drag-and-drop operation from the current mouse position "
         "to the target coordinates. Default (drag=False) is a simple cursor move (hover). "
-        "Optionally: pass element_name to move to a UI element by its accessible name "
+        "Optionally: pass label, an element id from the last Snapshot, to move to that element "
+        "directly, or element_name to move to a UI element by its accessible name "
         "(using Windows UI Automation), no coordinates needed. "
         "Use window_title to scope the search to a specific window."
     ),
@@ -413,19 +586,29 @@ def move_tool(
     drag: bool | str = False,
     element_name: str | None = None,
     window_title: str | None = None,
+    label: str | None = None,
     ctx: Context = None,
 ) -> str:
     drag = drag is True or (isinstance(drag, str) and drag.lower() == "true")
-    if element_name:
+    if label is not None:
+        x, y = desktop.get_coordinates_from_label(label)
+        loc = [x, y]
+    elif element_name:
         x, y = _resolve_element_location(element_name, window_title)
         loc = [x, y]
     elif loc is None:
-        raise ValueError("Either loc [x, y] or element_name must be provided.")
+        raise ValueError("Either loc [x, y], label or element_name must be provided.")
     elif len(loc) != 2:
         raise ValueError("loc must be a list of exactly 2 integers [x, y]")
     else:
         x, y = loc[0], loc[1]
-    source = f" (element: '{element_name}')" if element_name else ""
+    source = (
+        f" (label: {label})"
+        if label is not None
+        else f" (element: '{element_name}')"
+        if element_name
+        else ""
+    )
     if drag:
         desktop.drag(loc)
         return f"Dragged to ({x},{y}){source}."
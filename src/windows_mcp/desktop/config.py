@@ -13,3 +13,19 @@ EXCLUDED_APPS: Set[str] = set(
         "Windows.UI.Core.CoreWindow",
     ]
 )
+
+# Skip windows covered by the windows above them and drop elements hidden behind other windows
+OCCLUSION_CULLING = True
+
+# DwmGetWindowAttribute attributes: visible frame without the invisible resize borders, and
+# whether DWM hides the window (suspended UWP apps, windows of other virtual desktops)
+DWMWA_EXTENDED_FRAME_BOUNDS = 9
+DWMWA_CLOAKED = 14
+
+# Snapshot scopes: "desktop" traverses the active window and every top-level window that is not an
+# app (taskbar, desktop, menus, dialogs), "focused" the active window and its popups only
+SNAPSHOT_SCOPES = ("desktop", "focused")
+
+# Shell windows are never popups of an app, menus and XAML popups are popups of whichever app is
+SHELL_CLASS_NAMES: Set[str] = set(["Progman", "Shell_TrayWnd", "Shell_SecondaryTrayWnd"])
+POPUP_CLASS_NAMES: Set[str] = set(["#32768", "Microsoft.UI.Content.PopupWindowSiteBridge"])
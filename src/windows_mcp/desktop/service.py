@@ -5,13 +5,24 @@ from windows_mcp.vdm.core import (
     is_window_on_current_desktop,
 )
 from windows_mcp.desktop.views import DesktopState, Window, Browser, Status, Size
-from windows_mcp.tree.views import BoundingBox, TreeElementNode
+from windows_mcp.tree.views import BoundingBox, TreeElementNode, WindowProgress
 from concurrent.futures import ThreadPoolExecutor
 from PIL import ImageGrab, ImageFont, ImageDraw, Image
 from windows_mcp.tree.service import Tree
+from windows_mcp.tree.spatial_index import SpatialHit
+from windows_mcp.tree.query import QueryMatch
+from windows_mcp.tree.occlusion import OcclusionMap
+from windows_mcp.desktop.config import (
+    OCCLUSION_CULLING,
+    DWMWA_EXTENDED_FRAME_BOUNDS,
+    DWMWA_CLOAKED,
+    SNAPSHOT_SCOPES,
+    SHELL_CLASS_NAMES,
+    POPUP_CLASS_NAMES,
+)
 from locale import getpreferredencoding
 from contextlib import contextmanager
-from typing import Literal
+from typing import Callable, Literal
 from markdownify import markdownify
 from thefuzz import process
 from time import sleep, time
@@ -24,6 +35,7 @@ import requests
 import logging
 import base64
 import ctypes
+import ctypes.wintypes
 import csv
 import re
 import os
@@ -78,7 +90,23 @@ class Desktop:
         use_dom: bool | str = False,
         as_bytes: bool | str = False,
         scale: float = 1.0,
+        max_ms: int | None = None,
+        diff: bool = False,
+        scope: Literal["desktop", "focused"] = "desktop",
+        window: str | int | None = None,
+        region: tuple[int, int, int, int] | None = None,
+        on_window: Callable[[WindowProgress], None] | None = None,
     ) -> DesktopState:
+        """
+        Capture the desktop. `scope`, `window` (a handle or a part of the title) and `region`
+        (left, top, right, bottom) restrict which windows are traversed, and where, up front.
+        `on_window` gets the nodes of every window as soon as they are traversed, see
+        `Tree.get_state`.
+
+        Raises:
+            ValueError: If the scope is unknown, no window matches `window`, the region is empty
+                or the scope is "focused" and no window is focused.
+        """
         use_annotation = use_annotation is True or (
             isinstance(use_annotation, str) and use_annotation.lower() == "true"
         )
@@ -87,6 +115,12 @@ class Desktop:
         )
         use_dom = use_dom is True or (isinstance(use_dom, str) and use_dom.lower() == "true")
         as_bytes = as_bytes is True or (isinstance(as_bytes, str) and as_bytes.lower() == "true")
+        if scope not in SNAPSHOT_SCOPES:
+            raise ValueError(f"Unknown scope {scope!r}, expected one of {SNAPSHOT_SCOPES}")
+        if region is not None:
+            region = tuple(int(value) for value in region)
+            if len(region) != 4 or region[2] <= region[0] or region[3] <= region[1]:
+                raise ValueError("Region must be [left, top, right, bottom] with a positive size")
 
         start_time = time()
 
@@ -111,12 +145,45 @@ class Desktop:
         logger.debug(f"Active window: {active_window or 'No Active Window Found'}")
         logger.debug(f"Windows: {windows}")
 
+        if scope == "focused" and window is None and active_window is None:
+            # The full desktop is what the scope is meant to avoid
+            raise ValueError(
+                "No window is focused. Switch to a window with the App tool, pass window, "
+                "or use scope='desktop'."
+            )
+
         # Preparing handles for Tree
-        other_windows_handles = list(controls_handles - windows_handles)
+        other_windows_handles = [h for h in controls_handles if h not in windows_handles]
+        scoped = window is not None or scope == "focused"
+        if window is not None:
+            target = self.find_window(windows + ([active_window] if active_window else []), window)
+            active_window_handle = target.handle
+            other_windows_handles = self.get_popup_handles(target, other_windows_handles)
+        elif scoped:
+            other_windows_handles = self.get_popup_handles(active_window, other_windows_handles)
+        elif region is not None:
+            # Under a region, windows of background apps count as well
+            other_windows_handles = [h for h in controls_handles if h != active_window_handle]
+        if region is not None:
+            other_windows_handles = self.get_region_handles(other_windows_handles, region)
+            if active_window_handle and not self.get_region_handles([active_window_handle], region):
+                active_window_handle = None
+        occlusion = (
+            self.get_occlusion_map(controls_handles, windows_handles) if OCCLUSION_CULLING else None
+        )
 
+        previous_tree_state = self.desktop_state.tree_state if self.desktop_state else None
         tree_state = self.tree.get_state(
-            active_window_handle, other_windows_handles, use_dom=use_dom
+            active_window_handle,
+            other_windows_handles,
+            use_dom=use_dom,
+            max_ms=max_ms,
+            occlusion=occlusion,
+            region=region,
+            scoped=scoped,
+            on_window=on_window,
         )
+        tree_diff = tree_state.diff(previous_tree_state) if diff else None
 
         if use_vision:
             if use_annotation:
@@ -146,6 +213,7 @@ class Desktop:
             all_desktops=all_desktops,
             screenshot=screenshot,
             tree_state=tree_state,
+            tree_diff=tree_diff,
         )
         # Log the time taken to capture the state
         end_time = time()
@@ -451,17 +519,123 @@ class Desktop:
         except Exception as e:
             logger.exception(f"Failed to bring window to top: {e}")
 
-    def get_element_handle_from_label(self, label: int) -> uia.Control:
-        tree_state = self.desktop_state.tree_state
-        element_node = tree_state.interactive_nodes[label]
-        xpath = element_node.xpath
-        element_handle = self.get_element_from_xpath(xpath)
-        return element_handle
+    def get_element_handle_from_label(self, label: str | int) -> uia.Control | None:
+        """
+        The UIA element behind a label of the last snapshot, checked to still exist and
+        usable on the calling thread. None if the element was evicted from the registry.
+        """
+        _, element, _ = self.tree.registry.resolve(label)
+        return element
+
+    def get_coordinates_from_label(self, label: str | int) -> tuple[int, int]:
+        """Current center of the element behind a label of the last snapshot."""
+        _, _, center = self.tree.registry.resolve(label)
+        return center.x, center.y
+
+    def get_coordinates_from_name(
+        self, name: str, window_title: str | None = None
+    ) -> tuple[int, int] | None:
+        """
+        Current center of the element of the last snapshot named `name`, optionally in a
+        window whose title contains `window_title`. None on a miss or if the element is
+        gone, in which case the caller searches UI Automation.
+        """
+        match = self.tree.name_index.lookup(name, window_title)
+        if match is None:
+            return None
+        try:
+            _, _, center = self.tree.registry.resolve(match.label)
+        except ValueError:
+            self.tree.name_index.stale += 1
+            return None
+        logger.debug(f"'{name}' resolved from the snapshot ({match.kind}): {match.node.name!r}")
+        return center.x, center.y
+
+    def get_element_at(self, loc: tuple[int, int]) -> SpatialHit | None:
+        """The element of the last snapshot a click at `loc` lands on, if any."""
+        return self.tree.spatial_index.element_at(*loc)
+
+    def verify_click_target(self, loc: tuple[int, int], label: str | int) -> None:
+        """
+        Check against the last snapshot that `loc` lands on the element behind `label`.
+
+        Raises:
+            ValueError: If the label is unknown, or `loc` lands on another element or none.
+        """
+        entry = self.tree.registry.get(label)
+        if entry is None:
+            raise ValueError(
+                f"Label {label} is not in the last Snapshot. Use an id from the latest Snapshot."
+            )
+        hit = self.get_element_at(loc)
+        if hit is not None and hit.label == str(label).strip():
+            return
+        target = f"element {label} ('{entry.name}') at {entry.bounding_box.xyxy_to_string()}"
+        if hit is None:
+            landing = "no element of the last Snapshot"
+        else:
+            landing = f"element {hit.label} ('{hit.node.name}', {hit.node.control_type})"
+        raise ValueError(
+            f"({loc[0]},{loc[1]}) lands on {landing}, not on {target}. "
+            f"Nothing was clicked; pass only the label to click the center of the element."
+        )
 
-    def get_coordinates_from_label(self, label: int) -> tuple[int, int]:
-        element_handle = self.get_element_handle_from_label(label)
-        bounding_rectangle = element_handle.BoundingRectangle
-        return bounding_rectangle.xcenter(), bounding_rectangle.ycenter()
+    def query(self, selector: str, limit: int | None = None) -> list[QueryMatch]:
+        """
+        Elements of the windows of the last snapshot matching a selector, see
+        `windows_mcp.tree.query`. Answered from the last traversal, UI Automation is
+        only asked for toggle states.
+
+        Raises:
+            ValueError: If there is no snapshot yet or the selector is not valid.
+        """
+        if self.desktop_state is None:
+            raise ValueError("No Snapshot to query, take a Snapshot first")
+        start_time = time()
+        matches = self.tree.query_index.query(selector, limit=limit)
+        logger.debug(f"Query {selector!r} took {(time() - start_time) * 1000:.1f} ms")
+        return matches
+
+    def scroll_item_into_view(
+        self, label: str | int, item: str | int
+    ) -> tuple[str, tuple[int, int]]:
+        """
+        Bring an item of a list into view through ItemContainerPattern, realizing it first
+        if it is virtualized. `label` is the list or one of its listed items, `item` the name
+        of the item or its 0-based position in the list. Returns its name and center.
+
+        Raises:
+            ValueError: If the label is unknown, is not a list, or the list has no such item.
+        """
+        _, element, _ = self.tree.registry.resolve(label)
+        container = element
+        pattern = container.GetPattern(uia.PatternId.ItemContainerPattern)
+        if pattern is None:
+            # The label of a listed item stands for its list
+            container = element.GetParentControl()
+            if container is not None:
+                pattern = container.GetPattern(uia.PatternId.ItemContainerPattern)
+        if pattern is None:
+            raise ValueError(f"Element {label} is not a list whose items can be paged through.")
+        if isinstance(item, int):
+            # Items are walked in order, virtualized ones included
+            found = None
+            for _ in range(item + 1):
+                found = pattern.FindItemByProperty(found, 0, None)
+                if found is None:
+                    break
+        else:
+            found = pattern.FindItemByProperty(None, uia.PropertyId.NameProperty, item)
+        if found is None:
+            raise ValueError(f"No item {item!r} in list {label} ('{container.Name}').")
+        virtualized = found.GetPattern(uia.PatternId.VirtualizedItemPattern)
+        if virtualized is not None:
+            virtualized.Realize()
+        scroll_item = found.GetPattern(uia.PatternId.ScrollItemPattern)
+        if scroll_item is not None:
+            scroll_item.ScrollIntoView()
+        rect = found.BoundingRectangle
+        return found.Name, (rect.xcenter(), rect.ycenter())
 
     def click(self, loc: tuple[int, int], button: str = "left", clicks: int = 2):
         x, y = loc
@@ -620,8 +794,9 @@ class Desktop:
         is_name = "Overlay" in element.Name.strip()
         return no_children or is_name
 
-    def get_controls_handles(self, optimized: bool = False):
-        handles = set()
+    def get_controls_handles(self, optimized: bool = False) -> list[int]:
+        """Visible top-level windows of the current virtual desktop in z-order, topmost first."""
+        handles = []
 
         # For even more faster results (still under development)
         def callback(hwnd, _):
@@ -632,21 +807,116 @@ class Desktop:
                     and win32gui.IsWindowVisible(hwnd)
                     and is_window_on_current_desktop(hwnd)
                 ):
-                    handles.add(hwnd)
+                    handles.append(hwnd)
             except Exception:
                 # Skip invalid handles without logging (common during window enumeration)
                 pass
 
+        # EnumWindows goes through top-level windows in z-order
         win32gui.EnumWindows(callback, None)
 
-        if desktop_hwnd := win32gui.FindWindow("Progman", None):
-            handles.add(desktop_hwnd)
-        if taskbar_hwnd := win32gui.FindWindow("Shell_TrayWnd", None):
-            handles.add(taskbar_hwnd)
-        if secondary_taskbar_hwnd := win32gui.FindWindow("Shell_SecondaryTrayWnd", None):
-            handles.add(secondary_taskbar_hwnd)
+        for class_name in ("Progman", "Shell_TrayWnd", "Shell_SecondaryTrayWnd"):
+            hwnd = win32gui.FindWindow(class_name, None)
+            if hwnd and hwnd not in handles:
+                handles.append(hwnd)
         return handles
 
+    def find_window(self, windows: list[Window], window: str | int) -> Window:
+        """
+        The window whose handle is `window`, or else the topmost one whose title contains it.
+
+        Raises:
+            ValueError: If no window matches.
+        """
+        if isinstance(window, int) or str(window).strip().isdigit():
+            handle = int(window)
+            for candidate in windows:
+                if candidate.handle == handle:
+                    return candidate
+        name = str(window).strip().casefold()
+        matches = [candidate for candidate in windows if name in candidate.name.casefold()]
+        if not matches:
+            titles = ", ".join(f"'{candidate.name}'" for candidate in windows)
+            raise ValueError(f"No window matches {window!r}. Opened windows: {titles}")
+        return min(matches, key=lambda candidate: candidate.depth)
+
+    def get_popup_handles(self, owner: Window, handles: list[int]) -> list[int]:
+        """Menus, popups and dialogs among `handles` that belong to the `owner` app."""
+        popups = []
+        for hwnd in handles:
+            try:
+                class_name = win32gui.GetClassName(hwnd)
+                if class_name in SHELL_CLASS_NAMES:
+                    continue
+                if (
+                    class_name in POPUP_CLASS_NAMES
+                    or win32gui.GetWindow(hwnd, win32con.GW_OWNER) == owner.handle
+                    or win32process.GetWindowThreadProcessId(hwnd)[1] == owner.process_id
+                ):
+                    popups.append(hwnd)
+            except Exception:
+                continue
+        return popups
+
+    def get_region_handles(
+        self, handles: list[int], region: tuple[int, int, int, int]
+    ) -> list[int]:
+        """Windows among `handles` whose frame overlaps `region`."""
+        left, top, right, bottom = region
+        overlapping = []
+        for hwnd in handles:
+            try:
+                w_left, w_top, w_right, w_bottom = self.get_window_frame(hwnd)
+            except Exception:
+                continue
+            if w_left < right and left < w_right and w_top < bottom and top < w_bottom:
+                overlapping.append(hwnd)
+        return overlapping
+
+    def get_window_frame(self, hwnd: int) -> tuple[int, int, int, int]:
+        """Visible frame of a window, without the invisible resize borders of GetWindowRect."""
+        rect = ctypes.wintypes.RECT()
+        result = ctypes.windll.dwmapi.DwmGetWindowAttribute(
+            hwnd, DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect), ctypes.sizeof(rect)
+        )
+        if result != 0:
+            return win32gui.GetWindowRect(hwnd)
+        return rect.left, rect.top, rect.right, rect.bottom
+
+    def is_window_cloaked(self, hwnd: int) -> bool:
+        cloaked = ctypes.wintypes.DWORD()
+        result = ctypes.windll.dwmapi.DwmGetWindowAttribute(
+            hwnd, DWMWA_CLOAKED, ctypes.byref(cloaked), ctypes.sizeof(cloaked)
+        )
+        return result == 0 and cloaked.value != 0
+
+    def get_occlusion_map(self, handles: list[int], windows_handles: set[int]) -> OcclusionMap:
+        """
+        Visible region of each window, from `handles` in z-order (topmost first).
+
+        Only the app windows listed by `get_windows` (`windows_handles`) and the shell
+        windows hide what is below them: the overlays and tool windows it leaves out are
+        often layered, full screen or fully transparent without being click-through.
+        """
+        windows = []
+        for hwnd in handles:
+            try:
+                rect = self.get_window_frame(hwnd)
+                if hwnd in windows_handles:
+                    ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+                    # Minimized, click-through and cloaked windows hide nothing below them
+                    opaque = not (
+                        win32gui.IsIconic(hwnd)
+                        or ex_style & win32con.WS_EX_TRANSPARENT
+                        or self.is_window_cloaked(hwnd)
+                    )
+                else:
+                    opaque = win32gui.GetClassName(hwnd) in SHELL_CLASS_NAMES
+            except Exception:
+                continue
+            windows.append((hwnd, rect, opaque))
+        return OcclusionMap.from_z_order(windows)
+
     def get_active_window(self, windows: list[Window] | None = None) -> Window | None:
         try:
             if windows is None:
@@ -698,13 +968,13 @@ class Desktop:
             current = parent
 
     def get_windows(
-        self, controls_handles: set[int] | None = None
+        self, controls_handles: list[int] | None = None
     ) -> tuple[list[Window], set[int]]:
         try:
             windows = []
             window_handles = set()
             controls_handles = controls_handles or self.get_controls_handles()
-            for depth, hwnd in enumerate(controls_handles):
+            for hwnd in controls_handles:
                 try:
                     child = uia.ControlFromHandle(hwnd)
                 except Exception:
@@ -730,7 +1000,8 @@ class Desktop:
                             Window(
                                 **{
                                     "name": child.Name,
-                                    "depth": depth,
+                                    # Z-order among the listed windows, 0 is topmost
+                                    "depth": len(windows),
                                     "status": status,
                                     "bounding_box": BoundingBox(
                                         left=bounding_rect.left,
@@ -896,7 +1167,9 @@ class Desktop:
 
         # Draw annotations in parallel
         with ThreadPoolExecutor() as executor:
-            executor.map(draw_annotation, range(len(nodes)), nodes)
+            executor.map(
+                draw_annotation, [node.id or index for index, node in enumerate(nodes)], nodes
+            )
         return padded_screenshot
 
     def send_notification(self, title: str, message: str) -> str:
@@ -1,4 +1,4 @@
-from windows_mcp.tree.views import TreeState, BoundingBox
+from windows_mcp.tree.views import TreeState, TreeStateDiff, BoundingBox
 from dataclasses import dataclass
 from tabulate import tabulate
 from PIL.Image import Image
@@ -44,6 +44,16 @@ class Window:
             self.handle,
         ]
 
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "status": self.status.value,
+            "width": self.bounding_box.width,
+            "height": self.bounding_box.height,
+            "handle": self.handle,
+        }
+
 
 @dataclass
 class Size:
@@ -62,6 +72,7 @@ class DesktopState:
     windows: list[Window]
     screenshot: Image | None = None
     tree_state: TreeState | None = None
+    tree_diff: TreeStateDiff | None = None  # against the previous snapshot, if asked for
 
     def active_desktop_to_string(self):
         desktop_name = self.active_desktop.get("name")
@@ -85,3 +96,15 @@ class DesktopState:
         headers = ["Name", "Depth", "Status", "Width", "Height", "Handle"]
         rows = [window.to_row() for window in self.windows]
         return tabulate(rows, headers=headers, tablefmt="simple")
+
+    def to_dict(self):
+        """Desktops and windows, for the JSON formats of the Snapshot; elements are paged apart."""
+        tree_state = self.tree_state or TreeState()
+        return {
+            "active_desktop": self.active_desktop.get("name"),
+            "desktops": [desktop.get("name") for desktop in self.all_desktops],
+            "focused_window": self.active_window.to_dict() if self.active_window else None,
+            "windows": [window.to_dict() for window in self.windows],
+            "truncated_windows": [window.to_dict() for window in tree_state.truncated_windows],
+            "list_summaries": [summary.to_dict() for summary in tree_state.list_summaries],
+        }
@@ -0,0 +1,124 @@
+"""
+Per-application traversal profiles.
+
+Apps differ a lot in the shape of their trees: Electron apps render everything
+inside a Chromium document, Office and Explorer carry deep subtrees that hold
+nothing to act on. A profile matches the top-level windows of an app by process
+name or window class and tunes their traversal: subtrees to skip (by automation
+id or class name), a depth cap, the cache profiles to fetch and whether the
+window is traversed as a browser, in DOM mode. Profiles are declared in JSON,
+the bundled `app_profiles.json` and optionally a user file that takes precedence.
+"""
+
+from windows_mcp.tree.cache_utils import CACHE_PROFILES
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+import json
+import logging
+
+if TYPE_CHECKING:
+    from windows_mcp.uia import Control
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_APP_PROFILES_PATH = Path(__file__).with_name("app_profiles.json")
+
+PROFILE_KEYS = {
+    "name",
+    "process_names",
+    "class_names",
+    "skip_automation_ids",
+    "skip_class_names",
+    "max_depth",
+    "cache_profiles",
+    "use_dom",
+}
+
+
+@dataclass(frozen=True)
+class AppProfile:
+    name: str
+    process_names: frozenset[str] = frozenset()  # case-insensitive, e.g. "code.exe"
+    class_names: frozenset[str] = frozenset()  # class of the top-level window
+    skip_automation_ids: frozenset[str] = frozenset()
+    skip_class_names: frozenset[str] = frozenset()
+    max_depth: int | None = None
+    cache_profiles: tuple[str, ...] | None = None  # names from CACHE_PROFILES
+    use_dom: bool | None = None  # True traverses the window as a browser, None detects it
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "AppProfile":
+        """
+        Raises:
+            ValueError: If the entry has unknown keys, no name, nothing to match on,
+                or names an unknown cache profile.
+        """
+        unknown = set(data) - PROFILE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown app profile keys {sorted(unknown)}")
+        name = data.get("name")
+        if not name:
+            raise ValueError("App profile without a name")
+        process_names = frozenset(p.casefold() for p in data.get("process_names", ()))
+        class_names = frozenset(data.get("class_names", ()))
+        if not process_names and not class_names:
+            raise ValueError(f"App profile {name!r} matches no process name or class name")
+        cache_profiles = data.get("cache_profiles")
+        if cache_profiles is not None:
+            unknown = [profile for profile in cache_profiles if profile not in CACHE_PROFILES]
+            if unknown:
+                raise ValueError(f"App profile {name!r} uses unknown cache profiles {unknown}")
+            cache_profiles = tuple(cache_profiles)
+        return cls(
+            name=name,
+            process_names=process_names,
+            class_names=class_names,
+            skip_automation_ids=frozenset(data.get("skip_automation_ids", ())),
+            skip_class_names=frozenset(data.get("skip_class_names", ())),
+            max_depth=data.get("max_depth"),
+            cache_profiles=cache_profiles,
+            use_dom=data.get("use_dom"),
+        )
+
+    @property
+    def has_skip_rules(self) -> bool:
+        return bool(self.skip_automation_ids or self.skip_class_names)
+
+    def matches(self, process_name: str | None, class_name: str | None) -> bool:
+        return (process_name is not None and process_name.casefold() in self.process_names) or (
+            class_name is not None and class_name in self.class_names
+        )
+
+    def skips(self, node: "Control") -> bool:
+        """True if the subtree of a (cached) node is not traversed."""
+        try:
+            return (
+                node.CachedAutomationId in self.skip_automation_ids
+                or node.CachedClassName in self.skip_class_names
+            )
+        except Exception:
+            return False
+
+
+def load_app_profiles(path: str | Path = DEFAULT_APP_PROFILES_PATH) -> list[AppProfile]:
+    """
+    Profiles of a JSON file `{"profiles": [...]}`, in file order.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it is not valid JSON or an entry is invalid.
+    """
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    return [AppProfile.from_dict(entry) for entry in data.get("profiles", [])]
+
+
+def match_app_profile(
+    profiles: Iterable[AppProfile], process_name: str | None, class_name: str | None
+) -> AppProfile | None:
+    """The first profile matching a window, None if no profile does."""
+    for profile in profiles:
+        if profile.matches(process_name, class_name):
+            return profile
+    return None
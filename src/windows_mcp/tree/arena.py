@@ -0,0 +1,502 @@
+"""
+Columnar store of a traversed window.
+
+A `TreeArena` keeps every element a traversal visits as one row of parallel
+arrays: its rectangle as four ints, its control type as a small code, the row of
+its parent, and its name, automation id and class name as indices into a table
+of interned strings. A row costs a few dozen bytes where an object per element
+costs hundreds, and the traversal appends rows directly. Rows are in traversal
+order, a parent before its children, so the window is row 0. `ArenaNode` is a
+view of one row for navigating the hierarchy.
+
+The elements a snapshot lists are slots of the same arena: the row they were
+read from and the few columns the row does not hold, such as the clipped box,
+the value and the id. `NodeView` is the list of nodes a `TreeState` holds, slots
+of one or more arenas in listing order; it builds the node object of a slot when
+it is read and keeps none of them.
+"""
+
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from typing import Any, Iterable, Iterator
+import sys
+
+from windows_mcp.tree.views import (
+    BoundingBox,
+    Center,
+    ScrollElementNode,
+    TextElementNode,
+    TreeElementNode,
+)
+
+Rect = tuple[int, int, int, int]
+
+NO_PARENT = -1
+
+# Kinds of listed nodes
+INTERACTIVE, SCROLLABLE, TEXT = range(3)
+# Flags of listed nodes
+FOCUSED, HORIZONTALLY_SCROLLABLE, VERTICALLY_SCROLLABLE = 1, 2, 4
+
+
+class TreeArena:
+    __slots__ = (
+        "parents",
+        "control_types",
+        "rects",
+        "names",
+        "automation_ids",
+        "class_names",
+        "runtime_ids",
+        "strings",
+        "_string_ids",
+        "control_type_names",
+        "_control_type_ids",
+        "_children",
+        "listed_rows",
+        "listed_kinds",
+        "listed_boxes",
+        "listed_centers",
+        "listed_names",
+        "listed_control_types",
+        "listed_windows",
+        "listed_ids",
+        "listed_values",
+        "listed_shortcuts",
+        "listed_flags",
+        "listed_scroll_percents",
+        "elements",
+    )
+
+    def __init__(self):
+        self.parents = array("i")
+        self.control_types = array("H")
+        self.rects = array("i")  # left, top, right, bottom of every row
+        self.names = array("I")
+        self.automation_ids = array("I")
+        self.class_names = array("I")
+        self.runtime_ids: list[tuple[int, ...] | None] = []
+        # Interned strings, shared by the names, automation ids and class names
+        self.strings: list[str] = [""]
+        self._string_ids: dict[str, int] = {"": 0}
+        self.control_type_names: list[str] = []
+        self._control_type_ids: dict[str, int] = {}
+        self._children: list[list[int]] | None = None  # built on first use
+        # Listed nodes by slot, the strings interned in the same table as the rows
+        self.listed_rows = array("i")
+        self.listed_kinds = array("B")
+        self.listed_boxes = array("i")  # left, top, right, bottom, clipped for interactive nodes
+        self.listed_centers = array("i")  # x, y
+        self.listed_names = array("I")
+        self.listed_control_types = array("I")
+        self.listed_windows = array("I")
+        self.listed_ids: list[str] = []  # one per element, not worth interning
+        self.listed_values = array("I")
+        self.listed_shortcuts = array("I")
+        self.listed_flags = array("B")
+        self.listed_scroll_percents = array("d")  # horizontal, vertical
+        # UIA element of each slot until `release_elements`, the only object kept per node
+        self.elements: dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def intern(self, text: str | None) -> int:
+        text = text or ""
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def append(
+        self,
+        control_type: str,
+        name: str | None,
+        automation_id: str | None,
+        class_name: str | None,
+        rect: Rect,
+        runtime_id: tuple[int, ...] | None = None,
+        parent: int = NO_PARENT,
+    ) -> int:
+        """Add a row, returns its index."""
+        code = self._control_type_ids.get(control_type)
+        if code is None:
+            code = self._control_type_ids[control_type] = len(self.control_type_names)
+            self.control_type_names.append(control_type)
+        index = len(self.parents)
+        self.parents.append(parent)
+        self.control_types.append(code)
+        self.rects.extend(rect)
+        self.names.append(self.intern(name))
+        self.automation_ids.append(self.intern(automation_id))
+        self.class_names.append(self.intern(class_name))
+        self.runtime_ids.append(runtime_id)
+        self._children = None
+        return index
+
+    def list_node(
+        self,
+        kind: int,
+        row: int,
+        box: Rect,
+        center: tuple[int, int],
+        name: str,
+        control_type: str = "",
+        window_name: str = "",
+        id: str = "",
+        value: str | None = "",
+        shortcut: str | None = "",
+        flags: int = 0,
+        scroll_percents: tuple[float, float] = (0, 0),
+        element: Any = None,
+    ) -> int:
+        """List the element of `row` as a node of `kind`, returns its slot."""
+        slot = len(self.listed_rows)
+        self.listed_rows.append(row)
+        self.listed_kinds.append(kind)
+        self.listed_boxes.extend(box)
+        self.listed_centers.extend(center)
+        self.listed_names.append(self.intern(name))
+        self.listed_control_types.append(self.intern(control_type))
+        self.listed_windows.append(self.intern(window_name))
+        self.listed_ids.append(id)
+        self.listed_values.append(self.intern(value))
+        self.listed_shortcuts.append(self.intern(shortcut))
+        self.listed_flags.append(flags)
+        self.listed_scroll_percents.extend(scroll_percents)
+        if element is not None:
+            self.elements[slot] = element
+        return slot
+
+    def listed_node(self, slot: int) -> TreeElementNode | ScrollElementNode | TextElementNode:
+        """A new node object of a slot."""
+        strings = self.strings
+        kind = self.listed_kinds[slot]
+        if kind == TEXT:
+            return TextElementNode(text=strings[self.listed_names[slot]])
+        left, top, right, bottom = self.listed_boxes[slot * 4 : slot * 4 + 4]
+        bounding_box = BoundingBox(left, top, right, bottom, right - left, bottom - top)
+        center = Center(self.listed_centers[slot * 2], self.listed_centers[slot * 2 + 1])
+        flags = self.listed_flags[slot]
+        if kind == INTERACTIVE:
+            return TreeElementNode(
+                bounding_box=bounding_box,
+                center=center,
+                name=strings[self.listed_names[slot]],
+                control_type=strings[self.listed_control_types[slot]],
+                window_name=strings[self.listed_windows[slot]],
+                value=strings[self.listed_values[slot]],
+                shortcut=strings[self.listed_shortcuts[slot]],
+                is_focused=bool(flags & FOCUSED),
+                id=self.listed_ids[slot],
+                runtime_id=self.runtime_ids[self.listed_rows[slot]],
+                element=self.elements.get(slot),
+            )
+        horizontal_scroll_percent, vertical_scroll_percent = self.listed_scroll_percents[
+            slot * 2 : slot * 2 + 2
+        ]
+        return ScrollElementNode(
+            name=strings[self.listed_names[slot]],
+            control_type=strings[self.listed_control_types[slot]],
+            xpath="",
+            window_name=strings[self.listed_windows[slot]],
+            bounding_box=bounding_box,
+            center=center,
+            horizontal_scrollable=bool(flags & HORIZONTALLY_SCROLLABLE),
+            horizontal_scroll_percent=horizontal_scroll_percent,
+            vertical_scrollable=bool(flags & VERTICALLY_SCROLLABLE),
+            vertical_scroll_percent=vertical_scroll_percent,
+            is_focused=bool(flags & FOCUSED),
+            id=self.listed_ids[slot],
+            runtime_id=self.runtime_ids[self.listed_rows[slot]],
+            element=self.elements.get(slot),
+        )
+
+    def release_elements(self):
+        """Drop the UIA elements of the slots, once the registry holds the ones it keeps."""
+        self.elements = {}
+
+    def control_type(self, index: int) -> str:
+        return self.control_type_names[self.control_types[index]]
+
+    def name(self, index: int) -> str:
+        return self.strings[self.names[index]]
+
+    def automation_id(self, index: int) -> str:
+        return self.strings[self.automation_ids[index]]
+
+    def class_name(self, index: int) -> str:
+        return self.strings[self.class_names[index]]
+
+    def rect(self, index: int) -> Rect:
+        start = index * 4
+        return tuple(self.rects[start : start + 4])
+
+    def parent(self, index: int) -> int | None:
+        parent = self.parents[index]
+        return None if parent == NO_PARENT else parent
+
+    def children(self, index: int) -> list[int]:
+        if self._children is None:
+            children: list[list[int]] = [[] for _ in range(len(self.parents))]
+            for child, parent in enumerate(self.parents):
+                if parent != NO_PARENT:
+                    children[parent].append(child)
+            self._children = children
+        return self._children[index]
+
+    def node(self, index: int) -> "ArenaNode":
+        return ArenaNode(self, index)
+
+    def nbytes(self) -> int:
+        """Approximate size of the rows, interned strings included."""
+        columns = (
+            self.parents,
+            self.control_types,
+            self.rects,
+            self.names,
+            self.automation_ids,
+            self.class_names,
+            self.listed_rows,
+            self.listed_kinds,
+            self.listed_boxes,
+            self.listed_centers,
+            self.listed_names,
+            self.listed_control_types,
+            self.listed_windows,
+            self.listed_values,
+            self.listed_shortcuts,
+            self.listed_flags,
+            self.listed_scroll_percents,
+        )
+        return (
+            sum(column.itemsize * len(column) for column in columns)
+            + sys.getsizeof(self.runtime_ids)
+            + sum(sys.getsizeof(runtime_id) for runtime_id in self.runtime_ids)
+            + sys.getsizeof(self.listed_ids)
+            + sum(sys.getsizeof(listed_id) for listed_id in self.listed_ids)
+            + sum(sys.getsizeof(text) for text in self.strings)
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ArenaNode:
+    arena: TreeArena
+    index: int
+
+    @property
+    def control_type(self) -> str:
+        return self.arena.control_type(self.index)
+
+    @property
+    def name(self) -> str:
+        return self.arena.name(self.index)
+
+    @property
+    def automation_id(self) -> str:
+        return self.arena.automation_id(self.index)
+
+    @property
+    def class_name(self) -> str:
+        return self.arena.class_name(self.index)
+
+    @property
+    def rect(self) -> Rect:
+        return self.arena.rect(self.index)
+
+    @property
+    def runtime_id(self) -> tuple[int, ...] | None:
+        return self.arena.runtime_ids[self.index]
+
+    @property
+    def parent(self) -> "ArenaNode | None":
+        parent = self.arena.parent(self.index)
+        return None if parent is None else ArenaNode(self.arena, parent)
+
+    @property
+    def children(self) -> list["ArenaNode"]:
+        return [ArenaNode(self.arena, child) for child in self.arena.children(self.index)]
+
+
+class NodeView(Sequence):
+    """
+    Nodes listed in order, each a slot of an arena or an item of a list of node objects.
+
+    Reading an item builds its node from the columns of the arena, a new object every
+    time, so changes to it are not kept. The traversal appends the slots of its arena
+    with `append` and `pop_slot`; snapshots merge views with `extend` and `+`.
+    """
+
+    __slots__ = ("_sources", "_parts", "_slots", "_ids")
+
+    def __init__(self, source: TreeArena | list | None = None):
+        self._sources: list[TreeArena | list] = [] if source is None else [source]
+        self._parts = array("H")  # source of each item
+        self._slots = array("i")  # its slot in the arena, or index in the list
+        self._ids: dict[int, str] = {}  # ids given by position, see `with_ids`
+
+    @classmethod
+    def of(cls, nodes: Iterable) -> "NodeView":
+        """`nodes` as a view, the view itself if it is one."""
+        if isinstance(nodes, NodeView):
+            return nodes
+        nodes = nodes if isinstance(nodes, list) else list(nodes)
+        view = cls(nodes)
+        view._parts = array("H", bytes(2 * len(nodes)))
+        view._slots = array("i", range(len(nodes)))
+        return view
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _node(self, position: int):
+        source = self._sources[self._parts[position]]
+        slot = self._slots[position]
+        node = source.listed_node(slot) if isinstance(source, TreeArena) else source[slot]
+        node_id = self._ids.get(position)
+        return node if node_id is None else replace(node, id=node_id)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("NodeView index out of range")
+        return self._node(index)
+
+    def __iter__(self) -> Iterator:
+        for position in range(len(self._slots)):
+            yield self._node(position)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (NodeView, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"NodeView({list(self)!r})"
+
+    def __add__(self, other) -> "NodeView":
+        if not isinstance(other, (NodeView, list)):
+            return NotImplemented
+        view = self.take(range(len(self)))
+        view.extend(other)
+        return view
+
+    def __radd__(self, other) -> "NodeView":
+        if not isinstance(other, list):
+            return NotImplemented
+        view = NodeView.of(other).take(range(len(other)))
+        view.extend(self)
+        return view
+
+    def _part(self, source: TreeArena | list) -> int:
+        for part, known in enumerate(self._sources):
+            if known is source:
+                return part
+        self._sources.append(source)
+        return len(self._sources) - 1
+
+    def append(self, slot: int):
+        """List a slot of the arena of the view."""
+        self._parts.append(0)
+        self._slots.append(slot)
+
+    def pop_slot(self) -> int:
+        """Unlist the last node, returns its slot."""
+        self._ids.pop(len(self._slots) - 1, None)
+        self._parts.pop()
+        return self._slots.pop()
+
+    def clear(self):
+        self._parts = array("H")
+        self._slots = array("i")
+        self._ids = {}
+
+    def extend(self, nodes: Iterable):
+        other = NodeView.of(nodes)
+        offset = len(self)
+        parts = [self._part(source) for source in other._sources]
+        self._parts.extend(parts[part] for part in other._parts)
+        self._slots.extend(other._slots)
+        self._ids.update((offset + position, node_id) for position, node_id in other._ids.items())
+
+    def take(self, positions: Iterable[int]) -> "NodeView":
+        """The nodes at `positions`, as a view of the same sources."""
+        view = NodeView()
+        view._sources = list(self._sources)
+        for index, position in enumerate(positions):
+            view._parts.append(self._parts[position])
+            view._slots.append(self._slots[position])
+            if position in self._ids:
+                view._ids[index] = self._ids[position]
+        return view
+
+    def select(self, predicate) -> "NodeView":
+        """The nodes `predicate` holds for, in order."""
+        return self.take([position for position, node in enumerate(self) if predicate(node)])
+
+    def with_ids(self, ids: dict[int, str]) -> "NodeView":
+        """The same nodes, the ones at the positions of `ids` with these ids instead."""
+        view = self.take(range(len(self)))
+        view._ids.update(ids)
+        return view
+
+    def _column(self, column: str, attribute: str) -> list:
+        values = []
+        for part, slot in zip(self._parts, self._slots):
+            source = self._sources[part]
+            if isinstance(source, TreeArena):
+                values.append(source.strings[getattr(source, column)[slot]])
+            else:
+                values.append(getattr(source[slot], attribute))
+        return values
+
+    def ids(self) -> list[str]:
+        """Ids of the nodes, without building them."""
+        ids = []
+        for part, slot in zip(self._parts, self._slots):
+            source = self._sources[part]
+            ids.append(
+                source.listed_ids[slot] if isinstance(source, TreeArena) else source[slot].id
+            )
+        for position, node_id in self._ids.items():
+            ids[position] = node_id
+        return ids
+
+    def names(self) -> list[str]:
+        return self._column("listed_names", "name")
+
+    def runtime_ids(self) -> list[tuple[int, ...] | None]:
+        values = []
+        for part, slot in zip(self._parts, self._slots):
+            source = self._sources[part]
+            if isinstance(source, TreeArena):
+                values.append(source.runtime_ids[source.listed_rows[slot]])
+            else:
+                values.append(source[slot].runtime_id)
+        return values
+
+    def boxes(self) -> list[Rect]:
+        """(left, top, right, bottom) of the bounding boxes of the nodes."""
+        boxes = []
+        for part, slot in zip(self._parts, self._slots):
+            source = self._sources[part]
+            if isinstance(source, TreeArena):
+                boxes.append(tuple(source.listed_boxes[slot * 4 : slot * 4 + 4]))
+            else:
+                box = source[slot].bounding_box
+                boxes.append((box.left, box.top, box.right, box.bottom))
+        return boxes
+
+    def rows(self, arena: TreeArena) -> list[int | None]:
+        """Row in `arena` of each node, None for the nodes of other sources."""
+        return [
+            arena.listed_rows[slot] if self._sources[part] is arena else None
+            for part, slot in zip(self._parts, self._slots)
+        ]
@@ -0,0 +1,185 @@
+"""
+Batch geometry over the rows of a traversal.
+
+`clip_boxes` clips rectangles to a window and the screen with the semantics of
+`iou_bounding_box`, and `overlaps` measures pairs of rectangles. Given NumPy
+arrays, such as the rectangles of an arena, both run as one NumPy pass over the
+whole batch; given sequences of tuples they run as Python loops with the same
+results, converting a list of tuples costs more than the pass saves. NumPy is
+optional, without it the arena rectangles go through the loops.
+
+`drop_nested_duplicates` uses them on the rectangles recorded in a `TreeArena` to
+collapse an interactive element and its nested interactive descendants covering
+nearly the same area, such as a list item and the button filling it, into the
+most actionable one.
+"""
+
+from windows_mcp.tree.arena import NO_PARENT, NodeView, TreeArena
+from windows_mcp.tree.config import (
+    ACTIONABLE_CONTROL_TYPE_NAMES,
+    DUPLICATE_CONTAINMENT_THRESHOLD,
+    DUPLICATE_IOU_THRESHOLD,
+)
+from windows_mcp.tree.views import TreeElementNode
+from typing import Any, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional, the Python loops give the same results
+    np = None
+
+Box = tuple[int, int, int, int]  # (left, top, right, bottom)
+
+EMPTY_BOX: Box = (0, 0, 0, 0)
+
+ACTIONABLE_RANKS = {name: rank for rank, name in enumerate(ACTIONABLE_CONTROL_TYPE_NAMES)}
+
+
+def as_box(rect: Any) -> Box:
+    return (rect.left, rect.top, rect.right, rect.bottom)
+
+
+def _bounds(window: Box, screen: Box) -> Box:
+    return (
+        max(window[0], screen[0]),
+        max(window[1], screen[1]),
+        min(window[2], screen[2]),
+        min(window[3], screen[3]),
+    )
+
+
+def is_array(boxes: Any) -> bool:
+    return np is not None and isinstance(boxes, np.ndarray)
+
+
+def clip_boxes(boxes, window: Box, screen: Box):
+    """
+    Each box clipped to the window then the screen, `EMPTY_BOX` when none of it is
+    visible, as `iou_bounding_box` does for one element. An (n, 4) array gives an
+    array, a sequence of boxes a list of tuples.
+    """
+    left, top, right, bottom = _bounds(window, screen)
+    if is_array(boxes):
+        low = np.maximum(boxes[:, :2], (left, top))
+        high = np.minimum(boxes[:, 2:], (right, bottom))
+        clipped = np.concatenate((low, high), axis=1)
+        clipped[~(high > low).all(axis=1)] = 0
+        return clipped
+    clipped = []
+    for box in boxes:
+        box = (max(left, box[0]), max(top, box[1]), min(right, box[2]), min(bottom, box[3]))
+        clipped.append(box if box[2] > box[0] and box[3] > box[1] else EMPTY_BOX)
+    return clipped
+
+
+def overlaps(boxes_a, boxes_b):
+    """
+    (IoU, containment) of each pair of boxes, containment being the share of the
+    smaller inside the other, 0 for an empty box. Arrays give two arrays, sequences
+    two lists.
+    """
+    if is_array(boxes_a):
+        a, b = boxes_a.astype(np.int64), np.asarray(boxes_b, dtype=np.int64)
+        width = np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0])
+        height = np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        union = area_a + area_b - intersection
+        smaller = np.minimum(area_a, area_b)
+        iou = np.divide(intersection, union, out=np.zeros(len(a)), where=union > 0)
+        containment = np.divide(intersection, smaller, out=np.zeros(len(a)), where=smaller > 0)
+        return iou, containment
+    ious, containments = [], []
+    for a, b in zip(boxes_a, boxes_b):
+        width = min(a[2], b[2]) - max(a[0], b[0])
+        height = min(a[3], b[3]) - max(a[1], b[1])
+        intersection = max(width, 0) * max(height, 0)
+        area_a = (a[2] - a[0]) * (a[3] - a[1])
+        area_b = (b[2] - b[0]) * (b[3] - b[1])
+        union = area_a + area_b - intersection
+        smaller = min(area_a, area_b)
+        ious.append(intersection / union if union > 0 else 0.0)
+        containments.append(intersection / smaller if smaller > 0 else 0.0)
+    return ious, containments
+
+
+def _row_boxes(arena: TreeArena, rows: list[int]):
+    if np is not None:
+        # Integer indexing copies the rows, the buffer of the arena is released on return
+        return np.frombuffer(arena.rects, dtype=np.intc).reshape(-1, 4)[rows]
+    return [arena.rect(row) for row in rows]
+
+
+def drop_nested_duplicates(
+    nodes: Sequence[TreeElementNode],
+    arena: TreeArena | None,
+    window: Box,
+    screen: Box,
+    iou_threshold: float = DUPLICATE_IOU_THRESHOLD,
+    containment_threshold: float = DUPLICATE_CONTAINMENT_THRESHOLD,
+) -> Sequence[TreeElementNode]:
+    """
+    The nodes without the near-duplicates nested in each other, in their order.
+
+    Each node is compared with its nearest interactive ancestor in the arena, on
+    their rectangles clipped to the window and the screen. Of a chain of duplicates
+    the focused node is kept, else the most actionable control type, else a named
+    node, else the outermost. Nodes the arena does not hold are kept as they are.
+    A view of the slots of `arena` stays a view, without building its nodes.
+    """
+    if arena is None or len(nodes) < 2:
+        return nodes
+    if isinstance(nodes, NodeView):
+        node_rows = nodes.rows(arena)
+    else:
+        rows_of = {
+            runtime_id: row for row, runtime_id in enumerate(arena.runtime_ids) if runtime_id
+        }
+        node_rows = [rows_of.get(node.runtime_id) if node.runtime_id else None for node in nodes]
+    positions = {row: position for position, row in enumerate(node_rows) if row is not None}
+
+    children, ancestors = [], []
+    for position, row in enumerate(node_rows):
+        if row is None:
+            continue
+        ancestor = arena.parents[row]
+        while ancestor != NO_PARENT and ancestor not in positions:
+            ancestor = arena.parents[ancestor]
+        if ancestor != NO_PARENT:
+            children.append(position)
+            ancestors.append(positions[ancestor])
+    if not children:
+        return nodes
+
+    child_boxes = clip_boxes(_row_boxes(arena, [node_rows[p] for p in children]), window, screen)
+    ancestor_boxes = clip_boxes(
+        _row_boxes(arena, [node_rows[p] for p in ancestors]), window, screen
+    )
+    ious, containments = overlaps(child_boxes, ancestor_boxes)
+
+    # A duplicate joins the group of its ancestor, ancestors come first in the arena
+    group_of: dict[int, int] = {}
+    duplicates = [
+        (node_rows[child], child, ancestor)
+        for child, ancestor, iou, containment in zip(children, ancestors, ious, containments)
+        if iou >= iou_threshold and containment >= containment_threshold
+    ]
+    for _, child, ancestor in sorted(duplicates):
+        group_of[child] = group_of.get(ancestor, ancestor)
+    groups: dict[int, list[int]] = {}
+    for child, root in group_of.items():
+        groups.setdefault(root, [root]).append(child)
+
+    def preference(position: int) -> tuple:
+        node, row = nodes[position], node_rows[position]
+        rank = ACTIONABLE_RANKS.get(arena.control_type(row), len(ACTIONABLE_RANKS))
+        return (node.is_focused, -rank, bool(node.name.strip()), -row)
+
+    dropped = set()
+    for members in groups.values():
+        kept = max(members, key=preference)
+        dropped.update(member for member in members if member != kept)
+    if isinstance(nodes, NodeView):
+        return nodes.take([position for position in range(len(nodes)) if position not in dropped])
+    return [node for position, node in enumerate(nodes) if position not in dropped]
@@ -5,20 +5,269 @@ This module provides utilities for implementing UI Automation caching
 to reduce cross-process COM calls during tree traversal.
 """
 
-from windows_mcp.uia import CacheRequest, PropertyId, TreeScope, Control
+from __future__ import annotations
+
+from windows_mcp.uia.enums import PropertyId, PatternId, TreeScope
+from dataclasses import dataclass
+from threading import Lock
+from typing import TYPE_CHECKING, Any
+import windows_mcp.uia as uia
 import logging
 
+if TYPE_CHECKING:
+    from windows_mcp.uia import CacheRequest, Control
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class CacheProfile:
+    """A named set of properties cached for one traversal scenario."""
+
+    name: str
+    property_ids: tuple[int, ...]
+
+
+# Every profile is added on top of "minimal", which is what classification always reads
+CACHE_PROFILES: dict[str, CacheProfile] = {
+    "minimal": CacheProfile(
+        name="minimal",
+        property_ids=(
+            PropertyId.NameProperty,
+            PropertyId.AutomationIdProperty,
+            PropertyId.LocalizedControlTypeProperty,
+            PropertyId.AcceleratorKeyProperty,
+            PropertyId.ClassNameProperty,
+            PropertyId.ControlTypeProperty,
+            PropertyId.RuntimeIdProperty,
+            PropertyId.IsEnabledProperty,
+            PropertyId.IsOffscreenProperty,
+            PropertyId.IsControlElementProperty,
+            PropertyId.HasKeyboardFocusProperty,
+            PropertyId.IsKeyboardFocusableProperty,
+            PropertyId.BoundingRectangleProperty,
+        ),
+    ),
+    # Role check and value of interactive candidates, modal check of dialogs
+    "interactive": CacheProfile(
+        name="interactive",
+        property_ids=(
+            PropertyId.IsLegacyIAccessiblePatternAvailableProperty,
+            PropertyId.LegacyIAccessibleRoleProperty,
+            PropertyId.LegacyIAccessibleValueProperty,
+            PropertyId.IsWindowPatternAvailableProperty,
+            PropertyId.WindowIsModalProperty,
+        ),
+    ),
+    # Scrollable containers
+    "scroll": CacheProfile(
+        name="scroll",
+        property_ids=(
+            PropertyId.IsScrollPatternAvailableProperty,
+            PropertyId.ScrollHorizontallyScrollableProperty,
+            PropertyId.ScrollHorizontalScrollPercentProperty,
+            PropertyId.ScrollVerticallyScrollableProperty,
+            PropertyId.ScrollVerticalScrollPercentProperty,
+        ),
+    ),
+    # Browser groups are interactive when their default action is a click
+    "dom": CacheProfile(
+        name="dom",
+        property_ids=(
+            PropertyId.IsLegacyIAccessiblePatternAvailableProperty,
+            PropertyId.LegacyIAccessibleRoleProperty,
+            PropertyId.LegacyIAccessibleDefaultActionProperty,
+        ),
+    ),
+}
+
+DEFAULT_PROFILES = ("interactive", "scroll")
+BROWSER_PROFILES = ("interactive", "scroll", "dom")
+
+# Patterns read during traversal: availability property and cached property of each attribute
+PATTERN_PROPERTIES: dict[int, tuple[int, dict[str, int]]] = {
+    PatternId.LegacyIAccessiblePattern: (
+        PropertyId.IsLegacyIAccessiblePatternAvailableProperty,
+        {
+            "Role": PropertyId.LegacyIAccessibleRoleProperty,
+            "Value": PropertyId.LegacyIAccessibleValueProperty,
+            "DefaultAction": PropertyId.LegacyIAccessibleDefaultActionProperty,
+        },
+    ),
+    PatternId.ScrollPattern: (
+        PropertyId.IsScrollPatternAvailableProperty,
+        {
+            "HorizontallyScrollable": PropertyId.ScrollHorizontallyScrollableProperty,
+            "HorizontalScrollPercent": PropertyId.ScrollHorizontalScrollPercentProperty,
+            "VerticallyScrollable": PropertyId.ScrollVerticallyScrollableProperty,
+            "VerticalScrollPercent": PropertyId.ScrollVerticalScrollPercentProperty,
+        },
+    ),
+    PatternId.WindowPattern: (
+        PropertyId.IsWindowPatternAvailableProperty,
+        {"IsModal": PropertyId.WindowIsModalProperty},
+    ),
+}
+
+
+class CacheProfileStats:
+    """
+    Counts the reads served from the cache (live calls avoided) and the live
+    fallbacks, per profile, split in property and pattern calls.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._owner = {}
+        for profile in CACHE_PROFILES.values():
+            for property_id in profile.property_ids:
+                self._owner.setdefault(property_id, profile.name)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = {
+                name: {
+                    "avoided_property_calls": 0,
+                    "avoided_pattern_calls": 0,
+                    "live_property_calls": 0,
+                    "live_pattern_calls": 0,
+                }
+                for name in CACHE_PROFILES
+            }
+
+    def record(self, property_id: int, cached: bool, pattern: bool = False):
+        name = self._owner.get(property_id, "minimal")
+        key = f"{'avoided' if cached else 'live'}_{'pattern' if pattern else 'property'}_calls"
+        with self._lock:
+            self._counts[name][key] += 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+
+cache_profile_stats = CacheProfileStats()
+
+
+class CachedPattern:
+    """
+    Read-only view of a control pattern backed by cached pattern properties.
+
+    `available` answers from the cached Is*PatternAvailable property instead of a
+    GetPattern call, and pattern properties are read from the cache. When the node
+    was not cached with the matching profile it falls back to the live pattern.
+    """
+
+    def __init__(
+        self,
+        node: Control,
+        pattern_id: int,
+        availability_property_id: int,
+        properties: dict[str, int],
+    ):
+        self._node = node
+        self._pattern_id = pattern_id
+        self._availability_property_id = availability_property_id
+        self._properties = properties
+        self._available: bool | None = None
+        self._live_pattern: Any = None
+
+    @classmethod
+    def legacy_accessible(cls, node: Control) -> "CachedPattern":
+        return cls(
+            node,
+            PatternId.LegacyIAccessiblePattern,
+            *PATTERN_PROPERTIES[PatternId.LegacyIAccessiblePattern],
+        )
+
+    @classmethod
+    def scroll(cls, node: Control) -> "CachedPattern":
+        return cls(node, PatternId.ScrollPattern, *PATTERN_PROPERTIES[PatternId.ScrollPattern])
+
+    @classmethod
+    def window(cls, node: Control) -> "CachedPattern":
+        return cls(node, PatternId.WindowPattern, *PATTERN_PROPERTIES[PatternId.WindowPattern])
+
+    def _live(self) -> Any:
+        if self._live_pattern is None:
+            cache_profile_stats.record(self._availability_property_id, cached=False, pattern=True)
+            self._live_pattern = self._node.GetPattern(self._pattern_id)
+        return self._live_pattern
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            value = self._node.GetCachedPropertyValue(self._availability_property_id)
+            if value is None:
+                self._available = self._live() is not None
+            else:
+                cache_profile_stats.record(
+                    self._availability_property_id, cached=True, pattern=True
+                )
+                self._available = bool(value)
+        return self._available
+
+    def __getattr__(self, name: str) -> Any:
+        properties = self.__dict__.get("_properties", {})
+        if name not in properties:
+            raise AttributeError(name)
+        if not self.available:
+            raise AttributeError(f"Pattern {self._pattern_id} is not supported")
+        property_id = properties[name]
+        value = self._node.GetCachedPropertyValue(property_id)
+        if value is None:
+            cache_profile_stats.record(property_id, cached=False)
+            return getattr(self._live(), name)
+        cache_profile_stats.record(property_id, cached=True)
+        return value
+
+
 class CacheRequestFactory:
     """Factory for creating optimized cache requests for different scenarios."""
 
     @staticmethod
-    def create_tree_traversal_cache() -> CacheRequest:
+    def new_cache_request() -> CacheRequest:
+        return uia.CacheRequest()
+
+    @staticmethod
+    def on_screen_control_view_filter() -> Any:
+        """TreeFilter of on-screen control-view elements."""
+        return uia.CreateAndCondition(
+            uia.CreatePropertyCondition(PropertyId.IsControlElementProperty, True),
+            uia.CreatePropertyCondition(PropertyId.IsOffscreenProperty, False),
+        )
+
+    @classmethod
+    def create_profile_cache(cls, *profiles: str) -> CacheRequest:
+        """
+        Creates a cache request for the given profiles on top of the minimal profile.
+
+        Args:
+            profiles: Names from CACHE_PROFILES, e.g. "interactive", "scroll", "dom"
+
+        Returns:
+            CacheRequest with Element and Children scope
+        """
+        cache_request = cls.new_cache_request()
+        cache_request.TreeScope = TreeScope.TreeScope_Element | TreeScope.TreeScope_Children
+
+        property_ids = dict.fromkeys(CACHE_PROFILES["minimal"].property_ids)
+        for name in profiles:
+            if name not in CACHE_PROFILES:
+                raise ValueError(f"Unknown cache profile {name!r}")
+            property_ids.update(dict.fromkeys(CACHE_PROFILES[name].property_ids))
+        # Only pattern properties are cached, marshalling the patterns themselves is expensive
+        for property_id in property_ids:
+            cache_request.AddProperty(property_id)
+
+        return cache_request
+
+    @classmethod
+    def create_tree_traversal_cache(cls) -> CacheRequest:
         """
         Creates a cache request optimized for tree traversal.
-        Caches all commonly accessed properties and patterns.
+        Caches the minimal profile: identification, state and layout properties.
 
         This cache request is designed to minimize COM calls during
         the tree_traversal() operation in tree/service.py.
@@ -26,34 +275,26 @@ class CacheRequestFactory:
         Returns:
             CacheRequest configured for tree traversal
         """
-        cache_request = CacheRequest()
-
-        # Set scope to cache element and its children
-        # This allows us to get children with pre-cached properties
-        cache_request.TreeScope = TreeScope.TreeScope_Element | TreeScope.TreeScope_Children
-
-        # Basic identification properties
-        cache_request.AddProperty(PropertyId.NameProperty)
-        cache_request.AddProperty(PropertyId.AutomationIdProperty)
-        cache_request.AddProperty(PropertyId.LocalizedControlTypeProperty)
-        cache_request.AddProperty(PropertyId.AcceleratorKeyProperty)
-        cache_request.AddProperty(PropertyId.ClassNameProperty)
-        cache_request.AddProperty(PropertyId.ControlTypeProperty)
+        return cls.create_profile_cache()
 
-        # State properties for visibility and interaction checks
-        cache_request.AddProperty(PropertyId.IsEnabledProperty)
-        cache_request.AddProperty(PropertyId.IsOffscreenProperty)
-        cache_request.AddProperty(PropertyId.IsControlElementProperty)
-        cache_request.AddProperty(PropertyId.HasKeyboardFocusProperty)
-        cache_request.AddProperty(PropertyId.IsKeyboardFocusableProperty)
+    @classmethod
+    def create_subtree_cache(cls, profiles: tuple[str, ...] = DEFAULT_PROFILES) -> CacheRequest:
+        """
+        Creates a cache request that fetches a whole window in a single round trip.
 
-        # Layout properties
-        cache_request.AddProperty(PropertyId.BoundingRectangleProperty)
+        Uses the given profiles with TreeScope_Subtree and a TreeFilter
+        restricted to on-screen control-view elements, so the provider returns the
+        filtered tree in one call instead of one BuildUpdatedCache per node.
 
-        # REMOVED: Expensive patterns and less critical properties to improve performance
-        # Patterns like LegacyIAccessible are very expensive to marshal for every element.
-        # We will fetch them live only for the few elements that actually need them.
+        Note: Offscreen elements (and their subtrees) are filtered out by the provider,
+        unlike the per-node traversal which still keeps offscreen EditControls.
 
+        Returns:
+            CacheRequest configured for subtree prefetching
+        """
+        cache_request = cls.create_profile_cache(*profiles)
+        cache_request.TreeScope = TreeScope.TreeScope_Subtree
+        cache_request.TreeFilter = cls.on_screen_control_view_filter()
         return cache_request
 
 
@@ -83,6 +324,26 @@ class CachedControlHelper:
             logger.debug(f"Failed to build cached control: {e}")
             return node
 
+    @staticmethod
+    def prefetch_subtree(node: Control, cache_request: CacheRequest | None = None) -> Control:
+        """
+        Fetch the filtered subtree of a control in a single round trip.
+
+        Args:
+            node: The root control (usually a top-level window)
+            cache_request: Optional custom cache request. If None, uses the subtree cache.
+
+        Returns:
+            The root control with its whole subtree cached, or the original control if it fails
+        """
+        if cache_request is None:
+            cache_request = CacheRequestFactory.create_subtree_cache()
+
+        cached_node = CachedControlHelper.build_cached_control(node, cache_request)
+        if cached_node is not node:
+            cached_node._subtree_cached = True
+        return cached_node
+
     @staticmethod
     def get_cached_children(
         node: Control, cache_request: CacheRequest | None = None
@@ -101,6 +362,17 @@ class CachedControlHelper:
         Returns:
             List of children with cached properties
         """
+        # Subtree was prefetched in a single round trip, children are already in the cache
+        if getattr(node, "_subtree_cached", False):
+            try:
+                children = node.GetCachedChildren()
+                for child in children:
+                    child._is_cached = True
+                    child._subtree_cached = True
+                return children
+            except Exception as e:
+                logger.debug(f"Failed to read prefetched children, rebuilding cache: {e}")
+
         if cache_request is None:
             cache_request = CacheRequestFactory.create_tree_traversal_cache()
 
@@ -76,3 +76,95 @@ INFORMATIVE_CONTROL_TYPE_NAMES = set(
 DEFAULT_ACTIONS = set(["Click", "Press", "Jump", "Check", "Uncheck", "Double Click"])
 
 THREAD_MAX_RETRIES = 3
+
+# "per_node": one BuildUpdatedCache per visited element (keeps offscreen EditControls)
+# "subtree": the whole on-screen control view of a window is fetched in a single round trip
+TRAVERSAL_MODES = ("per_node", "subtree")
+DEFAULT_TRAVERSAL_MODE = "per_node"
+
+# UIA runtime ids of HWND-backed elements are [HWND_RUNTIME_ID_PREFIX, hwnd]
+HWND_RUNTIME_ID_PREFIX = 42
+
+# Properties whose change invalidates the cached nodes of a window
+# 30005: Name, 30045: Value, 30093: LegacyIAccessibleValue, 30010: IsEnabled,
+# 30022: IsOffscreen, 30001: BoundingRectangle, 30053/30055: Horizontal/VerticalScrollPercent
+SNAPSHOT_PROPERTY_IDS = [30005, 30045, 30093, 30010, 30022, 30001, 30053, 30055]
+
+# UIA client timeouts, calls into a provider that does not answer fail instead of blocking
+UIA_CONNECTION_TIMEOUT_MS = 1000
+UIA_TRANSACTION_TIMEOUT_MS = 3000
+
+# Hung window isolation: a traversal slower than SLOW_TRAVERSAL_MS or failing is a strike.
+# Windows with strikes are traversed last at DEGRADED_MAX_DEPTH, from SKIP_AFTER_STRIKES on
+# they are skipped with exponential back-off (base * 2**n, capped) before being probed again.
+SLOW_TRAVERSAL_MS = 2000
+SKIP_AFTER_STRIKES = 2
+PENALTY_BASE_BACKOFF_S = 5.0
+PENALTY_MAX_BACKOFF_S = 120.0
+DEGRADED_MAX_DEPTH = 8
+
+# Traversal limits of a single window, None disables a limit. A window that hits the node or
+# children limit is reported truncated; the depth limit only guards against runaway trees.
+TRAVERSAL_MAX_DEPTH = 128
+TRAVERSAL_MAX_NODES = 20000
+TRAVERSAL_MAX_CHILDREN = 2000
+
+# Element registry of the action tools: elements of recent snapshots, least recently used
+# evicted first. Entry size is an estimate of the marshalled UIA element and its bookkeeping.
+REGISTRY_MAX_ELEMENTS = 10000
+REGISTRY_MAX_BYTES = 16 * 1024 * 1024
+REGISTRY_ENTRY_BYTES = 1024
+
+# Name index of the last snapshot, used by element_name lookups before searching UIA. A fuzzy
+# (trigram) match needs this Dice similarity and must beat the runner-up by FUZZY_MARGIN.
+NAME_INDEX_FUZZY_THRESHOLD = 0.85
+NAME_INDEX_FUZZY_MARGIN = 0.05
+
+# Spatial index of the last snapshot: side of the square grid cells, in pixels
+SPATIAL_INDEX_CELL_SIZE = 64
+
+# Viewport pruning: children whose cached rectangle lies entirely outside the window, or the web
+# page inside a browser, grown by this margin in pixels are not traversed. Scroll containers,
+# windows and elements without a rectangle are always entered. None disables pruning.
+TRAVERSAL_VIEWPORT_MARGIN = 100
+
+# List summarization: a run of at least LIST_SUMMARY_MIN_ITEMS sibling items of one of these
+# types is listed by its first and last LIST_SUMMARY_EDGE_ITEMS visible items and a summary row,
+# the other items and their subtrees are not traversed. None for EDGE_ITEMS lists every item.
+LIST_ITEM_CONTROL_TYPE_NAMES = {"ListItemControl", "DataItemControl", "TreeItemControl"}
+LIST_SUMMARY_MIN_ITEMS = 50
+LIST_SUMMARY_EDGE_ITEMS = 10
+
+# Formats of a Snapshot: the pipe-separated rows, compact JSON, or MCP structured content
+SNAPSHOT_FORMATS = ("text", "json", "structured")
+
+# Rough size of a token, for budgets given in tokens
+BYTES_PER_TOKEN = 4
+
+# Distance to the focus, in pixels, at which the rank of an element is halved
+RANK_DISTANCE_SCALE = 200
+
+# Nested duplicates: an interactive element and its nearest interactive descendant are one
+# element when their clipped rectangles overlap by at least DUPLICATE_IOU_THRESHOLD and the
+# smaller lies at least DUPLICATE_CONTAINMENT_THRESHOLD inside the larger. The focused one is
+# kept, else the first of ACTIONABLE_CONTROL_TYPE_NAMES, most actionable first.
+DUPLICATE_IOU_THRESHOLD = 0.8
+DUPLICATE_CONTAINMENT_THRESHOLD = 0.95
+ACTIONABLE_CONTROL_TYPE_NAMES = [
+    "EditControl",
+    "TextBoxControl",
+    "ComboBoxControl",
+    "CheckBoxControl",
+    "RadioButtonControl",
+    "SplitButtonControl",
+    "ButtonControl",
+    "HyperlinkControl",
+    "MenuItemControl",
+    "TabItemControl",
+    "TreeItemControl",
+    "ListItemControl",
+    "DataItemControl",
+    "HeaderItemControl",
+    "SpinnerControl",
+    "ScrollBarControl",
+]
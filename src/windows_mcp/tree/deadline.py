@@ -0,0 +1,33 @@
+"""
+Time budget for a snapshot.
+
+The traversal checks the deadline cooperatively at every visited node, so a
+slow window gives up on its own instead of stalling the whole snapshot.
+"""
+
+from time import perf_counter
+
+
+class DeadlineExceeded(Exception):
+    """Raised inside a traversal once its time budget is spent."""
+
+
+class Deadline:
+    __slots__ = ("expires_at",)
+
+    def __init__(self, max_ms: float | None = None):
+        self.expires_at = None if max_ms is None else perf_counter() + max_ms / 1000
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and perf_counter() >= self.expires_at
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, None when there is no budget."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - perf_counter())
+
+    def check(self):
+        if self.expires_at is not None and perf_counter() >= self.expires_at:
+            raise DeadlineExceeded()
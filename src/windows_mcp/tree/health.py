@@ -0,0 +1,166 @@
+"""
+Traversal health tracking per window and per process.
+
+Every traversal records its latency and outcome against the window handle and
+its process id and window class. Slow or failed traversals are strikes; a window
+(or any window of the same class in its process) with strikes is traversed last
+and at reduced depth, and after repeated strikes it is skipped with exponential
+back-off before it is probed again. A successful, fast traversal clears the
+strikes.
+
+Process records are keyed on the class too: one slow File Explorer window must not
+penalize the taskbar and the desktop, which belong to the same explorer.exe.
+"""
+
+from windows_mcp.tree.config import (
+    SLOW_TRAVERSAL_MS,
+    SKIP_AFTER_STRIKES,
+    PENALTY_BASE_BACKOFF_S,
+    PENALTY_MAX_BACKOFF_S,
+)
+from dataclasses import dataclass, replace
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from psutil import pid_exists
+
+
+class TraversalPlan(Enum):
+    NORMAL = "normal"
+    DEGRADED = "degraded"  # traversed last, at reduced depth
+    SKIP = "skip"
+
+
+@dataclass
+class HealthRecord:
+    latency_ms: float | None = None  # exponential moving average
+    traversals: int = 0
+    failures: int = 0
+    strikes: int = 0
+    skip_until: float = 0.0
+    last_failure_slow: bool = False
+
+
+class TraversalHealth:
+    def __init__(
+        self,
+        slow_ms: float = SLOW_TRAVERSAL_MS,
+        skip_after_strikes: int = SKIP_AFTER_STRIKES,
+        base_backoff_s: float = PENALTY_BASE_BACKOFF_S,
+        max_backoff_s: float = PENALTY_MAX_BACKOFF_S,
+        clock: Callable[[], float] = monotonic,
+        process_exists: Callable[[int], bool] = pid_exists,
+    ):
+        self.slow_ms = slow_ms
+        self.skip_after_strikes = skip_after_strikes
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._clock = clock
+        self._process_exists = process_exists
+        self._lock = Lock()
+        self._windows: dict[int, HealthRecord] = {}
+        self._processes: dict[tuple[int, str | None], HealthRecord] = {}
+
+    def _records(
+        self, handle: int, process_id: int | None, class_name: str | None
+    ) -> list[HealthRecord]:
+        records = [self._windows.setdefault(handle, HealthRecord())]
+        if process_id:
+            records.append(self._processes.setdefault((process_id, class_name), HealthRecord()))
+        return records
+
+    def record_success(
+        self,
+        handle: int,
+        process_id: int | None,
+        latency_ms: float,
+        class_name: str | None = None,
+    ):
+        slow = latency_ms >= self.slow_ms
+        with self._lock:
+            for record in self._records(handle, process_id, class_name):
+                self._update_latency(record, latency_ms)
+                if slow:
+                    self._strike(record)
+                else:
+                    record.strikes = 0
+                    record.skip_until = 0.0
+
+    def record_failure(
+        self,
+        handle: int,
+        process_id: int | None,
+        latency_ms: float,
+        class_name: str | None = None,
+    ):
+        slow = latency_ms >= self.slow_ms
+        with self._lock:
+            for record in self._records(handle, process_id, class_name):
+                self._update_latency(record, latency_ms)
+                record.failures += 1
+                record.last_failure_slow = slow
+                self._strike(record)
+
+    def _update_latency(self, record: HealthRecord, latency_ms: float):
+        record.traversals += 1
+        if record.latency_ms is None:
+            record.latency_ms = latency_ms
+        else:
+            record.latency_ms = 0.7 * record.latency_ms + 0.3 * latency_ms
+
+    def _strike(self, record: HealthRecord):
+        record.strikes += 1
+        if record.strikes >= self.skip_after_strikes:
+            exponent = record.strikes - self.skip_after_strikes
+            backoff = min(self.max_backoff_s, self.base_backoff_s * 2**exponent)
+            record.skip_until = self._clock() + backoff
+
+    def plan(
+        self, handle: int, process_id: int | None = None, class_name: str | None = None
+    ) -> TraversalPlan:
+        """Decide how a window is traversed in the next snapshot."""
+        now = self._clock()
+        with self._lock:
+            records = [self._windows.get(handle)]
+            if process_id:
+                records.append(self._processes.get((process_id, class_name)))
+            records = [record for record in records if record is not None]
+        if not records or all(record.strikes == 0 for record in records):
+            return TraversalPlan.NORMAL
+        if any(record.skip_until > now for record in records):
+            return TraversalPlan.SKIP
+        # Back-off elapsed (or not enough strikes yet): probe again with a cheaper traversal
+        return TraversalPlan.DEGRADED
+
+    def should_retry(self, handle: int) -> bool:
+        """Only fast failures (element vanished, transient COM errors) are worth an immediate retry."""
+        with self._lock:
+            record = self._windows.get(handle)
+            return record is None or not record.last_failure_slow
+
+    def retain(self, handles: set[int] | list[int]):
+        """Forget closed windows, and the process records without strikes or process."""
+        live = set(handles)
+        with self._lock:
+            for handle in [h for h in self._windows if h not in live]:
+                del self._windows[handle]
+            process_ids = {process_id for process_id, _ in self._processes}
+        # Outside the lock, looking up a process is a system call
+        exited = {process_id for process_id in process_ids if not self._process_exists(process_id)}
+        with self._lock:
+            stale = [
+                key
+                for key, record in self._processes.items()
+                if not record.strikes or key[0] in exited
+            ]
+            for key in stale:
+                del self._processes[key]
+
+    def stats(self) -> dict[str, dict]:
+        """Copies of the records that currently carry strikes."""
+        with self._lock:
+            return {
+                "windows": {h: replace(r) for h, r in self._windows.items() if r.strikes},
+                "processes": {p: replace(r) for p, r in self._processes.items() if r.strikes},
+            }
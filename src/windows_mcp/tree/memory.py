@@ -0,0 +1,292 @@
+"""
+In-memory UI Automation backend.
+
+`MemoryControl` implements the part of the `Control` API used by the traversal
+(Cached* and live properties, GetCachedPropertyValue, BuildUpdatedCache,
+GetCachedChildren, GetChildren and GetPattern) on top of a tree of plain
+`MemoryElement` records, so the traversal can run without COM and on any
+platform. Calls that would be cross-process round trips against a real
+provider are counted in `MemoryStats`.
+"""
+
+from windows_mcp.uia.enums import AccessibleRole, ControlTypeNames, PropertyId, Rect, TreeScope
+from windows_mcp.tree.cache_utils import PATTERN_PROPERTIES, CacheRequestFactory
+from dataclasses import dataclass, field
+from itertools import count
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator
+import re
+
+# LegacyIAccessible role of the control types that have a meaningful default
+DEFAULT_ROLES = {
+    "ButtonControl": AccessibleRole.PushButton,
+    "SplitButtonControl": AccessibleRole.SplitButton,
+    "CheckBoxControl": AccessibleRole.CheckButton,
+    "RadioButtonControl": AccessibleRole.RadioButton,
+    "ComboBoxControl": AccessibleRole.ComboBox,
+    "EditControl": AccessibleRole.Text,
+    "HyperlinkControl": AccessibleRole.Link,
+    "ListItemControl": AccessibleRole.ListItem,
+    "MenuItemControl": AccessibleRole.MenuItem,
+    "TabItemControl": AccessibleRole.PageTab,
+    "TreeItemControl": AccessibleRole.OutlineItem,
+    "DataItemControl": AccessibleRole.Row,
+    "TextControl": AccessibleRole.StaticText,
+    "ImageControl": AccessibleRole.Graphic,
+    "WindowControl": AccessibleRole.Window,
+    "GroupControl": AccessibleRole.Grouping,
+    "DocumentControl": AccessibleRole.Document,
+    "PaneControl": AccessibleRole.Pane,
+}
+
+LOCALIZED_CONTROL_TYPES = {
+    "HyperlinkControl": "link",
+    "DataItemControl": "item",
+    "ImageControl": "image",
+}
+
+CONTROL_TYPE_IDS = {name: control_type for control_type, name in ControlTypeNames.items()}
+
+_runtime_ids = count(1)
+
+
+def localized_control_type(control_type: str) -> str:
+    """English localized name of a control type name, e.g. "ListItemControl" -> "list item"."""
+    if control_type in LOCALIZED_CONTROL_TYPES:
+        return LOCALIZED_CONTROL_TYPES[control_type]
+    return re.sub(r"(?<!^)(?=[A-Z])", " ", control_type.removesuffix("Control")).lower()
+
+
+@dataclass
+class MemoryElement:
+    control_type: str = "PaneControl"
+    name: str = ""
+    rect: Rect | tuple[int, int, int, int] = (0, 0, 0, 0)
+    children: list["MemoryElement"] = field(default_factory=list)
+    automation_id: str = ""
+    class_name: str = ""
+    localized_control_type: str | None = None
+    accelerator_key: str = ""
+    is_offscreen: bool = False
+    is_enabled: bool = True
+    is_control_element: bool = True
+    is_keyboard_focusable: bool = False
+    has_keyboard_focus: bool = False
+    runtime_id: tuple[int, ...] | None = None
+    # LegacyIAccessible, Scroll and Window pattern shortcuts, turned into cached properties
+    role: int | None = None
+    value: str = ""
+    default_action: str = ""
+    scrollable: bool = False
+    vertical_scroll_percent: float = 0
+    modal: bool = False
+    properties: dict[int, Any] = field(default_factory=dict)  # overrides by PropertyId
+
+    def __post_init__(self):
+        if not isinstance(self.rect, Rect):
+            self.rect = Rect(*self.rect)
+        if self.localized_control_type is None:
+            self.localized_control_type = localized_control_type(self.control_type)
+        if self.runtime_id is None:
+            self.runtime_id = (7, next(_runtime_ids))
+        role = self.role if self.role is not None else DEFAULT_ROLES.get(self.control_type)
+        defaults = {
+            PropertyId.IsLegacyIAccessiblePatternAvailableProperty: role is not None,
+            PropertyId.LegacyIAccessibleRoleProperty: role or 0,
+            PropertyId.LegacyIAccessibleValueProperty: self.value,
+            PropertyId.LegacyIAccessibleDefaultActionProperty: self.default_action,
+            PropertyId.IsScrollPatternAvailableProperty: self.scrollable,
+            PropertyId.ScrollHorizontallyScrollableProperty: False,
+            PropertyId.ScrollHorizontalScrollPercentProperty: 0,
+            PropertyId.ScrollVerticallyScrollableProperty: self.scrollable,
+            PropertyId.ScrollVerticalScrollPercentProperty: self.vertical_scroll_percent,
+            PropertyId.IsWindowPatternAvailableProperty: self.control_type == "WindowControl",
+            PropertyId.WindowIsModalProperty: self.modal,
+        }
+        self.properties = {**defaults, **self.properties}
+
+    def __len__(self) -> int:
+        """Number of elements in the subtree, this one included."""
+        return sum(1 for _ in self.walk())
+
+    def walk(self) -> Iterator["MemoryElement"]:
+        """Pre-order iteration over the subtree."""
+        stack = [self]
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(reversed(element.children))
+
+
+# Element fields served through GetCachedPropertyValue
+ELEMENT_PROPERTIES = {
+    PropertyId.NameProperty: "name",
+    PropertyId.AutomationIdProperty: "automation_id",
+    PropertyId.ClassNameProperty: "class_name",
+    PropertyId.LocalizedControlTypeProperty: "localized_control_type",
+    PropertyId.AcceleratorKeyProperty: "accelerator_key",
+    PropertyId.IsOffscreenProperty: "is_offscreen",
+    PropertyId.IsEnabledProperty: "is_enabled",
+    PropertyId.IsControlElementProperty: "is_control_element",
+    PropertyId.IsKeyboardFocusableProperty: "is_keyboard_focusable",
+    PropertyId.HasKeyboardFocusProperty: "has_keyboard_focus",
+    PropertyId.BoundingRectangleProperty: "rect",
+}
+
+
+def on_screen_control_view(element: MemoryElement) -> bool:
+    """The TreeFilter of the subtree cache request: on-screen control elements."""
+    return element.is_control_element and not element.is_offscreen
+
+
+@dataclass
+class MemoryStats:
+    round_trips: int = 0  # BuildUpdatedCache calls
+    live_calls: int = 0  # live property, pattern and navigation calls
+
+
+class MemoryCacheRequest:
+    """Stand-in for CacheRequest; `TreeFilter` is a predicate over elements."""
+
+    def __init__(
+        self,
+        tree_scope: int = TreeScope.TreeScope_Element | TreeScope.TreeScope_Children,
+        tree_filter: Callable[[MemoryElement], bool] | None = None,
+    ):
+        self.TreeScope = tree_scope
+        self.TreeFilter = tree_filter
+        self.property_ids: list[int] = []
+
+    def AddProperty(self, property_id: int):
+        self.property_ids.append(property_id)
+
+
+class MemoryCacheRequestFactory(CacheRequestFactory):
+    """CacheRequestFactory building requests for the in-memory backend."""
+
+    @staticmethod
+    def new_cache_request() -> MemoryCacheRequest:
+        return MemoryCacheRequest()
+
+    @staticmethod
+    def on_screen_control_view_filter() -> Callable[[MemoryElement], bool]:
+        return on_screen_control_view
+
+
+def _cached(name: str) -> property:
+    return property(lambda self: getattr(self.element, name))
+
+
+def _live(name: str) -> property:
+    def get(self):
+        self.stats.live_calls += 1
+        return getattr(self.element, name)
+
+    return property(get)
+
+
+class MemoryControl:
+    def __init__(
+        self,
+        element: MemoryElement,
+        stats: MemoryStats | None = None,
+        tree_scope: int = TreeScope.TreeScope_None,
+        tree_filter: Callable[[MemoryElement], bool] | None = None,
+    ):
+        self.element = element
+        self.stats = stats if stats is not None else MemoryStats()
+        self._tree_scope = tree_scope
+        self._tree_filter = tree_filter
+
+    CachedName = _cached("name")
+    CachedAutomationId = _cached("automation_id")
+    CachedClassName = _cached("class_name")
+    CachedControlTypeName = _cached("control_type")
+    CachedLocalizedControlType = _cached("localized_control_type")
+    CachedAcceleratorKey = _cached("accelerator_key")
+    CachedBoundingRectangle = _cached("rect")
+    CachedIsOffscreen = _cached("is_offscreen")
+    CachedIsEnabled = _cached("is_enabled")
+    CachedIsControlElement = _cached("is_control_element")
+    CachedIsKeyboardFocusable = _cached("is_keyboard_focusable")
+    CachedHasKeyboardFocus = _cached("has_keyboard_focus")
+
+    Name = _live("name")
+    AutomationId = _live("automation_id")
+    ClassName = _live("class_name")
+    ControlTypeName = _live("control_type")
+    LocalizedControlType = _live("localized_control_type")
+    AcceleratorKey = _live("accelerator_key")
+    BoundingRectangle = _live("rect")
+    IsOffscreen = _live("is_offscreen")
+    HasKeyboardFocus = _live("has_keyboard_focus")
+
+    @property
+    def CachedControlType(self) -> int:
+        return CONTROL_TYPE_IDS.get(self.element.control_type, 0)
+
+    def GetCachedPropertyValue(self, property_id: int) -> Any:
+        element = self.element
+        if property_id in ELEMENT_PROPERTIES:
+            return getattr(element, ELEMENT_PROPERTIES[property_id])
+        if property_id == PropertyId.RuntimeIdProperty:
+            return list(element.runtime_id)
+        if property_id == PropertyId.ControlTypeProperty:
+            return self.CachedControlType
+        return element.properties.get(property_id)
+
+    def GetPropertyValue(self, property_id: int) -> Any:
+        self.stats.live_calls += 1
+        return self.GetCachedPropertyValue(property_id)
+
+    def GetRuntimeId(self) -> list[int]:
+        return list(self.element.runtime_id)
+
+    def BuildUpdatedCache(self, cacheRequest: MemoryCacheRequest) -> "MemoryControl":
+        self.stats.round_trips += 1
+        return MemoryControl(
+            self.element, self.stats, cacheRequest.TreeScope, cacheRequest.TreeFilter
+        )
+
+    def _filtered_children(self, element: MemoryElement) -> Iterator[MemoryElement]:
+        # Like a UIA view, descendants of filtered out elements move up to the nearest match
+        for child in element.children:
+            if self._tree_filter is None or self._tree_filter(child):
+                yield child
+            else:
+                yield from self._filtered_children(child)
+
+    def GetCachedChildren(self) -> list["MemoryControl"]:
+        if self._tree_scope & TreeScope.TreeScope_Descendants:
+            scope = self._tree_scope
+        elif self._tree_scope & TreeScope.TreeScope_Children:
+            scope = TreeScope.TreeScope_Element
+        else:
+            return []
+        return [
+            MemoryControl(child, self.stats, scope, self._tree_filter)
+            for child in self._filtered_children(self.element)
+        ]
+
+    def GetChildren(self) -> list["MemoryControl"]:
+        self.stats.live_calls += 1
+        return [MemoryControl(child, self.stats) for child in self.element.children]
+
+    def GetFirstChildControl(self) -> "MemoryControl | None":
+        self.stats.live_calls += 1
+        children = self.element.children
+        return MemoryControl(children[0], self.stats) if children else None
+
+    def GetPattern(self, patternId: int) -> Any:
+        self.stats.live_calls += 1
+        if patternId not in PATTERN_PROPERTIES:
+            return None
+        availability_property_id, properties = PATTERN_PROPERTIES[patternId]
+        if not self.element.properties.get(availability_property_id):
+            return None
+        return SimpleNamespace(
+            **{name: self.element.properties.get(pid) for name, pid in properties.items()}
+        )
+
+    def __repr__(self) -> str:
+        return f"MemoryControl({self.element.control_type!r}, {self.element.name!r})"
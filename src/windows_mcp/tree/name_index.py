@@ -0,0 +1,151 @@
+"""
+Name index of the interactive elements of the last snapshot.
+
+`lookup` resolves an accessible name to a snapshot label without going back to
+UI Automation: an exact match first, then a case-insensitive one, then the
+closest name by trigram (Dice) similarity, optionally restricted to windows
+whose name contains a given title. Callers validate the hit through the
+element registry and search UIA only on a miss or a stale hit.
+"""
+
+from windows_mcp.tree.config import NAME_INDEX_FUZZY_THRESHOLD, NAME_INDEX_FUZZY_MARGIN
+from windows_mcp.tree.arena import NodeView
+from windows_mcp.tree.views import TreeElementNode
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Iterable, Literal, Sequence
+
+MatchKind = Literal["exact", "casefold", "fuzzy"]
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of a case-folded name, padded so short names and word starts count."""
+    padded = f"  {text.casefold()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class NameMatch:
+    label: str  # as accepted by ElementRegistry.resolve
+    node: TreeElementNode
+    kind: MatchKind
+    score: float = 1.0
+
+
+class NameIndex:
+    def __init__(
+        self,
+        fuzzy_threshold: float = NAME_INDEX_FUZZY_THRESHOLD,
+        fuzzy_margin: float = NAME_INDEX_FUZZY_MARGIN,
+    ):
+        self._lock = Lock()
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_margin = fuzzy_margin
+        # (label, position in the nodes, trigrams of the name) of the named nodes
+        self._entries: list[tuple[str, int, set[str]]] = []
+        self._nodes: Sequence[TreeElementNode] = []
+        self._exact: dict[str, list[int]] = {}
+        self._casefold: dict[str, list[int]] = {}
+        self._trigrams: dict[str, list[int]] = {}
+        self.hits: Counter[str] = Counter()
+        self.misses = 0
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, nodes: Iterable[TreeElementNode]):
+        """
+        Index the interactive nodes of a snapshot; labels follow the listing order. The
+        nodes are kept as given and read on a hit, a `NodeView` builds only those.
+        """
+        nodes = NodeView.of(nodes)
+        entries = []
+        exact, casefold, postings = defaultdict(list), defaultdict(list), defaultdict(list)
+        for index, (node_id, name) in enumerate(zip(nodes.ids(), nodes.names())):
+            name = name.strip()
+            if not name:
+                continue
+            position = len(entries)
+            grams = trigrams(name)
+            entries.append((node_id or str(index), index, grams))
+            exact[name].append(position)
+            casefold[name.casefold()].append(position)
+            for gram in grams:
+                postings[gram].append(position)
+        with self._lock:
+            self._entries, self._nodes = entries, nodes
+            self._exact, self._casefold, self._trigrams = exact, casefold, postings
+
+    def clear(self):
+        self.rebuild([])
+
+    @staticmethod
+    def _in_window(node: TreeElementNode, window: str | None) -> bool:
+        return window is None or window.casefold() in node.window_name.casefold()
+
+    def lookup(self, name: str, window: str | None = None) -> NameMatch | None:
+        """
+        Best match of `name` among the indexed nodes, in windows whose name contains `window`.
+
+        Ties go to the node listed first, i.e. the foreground window. A fuzzy match is only
+        returned when it is clearly better than the next candidate.
+        """
+        name = name.strip()
+        with self._lock:
+            entries, nodes = self._entries, self._nodes
+            for kind, table, key in (
+                ("exact", self._exact, name),
+                ("casefold", self._casefold, name.casefold()),
+            ):
+                for position in table.get(key, ()):
+                    label, index, _ = entries[position]
+                    node = nodes[index]
+                    if self._in_window(node, window):
+                        self.hits[kind] += 1
+                        return NameMatch(label, node, kind)
+            match = self._fuzzy(name, window)
+        if match is None:
+            self.misses += 1
+        else:
+            self.hits["fuzzy"] += 1
+        return match
+
+    def _fuzzy(self, name: str, window: str | None) -> NameMatch | None:
+        query = trigrams(name)
+        shared: Counter[int] = Counter()
+        for gram in query:
+            shared.update(self._trigrams.get(gram, ()))
+        scored = []
+        for position, count in shared.items():
+            label, index, grams = self._entries[position]
+            node = self._nodes[index]
+            if not self._in_window(node, window):
+                continue
+            score = 2 * count / (len(query) + len(grams))
+            scored.append((score, -position, label, node))
+        if not scored:
+            return None
+        scored.sort(reverse=True)
+        best, *rest = scored
+        score, _, label, node = best
+        if score < self.fuzzy_threshold:
+            return None
+        # A close runner-up with another name makes the match ambiguous
+        for other_score, _, _, other in rest:
+            if score - other_score >= self.fuzzy_margin:
+                break
+            if other.name.strip().casefold() != node.name.strip().casefold():
+                return None
+        return NameMatch(label, node, "fuzzy", round(score, 3))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "names": len(self._entries),
+            "exact": self.hits["exact"],
+            "casefold": self.hits["casefold"],
+            "fuzzy": self.hits["fuzzy"],
+            "misses": self.misses,
+            "stale": self.stale,
+        }
@@ -0,0 +1,101 @@
+"""
+Occlusion of top-level windows.
+
+Given the windows in z-order, topmost first, the visible region of each window
+is its rectangle minus the rectangles of the opaque windows above it, kept as a
+list of disjoint rectangles. `Tree` skips windows whose region is empty and
+drops elements whose center lies outside the region of their window. Rectangles
+are `(left, top, right, bottom)` and half-open, like screen rectangles.
+"""
+
+from windows_mcp.tree.utils import filter_nodes
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence, TypeVar
+
+Rect = tuple[int, int, int, int]
+
+Node = TypeVar("Node")
+
+
+def is_empty(rect: Rect) -> bool:
+    left, top, right, bottom = rect
+    return right <= left or bottom <= top
+
+
+def subtract(rect: Rect, cutter: Rect) -> list[Rect]:
+    """`rect` minus `cutter`, as at most four disjoint rectangles (bands above, below, left, right)."""
+    left, top, right, bottom = rect
+    c_left, c_top, c_right, c_bottom = cutter
+    if c_left >= right or c_right <= left or c_top >= bottom or c_bottom <= top:
+        return [rect]
+    pieces = []
+    if c_top > top:
+        pieces.append((left, top, right, c_top))
+    if c_bottom < bottom:
+        pieces.append((left, c_bottom, right, bottom))
+    middle_top, middle_bottom = max(top, c_top), min(bottom, c_bottom)
+    if c_left > left:
+        pieces.append((left, middle_top, c_left, middle_bottom))
+    if c_right < right:
+        pieces.append((c_right, middle_top, right, middle_bottom))
+    return pieces
+
+
+def visible_region(rect: Rect, occluders: Iterable[Rect]) -> list[Rect]:
+    """Parts of `rect` not covered by any of `occluders`."""
+    region = [] if is_empty(rect) else [rect]
+    for occluder in occluders:
+        if not region:
+            break
+        if is_empty(occluder):
+            continue
+        region = [piece for part in region for piece in subtract(part, occluder)]
+    return region
+
+
+def region_contains(region: list[Rect], x: int, y: int) -> bool:
+    return any(left <= x < right and top <= y < bottom for left, top, right, bottom in region)
+
+
+def region_area(region: list[Rect]) -> int:
+    return sum((right - left) * (bottom - top) for left, top, right, bottom in region)
+
+
+@dataclass
+class OcclusionMap:
+    """Visible regions of top-level windows; windows it does not know are fully visible."""
+
+    regions: dict[int, list[Rect]] = field(default_factory=dict)
+
+    @classmethod
+    def from_z_order(cls, windows: Iterable[tuple[int, Rect, bool]]) -> "OcclusionMap":
+        """
+        Build the map from `(handle, rect, opaque)` in z-order, topmost first.
+
+        Windows that are not opaque (minimized, cloaked or click-through) get a region
+        but hide nothing below them.
+        """
+        regions = {}
+        above: list[Rect] = []
+        for handle, rect, opaque in windows:
+            regions[handle] = visible_region(rect, above)
+            if opaque and not is_empty(rect):
+                above.append(rect)
+        return cls(regions)
+
+    def is_occluded(self, handle: int) -> bool:
+        """True if the window is known and nothing of it is visible."""
+        return handle in self.regions and not self.regions[handle]
+
+    def is_visible(self, handle: int, x: int, y: int) -> bool:
+        region = self.regions.get(handle)
+        return region is None or region_contains(region, x, y)
+
+    def filter(self, handle: int, nodes: Sequence[Node]) -> Sequence[Node]:
+        """Nodes of a window whose center is visible."""
+        region = self.regions.get(handle)
+        if region is None:
+            return nodes
+        return filter_nodes(
+            nodes, lambda node: region_contains(region, node.center.x, node.center.y)
+        )
@@ -0,0 +1,147 @@
+"""
+Long-lived worker pool for window traversal.
+
+Worker threads are started lazily, up to the configured maximum, and live for
+the lifetime of the server. Each thread runs `initializer` once when it starts
+(COM initialization) and `finalizer` once when it exits, so no per-snapshot or
+per-task setup is left on the traversal path.
+"""
+
+from concurrent.futures import Future
+from dataclasses import dataclass
+from queue import SimpleQueue
+from threading import Lock, Thread
+from typing import Any, Callable
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def default_max_workers(cap: int = 32) -> int:
+    """Traversal is I/O bound on cross-process calls, so allow a few more threads than cores."""
+    return min(cap, (os.cpu_count() or 1) + 4)
+
+
+@dataclass
+class PoolStats:
+    max_workers: int
+    workers: int
+    busy_workers: int
+    queue_depth: int
+    submitted: int
+    completed: int
+    failed: int
+
+
+class TraversalPool:
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        initializer: Callable[[], Any] | None = None,
+        finalizer: Callable[[], Any] | None = None,
+        name: str = "TraversalWorker",
+    ):
+        self.max_workers = max_workers or default_max_workers()
+        self._initializer = initializer
+        self._finalizer = finalizer
+        self._name = name
+        self._queue: SimpleQueue = SimpleQueue()
+        self._lock = Lock()
+        self._threads: list[Thread] = []
+        self._idle = 0
+        self._busy = 0
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._shutdown = False
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit to a traversal pool after shutdown")
+            self._submitted += 1
+            self._pending += 1
+            # Grow with the number of queued windows until the cap is reached
+            if self._pending > self._idle and len(self._threads) < self.max_workers:
+                self._spawn()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _spawn(self):
+        thread = Thread(target=self._worker, name=f"{self._name}-{len(self._threads)}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _worker(self):
+        if self._initializer is not None:
+            try:
+                self._initializer()
+            except Exception as e:
+                logger.error(f"Failed to initialize traversal worker: {e}")
+        try:
+            while True:
+                with self._lock:
+                    self._idle += 1
+                item = self._queue.get()
+                with self._lock:
+                    self._idle -= 1
+                if item is None:
+                    break
+                future, fn, args, kwargs = item
+                with self._lock:
+                    self._pending -= 1
+                    self._busy += 1
+                error = None
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = fn(*args, **kwargs)
+                    except BaseException as e:
+                        error = e
+                # Counters are settled before waiters wake up so stats read after a result are exact
+                with self._lock:
+                    self._busy -= 1
+                    if error is None:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+                if future.cancelled():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        finally:
+            if self._finalizer is not None:
+                try:
+                    self._finalizer()
+                except Exception as e:
+                    logger.debug(f"Failed to finalize traversal worker: {e}")
+
+    @property
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                max_workers=self.max_workers,
+                workers=len(self._threads),
+                busy_workers=self._busy,
+                queue_depth=self._pending,
+                submitted=self._submitted,
+                completed=self._completed,
+                failed=self._failed,
+            )
+
+    def shutdown(self, wait: bool = True, timeout: float | None = None):
+        """Stop accepting work and let every worker exit once the queue is drained."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join(timeout=timeout)
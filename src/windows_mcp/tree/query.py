@@ -0,0 +1,321 @@
+"""
+Structural queries over the last traversal.
+
+Every traversal records the elements it visits, linked to their parents, as rows
+of a `TreeArena`. `QueryIndex` keeps the arenas of the windows of the last
+snapshot and finds elements by selector, a small CSS-like language:
+
+    Window[name="Save As"] Edit
+    Window[name*=Settings] > Pane CheckBox:unchecked
+    Button[id=SubmitButton]
+
+A selector is a chain of compounds joined by a space (descendant) or `>` (child).
+A compound is a control type (`Edit` or `EditControl`, `*` for any) followed by
+attribute tests `[attribute op value]` on `name`, `id` (automation id), `class`
+and `window`, where op is `=`, `*=` (contains), `^=` (starts with) or `$=` (ends
+with), and by pseudo-classes: `:focused`, `:checked`, `:unchecked` and
+`:interactive` (listed in the snapshot). Matching is case-insensitive. Selectors
+are compiled once and cached.
+"""
+
+from windows_mcp.tree.arena import NO_PARENT, ArenaNode, NodeView, TreeArena
+from windows_mcp.tree.views import Center, ScrollElementNode, TreeElementNode
+from windows_mcp.uia.enums import PropertyId, ToggleState
+from dataclasses import dataclass, field
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable, Iterable, Sequence
+import re
+
+Node = TreeElementNode | ScrollElementNode
+
+ATTRIBUTES = {"name", "id", "class", "window"}
+OPERATORS = {
+    "=": lambda actual, value: actual == value,
+    "*=": lambda actual, value: value in actual,
+    "^=": lambda actual, value: actual.startswith(value),
+    "$=": lambda actual, value: actual.endswith(value),
+}
+# Arena columns of the attributes, `window` is the name of the window
+COLUMNS = {"name": "names", "id": "automation_ids", "class": "class_names"}
+PSEUDO_CLASSES = {"focused", "checked", "unchecked", "interactive"}
+
+TOKEN = re.compile(
+    r"""
+    (?P<space>\s*>\s*|\s+)
+    |(?P<type>\*|[A-Za-z][A-Za-z0-9]*)
+    |\[\s*(?P<attribute>[A-Za-z]+)\s*(?P<operator>[*^$]?=)\s*
+        (?:"(?P<double>[^"]*)"|'(?P<single>[^']*)'|(?P<bare>[^\]\s]+))\s*\]
+    |:(?P<pseudo>[A-Za-z]+)
+    """,
+    re.VERBOSE,
+)
+
+
+@dataclass
+class QueryWindow:
+    handle: int
+    name: str
+    arena: TreeArena = field(default_factory=TreeArena)  # in traversal order, the window first
+
+
+@dataclass(frozen=True)
+class AttributeTest:
+    attribute: str
+    operator: str
+    value: str  # case-folded
+
+    def matches(self, actual: str | None) -> bool:
+        return OPERATORS[self.operator]((actual or "").casefold(), self.value)
+
+
+@dataclass(frozen=True)
+class Compound:
+    control_type: str | None  # case-folded, without the "Control" suffix, None for any
+    tests: tuple[AttributeTest, ...] = ()
+    pseudo_classes: tuple[str, ...] = ()
+    combinator: str = " "  # to the compound before: " " descendant, ">" child
+
+
+@dataclass(frozen=True)
+class Selector:
+    text: str
+    compounds: tuple[Compound, ...]
+
+
+@dataclass
+class QueryMatch:
+    window_name: str
+    node: ArenaNode
+    element: Node | None = None  # the element in the snapshot, None if it is not listed
+
+    @property
+    def label(self) -> str:
+        return self.element.id if self.element is not None else ""
+
+    @property
+    def center(self) -> Center:
+        if self.element is not None:
+            return self.element.center
+        left, top, right, bottom = self.node.rect
+        return Center(x=(left + right) // 2, y=(top + bottom) // 2)
+
+    def to_string(self) -> str:
+        control_type = self.node.control_type.removesuffix("Control")
+        return (
+            f"{self.label}|{self.window_name}|{control_type}|{self.node.name.strip()}|"
+            f"{self.center.to_string()}"
+        )
+
+
+def normalize_control_type(control_type: str) -> str:
+    control_type = control_type.casefold()
+    return control_type.removesuffix("control") or control_type
+
+
+@lru_cache(maxsize=256)
+def compile_selector(text: str) -> Selector:
+    """
+    Raises:
+        ValueError: If the selector is empty or not valid.
+    """
+    compounds: list[Compound] = []
+    control_type, tests, pseudo_classes = None, [], []
+    combinator, started = " ", False
+    position, text = 0, text.strip()
+    if not text:
+        raise ValueError("Empty selector")
+
+    def close():
+        nonlocal control_type, tests, pseudo_classes, started
+        if not started:
+            raise ValueError(f"Invalid selector {text!r}: missing element before a combinator")
+        compounds.append(Compound(control_type, tuple(tests), tuple(pseudo_classes), combinator))
+        control_type, tests, pseudo_classes, started = None, [], [], False
+
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid selector {text!r} at position {position}")
+        position = match.end()
+        if match["space"] is not None:
+            close()
+            combinator = ">" if ">" in match["space"] else " "
+        elif match["type"] is not None:
+            if started:
+                raise ValueError(f"Invalid selector {text!r}: control type after a test")
+            if match["type"] != "*":
+                control_type = normalize_control_type(match["type"])
+            started = True
+        elif match["attribute"] is not None:
+            attribute = match["attribute"].lower()
+            if attribute not in ATTRIBUTES:
+                raise ValueError(
+                    f"Unknown attribute {attribute!r}, expected one of {sorted(ATTRIBUTES)}"
+                )
+            value = next(v for v in match.group("double", "single", "bare") if v is not None)
+            tests.append(AttributeTest(attribute, match["operator"], value.casefold()))
+            started = True
+        else:
+            pseudo_class = match["pseudo"].lower()
+            if pseudo_class not in PSEUDO_CLASSES:
+                raise ValueError(
+                    f"Unknown pseudo-class {pseudo_class!r}, expected one of {sorted(PSEUDO_CLASSES)}"
+                )
+            pseudo_classes.append(pseudo_class)
+            started = True
+    close()
+    return Selector(text, tuple(compounds))
+
+
+def toggle_state(element: Any) -> int | None:
+    """Current toggle state of a UIA element, None if it has none or is gone."""
+    if element is None:
+        return None
+    try:
+        return element.GetPropertyValue(PropertyId.ToggleToggleStateProperty)
+    except Exception:
+        return None
+
+
+class QueryIndex:
+    def __init__(self, uia_element: Callable[[Node], Any] | None = None):
+        """`uia_element` gives the UIA element of a snapshot element usable on the calling thread."""
+        self._lock = Lock()
+        self.uia_element = uia_element or (lambda node: node.element)
+        self._windows: list[QueryWindow] = []
+        self._elements: dict[tuple[int, ...], int] = {}  # position in the nodes by runtime id
+        self._nodes: Sequence[Node] = []
+
+    def __len__(self) -> int:
+        return sum(len(window.arena) for window in self._windows)
+
+    def rebuild(self, windows: Iterable[QueryWindow], nodes: Iterable[Node]):
+        """Index the traversals of the windows of a snapshot and link them to its elements."""
+        windows = list(windows)
+        nodes = NodeView.of(nodes)
+        elements = {
+            runtime_id: position
+            for position, runtime_id in enumerate(nodes.runtime_ids())
+            if runtime_id is not None
+        }
+        with self._lock:
+            self._windows, self._elements, self._nodes = windows, elements, nodes
+
+    def clear(self):
+        self.rebuild([], [])
+
+    def _matches(
+        self,
+        window: QueryWindow,
+        row: int,
+        compound: Compound,
+        control_types: list[str],
+        element: Node | None,
+        toggle: bool = True,
+    ) -> bool:
+        """
+        `control_types` are the normalized control types of the arena by code. `toggle`
+        False leaves out :checked and :unchecked, they ask UI Automation.
+        """
+        arena = window.arena
+        if (
+            compound.control_type is not None
+            and control_types[arena.control_types[row]] != compound.control_type
+        ):
+            return False
+        for test in compound.tests:
+            if test.attribute == "window":
+                actual = window.name
+            else:
+                actual = arena.strings[getattr(arena, COLUMNS[test.attribute])[row]]
+            if not test.matches(actual):
+                return False
+        for pseudo_class in compound.pseudo_classes:
+            if pseudo_class == "interactive":
+                if not isinstance(element, TreeElementNode):
+                    return False
+            elif pseudo_class == "focused":
+                if element is None or not element.is_focused:
+                    return False
+            elif toggle:
+                state = toggle_state(self.uia_element(element)) if element is not None else None
+                expected = ToggleState.On if pseudo_class == "checked" else ToggleState.Off
+                if state != expected:
+                    return False
+        return True
+
+    def _element_of(self, arena: TreeArena, row: int, elements: tuple) -> Node | None:
+        """`elements` are the positions by runtime id and the nodes, as taken by `query`."""
+        positions, nodes = elements
+        runtime_id = arena.runtime_ids[row]
+        position = positions.get(runtime_id) if runtime_id is not None else None
+        return nodes[position] if position is not None else None
+
+    def _matches_ancestry(
+        self,
+        window: QueryWindow,
+        row: int,
+        compounds: tuple[Compound, ...],
+        index: int,
+        control_types: list[str],
+        elements: tuple,
+    ) -> bool:
+        """True if the compounds before `index` match the ancestors of `row`."""
+        if index < 0:
+            return True
+        arena = window.arena
+        combinator = compounds[index + 1].combinator
+        ancestor = arena.parents[row]
+        compound = compounds[index]
+        while ancestor != NO_PARENT:
+            # Only pseudo-classes look at the element, building it costs more than the lookup
+            element = (
+                self._element_of(arena, ancestor, elements) if compound.pseudo_classes else None
+            )
+            if self._matches(
+                window, ancestor, compound, control_types, element
+            ) and self._matches_ancestry(
+                window, ancestor, compounds, index - 1, control_types, elements
+            ):
+                return True
+            if combinator == ">":
+                return False
+            ancestor = arena.parents[ancestor]
+        return False
+
+    def query(self, selector: str | Selector, limit: int | None = None) -> list[QueryMatch]:
+        """
+        Elements matching a selector, in window then traversal order.
+
+        Raises:
+            ValueError: If the selector is not valid.
+        """
+        if isinstance(selector, str):
+            selector = compile_selector(selector)
+        with self._lock:
+            windows, elements = self._windows, (self._elements, self._nodes)
+        *ancestors, last = selector.compounds
+        matches = []
+        for window in windows:
+            arena = window.arena
+            control_types = [normalize_control_type(name) for name in arena.control_type_names]
+            for row in range(len(arena)):
+                element = self._element_of(arena, row, elements) if last.pseudo_classes else None
+                if not self._matches(window, row, last, control_types, element, toggle=False):
+                    continue
+                if not self._matches_ancestry(
+                    window, row, selector.compounds, len(ancestors) - 1, control_types, elements
+                ):
+                    continue
+                # Toggle states last, only for the few elements matching everything else
+                if not self._matches(window, row, last, control_types, element):
+                    continue
+                if element is None:
+                    element = self._element_of(arena, row, elements)
+                matches.append(
+                    QueryMatch(window_name=window.name, node=arena.node(row), element=element)
+                )
+                if limit is not None and len(matches) >= limit:
+                    return matches
+        return matches
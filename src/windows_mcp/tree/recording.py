@@ -0,0 +1,350 @@
+"""
+UIA tree recordings.
+
+`record_window` snapshots a live window's UIA subtree (the properties the
+traversal caches, pattern availability and the LegacyIAccessible role, value
+and default action) into `MemoryElement` trees, which `save` writes as
+compact JSON, gzipped for `.gz` paths. `ReplayBackend` plugs a loaded
+recording into `Tree.get_nodes`, so bugs and regressions seen on a real
+desktop can be reproduced and benchmarked without it.
+
+    windows-mcp-record record --handle 0x1A2B -o notepad.json.gz
+    windows-mcp-record replay notepad.json.gz --mode subtree
+"""
+
+from windows_mcp.uia.enums import PropertyId, Rect, TreeScope
+from windows_mcp.tree.cache_utils import CacheRequestFactory, BROWSER_PROFILES
+from windows_mcp.tree.config import TRAVERSAL_MODES, DEFAULT_TRAVERSAL_MODE
+from windows_mcp.tree.memory import (
+    MemoryControl,
+    MemoryElement,
+    MemoryStats,
+    MemoryCacheRequestFactory,
+    localized_control_type,
+)
+from windows_mcp.tree.window_cache import normalize_runtime_id
+from windows_mcp.desktop.views import Browser, Size
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from psutil import Process
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+import windows_mcp.uia as uia
+import logging
+import click
+import gzip
+import json
+
+if TYPE_CHECKING:
+    from windows_mcp.tree.service import Tree
+    from windows_mcp.uia import Control
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Pattern properties read by the traversal, with the value a provider reports when unset
+PATTERN_PROPERTY_DEFAULTS: dict[int, Any] = {
+    PropertyId.IsLegacyIAccessiblePatternAvailableProperty: False,
+    PropertyId.LegacyIAccessibleRoleProperty: 0,
+    PropertyId.LegacyIAccessibleValueProperty: "",
+    PropertyId.LegacyIAccessibleDefaultActionProperty: "",
+    PropertyId.IsScrollPatternAvailableProperty: False,
+    PropertyId.ScrollHorizontallyScrollableProperty: False,
+    PropertyId.ScrollHorizontalScrollPercentProperty: 0,
+    PropertyId.ScrollVerticallyScrollableProperty: False,
+    PropertyId.ScrollVerticalScrollPercentProperty: 0,
+    PropertyId.IsWindowPatternAvailableProperty: False,
+    PropertyId.WindowIsModalProperty: False,
+}
+
+# MemoryElement fields stored as is, omitted when equal to their default
+_FIELD_DEFAULTS = {
+    f.name: f.default
+    for f in fields(MemoryElement)
+    if f.name
+    in (
+        "name",
+        "automation_id",
+        "class_name",
+        "accelerator_key",
+        "is_offscreen",
+        "is_enabled",
+        "is_control_element",
+        "is_keyboard_focusable",
+        "has_keyboard_focus",
+    )
+}
+
+
+@dataclass
+class RecordedWindow:
+    handle: int
+    name: str
+    root: MemoryElement
+    is_browser: bool = False
+
+
+@dataclass
+class Recording:
+    windows: list[RecordedWindow] = field(default_factory=list)
+    screen_size: tuple[int, int] = (1920, 1080)
+    created: str = ""
+    version: int = FORMAT_VERSION
+
+    def window(self, handle: int) -> RecordedWindow:
+        for window in self.windows:
+            if window.handle == handle:
+                return window
+        raise KeyError(f"Window {handle} is not in the recording")
+
+
+def encode_element(element: MemoryElement) -> dict[str, Any]:
+    """JSON-ready form of a subtree; fields and pattern properties at their default are left out."""
+    data: dict[str, Any] = {"type": element.control_type}
+    rect = element.rect
+    data["rect"] = [rect.left, rect.top, rect.right, rect.bottom]
+    for name, default in _FIELD_DEFAULTS.items():
+        value = getattr(element, name)
+        if value != default:
+            data[name] = value
+    if element.localized_control_type != localized_control_type(element.control_type):
+        data["localized_control_type"] = element.localized_control_type
+    data["runtime_id"] = list(element.runtime_id)
+    properties = {
+        str(property_id): value
+        for property_id, value in element.properties.items()
+        if property_id in PATTERN_PROPERTY_DEFAULTS
+        and value != PATTERN_PROPERTY_DEFAULTS[property_id]
+    }
+    if properties:
+        data["properties"] = properties
+    if element.children:
+        data["children"] = [encode_element(child) for child in element.children]
+    return data
+
+
+def decode_element(data: dict[str, Any]) -> MemoryElement:
+    """Inverse of `encode_element`."""
+    # Recorded values replace the control type defaults of MemoryElement entirely
+    properties = dict(PATTERN_PROPERTY_DEFAULTS)
+    for property_id, value in data.get("properties", {}).items():
+        properties[int(property_id)] = value
+    return MemoryElement(
+        data["type"],
+        rect=tuple(data["rect"]),
+        runtime_id=tuple(data["runtime_id"]),
+        localized_control_type=data.get("localized_control_type"),
+        properties=properties,
+        children=[decode_element(child) for child in data.get("children", [])],
+        **{name: data[name] for name in _FIELD_DEFAULTS if name in data},
+    )
+
+
+def save(recording: Recording, path: str | Path):
+    payload = {
+        "version": recording.version,
+        "created": recording.created,
+        "screen_size": list(recording.screen_size),
+        "windows": [
+            {
+                "handle": window.handle,
+                "name": window.name,
+                "is_browser": window.is_browser,
+                "root": encode_element(window.root),
+            }
+            for window in recording.windows
+        ],
+    }
+    text = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    path = Path(path)
+    if path.suffix == ".gz":
+        path.write_bytes(gzip.compress(text.encode("utf-8")))
+    else:
+        path.write_text(text, encoding="utf-8")
+
+
+def load(path: str | Path) -> Recording:
+    path = Path(path)
+    if path.suffix == ".gz":
+        text = gzip.decompress(path.read_bytes()).decode("utf-8")
+    else:
+        text = path.read_text(encoding="utf-8")
+    payload = json.loads(text)
+    if payload.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported recording version {payload.get('version')}, expected {FORMAT_VERSION}"
+        )
+    return Recording(
+        windows=[
+            RecordedWindow(
+                handle=window["handle"],
+                name=window["name"],
+                root=decode_element(window["root"]),
+                is_browser=window.get("is_browser", False),
+            )
+            for window in payload["windows"]
+        ],
+        screen_size=tuple(payload["screen_size"]),
+        created=payload.get("created", ""),
+    )
+
+
+def _record_element(node: "Control") -> MemoryElement:
+    rect = node.CachedBoundingRectangle
+    runtime_id = normalize_runtime_id(node.GetCachedPropertyValue(PropertyId.RuntimeIdProperty))
+    properties = {}
+    for property_id in PATTERN_PROPERTY_DEFAULTS:
+        value = node.GetCachedPropertyValue(property_id)
+        if value is not None:
+            properties[property_id] = value
+    return MemoryElement(
+        node.CachedControlTypeName,
+        name=node.CachedName or "",
+        rect=Rect(rect.left, rect.top, rect.right, rect.bottom),
+        automation_id=node.CachedAutomationId or "",
+        class_name=node.CachedClassName or "",
+        localized_control_type=node.CachedLocalizedControlType or "",
+        accelerator_key=node.CachedAcceleratorKey or "",
+        is_offscreen=bool(node.CachedIsOffscreen),
+        is_enabled=bool(node.CachedIsEnabled),
+        is_control_element=bool(node.CachedIsControlElement),
+        is_keyboard_focusable=bool(node.CachedIsKeyboardFocusable),
+        has_keyboard_focus=bool(node.CachedHasKeyboardFocus),
+        runtime_id=runtime_id,
+        properties={**PATTERN_PROPERTY_DEFAULTS, **properties},
+    )
+
+
+def record_control(node: "Control") -> MemoryElement:
+    """
+    Copy a subtree whose properties and children are already cached.
+
+    Works on any control that serves the traversal's cached properties, including
+    `MemoryControl`, which is how recordings are tested away from a desktop.
+    """
+    root = _record_element(node)
+    stack = [(node, root)]
+    while stack:
+        control, element = stack.pop()
+        for child in control.GetCachedChildren():
+            child_element = _record_element(child)
+            element.children.append(child_element)
+            stack.append((child, child_element))
+    return root
+
+
+def record_window(handle: int, is_browser: bool = False) -> MemoryElement:
+    """Fetch the control view of a window in one round trip and record it."""
+    cache_request = CacheRequestFactory.create_profile_cache(*BROWSER_PROFILES)
+    cache_request.TreeScope = TreeScope.TreeScope_Subtree
+    node = uia.ControlFromHandle(handle).BuildUpdatedCache(cache_request)
+    return record_control(node)
+
+
+class ReplayDesktop:
+    """The part of `Desktop` that `Tree` needs, answered from a recording."""
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+
+    def get_screen_size(self) -> Size:
+        width, height = self.recording.screen_size
+        return Size(width=width, height=height)
+
+
+class ReplayBackend:
+    """Serves the windows of a recording to `Tree.get_nodes` in place of UI Automation."""
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+        self.stats = MemoryStats()
+        self.desktop = ReplayDesktop(recording)
+
+    def control_from_handle(self, handle: int) -> MemoryControl:
+        return MemoryControl(self.recording.window(handle).root, self.stats)
+
+    def attach(self, tree: "Tree"):
+        tree.set_backend(self.control_from_handle, MemoryCacheRequestFactory)
+
+    def create_tree(self, traversal_mode: str | None = None) -> "Tree":
+        from windows_mcp.tree.service import Tree
+
+        tree = Tree(self.desktop) if traversal_mode is None else Tree(self.desktop, traversal_mode)
+        self.attach(tree)
+        return tree
+
+
+@click.group(help="Record UIA trees of live windows and replay them through the tree engine.")
+def main():
+    pass
+
+
+@main.command(help="Record windows, the foreground window by default.")
+@click.option(
+    "--handle",
+    "handles",
+    multiple=True,
+    help="Window handle, decimal or 0x hex. Repeat for several windows.",
+)
+@click.option(
+    "-o",
+    "--output",
+    default="uia-recording.json.gz",
+    show_default=True,
+    help="Recording file, gzipped if it ends in .gz.",
+)
+def record(handles, output):
+    handles = [int(handle, 0) for handle in handles] or [uia.GetForegroundWindow()]
+    width, height = uia.GetVirtualScreenSize()
+    recording = Recording(
+        screen_size=(width, height),
+        created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+    for handle in handles:
+        try:
+            process = Process(uia.ControlFromHandle(handle).ProcessId)
+            is_browser = Browser.has_process(process.name())
+        except Exception:
+            is_browser = False
+        root = record_window(handle, is_browser)
+        recording.windows.append(RecordedWindow(handle, root.name, root, is_browser))
+        click.echo(f"{handle:#x} {root.name!r}: {len(root)} elements")
+    save(recording, output)
+    click.echo(f"Saved {output}")
+
+
+@main.command(help="Traverse the windows of a recording with Tree.get_nodes.")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--mode",
+    type=click.Choice(TRAVERSAL_MODES),
+    default=DEFAULT_TRAVERSAL_MODE,
+    show_default=True,
+)
+@click.option("--repeat", default=1, show_default=True, help="Traversals per window.")
+def replay(path, mode, repeat):
+    backend = ReplayBackend(load(path))
+    tree = backend.create_tree(mode)
+    try:
+        for window in backend.recording.windows:
+            best = None
+            for _ in range(repeat):
+                start = perf_counter()
+                interactive, scrollable, informative = tree.get_nodes(
+                    window.handle, window.is_browser
+                )
+                elapsed = perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            click.echo(
+                f"{window.handle:#x} {window.name!r}: {len(window.root)} elements, "
+                f"{len(interactive)} interactive, {len(scrollable)} scrollable, "
+                f"{len(informative)} informative in {best * 1000:.1f}ms"
+            )
+    finally:
+        tree.shutdown()
+
+
+if __name__ == "__main__":
+    main()
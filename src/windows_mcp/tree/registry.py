@@ -0,0 +1,356 @@
+"""
+Registry of the elements listed by recent snapshots.
+
+Traversal workers `register` the UIA element of every interactive and scrollable
+node, keyed by runtime id, in an `ElementStore`; on Windows that is the COM Global
+Interface Table, so the tool thread gets back a pointer marshalled for its own
+apartment. Entries are kept in least recently used order under a count and a
+memory cap, and released when their window closes or the element is removed.
+
+`rebuild` maps the labels of the last snapshot (the stable element ids, or the
+position for nodes without one) to entries. Acting on a label is then a
+dictionary lookup plus one live call that re-validates the element, instead of
+searching the desktop again.
+"""
+
+from windows_mcp.tree.config import (
+    REGISTRY_MAX_ELEMENTS,
+    REGISTRY_MAX_BYTES,
+    REGISTRY_ENTRY_BYTES,
+)
+from windows_mcp.tree.views import BoundingBox, Center, TreeElementNode, ScrollElementNode
+from windows_mcp.tree.boxes import as_box, clip_boxes
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+RuntimeId = tuple[int, ...]
+
+
+class ElementStore:
+    """Keeps elements alive between threads. This one holds them as they are."""
+
+    def register(self, element: Any) -> Any:
+        """Return a reference to `element` that `get` accepts on any thread."""
+        return element
+
+    def get(self, reference: Any) -> Any:
+        return reference
+
+    def revoke(self, reference: Any):
+        pass
+
+
+class GlobalInterfaceTableStore(ElementStore):
+    """Marshals `IUIAutomationElement` pointers through the COM Global Interface Table."""
+
+    def __init__(self):
+        self._table = None
+        self._lock = Lock()
+
+    @property
+    def table(self):
+        # Created on first use, from a thread that initialized COM
+        with self._lock:
+            if self._table is None:
+                from windows_mcp.uia.git import GlobalInterfaceTable
+
+                self._table = GlobalInterfaceTable()
+            return self._table
+
+    def register(self, element: Any) -> int:
+        return self.table.register(element.Element)
+
+    def get(self, reference: int) -> Any:
+        from windows_mcp.uia.core import _AutomationClient
+        from windows_mcp.uia import Control
+
+        interface = _AutomationClient.instance().UIAutomationCore.IUIAutomationElement
+        return Control.CreateControlFromElement(self.table.get(reference, interface))
+
+    def revoke(self, reference: int):
+        self.table.revoke(reference)
+
+
+@dataclass
+class RegisteredElement:
+    id: str
+    runtime_id: RuntimeId | None
+    bounding_box: BoundingBox
+    center: Center
+    name: str = ""
+    control_type: str = ""
+    window_name: str = ""
+    handle: int | None = None  # top-level window
+    reference: Any = None  # from ElementStore.register, None once released
+    size: int = REGISTRY_ENTRY_BYTES
+
+
+class StaleElementError(ValueError):
+    """The element behind a label is gone or moved out of sight since the snapshot."""
+
+
+class ElementRegistry:
+    def __init__(
+        self,
+        store: ElementStore | None = None,
+        element_from_point: Callable[[int, int], Any] | None = None,
+        window_rect: Callable[[int], Any] | None = None,
+        screen_box: Any = None,
+        max_elements: int = REGISTRY_MAX_ELEMENTS,
+        max_bytes: int = REGISTRY_MAX_BYTES,
+    ):
+        self._lock = Lock()
+        self.store = store if store is not None else ElementStore()
+        # Entries holding a store reference, least recently used first
+        self._entries: OrderedDict[RuntimeId, RegisteredElement] = OrderedDict()
+        self._by_label: dict[str, RegisteredElement] = {}
+        # Fallback when the entry holds no reference, see `validate`
+        self._element_from_point = element_from_point
+        # Live rectangle of a top-level window and the screen, the live rectangle of an
+        # element is clipped to both as the traversal does
+        self._window_rect = window_rect
+        self.screen_box = screen_box
+        self.max_elements = max_elements
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._by_label)
+
+    def __contains__(self, label: str | int) -> bool:
+        return str(label) in self._by_label
+
+    @staticmethod
+    def _entry(node: TreeElementNode | ScrollElementNode, handle: int | None) -> RegisteredElement:
+        return RegisteredElement(
+            id=node.id,
+            runtime_id=node.runtime_id,
+            bounding_box=node.bounding_box,
+            center=node.center,
+            name=node.name,
+            control_type=node.control_type,
+            window_name=node.window_name,
+            handle=handle,
+            size=REGISTRY_ENTRY_BYTES + len(node.name) * 2,
+        )
+
+    @staticmethod
+    def _move(entry: RegisteredElement, node: TreeElementNode | ScrollElementNode):
+        # The nodes of a snapshot are built when read, an element that did not move keeps
+        # the box and center of its entry rather than holding new ones every snapshot
+        if entry.bounding_box != node.bounding_box or entry.center != node.center:
+            entry.bounding_box, entry.center = node.bounding_box, node.center
+
+    def register(self, nodes: Iterable[TreeElementNode | ScrollElementNode], handle: int | None):
+        """
+        Take over the UIA elements of freshly traversed nodes of one window.
+
+        Runs on the traversal worker, the apartment the elements belong to. The nodes
+        give up their element, so only the registry keeps it alive and within its caps.
+        """
+        released = []
+        with self._lock:
+            for node in nodes:
+                element, node.element = node.element, None
+                if element is None or node.runtime_id is None:
+                    continue
+                entry = self._entries.get(node.runtime_id)
+                if entry is not None and entry.reference is not None:
+                    # Same element as before, the existing reference stays valid
+                    self._move(entry, node)
+                    self._entries.move_to_end(node.runtime_id)
+                    continue
+                try:
+                    reference = self.store.register(element)
+                except Exception as e:
+                    logger.debug(f"Failed to register element {node.id}: {e}")
+                    continue
+                entry = self._entry(node, handle)
+                entry.reference = reference
+                self._entries[node.runtime_id] = entry
+                self.bytes += entry.size
+            released = self._evict()
+        self._revoke(released)
+
+    def rebuild(self, nodes: Iterable[TreeElementNode | ScrollElementNode]):
+        """Make the labels of a snapshot, in listing order, the ones that `resolve` accepts."""
+        by_label = {}
+        released = []
+        with self._lock:
+            for index, node in enumerate(nodes):
+                entry = self._entries.get(node.runtime_id) if node.runtime_id else None
+                if entry is not None:
+                    self._entries.move_to_end(node.runtime_id)
+                    entry.id, entry.name = node.id, node.name
+                    self._move(entry, node)
+                else:
+                    entry = self._entry(node, None)
+                    # Nodes built without going through a worker, e.g. by a custom backend
+                    if node.element is not None and node.runtime_id is not None:
+                        entry.reference = self.store.register(node.element)
+                        self._entries[node.runtime_id] = entry
+                        self.bytes += entry.size
+                by_label[node.id or str(index)] = entry
+            self._by_label = by_label
+            released = self._evict()
+        self._revoke(released)
+
+    def _evict(self) -> list[Any]:
+        released = []
+        while self._entries and (
+            len(self._entries) > self.max_elements or self.bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            released.append(self._release(entry))
+            self.evictions += 1
+        return released
+
+    def _release(self, entry: RegisteredElement) -> Any:
+        reference, entry.reference = entry.reference, None
+        self.bytes -= entry.size
+        return reference
+
+    def _revoke(self, references: list[Any]):
+        for reference in references:
+            if reference is None:
+                continue
+            try:
+                self.store.revoke(reference)
+            except Exception as e:
+                logger.debug(f"Failed to revoke element reference: {e}")
+
+    def retain_windows(self, handles: Iterable[int]):
+        """Release the elements of windows that are not among `handles` anymore."""
+        handles = set(handles)
+        with self._lock:
+            closed = [
+                runtime_id
+                for runtime_id, entry in self._entries.items()
+                if entry.handle is not None and entry.handle not in handles
+            ]
+            released = [self._release(self._entries.pop(runtime_id)) for runtime_id in closed]
+        self._revoke(released)
+
+    def release(self, runtime_id: Any):
+        """Release a removed element, e.g. from a UIA structure change event."""
+        try:
+            runtime_id = tuple(int(part) for part in runtime_id)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            entry = self._entries.pop(runtime_id, None)
+            released = [self._release(entry)] if entry is not None else []
+        self._revoke(released)
+
+    def clear(self):
+        with self._lock:
+            released = [self._release(entry) for entry in self._entries.values()]
+            self._entries.clear()
+            self._by_label = {}
+        self._revoke(released)
+
+    def get(self, label: str | int) -> RegisteredElement | None:
+        with self._lock:
+            return self._by_label.get(str(label).strip())
+
+    def element(self, entry: RegisteredElement) -> Any:
+        """The UIA element of an entry, usable on the calling thread, or None."""
+        reference = entry.reference
+        if reference is None:
+            return None
+        try:
+            return self.store.get(reference)
+        except Exception as e:
+            logger.debug(f"Element {entry.id} could not be fetched: {e}")
+            return None
+
+    def validate(self, entry: RegisteredElement) -> tuple[Any, Center | None]:
+        """
+        The element of an entry and its current center, with a None center if it is
+        no longer usable.
+
+        One live call: the bounding rectangle of the registered element, which fails
+        once the element is gone. It is clipped to its window and the screen, as the
+        traversal clips, so the center is on the visible part; an element with no
+        visible part is not usable. Without a reference, the element at the registered
+        center must have the registered runtime id.
+        """
+        element = self.element(entry)
+        if element is not None:
+            try:
+                rect = element.BoundingRectangle
+            except Exception as e:
+                logger.debug(f"Element {entry.id} is no longer available: {e}")
+                return element, None
+            left, top, right, bottom = self._clip(entry, as_box(rect))
+            if right <= left or bottom <= top:
+                return element, None
+            center = Center(x=left + (right - left) // 2, y=top + (bottom - top) // 2)
+            return element, center
+        if self._element_from_point is not None and entry.runtime_id is not None:
+            try:
+                element = self._element_from_point(entry.center.x, entry.center.y)
+                if element is not None and tuple(element.GetRuntimeId()) == entry.runtime_id:
+                    return element, entry.center
+            except Exception as e:
+                logger.debug(f"Element {entry.id} could not be checked: {e}")
+            return None, None
+        return None, entry.center
+
+    def _clip(self, entry: RegisteredElement, box: tuple[int, int, int, int]):
+        window = None
+        if self._window_rect is not None and entry.handle is not None:
+            try:
+                window = self._window_rect(entry.handle)
+            except Exception as e:
+                logger.debug(f"Window of element {entry.id} has no rectangle: {e}")
+        screen = as_box(self.screen_box) if self.screen_box is not None else None
+        window = as_box(window) if window is not None else screen
+        if window is None:
+            return box
+        return clip_boxes([box], window, screen or window)[0]
+
+    def resolve(self, label: str | int) -> tuple[RegisteredElement, Any, Center]:
+        """
+        Look up a label of the last snapshot and check that its element is still there.
+
+        Returns the entry, its UIA element (None if only its position is known) and
+        its current center.
+
+        Raises:
+            ValueError: If the label was not part of the last snapshot.
+            StaleElementError: If the element is gone or has no area anymore.
+        """
+        entry = self.get(label)
+        if entry is None:
+            raise ValueError(
+                f"Label {label} is not in the last Snapshot. Use an id from the latest Snapshot."
+            )
+        element, center = self.validate(entry)
+        if center is None:
+            self.stale += 1
+            raise StaleElementError(
+                f"Element {label} ('{entry.name}') is no longer available. "
+                f"Take a new Snapshot to get the current elements."
+            )
+        self.hits += 1
+        return entry, element, center
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "elements": len(self._entries),
+                "labels": len(self._by_label),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "stale": self.stale,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,140 @@
+"""
+Serialization of snapshots within a budget.
+
+The interactive and scrollable elements of a `TreeState` are ranked: the focused
+element first, then the rest of its window, then the other windows, and within
+each group by area, discounted by the distance to the focus. A page holds as
+many ranked elements as fit in a budget of estimated tokens or bytes, measured
+on the rows of the requested format, and carries a cursor to the next page. The
+cursor names the snapshot it belongs to, so the next page is read from the same
+`TreeState` without traversing again.
+"""
+
+from windows_mcp.tree.config import BYTES_PER_TOKEN, RANK_DISTANCE_SCALE, SNAPSHOT_FORMATS
+from windows_mcp.tree.views import (
+    INTERACTIVE_COLUMNS,
+    SCROLLABLE_COLUMNS,
+    ScrollElementNode,
+    SnapshotPage,
+    TreeElementNode,
+    TreeState,
+)
+from math import hypot
+import json
+
+Node = TreeElementNode | ScrollElementNode
+
+
+def rank_elements(tree_state: TreeState) -> list[Node]:
+    """Interactive and scrollable elements, most relevant first; stable for a given state."""
+    nodes: list[Node] = [*tree_state.interactive_nodes, *tree_state.scrollable_nodes]
+    if not nodes:
+        return []
+    focused = next((node for node in nodes if node.is_focused), None)
+    # Without a focused element, the active window is the first one merged
+    focused_window = focused.window_name if focused is not None else nodes[0].window_name
+    focus = focused.center if focused is not None else None
+
+    def key(node: Node) -> tuple[bool, bool, float]:
+        box = node.bounding_box
+        area = max(box.width, 0) * max(box.height, 0)
+        if focus is not None:
+            area /= (
+                1 + hypot(node.center.x - focus.x, node.center.y - focus.y) / RANK_DISTANCE_SCALE
+            )
+        return (not node.is_focused, node.window_name != focused_window, -area)
+
+    return sorted(nodes, key=key)
+
+
+def encode_cursor(generation: int, offset: int) -> str:
+    return f"{generation}:{offset}"
+
+
+def decode_cursor(cursor: str, tree_state: TreeState) -> int:
+    """
+    Offset of a cursor into the ranked elements of `tree_state`.
+
+    Raises:
+        ValueError: If the cursor is malformed, out of range or from another snapshot.
+    """
+    try:
+        generation, offset = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}") from None
+    if generation != tree_state.generation:
+        raise ValueError("The cursor is from an earlier Snapshot, take a new Snapshot")
+    total = len(tree_state.interactive_nodes) + len(tree_state.scrollable_nodes)
+    if not 0 <= offset <= total:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return offset
+
+
+def budget_bytes(max_tokens: int | None = None, max_bytes: int | None = None) -> int | None:
+    """The tighter of the two budgets in bytes, None if there is none."""
+    budgets = [] if max_bytes is None else [max_bytes]
+    if max_tokens is not None:
+        budgets.append(max_tokens * BYTES_PER_TOKEN)
+    return min(budgets) if budgets else None
+
+
+def row_size(node: Node, format: str) -> int:
+    """Bytes an element takes in a page, separator included."""
+    if format == "text":
+        row = node.to_string(node.id)
+    else:
+        row = json.dumps(node.to_dict(), separators=(",", ":"), ensure_ascii=False)
+    return len(row.encode("utf-8")) + 1
+
+
+def page_to_json(page: SnapshotPage) -> str:
+    return json.dumps(page.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+
+def paginate(
+    tree_state: TreeState,
+    cursor: str | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    format: str = "text",
+) -> SnapshotPage:
+    """
+    The page of ranked elements starting at `cursor` (the first page if None) that fits
+    in the budget. A page always holds at least one element, if any is left.
+
+    Raises:
+        ValueError: If the format is unknown, a budget is not positive or the cursor is invalid.
+    """
+    if format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {SNAPSHOT_FORMATS}")
+    if any(budget is not None and budget <= 0 for budget in (max_tokens, max_bytes)):
+        raise ValueError("max_tokens and max_bytes must be positive")
+    offset = decode_cursor(cursor, tree_state) if cursor else 0
+    ranked = rank_elements(tree_state)
+    budget = budget_bytes(max_tokens, max_bytes)
+    end = len(ranked)
+    if budget is not None:
+        # The headers or the JSON envelope count against the budget as well
+        if format == "text":
+            # "# " and a line break around each header
+            used = len(INTERACTIVE_COLUMNS) + len(SCROLLABLE_COLUMNS) + 6
+        else:
+            empty = SnapshotPage(
+                total=len(ranked), next_cursor=encode_cursor(tree_state.generation, len(ranked))
+            )
+            used = len(page_to_json(empty))
+        end = offset
+        while end < len(ranked):
+            size = row_size(ranked[end], format)
+            if end > offset and used + size > budget:
+                break
+            used += size
+            end += 1
+    page_nodes = ranked[offset:end]
+    return SnapshotPage(
+        interactive_nodes=[node for node in page_nodes if isinstance(node, TreeElementNode)],
+        scrollable_nodes=[node for node in page_nodes if isinstance(node, ScrollElementNode)],
+        offset=offset,
+        total=len(ranked),
+        next_cursor=encode_cursor(tree_state.generation, end) if end < len(ranked) else None,
+    )
@@ -1,37 +1,78 @@
-from windows_mcp.uia import (
-    Control,
-    ScrollPattern,
-    WindowControl,
-    Rect,
-    PatternId,
-    AccessibleRoleNames,
-    TreeScope,
-    ControlFromHandle,
-)
+from windows_mcp.uia.enums import Rect, TreeScope, StructureChangeType
 from windows_mcp.tree.config import (
-    INTERACTIVE_CONTROL_TYPE_NAMES,
-    DOCUMENT_CONTROL_TYPE_NAMES,
-    INFORMATIVE_CONTROL_TYPE_NAMES,
-    DEFAULT_ACTIONS,
-    INTERACTIVE_ROLES,
     THREAD_MAX_RETRIES,
+    TRAVERSAL_MODES,
+    DEFAULT_TRAVERSAL_MODE,
+    DEGRADED_MAX_DEPTH,
+    TRAVERSAL_VIEWPORT_MARGIN,
+    LIST_SUMMARY_EDGE_ITEMS,
 )
 from windows_mcp.tree.views import (
     TreeElementNode,
     ScrollElementNode,
     TextElementNode,
-    Center,
+    TruncatedWindow,
+    ListSummary,
+    SnapshotScope,
+    WindowProgress,
     BoundingBox,
     TreeState,
 )
-from windows_mcp.tree.cache_utils import CacheRequestFactory, CachedControlHelper
-from windows_mcp.tree.utils import random_point_within_bounding_box
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import TYPE_CHECKING, Any
-from time import time
+from windows_mcp.tree.cache_utils import (
+    CacheRequestFactory,
+    CachedControlHelper,
+    CachedPattern,
+    cache_profile_stats,
+    DEFAULT_PROFILES,
+    BROWSER_PROFILES,
+)
+from windows_mcp.tree.traversal import (
+    TraversalContext,
+    TraversalLimits,
+    DEFAULT_TRAVERSAL_LIMITS,
+    iou_bounding_box,
+    traverse,
+)
+from windows_mcp.tree.window_cache import WindowNodeCache, WindowCacheEntry, WindowState
+from windows_mcp.tree.utils import deduplicate_ids, filter_nodes
+from windows_mcp.tree.name_index import NameIndex
+from windows_mcp.tree.occlusion import OcclusionMap, region_contains
+from windows_mcp.tree.spatial_index import SpatialIndex
+from windows_mcp.tree.query import QueryIndex, QueryWindow
+from windows_mcp.tree.arena import NodeView
+from windows_mcp.tree.boxes import as_box, drop_nested_duplicates
+from windows_mcp.tree.registry import ElementRegistry, ElementStore, GlobalInterfaceTableStore
+from windows_mcp.tree.pool import TraversalPool
+from windows_mcp.tree.deadline import Deadline, DeadlineExceeded
+from windows_mcp.tree.health import TraversalHealth, TraversalPlan
+from windows_mcp.tree.app_profiles import AppProfile, load_app_profiles, match_app_profile
+from concurrent.futures import Future, as_completed
+from itertools import count
+from threading import local
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+from time import time, perf_counter
+from psutil import Process
 import logging
 import weakref
-import comtypes
+import sys
+
+# The live desktop, off Windows a Tree only traverses other backends such as a recording
+if sys.platform == "win32":
+    from windows_mcp.uia import (
+        Control,
+        ControlFromHandle,
+        ControlFromPoint,
+        GetClassName,
+        GetWindowProcessId,
+        GetWindowRect,
+        GetWindowText,
+        IsHungAppWindow,
+    )
+    import comtypes
+else:
+    Control = ControlFromHandle = ControlFromPoint = GetWindowRect = None
+    GetClassName = GetWindowProcessId = GetWindowText = IsHungAppWindow = None
+    comtypes = None
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -40,11 +81,30 @@ if TYPE_CHECKING:
     from windows_mcp.desktop.service import Desktop
 
 
+def _initialize_worker():
+    # UIA client objects are free-threaded, the MTA avoids marshalling through a message pump
+    comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+
+
 class Tree:
-    def __init__(self, desktop: "Desktop"):
+    def __init__(
+        self,
+        desktop: "Desktop",
+        traversal_mode: str = DEFAULT_TRAVERSAL_MODE,
+        limits: TraversalLimits = DEFAULT_TRAVERSAL_LIMITS,
+        app_profiles: list[AppProfile] | None = None,
+    ):
+        if traversal_mode not in TRAVERSAL_MODES:
+            raise ValueError(
+                f"Unknown traversal mode {traversal_mode!r}, expected one of {TRAVERSAL_MODES}"
+            )
         self.desktop = weakref.proxy(desktop)
+        self.traversal_mode = traversal_mode
+        self.limits = limits
+        # Loaded once, the first matching profile of a window tunes its traversal
+        self.app_profiles = load_app_profiles() if app_profiles is None else app_profiles
         self.screen_size = desktop.get_screen_size()
-        self.dom: Control | None = None
+        self.dom: "Control | None" = None
         self.dom_bounding_box: BoundingBox = None
         self.screen_box = BoundingBox(
             top=0,
@@ -55,17 +115,86 @@ class Tree:
             height=self.screen_size.height,
         )
         self.tree_state = None
+        self._generations = count(1)
+        self.window_cache = WindowNodeCache()
+        self.health = TraversalHealth()
+        if comtypes is not None:
+            self.pool = TraversalPool(
+                initializer=_initialize_worker, finalizer=comtypes.CoUninitialize
+            )
+        else:
+            self.pool = TraversalPool()
+        # Cache requests are built once per worker thread and profile set
+        self._thread_state = local()
+        # Elements of recent snapshots and the labels of the last one, used by the action tools
+        self.registry = ElementRegistry(
+            store=GlobalInterfaceTableStore(),
+            element_from_point=ControlFromPoint,
+            window_rect=GetWindowRect,
+            screen_box=self.screen_box,
+        )
+        # Names of the interactive elements of the last snapshot, for element_name lookups
+        self.name_index = NameIndex()
+        # Boxes of the elements of the last snapshot, for hit-testing without UIA
+        self.spatial_index = SpatialIndex()
+        # Structure of the windows of the last snapshot, for selector queries
+        self.query_index = QueryIndex(uia_element=self._registered_element)
+        # Windows whose last traversal stopped at a node or children limit
+        self._limit_truncations: dict[int, str] = {}
+        # Long lists of the last traversal of every window, listed by their first and last items
+        self._list_summaries: dict[int, list[ListSummary]] = {}
+        # Copy of the last traversal of every window, the structure selector queries run on
+        self._query_windows: dict[int, QueryWindow] = {}
+        # UI Automation backend of get_nodes, replaced to replay recorded trees
+        self.control_from_handle: Callable[[int], Any] = ControlFromHandle
+        self.cache_request_factory: type[CacheRequestFactory] = CacheRequestFactory
+
+    def set_backend(
+        self,
+        control_from_handle: Callable[[int], Any],
+        cache_request_factory: type[CacheRequestFactory],
+    ):
+        """Traverse windows through another UI Automation backend, e.g. a recording."""
+        self.control_from_handle = control_from_handle
+        self.cache_request_factory = cache_request_factory
+        # Cache requests of the previous backend are not usable anymore
+        self._thread_state = local()
+        self.window_cache.invalidate_all()
+        # Elements of other backends are plain objects, usable from any thread
+        self.registry.clear()
+        self.registry.store = ElementStore()
+
+    def shutdown(self):
+        """Stop the traversal workers, called from the server teardown."""
+        self.pool.shutdown(wait=True, timeout=2.0)
 
     def get_state(
         self,
         active_window_handle: int | None,
         other_windows_handles: list[int],
         use_dom: bool = False,
+        max_ms: int | None = None,
+        occlusion: OcclusionMap | None = None,
+        region: tuple[int, int, int, int] | None = None,
+        scoped: bool = False,
+        on_window: Callable[[WindowProgress], None] | None = None,
     ) -> TreeState:
+        """
+        Traverse the active window then the other windows. `scoped` marks a snapshot of
+        some windows only and `region` restricts it to a part of the screen, so the next
+        diff does not report what was not looked at as removed. `on_window` streams the
+        snapshot: it is called with the nodes of every window as soon as they are in, the
+        active window first, before the state is complete.
+        """
         # Reset DOM state to prevent leaks and stale data
         self.dom = None
         self.dom_bounding_box = None
         start_time = time()
+        deadline = Deadline(max_ms) if max_ms is not None else None
+        truncated_windows: list[TruncatedWindow] = []
+        list_summaries: list[ListSummary] = []
+        traversed_windows: set[str] = set()
+        query_windows: list[QueryWindow] = []
 
         active_window_flag = False
         if active_window_handle:
@@ -78,7 +207,21 @@ class Tree:
             windows_handles=windows_handles,
             active_window_flag=active_window_flag,
             use_dom=use_dom,
+            deadline=deadline,
+            truncated_windows=truncated_windows,
+            occlusion=occlusion,
+            list_summaries=list_summaries,
+            region=region,
+            traversed_windows=traversed_windows,
+            on_window=on_window,
+            query_windows=query_windows,
         )
+        interactive_nodes = deduplicate_ids(interactive_nodes)
+        scrollable_nodes = deduplicate_ids(scrollable_nodes)
+        self.registry.rebuild(interactive_nodes + scrollable_nodes)
+        self.name_index.rebuild(interactive_nodes)
+        self.spatial_index.rebuild(interactive_nodes + scrollable_nodes)
+        self.query_index.rebuild(query_windows, interactive_nodes + scrollable_nodes)
         root_node = TreeElementNode(
             name="Desktop",
             control_type="PaneControl",
@@ -91,7 +234,8 @@ class Tree:
             is_focused=False,
         )
         if self.dom:
-            scroll_pattern: ScrollPattern = self.dom.GetPattern(PatternId.ScrollPattern)
+            scroll_pattern = CachedPattern.scroll(self.dom)
+            scroll_pattern = scroll_pattern if scroll_pattern.available else None
             dom_node = ScrollElementNode(
                 name="DOM",
                 control_type="DocumentControl",
@@ -121,9 +265,19 @@ class Tree:
             interactive_nodes=interactive_nodes,
             scrollable_nodes=scrollable_nodes,
             dom_informative_nodes=dom_informative_nodes,
+            truncated_windows=truncated_windows,
+            list_summaries=list_summaries,
+            scope=SnapshotScope(window_names=traversed_windows if scoped else None, region=region)
+            if scoped or region is not None
+            else None,
+            generation=next(self._generations),
         )
         end_time = time()
         logger.info(f"Tree State capture took {end_time - start_time:.2f} seconds")
+        logger.debug(f"Cache profile stats: {cache_profile_stats.snapshot()}")
+        logger.debug(f"Traversal pool stats: {self.pool.stats}")
+        logger.debug(f"Traversal health: {self.health.stats()}")
+        logger.debug(f"Name index stats: {self.name_index.stats()}")
         return self.tree_state
 
     def get_window_wise_nodes(
@@ -131,526 +285,349 @@ class Tree:
         windows_handles: list[int],
         active_window_flag: bool,
         use_dom: bool = False,
-    ) -> tuple[list[TreeElementNode], list[ScrollElementNode], list[TextElementNode]]:
-        interactive_nodes, scrollable_nodes, dom_informative_nodes = [], [], []
+        deadline: Deadline | None = None,
+        truncated_windows: list[TruncatedWindow] | None = None,
+        occlusion: OcclusionMap | None = None,
+        list_summaries: list[ListSummary] | None = None,
+        region: tuple[int, int, int, int] | None = None,
+        traversed_windows: set[str] | None = None,
+        on_window: Callable[[WindowProgress], None] | None = None,
+        query_windows: list[QueryWindow] | None = None,
+    ) -> tuple[Sequence[TreeElementNode], Sequence[ScrollElementNode], Sequence[TextElementNode]]:
+        interactive_nodes, scrollable_nodes, dom_informative_nodes = (
+            NodeView(),
+            NodeView(),
+            NodeView(),
+        )
+        self.window_cache.retain(windows_handles)
+        self.registry.retain_windows(windows_handles)
 
         # Pre-calculate browser status in main thread to pass simple types to workers
         task_inputs = []
+        ordered_handles = []
+        results = {}
+        window_names = {}
+        truncated_reasons: dict[int, str] = {}
+        self.health.retain(windows_handles)
+        for handle in [h for h in self._limit_truncations if h not in windows_handles]:
+            del self._limit_truncations[handle]
+        for handle in [h for h in self._list_summaries if h not in windows_handles]:
+            del self._list_summaries[handle]
+        for handle in [h for h in self._query_windows if h not in windows_handles]:
+            del self._query_windows[handle]
+        active_handle = windows_handles[0] if active_window_flag and windows_handles else None
         for handle in windows_handles:
+            # Nothing of a window covered by the ones above it can be seen or clicked
+            if occlusion is not None and occlusion.is_occluded(handle):
+                logger.debug(f"Skipping occluded window {handle}")
+                if handle == active_handle:
+                    # The window asked for or in use, the snapshot says why it has no elements
+                    ordered_handles.append(handle)
+                    window_names[handle] = GetWindowText(handle) or str(handle)
+                    truncated_reasons[handle] = "occluded"
+                continue
             is_browser = False
+            window_rect = None
+            # Win32 rather than UIA, a hung window must not block the main thread
+            class_name = GetClassName(handle)
+            process_id = GetWindowProcessId(handle)
+            # Decided before touching UIA so a hung window never blocks the main thread
+            if IsHungAppWindow(handle):
+                plan, reason = TraversalPlan.SKIP, "not responding"
+            elif handle == active_handle:
+                # The window in use is never skipped nor cut short, only the deadline bounds it
+                plan, reason = TraversalPlan.NORMAL, None
+            else:
+                plan = self.health.plan(handle, process_id, class_name)
+                reason = "skipped, slow or failing" if plan is TraversalPlan.SKIP else None
+            if plan is TraversalPlan.SKIP:
+                ordered_handles.append(handle)
+                window_names[handle] = GetWindowText(handle) or str(handle)
+                truncated_reasons[handle] = reason
+                continue
             try:
                 # Use temporary control for property check in main thread
                 # This is safe as we don't pass this specific COM object to the thread
                 temp_node = ControlFromHandle(handle)
-                if active_window_flag and temp_node.ClassName == "Progman":
+                if active_window_flag and class_name == "Progman":
                     continue
+                window_names[handle] = self.app_name_correction(temp_node.Name.strip())
                 is_browser = self.desktop.is_window_browser(temp_node)
+                if self.window_cache.enabled:
+                    window_rect = self._rect_key(temp_node.BoundingRectangle)
             except Exception:
                 pass
-            task_inputs.append((handle, is_browser))
+            profile = self.get_app_profile(process_id, class_name)
+            if profile is not None and profile.use_dom is not None:
+                is_browser = profile.use_dom
+            ordered_handles.append(handle)
+            # Reuse the nodes of windows that did not change since the last snapshot
+            entry = self.window_cache.get(handle, window_rect, is_browser, use_dom)
+            if entry is not None:
+                results[handle] = entry.nodes
+                self._apply_window_state(handle, entry.state)
+                continue
+            if plan is TraversalPlan.DEGRADED:
+                truncated_reasons[handle] = "reduced depth, slow or failing"
+                max_depth = DEGRADED_MAX_DEPTH
+            else:
+                max_depth = None
+            task_inputs.append((handle, is_browser, process_id, class_name, max_depth, profile))
+
+        # Penalized windows are queued last so they never hold up healthy ones
+        task_inputs.sort(key=lambda task: task[4] is not None)
+        task_args = {task[0]: task for task in task_inputs}
+
+        # Nodes of a window as merged: occluded elements and elements outside the region dropped
+        visible_nodes: dict[int, tuple] = {}
+
+        def get_visible_nodes(handle: int) -> tuple:
+            if handle not in visible_nodes:
+                element_nodes, scroll_nodes, info_nodes = results[handle]
+                if occlusion is not None:
+                    # Filtered here, cached windows keep all their nodes
+                    element_nodes = occlusion.filter(handle, element_nodes)
+                    scroll_nodes = occlusion.filter(handle, scroll_nodes)
+                if region is not None:
+                    # Cached windows were traversed in full
+                    element_nodes = filter_nodes(
+                        element_nodes, lambda n: region_contains([region], n.center.x, n.center.y)
+                    )
+                    scroll_nodes = filter_nodes(
+                        scroll_nodes, lambda n: region_contains([region], n.center.x, n.center.y)
+                    )
+                visible_nodes[handle] = (element_nodes, scroll_nodes, info_nodes)
+            return visible_nodes[handle]
+
+        progress_total = len(results) + len(task_inputs)
+        reported: list[int] = []
+
+        def report(handle: int):
+            if on_window is None:
+                return
+            element_nodes, scroll_nodes, _ = get_visible_nodes(handle)
+            is_active = handle == active_handle
+            if is_active:
+                # First in the merged lists, deduplicating those gives the same suffixes
+                element_nodes = deduplicate_ids(element_nodes)
+                scroll_nodes = deduplicate_ids(scroll_nodes)
+            reported.append(handle)
+            try:
+                on_window(
+                    WindowProgress(
+                        handle=handle,
+                        name=window_names.get(handle, str(handle)),
+                        interactive_nodes=element_nodes,
+                        scrollable_nodes=scroll_nodes,
+                        done=len(reported),
+                        total=progress_total,
+                        is_active=is_active,
+                    )
+                )
+            except Exception as e:
+                logger.debug(f"Failed to report the nodes of window {handle}: {e}")
+
+        # Windows reused from the cache are in already, the active one first
+        for handle in ordered_handles:
+            if handle in results:
+                report(handle)
+
+        # When streaming, the active window is traversed here while the workers take the others
+        inline_task = None
+        if on_window is not None and active_handle in task_args:
+            inline_task = task_args[active_handle]
+            task_inputs.remove(inline_task)
 
-        with ThreadPoolExecutor() as executor:
+        if task_inputs or inline_task:
             retry_counts = {handle: 0 for handle in windows_handles}
             future_to_handle = {
-                executor.submit(self.get_nodes, handle, is_browser, use_dom): handle
-                for handle, is_browser in task_inputs
+                self.pool.submit(self._traverse_window, *task, use_dom, deadline, region): task[0]
+                for task in task_inputs
             }
-            while future_to_handle:  # keep running until no pending futures
-                for future in as_completed(list(future_to_handle)):
-                    handle = future_to_handle.pop(future)  # remove completed future
-                    try:
-                        result = future.result()
-                        if result:
-                            element_nodes, scroll_nodes, info_nodes = result
-                            interactive_nodes.extend(element_nodes)
-                            scrollable_nodes.extend(scroll_nodes)
-                            dom_informative_nodes.extend(info_nodes)
-                    except Exception as e:
-                        retry_counts[handle] += 1
-                        logger.debug(
-                            f"Error in processing handle {handle}, retry attempt {retry_counts[handle]}\nError: {e}"
+
+            def collect(handle: int, future: Future):
+                try:
+                    result, window_state = future.result()
+                    if result:
+                        # Only results collected in time touch the state of the Tree
+                        self._apply_window_state(handle, window_state)
+                        results[handle] = result
+                        report(handle)
+                except DeadlineExceeded:
+                    truncated_reasons[handle] = "deadline"
+                except Exception as e:
+                    retry_counts[handle] += 1
+                    logger.debug(
+                        f"Error in processing handle {handle}, retry attempt {retry_counts[handle]}\nError: {e}"
+                    )
+                    if deadline is not None and deadline.expired:
+                        truncated_reasons[handle] = "deadline"
+                    elif not self.health.should_retry(handle):
+                        # Retrying a window that just stalled would only stall again
+                        truncated_reasons[handle] = "not responding"
+                    elif retry_counts[handle] < THREAD_MAX_RETRIES:
+                        new_future = self.pool.submit(
+                            self._traverse_window,
+                            *task_args[handle],
+                            use_dom,
+                            deadline,
+                            region,
+                        )
+                        future_to_handle[new_future] = handle
+                    else:
+                        logger.error(
+                            f"Task failed completely for handle {handle} after {THREAD_MAX_RETRIES} retries"
                         )
-                        if retry_counts[handle] < THREAD_MAX_RETRIES:
-                            # Need to find is_browser again for retry
-                            is_browser = next((ib for h, ib in task_inputs if h == handle), False)
-                            new_future = executor.submit(
-                                self.get_nodes, handle, is_browser, use_dom
-                            )
-                            future_to_handle[new_future] = handle
-                        else:
-                            logger.error(
-                                f"Task failed completely for handle {handle} after {THREAD_MAX_RETRIES} retries"
-                            )
-        return interactive_nodes, scrollable_nodes, dom_informative_nodes
 
-    def iou_bounding_box(
-        self,
-        window_box: Rect,
-        element_box: Rect,
-    ) -> BoundingBox:
-        # Step 1: Intersection of element and window (existing logic)
-        intersection_left = max(window_box.left, element_box.left)
-        intersection_top = max(window_box.top, element_box.top)
-        intersection_right = min(window_box.right, element_box.right)
-        intersection_bottom = min(window_box.bottom, element_box.bottom)
-
-        # Step 2: Clamp to screen boundaries (new addition)
-        intersection_left = max(self.screen_box.left, intersection_left)
-        intersection_top = max(self.screen_box.top, intersection_top)
-        intersection_right = min(self.screen_box.right, intersection_right)
-        intersection_bottom = min(self.screen_box.bottom, intersection_bottom)
-
-        # Step 3: Validate intersection
-        if intersection_right > intersection_left and intersection_bottom > intersection_top:
-            bounding_box = BoundingBox(
-                left=intersection_left,
-                top=intersection_top,
-                right=intersection_right,
-                bottom=intersection_bottom,
-                width=intersection_right - intersection_left,
-                height=intersection_bottom - intersection_top,
-            )
-        else:
-            # No valid visible intersection (either outside window or screen)
-            bounding_box = BoundingBox(left=0, top=0, right=0, bottom=0, width=0, height=0)
-        return bounding_box
-
-    def element_has_child_element(self, node: Control, control_type: str, child_control_type: str):
-        if node.LocalizedControlType == control_type:
-            first_child = node.GetFirstChildControl()
-            if first_child is None:
-                return False
-            return first_child.LocalizedControlType == child_control_type
-
-    def _dom_correction(
-        self,
-        node: Control,
-        dom_interactive_nodes: list[TreeElementNode],
-        window_name: str,
-    ):
-        if self.element_has_child_element(
-            node, "list item", "link"
-        ) or self.element_has_child_element(node, "item", "link"):
-            dom_interactive_nodes.pop()
-            return None
-        elif node.ControlTypeName == "GroupControl":
-            dom_interactive_nodes.pop()
-            # Inlined is_keyboard_focusable logic for correction
-            control_type_name_check = node.CachedControlTypeName
-            is_kb_focusable = False
-            if control_type_name_check in set(
-                [
-                    "EditControl",
-                    "ButtonControl",
-                    "CheckBoxControl",
-                    "RadioButtonControl",
-                    "TabItemControl",
-                ]
-            ):
-                is_kb_focusable = True
-            else:
-                is_kb_focusable = node.CachedIsKeyboardFocusable
+            if inline_task is not None:
+                # Wrapped in a future so that failures and retries go the same way as the workers'
+                future = Future()
+                try:
+                    future.set_result(
+                        self._traverse_window(*inline_task, use_dom, deadline, region)
+                    )
+                except Exception as e:
+                    future.set_exception(e)
+                collect(active_handle, future)
 
-            if is_kb_focusable:
-                child = node
+            while future_to_handle:  # keep running until no pending futures
                 try:
-                    while child.GetFirstChildControl() is not None:
-                        if child.ControlTypeName in INTERACTIVE_CONTROL_TYPE_NAMES:
-                            return None
-                        child = child.GetFirstChildControl()
-                except Exception:
-                    return None
-                if child.ControlTypeName != "TextControl":
-                    return None
-                legacy_pattern = node.GetLegacyIAccessiblePattern()
-                value = legacy_pattern.Value
-                element_bounding_box = node.BoundingRectangle
-                bounding_box = self.iou_bounding_box(self.dom_bounding_box, element_bounding_box)
-                center = bounding_box.get_center()
-                is_focused = node.HasKeyboardFocus
-                dom_interactive_nodes.append(
-                    TreeElementNode(
-                        **{
-                            "name": child.Name.strip(),
-                            "control_type": node.LocalizedControlType,
-                            "value": value,
-                            "shortcut": node.AcceleratorKey,
-                            "bounding_box": bounding_box,
-                            "xpath": "",
-                            "center": center,
-                            "window_name": window_name,
-                            "is_focused": is_focused,
-                        }
+                    timeout = deadline.remaining() if deadline is not None else None
+                    for future in as_completed(list(future_to_handle), timeout=timeout):
+                        handle = future_to_handle.pop(future)  # remove completed future
+                        collect(handle, future)
+                except TimeoutError:
+                    # Out of budget: unfinished windows are reported and their late results dropped
+                    for future, handle in future_to_handle.items():
+                        future.cancel()
+                        truncated_reasons[handle] = "deadline"
+                    future_to_handle.clear()
+
+        # Cached windows keep the truncation of the traversal that produced them
+        for handle in results:
+            if handle in self._limit_truncations:
+                truncated_reasons.setdefault(handle, self._limit_truncations[handle])
+
+        if truncated_windows is not None:
+            for handle in ordered_handles:
+                reason = truncated_reasons.get(handle)
+                if reason is None or (handle in results and reason == "deadline"):
+                    continue
+                truncated_windows.append(
+                    TruncatedWindow(
+                        handle=handle, name=window_names.get(handle, str(handle)), reason=reason
                     )
                 )
-        elif self.element_has_child_element(node, "link", "heading"):
-            dom_interactive_nodes.pop()
-            node = node.GetFirstChildControl()
-            control_type = "link"
-            legacy_pattern = node.GetLegacyIAccessiblePattern()
-            value = legacy_pattern.Value
-            element_bounding_box = node.BoundingRectangle
-            bounding_box = self.iou_bounding_box(self.dom_bounding_box, element_bounding_box)
-            center = bounding_box.get_center()
-            is_focused = node.HasKeyboardFocus
-            dom_interactive_nodes.append(
-                TreeElementNode(
-                    **{
-                        "name": node.Name.strip(),
-                        "control_type": control_type,
-                        "value": node.Name.strip(),
-                        "shortcut": node.AcceleratorKey,
-                        "bounding_box": bounding_box,
-                        "xpath": "",
-                        "center": center,
-                        "window_name": window_name,
-                        "is_focused": is_focused,
-                    }
-                )
+            if truncated_windows:
+                logger.info(f"{len(truncated_windows)} windows truncated or skipped")
+
+        if traversed_windows is not None:
+            traversed_windows.update(
+                window_names.get(handle, str(handle)) for handle in ordered_handles
             )
 
-    def tree_traversal(
+        # Merge in window order so the active window always comes first
+        for handle in ordered_handles:
+            if handle not in results:
+                continue
+            element_nodes, scroll_nodes, info_nodes = get_visible_nodes(handle)
+            interactive_nodes.extend(element_nodes)
+            scrollable_nodes.extend(scroll_nodes)
+            dom_informative_nodes.extend(info_nodes)
+            if list_summaries is not None:
+                list_summaries.extend(self._list_summaries.get(handle, ()))
+            if query_windows is not None and handle in self._query_windows:
+                query_windows.append(self._query_windows[handle])
+        return interactive_nodes, scrollable_nodes, dom_informative_nodes
+
+    def _traverse_window(
         self,
-        node: Control,
-        window_bounding_box: Rect,
-        window_name: str,
+        handle: int,
         is_browser: bool,
-        interactive_nodes: list[TreeElementNode] | None = None,
-        scrollable_nodes: list[ScrollElementNode] | None = None,
-        dom_interactive_nodes: list[TreeElementNode] | None = None,
-        dom_informative_nodes: list[TextElementNode] | None = None,
-        is_dom: bool = False,
-        is_dialog: bool = False,
-        element_cache_req: Any | None = None,
-        children_cache_req: Any | None = None,
-    ):
+        process_id: int | None,
+        class_name: str | None,
+        max_depth: int | None,
+        app_profile: AppProfile | None,
+        use_dom: bool,
+        deadline: Deadline | None,
+        region: tuple[int, int, int, int] | None = None,
+    ) -> tuple[
+        tuple[Sequence[TreeElementNode], Sequence[ScrollElementNode], Sequence[TextElementNode]],
+        WindowState,
+    ]:
+        """
+        Run `get_nodes` on a worker and record its latency and outcome for the window.
+
+        Returns the nodes and the state learned about the window, which the calling
+        thread applies if it collects the result before the deadline.
+        """
+        start_time = perf_counter()
+        window_state = WindowState()
         try:
-            # Build cached control if caching is enabled
-            if not hasattr(node, "_is_cached") and element_cache_req:
-                node = CachedControlHelper.build_cached_control(node, element_cache_req)
-
-            # Checks to skip the nodes that are not interactive
-            is_offscreen = node.CachedIsOffscreen
-            control_type_name = node.CachedControlTypeName
-            # Scrollable check
-            if scrollable_nodes is not None:
-                if (
-                    control_type_name
-                    not in (INTERACTIVE_CONTROL_TYPE_NAMES | INFORMATIVE_CONTROL_TYPE_NAMES)
-                ) and not is_offscreen:
-                    try:
-                        scroll_pattern: ScrollPattern = node.GetPattern(PatternId.ScrollPattern)
-                        if scroll_pattern and scroll_pattern.VerticallyScrollable:
-                            box = node.CachedBoundingRectangle
-                            x, y = random_point_within_bounding_box(node=node, scale_factor=0.8)
-                            center = Center(x=x, y=y)
-                            name = node.CachedName
-                            automation_id = node.CachedAutomationId
-                            localized_control_type = node.CachedLocalizedControlType
-                            has_keyboard_focus = node.CachedHasKeyboardFocus
-                            scrollable_nodes.append(
-                                ScrollElementNode(
-                                    **{
-                                        "name": name.strip()
-                                        or automation_id
-                                        or localized_control_type.capitalize()
-                                        or "''",
-                                        "control_type": localized_control_type.title(),
-                                        "bounding_box": BoundingBox(
-                                            **{
-                                                "left": box.left,
-                                                "top": box.top,
-                                                "right": box.right,
-                                                "bottom": box.bottom,
-                                                "width": box.width(),
-                                                "height": box.height(),
-                                            }
-                                        ),
-                                        "center": center,
-                                        "xpath": "",
-                                        "horizontal_scrollable": scroll_pattern.HorizontallyScrollable,
-                                        "horizontal_scroll_percent": scroll_pattern.HorizontalScrollPercent
-                                        if scroll_pattern.HorizontallyScrollable
-                                        else 0,
-                                        "vertical_scrollable": scroll_pattern.VerticallyScrollable,
-                                        "vertical_scroll_percent": scroll_pattern.VerticalScrollPercent
-                                        if scroll_pattern.VerticallyScrollable
-                                        else 0,
-                                        "window_name": window_name,
-                                        "is_focused": has_keyboard_focus,
-                                    }
-                                )
-                            )
-                    except Exception:
-                        pass
-
-            # Interactive and Informative checks
-            # Pre-calculate common properties
-            is_control_element = node.CachedIsControlElement
-            element_bounding_box = node.CachedBoundingRectangle
-            width = element_bounding_box.width()
-            height = element_bounding_box.height()
-            area = width * height
-
-            # Is Visible Check
-            is_visible = (
-                (area > 0)
-                and (not is_offscreen or control_type_name == "EditControl")
-                and is_control_element
+            result = self.get_nodes(
+                handle,
+                is_browser,
+                use_dom,
+                deadline,
+                max_depth=max_depth,
+                app_profile=app_profile,
+                region=region,
+                window_state=window_state,
             )
-
-            if is_visible:
-                is_enabled = node.CachedIsEnabled
-                if is_enabled:
-                    # Determine is_keyboard_focusable
-                    if control_type_name in set(
-                        [
-                            "EditControl",
-                            "ButtonControl",
-                            "CheckBoxControl",
-                            "RadioButtonControl",
-                            "TabItemControl",
-                        ]
-                    ):
-                        is_keyboard_focusable = True
-                    else:
-                        is_keyboard_focusable = node.CachedIsKeyboardFocusable
-
-                    # Interactive Check
-                    if interactive_nodes is not None:
-                        is_interactive = False
-                        if (
-                            is_browser
-                            and control_type_name in set(["DataItemControl", "ListItemControl"])
-                            and not is_keyboard_focusable
-                        ):
-                            is_interactive = False
-                        elif (
-                            not is_browser
-                            and control_type_name == "ImageControl"
-                            and is_keyboard_focusable
-                        ):
-                            is_interactive = True
-                        elif control_type_name in (
-                            INTERACTIVE_CONTROL_TYPE_NAMES | DOCUMENT_CONTROL_TYPE_NAMES
-                        ):
-                            # Role check
-                            try:
-                                legacy_pattern = node.GetLegacyIAccessiblePattern()
-                                is_role_interactive = (
-                                    AccessibleRoleNames.get(legacy_pattern.Role, "Default")
-                                    in INTERACTIVE_ROLES
-                                )
-                            except Exception:
-                                is_role_interactive = False
-
-                            # Image check
-                            is_image = False
-                            if control_type_name == "ImageControl":  # approximated
-                                localized = node.CachedLocalizedControlType
-                                if localized == "graphic" or not is_keyboard_focusable:
-                                    is_image = True
-
-                            if is_role_interactive and (not is_image or is_keyboard_focusable):
-                                is_interactive = True
-
-                        elif control_type_name == "GroupControl":
-                            if is_browser:
-                                try:
-                                    legacy_pattern = node.GetLegacyIAccessiblePattern()
-                                    is_role_interactive = (
-                                        AccessibleRoleNames.get(legacy_pattern.Role, "Default")
-                                        in INTERACTIVE_ROLES
-                                    )
-                                except Exception:
-                                    is_role_interactive = False
-
-                                is_default_action = False
-                                try:
-                                    legacy_pattern = node.GetLegacyIAccessiblePattern()
-                                    if legacy_pattern.DefaultAction.title() in DEFAULT_ACTIONS:
-                                        is_default_action = True
-                                except Exception:
-                                    pass
-
-                                if is_role_interactive and (
-                                    is_default_action or is_keyboard_focusable
-                                ):
-                                    is_interactive = True
-
-                        if is_interactive:
-                            legacy_pattern = node.GetLegacyIAccessiblePattern()
-                            value = (
-                                legacy_pattern.Value.strip()
-                                if legacy_pattern.Value is not None
-                                else ""
-                            )
-                            is_focused = node.CachedHasKeyboardFocus
-                            name = node.CachedName.strip()
-                            localized_control_type = node.CachedLocalizedControlType
-                            accelerator_key = node.CachedAcceleratorKey
-
-                            if is_browser and is_dom:
-                                bounding_box = self.iou_bounding_box(
-                                    self.dom_bounding_box, element_bounding_box
-                                )
-                                center = bounding_box.get_center()
-                                tree_node = TreeElementNode(
-                                    **{
-                                        "name": name,
-                                        "control_type": localized_control_type.title(),
-                                        "value": value,
-                                        "shortcut": accelerator_key,
-                                        "bounding_box": bounding_box,
-                                        "center": center,
-                                        "xpath": "",
-                                        "window_name": window_name,
-                                        "is_focused": is_focused,
-                                    }
-                                )
-                                dom_interactive_nodes.append(tree_node)
-                                self._dom_correction(node, dom_interactive_nodes, window_name)
-                            else:
-                                bounding_box = self.iou_bounding_box(
-                                    window_bounding_box, element_bounding_box
-                                )
-                                center = bounding_box.get_center()
-                                tree_node = TreeElementNode(
-                                    **{
-                                        "name": name,
-                                        "control_type": localized_control_type.title(),
-                                        "value": value,
-                                        "shortcut": accelerator_key,
-                                        "bounding_box": bounding_box,
-                                        "center": center,
-                                        "xpath": "",
-                                        "window_name": window_name,
-                                        "is_focused": is_focused,
-                                    }
-                                )
-                                interactive_nodes.append(tree_node)
-
-                    # Informative Check
-                    if dom_informative_nodes is not None:
-                        # is_element_text check
-                        is_text = False
-                        if control_type_name in INFORMATIVE_CONTROL_TYPE_NAMES:
-                            # is_element_image check
-                            is_image_check = False
-                            if control_type_name == "ImageControl":
-                                localized = node.CachedLocalizedControlType
-
-                                # Check keybord focusable again if not established, but reuse
-                                if not is_keyboard_focusable:
-                                    # If localized is graphic OR not focusable -> image
-                                    # wait, is_element_image: if localized=='graphic' or not focusable -> True
-                                    if localized == "graphic":
-                                        is_image_check = True
-                                    else:
-                                        is_image_check = True  # not focusable
-                                elif localized == "graphic":
-                                    is_image_check = True
-
-                            if not is_image_check:
-                                is_text = True
-
-                        if is_text:
-                            if is_browser and is_dom:
-                                name = node.CachedName
-                                dom_informative_nodes.append(
-                                    TextElementNode(
-                                        text=name.strip(),
-                                    )
-                                )
-
-            # Phase 3: Cached Children Retrieval
-            children = CachedControlHelper.get_cached_children(node, children_cache_req)
-
-            # Recursively traverse the tree the right to left for normal apps and for DOM traverse from left to right
-            for child in children if is_dom else children[::-1]:
-                # Incrementally building the xpath
-
-                # Check if the child is a DOM element
-                if is_browser and child.CachedAutomationId == "RootWebArea":
-                    bounding_box = child.CachedBoundingRectangle
-                    self.dom_bounding_box = BoundingBox(
-                        left=bounding_box.left,
-                        top=bounding_box.top,
-                        right=bounding_box.right,
-                        bottom=bounding_box.bottom,
-                        width=bounding_box.width(),
-                        height=bounding_box.height(),
-                    )
-                    self.dom = child
-                    # enter DOM subtree
-                    self.tree_traversal(
-                        child,
-                        window_bounding_box,
-                        window_name,
-                        is_browser,
-                        interactive_nodes,
-                        scrollable_nodes,
-                        dom_interactive_nodes,
-                        dom_informative_nodes,
-                        is_dom=True,
-                        is_dialog=is_dialog,
-                        element_cache_req=element_cache_req,
-                        children_cache_req=children_cache_req,
-                    )
-                # Check if the child is a dialog
-                elif isinstance(child, WindowControl):
-                    if not child.CachedIsOffscreen:
-                        if is_dom:
-                            bounding_box = child.CachedBoundingRectangle
-                            if bounding_box.width() > 0.8 * self.dom_bounding_box.width:
-                                # Because this window element covers the majority of the screen
-                                dom_interactive_nodes.clear()
-                        else:
-                            # Inline is_window_modal
-                            is_modal = False
-                            try:
-                                window_pattern = child.GetWindowPattern()
-                                is_modal = window_pattern.IsModal
-                            except Exception:
-                                pass
-
-                            if is_modal:
-                                # Because this window element is modal
-                                interactive_nodes.clear()
-                    # enter dialog subtree
-                    self.tree_traversal(
-                        child,
-                        window_bounding_box,
-                        window_name,
-                        is_browser,
-                        interactive_nodes,
-                        scrollable_nodes,
-                        dom_interactive_nodes,
-                        dom_informative_nodes,
-                        is_dom=is_dom,
-                        is_dialog=True,
-                        element_cache_req=element_cache_req,
-                        children_cache_req=children_cache_req,
-                    )
-                else:
-                    # normal non-dialog children
-                    self.tree_traversal(
-                        child,
-                        window_bounding_box,
-                        window_name,
-                        is_browser,
-                        interactive_nodes,
-                        scrollable_nodes,
-                        dom_interactive_nodes,
-                        dom_informative_nodes,
-                        is_dom=is_dom,
-                        is_dialog=is_dialog,
-                        element_cache_req=element_cache_req,
-                        children_cache_req=children_cache_req,
-                    )
-        except Exception as e:
-            logger.error(f"Error in tree_traversal: {e}", exc_info=True)
+        except DeadlineExceeded:
+            # Running out of a short budget says nothing about the window, unless it was slow anyway
+            latency_ms = (perf_counter() - start_time) * 1000
+            if latency_ms >= self.health.slow_ms:
+                self.health.record_failure(handle, process_id, latency_ms, class_name)
             raise
+        except Exception:
+            latency_ms = (perf_counter() - start_time) * 1000
+            self.health.record_failure(handle, process_id, latency_ms, class_name)
+            raise
+        latency_ms = (perf_counter() - start_time) * 1000
+        self.health.record_success(handle, process_id, latency_ms, class_name)
+        return result, window_state
+
+    def _apply_window_state(self, handle: int, state: WindowState):
+        """Keep what the traversal behind the nodes of a snapshot learned about their window."""
+        if state.query_window is not None:
+            self._query_windows[handle] = state.query_window
+        else:
+            self._query_windows.pop(handle, None)
+        if state.dom is not None:
+            self.dom = state.dom
+            self.dom_bounding_box = state.dom_bounding_box
+        if state.truncated_by is not None:
+            self._limit_truncations[handle] = state.truncated_by
+        else:
+            self._limit_truncations.pop(handle, None)
+        self._list_summaries[handle] = state.list_summaries
+
+    def _registered_element(self, node: TreeElementNode | ScrollElementNode) -> Any:
+        """The UIA element of a node of the last snapshot, usable on the calling thread."""
+        entry = self.registry.get(node.id)
+        return self.registry.element(entry) if entry is not None else None
+
+    def get_app_profile(self, process_id: int | None, class_name: str | None) -> AppProfile | None:
+        """The traversal profile of a window, from the name of its process or its class."""
+        if not self.app_profiles:
+            return None
+        try:
+            process_name = Process(process_id).name() if process_id else None
+        except Exception:
+            process_name = None
+        return match_app_profile(self.app_profiles, process_name, class_name)
+
+    @staticmethod
+    def _rect_key(rect: Rect) -> tuple[int, int, int, int]:
+        return (rect.left, rect.top, rect.right, rect.bottom)
+
+    def iou_bounding_box(
+        self,
+        window_box: Rect,
+        element_box: Rect,
+    ) -> BoundingBox:
+        return iou_bounding_box(self.screen_box, window_box, element_box)
 
     def app_name_correction(self, app_name: str) -> str:
         match app_name:
@@ -664,50 +641,99 @@ class Tree:
                 return app_name
 
     def get_nodes(
-        self, handle: int, is_browser: bool = False, use_dom: bool = False
-    ) -> tuple[list[TreeElementNode], list[ScrollElementNode], list[TextElementNode]]:
+        self,
+        handle: int,
+        is_browser: bool = False,
+        use_dom: bool = False,
+        deadline: Deadline | None = None,
+        max_depth: int | None = None,
+        app_profile: AppProfile | None = None,
+        region: tuple[int, int, int, int] | None = None,
+        window_state: WindowState | None = None,
+    ) -> tuple[Sequence[TreeElementNode], Sequence[ScrollElementNode], Sequence[TextElementNode]]:
+        """
+        Traverse one window. What is learned about it besides the nodes goes into
+        `window_state` when given, for the caller to apply, else straight into the Tree.
+        """
+        state = window_state if window_state is not None else WindowState()
         try:
-            comtypes.CoInitialize()
+            if deadline is not None:
+                deadline.check()
+            # Taken before traversal so events arriving meanwhile leave the cache entry dirty
+            cache_token = self.window_cache.begin(handle)
             # Rehydrate Control from handle within the thread's COM context
-            node = ControlFromHandle(handle)
+            node = self.control_from_handle(handle)
             if not node:
                 raise Exception("Failed to create Control from handle")
 
-            # Create fresh cache requests for this traversal session
-            element_cache_req = CacheRequestFactory.create_tree_traversal_cache()
-            element_cache_req.TreeScope = TreeScope.TreeScope_Element
-
-            children_cache_req = CacheRequestFactory.create_tree_traversal_cache()
-            children_cache_req.TreeScope = (
-                TreeScope.TreeScope_Element | TreeScope.TreeScope_Children
-            )
+            if app_profile is not None and app_profile.cache_profiles is not None:
+                profiles = app_profile.cache_profiles
+            else:
+                profiles = BROWSER_PROFILES if is_browser else DEFAULT_PROFILES
+            element_cache_req, children_cache_req = self._get_cache_requests(profiles)
 
             window_bounding_box = node.BoundingRectangle
 
-            (
-                interactive_nodes,
-                dom_interactive_nodes,
-                dom_informative_nodes,
-                scrollable_nodes,
-            ) = [], [], [], []
+            if self.traversal_mode == "subtree":
+                # Single round trip, per-node requests are only used if prefetching fails
+                node = CachedControlHelper.prefetch_subtree(
+                    node, self._get_subtree_cache_request(profiles)
+                )
+
+            # Depth or region limited results are partial and must not be served from the cache later
+            partial = max_depth is not None or region is not None
+            # The depth cap of a profile holds for every traversal, its results can be cached
+            limits = self.limits.with_max_depth(max_depth)
+            if app_profile is not None:
+                limits = limits.with_max_depth(app_profile.max_depth)
             window_name = node.Name.strip()
             window_name = self.app_name_correction(window_name)
 
-            self.tree_traversal(
-                node,
-                window_bounding_box,
-                window_name,
-                is_browser,
-                interactive_nodes,
-                scrollable_nodes,
-                dom_interactive_nodes,
-                dom_informative_nodes,
-                is_dom=False,
-                is_dialog=False,
+            ctx = TraversalContext(
+                window_bounding_box=window_bounding_box,
+                window_name=window_name,
+                is_browser=is_browser,
+                screen_box=self.screen_box,
                 element_cache_req=element_cache_req,
                 children_cache_req=children_cache_req,
+                deadline=deadline,
+                limits=limits,
+                viewport_margin=TRAVERSAL_VIEWPORT_MARGIN,
+                region=region,
+                list_summary_items=LIST_SUMMARY_EDGE_ITEMS,
+                app_profile=app_profile,
+            )
+            traverse(node, ctx)
+            state.query_window = QueryWindow(handle, window_name, ctx.arena)
+            state.dom, state.dom_bounding_box = ctx.dom, ctx.dom_bounding_box
+            state.truncated_by = ctx.truncated_by
+            if ctx.truncated_by is not None:
+                logger.info(f"Traversal of {window_name} stopped at the {ctx.truncated_by}")
+
+            screen_box = as_box(self.screen_box)
+            interactive_nodes = drop_nested_duplicates(
+                ctx.interactive_nodes, ctx.arena, as_box(window_bounding_box), screen_box
+            )
+            dom_interactive_nodes = ctx.dom_interactive_nodes
+            if ctx.dom_bounding_box is not None:
+                dom_interactive_nodes = drop_nested_duplicates(
+                    dom_interactive_nodes, ctx.arena, as_box(ctx.dom_bounding_box), screen_box
+                )
+            duplicates = (
+                len(ctx.interactive_nodes)
+                + len(ctx.dom_interactive_nodes)
+                - len(interactive_nodes)
+                - len(dom_interactive_nodes)
             )
+            dom_informative_nodes = ctx.dom_informative_nodes
+            scrollable_nodes = ctx.scrollable_nodes
             logger.debug(f"Window name:{window_name}")
+            logger.debug(f"Visited nodes:{ctx.visited}")
+            logger.debug(f"Pruned offscreen subtrees:{ctx.pruned}")
+            logger.debug(f"Summarized lists:{len(ctx.list_summaries)}")
+            if app_profile is not None:
+                logger.debug(f"App profile:{app_profile.name}, skipped subtrees:{ctx.skipped}")
+            logger.debug(f"Nested duplicates dropped:{duplicates}")
             logger.debug(f"Interactive nodes:{len(interactive_nodes)}")
             if is_browser:
                 logger.debug(f"DOM interactive nodes:{len(dom_interactive_nodes)}")
@@ -716,21 +742,102 @@ class Tree:
 
             if use_dom:
                 if is_browser:
-                    return (
+                    result = (
                         dom_interactive_nodes,
                         scrollable_nodes,
                         dom_informative_nodes,
                     )
                 else:
-                    return ([], [], [])
+                    result = (NodeView(), NodeView(), NodeView())
+                    ctx.list_summaries.clear()
             else:
                 interactive_nodes.extend(dom_interactive_nodes)
-                return (interactive_nodes, scrollable_nodes, dom_informative_nodes)
+                result = (interactive_nodes, scrollable_nodes, dom_informative_nodes)
+            state.list_summaries = ctx.list_summaries
+            # Marshalled here, in the apartment the elements belong to
+            self.registry.register(result[0] + result[1], handle)
+            # The nodes give up their elements to the registry
+            ctx.arena.release_elements()
+
+            if self.window_cache.enabled and not partial:
+                self.window_cache.put(
+                    WindowCacheEntry(
+                        handle=handle,
+                        interactive_nodes=result[0],
+                        scrollable_nodes=result[1],
+                        dom_informative_nodes=result[2],
+                        window_rect=self._rect_key(window_bounding_box),
+                        is_browser=is_browser,
+                        use_dom=use_dom,
+                        state=state,
+                        runtime_ids={
+                            runtime_id
+                            for runtime_id in ctx.arena.runtime_ids
+                            if runtime_id is not None
+                        },
+                    ),
+                    cache_token,
+                )
+            if window_state is None:
+                self._apply_window_state(handle, state)
+            return result
+        except DeadlineExceeded:
+            logger.debug(f"Deadline exceeded while traversing {handle}")
+            raise
         except Exception as e:
-            logger.error(f"Error getting nodes for {node.Name}: {e}")
+            logger.error(f"Error getting nodes for {handle}: {e}")
             raise e
-        finally:
-            comtypes.CoUninitialize()
+
+    def _get_cache_requests(self, profiles: tuple[str, ...]) -> tuple[Any, Any]:
+        """Return the (element, children) cache requests of the calling thread for `profiles`."""
+        cache_requests = getattr(self._thread_state, "cache_requests", None)
+        if cache_requests is None:
+            cache_requests = self._thread_state.cache_requests = {}
+        if profiles not in cache_requests:
+            element_cache_req = self.cache_request_factory.create_profile_cache(*profiles)
+            element_cache_req.TreeScope = TreeScope.TreeScope_Element
+
+            children_cache_req = self.cache_request_factory.create_profile_cache(*profiles)
+            children_cache_req.TreeScope = (
+                TreeScope.TreeScope_Element | TreeScope.TreeScope_Children
+            )
+            cache_requests[profiles] = (element_cache_req, children_cache_req)
+        return cache_requests[profiles]
+
+    def _get_subtree_cache_request(self, profiles: tuple[str, ...]) -> Any:
+        """Return the subtree cache request of the calling thread for `profiles`."""
+        subtree_requests = getattr(self._thread_state, "subtree_requests", None)
+        if subtree_requests is None:
+            subtree_requests = self._thread_state.subtree_requests = {}
+        if profiles not in subtree_requests:
+            subtree_requests[profiles] = self.cache_request_factory.create_subtree_cache(profiles)
+        return subtree_requests[profiles]
+
+    def _invalidate_element(self, element: "Control | None", runtime_id: Any = None) -> int | None:
+        """Mark the cached window that owns `element` (or `runtime_id`) dirty."""
+        if runtime_id is not None:
+            handle = self.window_cache.invalidate_runtime_id(runtime_id)
+            if handle is not None:
+                return handle
+        if element is None:
+            # Sender is gone and could not be mapped, so any cached window may be stale
+            self.window_cache.invalidate_all()
+            return None
+        try:
+            handle = self.window_cache.invalidate_runtime_id(element.GetRuntimeId())
+            if handle is not None:
+                return handle
+            # Element was not seen during the last traversal, resolve its top level window
+            top_level = element.GetTopLevelControl()
+            if top_level is None:
+                return None
+            handle = top_level.NativeWindowHandle
+            self.window_cache.invalidate(handle)
+            return handle
+        except (comtypes.COMError, OSError):
+            # Owner can no longer be resolved, so any cached window may be stale
+            self.window_cache.invalidate_all()
+            return None
 
     def _on_focus_change(self, sender: Any):
         """Handle focus change events."""
@@ -750,6 +857,13 @@ class Tree:
                 return None
         self._last_focus_event = (event_key, current_time)
 
+        # is_focused flags of both the previously and the newly focused window change
+        if self.window_cache.enabled:
+            previous_handle = getattr(self, "_last_focus_handle", None)
+            if previous_handle is not None:
+                self.window_cache.invalidate(previous_handle)
+            self._last_focus_handle = self._invalidate_element(element, runtime_id)
+
         try:
             logger.debug(
                 f"[WatchDog] Focus changed to: '{element.Name}' ({element.ControlTypeName})"
@@ -757,10 +871,35 @@ class Tree:
         except Exception:
             pass
 
+    def _on_structure_change(self, sender: Any, changeType: int, runtimeId):
+        """Handle structure change events."""
+        if changeType == StructureChangeType.StructureChangeType_ChildRemoved:
+            self.registry.release(runtimeId)
+        if not self.window_cache.enabled:
+            return None
+        try:
+            element = Control.CreateControlFromElement(sender)
+        except (comtypes.COMError, OSError):
+            element = None
+        # For removals the sender is the parent, the runtime id belongs to the removed child
+        if changeType in (
+            StructureChangeType.StructureChangeType_ChildRemoved,
+            StructureChangeType.StructureChangeType_ChildrenBulkRemoved,
+        ):
+            handle = self._invalidate_element(element, runtimeId)
+        else:
+            handle = self._invalidate_element(element)
+        logger.debug(f"[WatchDog] Structure changed: type={changeType} window={handle}")
+
     def _on_property_change(self, sender: Any, propertyId: int, newValue):
         """Handle property change events."""
         try:
             element = Control.CreateControlFromElement(sender)
+        except (comtypes.COMError, OSError):
+            element = None
+        if self.window_cache.enabled:
+            self._invalidate_element(element)
+        try:
             logger.debug(
                 f"[WatchDog] Property changed: ID={propertyId} Value={newValue} Element: '{element.Name}' ({element.ControlTypeName})"
             )
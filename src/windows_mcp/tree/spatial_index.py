@@ -0,0 +1,113 @@
+"""
+Spatial index of the elements of the last snapshot.
+
+A uniform grid over the bounding boxes of the interactive and scrollable nodes
+answers "what is at (x, y)" and "what intersects this rectangle" from the
+snapshot alone, without `ControlFromPoint` round trips. Boxes are half-open,
+`left <= x < right`, like screen rectangles.
+"""
+
+from windows_mcp.tree.arena import NodeView
+from windows_mcp.tree.config import SPATIAL_INDEX_CELL_SIZE
+from windows_mcp.tree.views import TreeElementNode, ScrollElementNode
+from collections import defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Iterable, Sequence
+
+Node = TreeElementNode | ScrollElementNode
+Box = tuple[int, int, int, int]  # (left, top, right, bottom)
+
+
+@dataclass
+class SpatialHit:
+    label: str  # as accepted by ElementRegistry.resolve
+    node: Node
+
+    @property
+    def area(self) -> int:
+        box = self.node.bounding_box
+        return max(box.right - box.left, 0) * max(box.bottom - box.top, 0)
+
+
+def box_contains(box: Box, x: int, y: int) -> bool:
+    return box[0] <= x < box[2] and box[1] <= y < box[3]
+
+
+def boxes_intersect(box: Box, left: int, top: int, right: int, bottom: int) -> bool:
+    return box[0] < right and left < box[2] and box[1] < bottom and top < box[3]
+
+
+class SpatialIndex:
+    def __init__(self, cell_size: int = SPATIAL_INDEX_CELL_SIZE):
+        self._lock = Lock()
+        self.cell_size = cell_size
+        # (label, position in the nodes, box) of the nodes with an area
+        self._hits: list[tuple[str, int, Box]] = []
+        self._nodes: Sequence[Node] = []
+        self._cells: dict[tuple[int, int], list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._hits)
+
+    def _cell_range(self, left: int, top: int, right: int, bottom: int):
+        size = self.cell_size
+        for cx in range(left // size, (right - 1) // size + 1):
+            for cy in range(top // size, (bottom - 1) // size + 1):
+                yield cx, cy
+
+    def rebuild(self, nodes: Iterable[Node]):
+        """
+        Index the interactive then scrollable nodes of a snapshot, in listing order. The
+        nodes are kept as given and read on a hit, a `NodeView` builds only those.
+        """
+        nodes = NodeView.of(nodes)
+        hits = []
+        cells = defaultdict(list)
+        for index, (node_id, box) in enumerate(zip(nodes.ids(), nodes.boxes())):
+            left, top, right, bottom = box
+            if right <= left or bottom <= top:
+                continue
+            position = len(hits)
+            hits.append((node_id or str(index), index, box))
+            for cell in self._cell_range(left, top, right, bottom):
+                cells[cell].append(position)
+        with self._lock:
+            self._hits, self._nodes, self._cells = hits, nodes, cells
+
+    def clear(self):
+        self.rebuild([])
+
+    @staticmethod
+    def _hit(hit: tuple[str, int, Box], nodes: Sequence[Node]) -> SpatialHit:
+        label, index, _ = hit
+        return SpatialHit(label, nodes[index])
+
+    def at(self, x: int, y: int) -> list[SpatialHit]:
+        """Elements containing (x, y), innermost (smallest) first."""
+        size = self.cell_size
+        with self._lock:
+            hits, nodes = self._hits, self._nodes
+            positions = self._cells.get((x // size, y // size), ())
+            found = [self._hit(hits[p], nodes) for p in positions if box_contains(hits[p][2], x, y)]
+        return sorted(found, key=lambda hit: hit.area)
+
+    def element_at(self, x: int, y: int) -> SpatialHit | None:
+        """The innermost element at (x, y), i.e. the one a click there lands on."""
+        found = self.at(x, y)
+        return found[0] if found else None
+
+    def intersecting(self, left: int, top: int, right: int, bottom: int) -> list[SpatialHit]:
+        """Elements overlapping the rectangle, in listing order."""
+        if right <= left or bottom <= top:
+            return []
+        with self._lock:
+            hits, nodes = self._hits, self._nodes
+            positions = set()
+            for cell in self._cell_range(left, top, right, bottom):
+                positions.update(self._cells.get(cell, ()))
+            return [
+                self._hit(hits[p], nodes)
+                for p in sorted(positions)
+                if boxes_intersect(hits[p][2], left, top, right, bottom)
+            ]
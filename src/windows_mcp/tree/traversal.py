@@ -0,0 +1,649 @@
+"""
+Window traversal engine.
+
+Walks the UIA tree of one window with an explicit stack instead of recursion,
+so deep trees cannot exhaust the interpreter stack, and stops at configurable
+limits: maximum depth, maximum nodes per window and maximum children per node.
+Children entirely outside the viewport or skipped by the profile of the app are
+pruned with their subtree, and long runs of list items are cut down to their
+first and last visible items.
+The visit order is the one of the recursive traversal it replaces: children
+right to left for normal apps and left to right inside the DOM.
+"""
+
+from __future__ import annotations
+
+from windows_mcp.uia.enums import PropertyId, AccessibleRoleNames
+from windows_mcp.tree.config import (
+    INTERACTIVE_CONTROL_TYPE_NAMES,
+    DOCUMENT_CONTROL_TYPE_NAMES,
+    INFORMATIVE_CONTROL_TYPE_NAMES,
+    DEFAULT_ACTIONS,
+    INTERACTIVE_ROLES,
+    TRAVERSAL_MAX_DEPTH,
+    TRAVERSAL_MAX_NODES,
+    TRAVERSAL_MAX_CHILDREN,
+    LIST_ITEM_CONTROL_TYPE_NAMES,
+    LIST_SUMMARY_MIN_ITEMS,
+)
+from windows_mcp.tree.views import BoundingBox, ListSummary
+from windows_mcp.tree.cache_utils import CachedControlHelper, CachedPattern, cache_profile_stats
+from windows_mcp.tree.app_profiles import AppProfile
+from windows_mcp.tree.arena import (
+    FOCUSED,
+    HORIZONTALLY_SCROLLABLE,
+    INTERACTIVE,
+    NO_PARENT,
+    SCROLLABLE,
+    TEXT,
+    VERTICALLY_SCROLLABLE,
+    NodeView,
+    TreeArena,
+)
+from windows_mcp.tree.window_cache import normalize_runtime_id
+from windows_mcp.tree.deadline import Deadline, DeadlineExceeded
+from windows_mcp.tree.utils import element_id, random_point_within_bounding_box
+from dataclasses import dataclass, field, replace
+from itertools import groupby
+from typing import TYPE_CHECKING, Any
+import logging
+
+if TYPE_CHECKING:
+    from windows_mcp.uia import Control, Rect
+
+logger = logging.getLogger(__name__)
+
+KEYBOARD_FOCUSABLE_CONTROL_TYPE_NAMES = set(
+    ["EditControl", "ButtonControl", "CheckBoxControl", "RadioButtonControl", "TabItemControl"]
+)
+
+
+@dataclass(frozen=True)
+class TraversalLimits:
+    max_depth: int | None = None
+    max_nodes: int | None = None  # per window
+    max_children: int | None = None  # per node, the first children in document order are kept
+
+    def with_max_depth(self, max_depth: int | None) -> "TraversalLimits":
+        """Tighten the depth limit, a looser one never overrides the current limit."""
+        if max_depth is None or (self.max_depth is not None and self.max_depth <= max_depth):
+            return self
+        return replace(self, max_depth=max_depth)
+
+
+DEFAULT_TRAVERSAL_LIMITS = TraversalLimits(
+    max_depth=TRAVERSAL_MAX_DEPTH,
+    max_nodes=TRAVERSAL_MAX_NODES,
+    max_children=TRAVERSAL_MAX_CHILDREN,
+)
+
+
+@dataclass
+class TraversalContext:
+    """Inputs, outputs and bookkeeping of the traversal of one window."""
+
+    window_bounding_box: Rect
+    window_name: str
+    is_browser: bool
+    screen_box: Rect
+    element_cache_req: Any = None
+    children_cache_req: Any = None
+    deadline: Deadline | None = None
+    limits: TraversalLimits = field(default_factory=TraversalLimits)
+    # RootWebArea of the window and its box, set when the traversal enters the DOM
+    dom: Any = None
+    dom_bounding_box: BoundingBox | None = None
+    # Margin of viewport pruning in pixels, None traverses offscreen subtrees too
+    viewport_margin: int | None = None
+    # Screen region of a region-scoped snapshot, it narrows the viewport
+    region: tuple[int, int, int, int] | None = None
+    visited: int = 0
+    pruned: int = 0  # children skipped with their subtree by viewport pruning
+    # First and last visible items listed of long lists, None lists every item
+    list_summary_items: int | None = None
+    list_summaries: list[ListSummary] = field(default_factory=list)
+    # Profile of the app, its skip rules prune subtrees
+    app_profile: AppProfile | None = None
+    skipped: int = 0  # children skipped with their subtree by the skip rules of the profile
+    # Row of every visited node linked to its parent, and the nodes listed from the rows
+    arena: TreeArena = field(default_factory=TreeArena)
+    truncated_by: str | None = None  # "node limit" or "children limit"
+    # Slots of the arena by list, the nodes are built when read
+    interactive_nodes: NodeView = field(init=False)
+    scrollable_nodes: NodeView = field(init=False)
+    dom_interactive_nodes: NodeView = field(init=False)
+    dom_informative_nodes: NodeView = field(init=False)
+
+    def __post_init__(self):
+        self.interactive_nodes = NodeView(self.arena)
+        self.scrollable_nodes = NodeView(self.arena)
+        self.dom_interactive_nodes = NodeView(self.arena)
+        self.dom_informative_nodes = NodeView(self.arena)
+
+    def viewport(self, is_dom: bool) -> tuple[int, int, int, int]:
+        """The web page inside the DOM, the window elsewhere, clamped to the screen and region."""
+        box = (
+            self.dom_bounding_box if is_dom and self.dom_bounding_box else self.window_bounding_box
+        )
+        screen = self.screen_box
+        viewport = (
+            max(box.left, screen.left),
+            max(box.top, screen.top),
+            min(box.right, screen.right),
+            min(box.bottom, screen.bottom),
+        )
+        if self.region is not None:
+            left, top, right, bottom = self.region
+            viewport = (
+                max(viewport[0], left),
+                max(viewport[1], top),
+                min(viewport[2], right),
+                min(viewport[3], bottom),
+            )
+        return viewport
+
+
+def iou_bounding_box(screen_box: Rect, window_box: Rect, element_box: Rect) -> BoundingBox:
+    left, top, right, bottom = clip_rect(screen_box, window_box, element_box)
+    return BoundingBox(
+        left=left, top=top, right=right, bottom=bottom, width=right - left, height=bottom - top
+    )
+
+
+def clip_rect(screen_box: Rect, window_box: Rect, element_box: Rect) -> tuple[int, int, int, int]:
+    """The part of an element within its window and the screen, (0, 0, 0, 0) if none."""
+    # Step 1: Intersection of element and window (existing logic)
+    intersection_left = max(window_box.left, element_box.left)
+    intersection_top = max(window_box.top, element_box.top)
+    intersection_right = min(window_box.right, element_box.right)
+    intersection_bottom = min(window_box.bottom, element_box.bottom)
+
+    # Step 2: Clamp to screen boundaries (new addition)
+    intersection_left = max(screen_box.left, intersection_left)
+    intersection_top = max(screen_box.top, intersection_top)
+    intersection_right = min(screen_box.right, intersection_right)
+    intersection_bottom = min(screen_box.bottom, intersection_bottom)
+
+    # Step 3: Validate intersection
+    if intersection_right > intersection_left and intersection_bottom > intersection_top:
+        return intersection_left, intersection_top, intersection_right, intersection_bottom
+    # No valid visible intersection (either outside window or screen)
+    return 0, 0, 0, 0
+
+
+def rect_in_viewport(rect: Rect, viewport: tuple[int, int, int, int], margin: int = 0) -> bool:
+    left, top, right, bottom = viewport
+    return (
+        rect.right > left - margin
+        and rect.left < right + margin
+        and rect.bottom > top - margin
+        and rect.top < bottom + margin
+    )
+
+
+def in_viewport(node: Control, viewport: tuple[int, int, int, int], margin: int) -> bool:
+    """
+    False if the cached rectangle of a node lies entirely outside `viewport` grown by
+    `margin`, so its subtree can be skipped. Nodes without a rectangle, windows (which
+    may be modal) and scroll containers are always kept.
+    """
+    try:
+        rect = node.CachedBoundingRectangle
+        if rect.width() <= 0 or rect.height() <= 0:
+            return True
+        if rect_in_viewport(rect, viewport, margin):
+            return True
+        if node.CachedControlTypeName == "WindowControl":
+            return True
+        return CachedPattern.scroll(node).available
+    except Exception:
+        return True
+
+
+def is_item_visible(item: Control, viewport: tuple[int, int, int, int]) -> bool:
+    try:
+        rect = item.CachedBoundingRectangle
+        return (
+            not item.CachedIsOffscreen
+            and rect.width() > 0
+            and rect.height() > 0
+            and rect_in_viewport(rect, viewport)
+        )
+    except Exception:
+        return False
+
+
+def summarize_lists(node: Control, children: list, ctx: TraversalContext, is_dom: bool) -> list:
+    """
+    Cut every run of at least LIST_SUMMARY_MIN_ITEMS sibling items of one type down to its
+    first and last `ctx.list_summary_items` visible items, recording a `ListSummary` of the
+    run. Offscreen and virtualized (empty) items are never listed, so they are dropped too.
+    """
+    edge = ctx.list_summary_items
+    kept = []
+    for control_type, run in groupby(children, key=lambda child: child.CachedControlTypeName):
+        run = list(run)
+        if control_type not in LIST_ITEM_CONTROL_TYPE_NAMES or len(run) < LIST_SUMMARY_MIN_ITEMS:
+            kept.extend(run)
+            continue
+        viewport = ctx.viewport(is_dom)
+        visible = [item for item in run if is_item_visible(item, viewport)]
+        listed = visible if len(visible) <= 2 * edge else visible[:edge] + visible[-edge:]
+        kept.extend(listed)
+        # The list was visited just before its children, as the last scrollable node if it scrolls
+        runtime_id = normalize_runtime_id(node.GetCachedPropertyValue(PropertyId.RuntimeIdProperty))
+        container = ctx.scrollable_nodes[-1] if ctx.scrollable_nodes else None
+        if container is None or runtime_id is None or container.runtime_id != runtime_id:
+            container = None
+        ctx.list_summaries.append(
+            ListSummary(
+                window_name=ctx.window_name,
+                name=node.CachedName.strip()
+                or node.CachedAutomationId
+                or node.CachedLocalizedControlType.capitalize(),
+                item_type=run[0].CachedLocalizedControlType.title(),
+                items=len(run),
+                listed=len(listed),
+                container=container,
+            )
+        )
+    return kept
+
+
+def element_has_child_element(node: Control, control_type: str, child_control_type: str):
+    if node.LocalizedControlType == control_type:
+        first_child = node.GetFirstChildControl()
+        if first_child is None:
+            return False
+        return first_child.LocalizedControlType == child_control_type
+
+
+def list_interactive(
+    ctx: TraversalContext,
+    nodes: NodeView,
+    row: int,
+    box: tuple[int, int, int, int],
+    name: str,
+    control_type: str,
+    value: str | None,
+    shortcut: str | None,
+    is_focused: bool,
+    id: str,
+    element: Control,
+):
+    """List the element of `row` in `nodes` as an interactive node, centered in its clipped box."""
+    left, top, right, bottom = box
+    center = (left + (right - left) // 2, top + (bottom - top) // 2)
+    slot = ctx.arena.list_node(
+        INTERACTIVE,
+        row,
+        box,
+        center,
+        name,
+        control_type,
+        ctx.window_name,
+        id,
+        value,
+        shortcut,
+        FOCUSED if is_focused else 0,
+        element=element,
+    )
+    nodes.append(slot)
+
+
+def dom_correction(node: Control, ctx: TraversalContext):
+    dom_interactive_nodes = ctx.dom_interactive_nodes
+    arena = ctx.arena
+    if element_has_child_element(node, "list item", "link") or element_has_child_element(
+        node, "item", "link"
+    ):
+        dom_interactive_nodes.pop_slot()
+        return None
+    elif node.ControlTypeName == "GroupControl":
+        # The replacement describes the same element and keeps its row and id
+        popped = dom_interactive_nodes.pop_slot()
+        # Inlined is_keyboard_focusable logic for correction
+        if node.CachedControlTypeName in KEYBOARD_FOCUSABLE_CONTROL_TYPE_NAMES:
+            is_kb_focusable = True
+        else:
+            is_kb_focusable = node.CachedIsKeyboardFocusable
+
+        if is_kb_focusable:
+            child = node
+            try:
+                while child.GetFirstChildControl() is not None:
+                    if child.ControlTypeName in INTERACTIVE_CONTROL_TYPE_NAMES:
+                        return None
+                    child = child.GetFirstChildControl()
+            except Exception:
+                return None
+            if child.ControlTypeName != "TextControl":
+                return None
+            legacy_pattern = CachedPattern.legacy_accessible(node)
+            list_interactive(
+                ctx,
+                dom_interactive_nodes,
+                arena.listed_rows[popped],
+                clip_rect(ctx.screen_box, ctx.dom_bounding_box, node.BoundingRectangle),
+                name=child.Name.strip(),
+                control_type=node.LocalizedControlType,
+                value=legacy_pattern.Value,
+                shortcut=node.AcceleratorKey,
+                is_focused=node.HasKeyboardFocus,
+                id=arena.listed_ids[popped],
+                element=node,
+            )
+    elif element_has_child_element(node, "link", "heading"):
+        popped = dom_interactive_nodes.pop_slot()
+        node = node.GetFirstChildControl()
+        list_interactive(
+            ctx,
+            dom_interactive_nodes,
+            arena.listed_rows[popped],
+            clip_rect(ctx.screen_box, ctx.dom_bounding_box, node.BoundingRectangle),
+            name=node.Name.strip(),
+            control_type="link",
+            value=node.Name.strip(),
+            shortcut=node.AcceleratorKey,
+            is_focused=node.HasKeyboardFocus,
+            id=arena.listed_ids[popped],
+            element=node,
+        )
+
+
+def enter(node: Control, ctx: TraversalContext, is_dom: bool, is_dialog: bool) -> tuple[bool, bool]:
+    """
+    Handle a child as the traversal reaches it: a RootWebArea starts the DOM and a
+    dialog may hide what was collected before it. Returns the (is_dom, is_dialog)
+    flags of the child's subtree.
+    """
+    # Check if the child is a DOM element
+    if ctx.is_browser and node.CachedAutomationId == "RootWebArea":
+        bounding_box = node.CachedBoundingRectangle
+        ctx.dom_bounding_box = BoundingBox(
+            left=bounding_box.left,
+            top=bounding_box.top,
+            right=bounding_box.right,
+            bottom=bounding_box.bottom,
+            width=bounding_box.width(),
+            height=bounding_box.height(),
+        )
+        ctx.dom = node
+        return True, is_dialog
+    # Check if the child is a dialog
+    if node.CachedControlTypeName == "WindowControl":
+        if not node.CachedIsOffscreen:
+            if is_dom:
+                bounding_box = node.CachedBoundingRectangle
+                if bounding_box.width() > 0.8 * ctx.dom_bounding_box.width:
+                    # Because this window element covers the majority of the screen
+                    ctx.dom_interactive_nodes.clear()
+            else:
+                # Inline is_window_modal
+                is_modal = False
+                try:
+                    window_pattern = CachedPattern.window(node)
+                    is_modal = window_pattern.available and window_pattern.IsModal
+                except Exception:
+                    pass
+
+                if is_modal:
+                    # Because this window element is modal
+                    ctx.interactive_nodes.clear()
+        return is_dom, True
+    return is_dom, is_dialog
+
+
+def visit(
+    node: Control, ctx: TraversalContext, is_dom: bool, parent: int = NO_PARENT
+) -> tuple[Control, int]:
+    """
+    Record one node in the arena under the row `parent` and list it in the node lists
+    of the context it belongs to. Returns the cached node and its row, the row of its
+    parent if it could not be recorded.
+    """
+    if ctx.deadline is not None:
+        ctx.deadline.check()
+    ctx.visited += 1
+
+    # Build cached control if caching is enabled
+    if not hasattr(node, "_is_cached") and ctx.element_cache_req:
+        node = CachedControlHelper.build_cached_control(node, ctx.element_cache_req)
+
+    # Identifies the element across snapshots, and maps UIA events back to this window
+    runtime_id = normalize_runtime_id(node.GetCachedPropertyValue(PropertyId.RuntimeIdProperty))
+    control_type_name = node.CachedControlTypeName
+    element_bounding_box = node.CachedBoundingRectangle
+    row = record_node(node, control_type_name, element_bounding_box, runtime_id, parent, ctx)
+    if row is None:
+        # Its children hang off the nearest recorded ancestor, only rows are listed
+        return node, parent
+    arena = ctx.arena
+
+    is_browser = ctx.is_browser
+    # Checks to skip the nodes that are not interactive
+    is_offscreen = node.CachedIsOffscreen
+    # Scrollable check
+    if (
+        control_type_name not in (INTERACTIVE_CONTROL_TYPE_NAMES | INFORMATIVE_CONTROL_TYPE_NAMES)
+    ) and not is_offscreen:
+        try:
+            scroll_pattern = CachedPattern.scroll(node)
+            if scroll_pattern.available and scroll_pattern.VerticallyScrollable:
+                box = element_bounding_box
+                cache_profile_stats.record(PropertyId.BoundingRectangleProperty, cached=True)
+                x, y = random_point_within_bounding_box(box=box, scale_factor=0.8)
+                name = node.CachedName
+                automation_id = node.CachedAutomationId
+                localized_control_type = node.CachedLocalizedControlType
+                horizontal_scrollable = scroll_pattern.HorizontallyScrollable
+                flags = VERTICALLY_SCROLLABLE
+                if horizontal_scrollable:
+                    flags |= HORIZONTALLY_SCROLLABLE
+                if node.CachedHasKeyboardFocus:
+                    flags |= FOCUSED
+                slot = arena.list_node(
+                    SCROLLABLE,
+                    row,
+                    (box.left, box.top, box.right, box.bottom),
+                    (x, y),
+                    name.strip() or automation_id or localized_control_type.capitalize() or "''",
+                    localized_control_type.title(),
+                    ctx.window_name,
+                    element_id(runtime_id, ctx.window_name, "scroll", name),
+                    flags=flags,
+                    scroll_percents=(
+                        scroll_pattern.HorizontalScrollPercent if horizontal_scrollable else 0,
+                        scroll_pattern.VerticalScrollPercent,
+                    ),
+                    element=node,
+                )
+                ctx.scrollable_nodes.append(slot)
+        except Exception:
+            pass
+
+    # Interactive and Informative checks
+    # Pre-calculate common properties
+    is_control_element = node.CachedIsControlElement
+    area = element_bounding_box.width() * element_bounding_box.height()
+
+    # Is Visible Check
+    is_visible = (
+        (area > 0)
+        and (not is_offscreen or control_type_name == "EditControl")
+        and is_control_element
+    )
+    if not is_visible or not node.CachedIsEnabled:
+        return node, row
+
+    # Determine is_keyboard_focusable
+    if control_type_name in KEYBOARD_FOCUSABLE_CONTROL_TYPE_NAMES:
+        is_keyboard_focusable = True
+    else:
+        is_keyboard_focusable = node.CachedIsKeyboardFocusable
+
+    # Interactive Check
+    is_interactive = False
+    if (
+        is_browser
+        and control_type_name in set(["DataItemControl", "ListItemControl"])
+        and not is_keyboard_focusable
+    ):
+        is_interactive = False
+    elif not is_browser and control_type_name == "ImageControl" and is_keyboard_focusable:
+        is_interactive = True
+    elif control_type_name in (INTERACTIVE_CONTROL_TYPE_NAMES | DOCUMENT_CONTROL_TYPE_NAMES):
+        # Role check
+        legacy_pattern = CachedPattern.legacy_accessible(node)
+        try:
+            is_role_interactive = (
+                AccessibleRoleNames.get(legacy_pattern.Role, "Default") in INTERACTIVE_ROLES
+            )
+        except Exception:
+            is_role_interactive = False
+
+        # Image check
+        is_image = False
+        if control_type_name == "ImageControl":  # approximated
+            localized = node.CachedLocalizedControlType
+            if localized == "graphic" or not is_keyboard_focusable:
+                is_image = True
+
+        if is_role_interactive and (not is_image or is_keyboard_focusable):
+            is_interactive = True
+
+    elif control_type_name == "GroupControl":
+        if is_browser:
+            legacy_pattern = CachedPattern.legacy_accessible(node)
+            try:
+                is_role_interactive = (
+                    AccessibleRoleNames.get(legacy_pattern.Role, "Default") in INTERACTIVE_ROLES
+                )
+            except Exception:
+                is_role_interactive = False
+
+            is_default_action = False
+            try:
+                if legacy_pattern.DefaultAction.title() in DEFAULT_ACTIONS:
+                    is_default_action = True
+            except Exception:
+                pass
+
+            if is_role_interactive and (is_default_action or is_keyboard_focusable):
+                is_interactive = True
+
+    if is_interactive:
+        legacy_pattern = CachedPattern.legacy_accessible(node)
+        value = legacy_pattern.Value.strip() if legacy_pattern.Value is not None else ""
+        in_dom = is_browser and is_dom
+        name = node.CachedName.strip()
+        control_type = node.CachedLocalizedControlType.title()
+        list_interactive(
+            ctx,
+            ctx.dom_interactive_nodes if in_dom else ctx.interactive_nodes,
+            row,
+            clip_rect(
+                ctx.screen_box,
+                ctx.dom_bounding_box if in_dom else ctx.window_bounding_box,
+                element_bounding_box,
+            ),
+            name=name,
+            control_type=control_type,
+            value=value,
+            shortcut=node.CachedAcceleratorKey,
+            is_focused=node.CachedHasKeyboardFocus,
+            id=element_id(runtime_id, ctx.window_name, control_type, name),
+            element=node,
+        )
+        if in_dom:
+            dom_correction(node, ctx)
+
+    # Informative Check
+    if is_browser and is_dom:
+        if control_type_name in INFORMATIVE_CONTROL_TYPE_NAMES:
+            # Images are not text: graphics, and images that cannot take keyboard focus
+            is_image = control_type_name == "ImageControl" and (
+                not is_keyboard_focusable or node.CachedLocalizedControlType == "graphic"
+            )
+            if not is_image:
+                ctx.dom_informative_nodes.append(
+                    arena.list_node(TEXT, row, (0, 0, 0, 0), (0, 0), node.CachedName.strip())
+                )
+    return node, row
+
+
+def record_node(
+    node: Control,
+    control_type_name: str,
+    rect: Rect,
+    runtime_id: tuple[int, ...] | None,
+    parent: int,
+    ctx: TraversalContext,
+) -> int | None:
+    """Append the node to the arena, returns its row, None if it cannot be read."""
+    try:
+        return ctx.arena.append(
+            control_type_name,
+            node.CachedName,
+            node.CachedAutomationId,
+            node.CachedClassName,
+            (rect.left, rect.top, rect.right, rect.bottom),
+            runtime_id,
+            parent,
+        )
+    except Exception:
+        return None
+
+
+def traverse(root: Control, ctx: TraversalContext):
+    """
+    Depth-first traversal of a window with an explicit stack.
+
+    Each frame is (node, is_dom, is_dialog, depth, parent) where the flags are the
+    ones of the parent and parent is its row in the arena, if recorded; `enter` runs when
+    a frame is popped, so dialogs clear exactly the nodes collected before them, as
+    in the recursive traversal.
+    """
+    limits = ctx.limits
+    stack: list[tuple[Any, bool, bool, int, int]] = [(root, False, False, 0, NO_PARENT)]
+    try:
+        while stack:
+            if limits.max_nodes is not None and ctx.visited >= limits.max_nodes:
+                ctx.truncated_by = "node limit"
+                break
+            node, is_dom, is_dialog, depth, parent = stack.pop()
+            if depth:
+                is_dom, is_dialog = enter(node, ctx, is_dom, is_dialog)
+            node, parent = visit(node, ctx, is_dom, parent)
+
+            if limits.max_depth is not None and depth >= limits.max_depth:
+                continue
+
+            children = CachedControlHelper.get_cached_children(node, ctx.children_cache_req)
+            profile = ctx.app_profile
+            if profile is not None and profile.has_skip_rules and children:
+                kept = [child for child in children if not profile.skips(child)]
+                ctx.skipped += len(children) - len(kept)
+                children = kept
+            # Before the children limit, so a long list is summarized rather than truncated
+            if ctx.list_summary_items is not None and len(children) >= LIST_SUMMARY_MIN_ITEMS:
+                children = summarize_lists(node, children, ctx, is_dom)
+            if limits.max_children is not None and len(children) > limits.max_children:
+                children = children[: limits.max_children]
+                ctx.truncated_by = ctx.truncated_by or "children limit"
+
+            if ctx.viewport_margin is not None and children:
+                viewport = ctx.viewport(is_dom)
+                kept = [c for c in children if in_viewport(c, viewport, ctx.viewport_margin)]
+                ctx.pruned += len(children) - len(kept)
+                children = kept
+
+            # Pushed in reverse visit order: right to left for normal apps, left to right for DOM
+            depth += 1
+            for child in reversed(children) if is_dom else children:
+                stack.append((child, is_dom, is_dialog, depth, parent))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error in tree traversal: {e}", exc_info=True)
+        raise
@@ -1,19 +1,31 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 import random
-from windows_mcp.uia import Control
+import zlib
+
+from windows_mcp.tree.arena import NodeView
 
+if TYPE_CHECKING:
+    from windows_mcp.uia import Control, Rect
 
-def random_point_within_bounding_box(node: Control, scale_factor: float = 1.0) -> tuple[int, int]:
+
+def random_point_within_bounding_box(
+    node: Control | None = None, scale_factor: float = 1.0, box: Rect | None = None
+) -> tuple[int, int]:
     """
     Generate a random point within a scaled-down bounding box.
 
     Args:
         node (Control): The node with a bounding rectangle
         scale_factor (float, optional): The factor to scale down the bounding box. Defaults to 1.0.
+        box (Rect, optional): An already known (e.g. cached) bounding rectangle, avoids a live call.
 
     Returns:
         tuple: A random point (x, y) within the scaled-down bounding box
     """
-    box = node.BoundingRectangle
+    if box is None:
+        box = node.BoundingRectangle
     scaled_width = int(box.width() * scale_factor)
     scaled_height = int(box.height() * scale_factor)
     scaled_left = box.left + (box.width() - scaled_width) // 2
@@ -21,3 +33,46 @@ def random_point_within_bounding_box(node: Control, scale_factor: float = 1.0) -
     x = random.randint(scaled_left, scaled_left + scaled_width)
     y = random.randint(scaled_top, scaled_top + scaled_height)
     return (x, y)
+
+
+def element_id(runtime_id: tuple[int, ...] | None, *fallback: object) -> str:
+    """
+    Short id of an element that stays the same across snapshots.
+
+    Derived from the UIA runtime id, which is stable for the lifetime of the element.
+    Elements without one are identified by `fallback` (e.g. window, type and name) instead.
+    """
+    key = runtime_id if runtime_id else ("~", *fallback)
+    checksum = zlib.crc32(".".join(map(str, key)).encode("utf-8"))
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        checksum, digit = divmod(checksum, 36)
+        text = digits[digit] + text
+        if not checksum:
+            return text
+
+
+def deduplicate_ids(nodes: Iterable) -> NodeView:
+    """
+    The nodes with the ids that collide within them suffixed, in order, so that every
+    id resolves to one node.
+
+    The suffixed ids belong to the view returned, the nodes given are left as they are:
+    they may be shared with the window cache and the previous snapshot.
+    """
+    view = NodeView.of(nodes)
+    seen: dict[str, int] = {}
+    renamed = {}
+    for position, node_id in enumerate(view.ids()):
+        if node_id:
+            count = seen.get(node_id, 0)
+            seen[node_id] = count + 1
+            if count:
+                renamed[position] = f"{node_id}-{count + 1}"
+    return view.with_ids(renamed)
+
+
+def filter_nodes(nodes: Iterable, predicate: Callable[[Any], bool]) -> NodeView:
+    """The nodes `predicate` holds for, in order, as a view of the same arenas."""
+    return NodeView.of(nodes).select(predicate)
@@ -1,47 +1,297 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Sequence
+
+# Columns of the rows of interactive and scrollable elements
+INTERACTIVE_COLUMNS = "id|window|control_type|name|coords|focus"
+SCROLLABLE_COLUMNS = "id|window|control_type|name|coords|h_scroll|h_pct|v_scroll|v_pct|focus"
 
 
 @dataclass
 class TreeState:
     root_node: "TreeElementNode" | None = None
     dom_node: "ScrollElementNode" | None = None
-    interactive_nodes: list["TreeElementNode"] = field(default_factory=list)
-    scrollable_nodes: list["ScrollElementNode"] = field(default_factory=list)
-    dom_informative_nodes: list["TextElementNode"] = field(default_factory=list)
+    # Views over the arenas of the traversals when built by `Tree`, see `NodeView`
+    interactive_nodes: Sequence["TreeElementNode"] = field(default_factory=list)
+    scrollable_nodes: Sequence["ScrollElementNode"] = field(default_factory=list)
+    dom_informative_nodes: Sequence["TextElementNode"] = field(default_factory=list)
+    truncated_windows: list["TruncatedWindow"] = field(default_factory=list)
+    list_summaries: list["ListSummary"] = field(default_factory=list)
+    scope: "SnapshotScope | None" = None  # None for the whole desktop
+    generation: int = 0  # numbers the snapshots of a Tree, cursors are only valid for theirs
 
     def interactive_elements_to_string(self) -> str:
         if not self.interactive_nodes:
             return "No interactive elements"
         # TOON-like format: Pipe-separated values with clear header
         # Using abbreviations in header to save tokens
-        header = "# id|window|control_type|name|coords|focus"
+        header = f"# {INTERACTIVE_COLUMNS}"
         rows = [header]
         for idx, node in enumerate(self.interactive_nodes):
-            row = f"{idx}|{node.window_name}|{node.control_type}|{node.name}|{node.center.to_string()}|{node.is_focused}"
-            rows.append(row)
+            rows.append(node.to_string(node.id or idx))
         return "\n".join(rows)
 
     def scrollable_elements_to_string(self) -> str:
         if not self.scrollable_nodes:
             return "No scrollable elements"
         # TOON-like format
-        header = "# id|window|control_type|name|coords|h_scroll|h_pct|v_scroll|v_pct|focus"
+        header = f"# {SCROLLABLE_COLUMNS}"
         rows = [header]
         base_index = len(self.interactive_nodes)
         for idx, node in enumerate(self.scrollable_nodes):
-            row = (
-                f"{base_index + idx}|{node.window_name}|{node.control_type}|{node.name}|"
-                f"{node.center.to_string()}|{node.horizontal_scrollable}|{node.horizontal_scroll_percent}|"
-                f"{node.vertical_scrollable}|{node.vertical_scroll_percent}|{node.is_focused}"
-            )
-            rows.append(row)
+            rows.append(node.to_string(node.id or base_index + idx))
+        return "\n".join(rows)
+
+    def truncated_windows_to_string(self) -> str:
+        if not self.truncated_windows:
+            return ""
+        header = "# window|reason"
+        rows = [header]
+        for window in self.truncated_windows:
+            rows.append(f"{window.name}|{window.reason}")
+        return "\n".join(rows)
+
+    def list_summaries_to_string(self) -> str:
+        if not self.list_summaries:
+            return ""
+        header = "# id|window|name|item_type|items|listed|v_pct"
+        rows = [header]
+        for summary in self.list_summaries:
+            rows.append(summary.to_string())
+        return "\n".join(rows)
+
+    def diff(self, previous: "TreeState | None") -> "TreeStateDiff":
+        """
+        Elements added, removed and changed since `previous`, matched by id.
+
+        Elements of windows that were truncated this time, or outside the scope of this
+        snapshot, are not reported as removed, they were only not seen.
+        """
+        truncated = {window.name for window in self.truncated_windows}
+        previous_interactive = previous.interactive_nodes if previous else []
+        previous_scrollable = previous.scrollable_nodes if previous else []
+        if self.scope is not None:
+            previous_interactive = [n for n in previous_interactive if self.scope.contains(n)]
+            previous_scrollable = [n for n in previous_scrollable if self.scope.contains(n)]
+        interactive = _diff_nodes(previous_interactive, self.interactive_nodes, truncated)
+        scrollable = _diff_nodes(previous_scrollable, self.scrollable_nodes, truncated)
+        return TreeStateDiff(
+            interactive_added=interactive[0],
+            interactive_removed=interactive[1],
+            interactive_changed=interactive[2],
+            scrollable_added=scrollable[0],
+            scrollable_removed=scrollable[1],
+            scrollable_changed=scrollable[2],
+            is_initial=previous is None,
+        )
+
+
+def _diff_nodes(
+    previous: list["TreeElementNode | ScrollElementNode"],
+    current: list["TreeElementNode | ScrollElementNode"],
+    truncated_windows: set[str],
+) -> tuple[list, list, list]:
+    # Nodes without an id can only be matched by their row
+    previous_by_key = {node.id or node.to_string(""): node for node in previous}
+    current_keys = set()
+    added, changed = [], []
+    for node in current:
+        key = node.id or node.to_string("")
+        current_keys.add(key)
+        old = previous_by_key.get(key)
+        if old is None:
+            added.append(node)
+        elif old.to_string("") != node.to_string(""):
+            changed.append(node)
+    removed = [
+        node
+        for key, node in previous_by_key.items()
+        if key not in current_keys and node.window_name not in truncated_windows
+    ]
+    return added, removed, changed
+
+
+@dataclass
+class TreeStateDiff:
+    interactive_added: list["TreeElementNode"] = field(default_factory=list)
+    interactive_removed: list["TreeElementNode"] = field(default_factory=list)
+    interactive_changed: list["TreeElementNode"] = field(default_factory=list)
+    scrollable_added: list["ScrollElementNode"] = field(default_factory=list)
+    scrollable_removed: list["ScrollElementNode"] = field(default_factory=list)
+    scrollable_changed: list["ScrollElementNode"] = field(default_factory=list)
+    is_initial: bool = False  # no previous snapshot, everything is added
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.interactive_added
+            or self.interactive_removed
+            or self.interactive_changed
+            or self.scrollable_added
+            or self.scrollable_removed
+            or self.scrollable_changed
+        )
+
+    @staticmethod
+    def _to_string(header: str, added: list, removed: list, changed: list) -> str:
+        # Changes are prefixed to the rows of the full listing: + added, - removed, ~ changed
+        rows = [f"# change|{header}"]
+        for change, nodes in (("+", added), ("~", changed), ("-", removed)):
+            rows.extend(f"{change}|{node.to_string(node.id)}" for node in nodes)
         return "\n".join(rows)
 
+    def interactive_elements_to_string(self) -> str:
+        if not (self.interactive_added or self.interactive_removed or self.interactive_changed):
+            return "No changes in interactive elements"
+        return self._to_string(
+            INTERACTIVE_COLUMNS,
+            self.interactive_added,
+            self.interactive_removed,
+            self.interactive_changed,
+        )
+
+    def scrollable_elements_to_string(self) -> str:
+        if not (self.scrollable_added or self.scrollable_removed or self.scrollable_changed):
+            return "No changes in scrollable elements"
+        return self._to_string(
+            SCROLLABLE_COLUMNS,
+            self.scrollable_added,
+            self.scrollable_removed,
+            self.scrollable_changed,
+        )
+
+
+@dataclass
+class WindowProgress:
+    """A window of a streamed snapshot, reported as soon as its nodes are in."""
+
+    handle: int
+    name: str
+    interactive_nodes: Sequence["TreeElementNode"]
+    scrollable_nodes: Sequence["ScrollElementNode"]
+    done: int  # windows reported so far, this one included
+    total: int  # windows with nodes to report
+    is_active: bool = False
+
+    def to_string(self) -> str:
+        # Ids of the active window are final, the others may still get a suffix when merged
+        if not self.is_active:
+            return (
+                f"{self.name}: {len(self.interactive_nodes)} interactive and "
+                f"{len(self.scrollable_nodes)} scrollable elements"
+            )
+        state = TreeState(
+            interactive_nodes=self.interactive_nodes, scrollable_nodes=self.scrollable_nodes
+        )
+        return "\n\n".join(
+            [
+                f"Focused Window {self.name}:",
+                state.interactive_elements_to_string(),
+                state.scrollable_elements_to_string(),
+            ]
+        )
+
 
 @dataclass
+class SnapshotPage:
+    """Ranked elements of a snapshot that fit in a budget, see `windows_mcp.tree.serializer`."""
+
+    interactive_nodes: list["TreeElementNode"] = field(default_factory=list)
+    scrollable_nodes: list["ScrollElementNode"] = field(default_factory=list)
+    offset: int = 0  # rank of the first element of the page
+    total: int = 0  # interactive and scrollable elements of the snapshot
+    next_cursor: str | None = None  # None on the last page
+
+    @property
+    def listed(self) -> int:
+        return len(self.interactive_nodes) + len(self.scrollable_nodes)
+
+    def next_page_to_string(self) -> str:
+        if self.next_cursor is None:
+            return ""
+        return (
+            f"{self.listed} of {self.total} elements listed from rank {self.offset}, "
+            f'pass cursor="{self.next_cursor}" to get the next ones'
+        )
+
+    def interactive_elements_to_string(self) -> str:
+        return TreeState(interactive_nodes=self.interactive_nodes).interactive_elements_to_string()
+
+    def scrollable_elements_to_string(self) -> str:
+        return TreeState(scrollable_nodes=self.scrollable_nodes).scrollable_elements_to_string()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "interactive_elements": [node.to_dict() for node in self.interactive_nodes],
+            "scrollable_elements": [node.to_dict() for node in self.scrollable_nodes],
+            "offset": self.offset,
+            "total": self.total,
+            "next_cursor": self.next_cursor,
+        }
+
+
+@dataclass
+class TruncatedWindow:
+    handle: int
+    name: str
+    reason: str = "deadline"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"window": self.name, "reason": self.reason}
+
+
+@dataclass
+class SnapshotScope:
+    """Part of the desktop a snapshot covers, None covers everything."""
+
+    window_names: set[str] | None = None  # windows traversed
+    region: tuple[int, int, int, int] | None = None  # (left, top, right, bottom) on screen
+
+    def contains(self, node: "TreeElementNode | ScrollElementNode") -> bool:
+        if self.window_names is not None and node.window_name not in self.window_names:
+            return False
+        if self.region is not None:
+            left, top, right, bottom = self.region
+            return left <= node.center.x < right and top <= node.center.y < bottom
+        return True
+
+
+@dataclass
+class ListSummary:
+    """A long run of sibling items of which only the first and last visible ones are listed."""
+
+    window_name: str
+    name: str  # of the list
+    item_type: str
+    items: int  # items of the run, virtualized lists only count the realized ones
+    listed: int
+    # The list as a scrollable element, its id is the label to page through the items with
+    container: "ScrollElementNode | None" = field(default=None, repr=False)
+
+    def to_string(self) -> str:
+        container = self.container
+        label = container.id if container is not None else ""
+        v_pct = container.vertical_scroll_percent if container is not None else ""
+        return (
+            f"{label}|{self.window_name}|{self.name}|{self.item_type}|"
+            f"{self.items}|{self.listed}|{v_pct}"
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        container = self.container
+        return {
+            "id": container.id if container is not None else None,
+            "window": self.window_name,
+            "name": self.name,
+            "item_type": self.item_type,
+            "items": self.items,
+            "listed": self.listed,
+            "v_pct": container.vertical_scroll_percent if container is not None else None,
+        }
+
+
+@dataclass(slots=True)
 class BoundingBox:
     left: int
     top: int
@@ -77,7 +327,7 @@ class BoundingBox:
         return x1, y1, x2, y2
 
 
-@dataclass
+@dataclass(slots=True)
 class Center:
     x: int
     y: int
@@ -86,7 +336,7 @@ class Center:
         return f"({self.x},{self.y})"
 
 
-@dataclass
+@dataclass(slots=True)
 class TreeElementNode:
     bounding_box: BoundingBox
     center: Center
@@ -97,6 +347,24 @@ class TreeElementNode:
     shortcut: str = ""
     xpath: str = ""
     is_focused: bool = False
+    id: str = ""  # stable across snapshots, see `element_id`
+    runtime_id: tuple[int, ...] | None = None
+    # UIA element the node was built from, for acting on it without searching again
+    element: Any = field(default=None, compare=False, repr=False)
+
+    def to_string(self, label: str | int) -> str:
+        return f"{label}|{self.window_name}|{self.control_type}|{self.name}|{self.center.to_string()}|{self.is_focused}"
+
+    def to_dict(self) -> dict[str, Any]:
+        # Same fields as `to_string`
+        return {
+            "id": self.id,
+            "window": self.window_name,
+            "control_type": self.control_type,
+            "name": self.name,
+            "coords": [self.center.x, self.center.y],
+            "focus": self.is_focused,
+        }
 
     def update_from_node(self, node: "TreeElementNode"):
         self.name = node.name
@@ -108,6 +376,9 @@ class TreeElementNode:
         self.center = node.center
         self.xpath = node.xpath
         self.is_focused = node.is_focused
+        self.id = node.id
+        self.runtime_id = node.runtime_id
+        self.element = node.element
 
     # Legacy method kept for compatibility if needed, but not used in new format
     def to_row(self, index: int):
@@ -123,7 +394,7 @@ class TreeElementNode:
         ]
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrollElementNode:
     name: str
     control_type: str
@@ -136,6 +407,30 @@ class ScrollElementNode:
     vertical_scrollable: bool
     vertical_scroll_percent: float
     is_focused: bool
+    id: str = ""
+    runtime_id: tuple[int, ...] | None = None
+    element: Any = field(default=None, compare=False, repr=False)
+
+    def to_string(self, label: str | int) -> str:
+        return (
+            f"{label}|{self.window_name}|{self.control_type}|{self.name}|"
+            f"{self.center.to_string()}|{self.horizontal_scrollable}|{self.horizontal_scroll_percent}|"
+            f"{self.vertical_scrollable}|{self.vertical_scroll_percent}|{self.is_focused}"
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "window": self.window_name,
+            "control_type": self.control_type,
+            "name": self.name,
+            "coords": [self.center.x, self.center.y],
+            "h_scroll": self.horizontal_scrollable,
+            "h_pct": self.horizontal_scroll_percent,
+            "v_scroll": self.vertical_scrollable,
+            "v_pct": self.vertical_scroll_percent,
+            "focus": self.is_focused,
+        }
 
     # Legacy method kept for compatibility
     def to_row(self, index: int, base_index: int):
@@ -153,7 +448,7 @@ class ScrollElementNode:
         ]
 
 
-@dataclass
+@dataclass(slots=True)
 class TextElementNode:
     text: str
 
@@ -0,0 +1,214 @@
+"""
+Per-window node cache for incremental snapshots.
+
+Keeps the nodes produced by the last traversal of every top-level window,
+keyed by HWND, together with the UIA runtime ids seen inside that window.
+UIA events (structure, property and focus changes) mark the owning window
+dirty so that only dirty windows are traversed again on the next snapshot.
+"""
+
+from windows_mcp.tree.config import HWND_RUNTIME_ID_PREFIX
+from windows_mcp.tree.views import TreeElementNode, ScrollElementNode, TextElementNode
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Iterable, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+RuntimeId = tuple[int, ...]
+
+
+def normalize_runtime_id(runtime_id: Iterable[int] | None) -> RuntimeId | None:
+    """Convert a UIA runtime id (list, tuple or SAFEARRAY) into a hashable tuple."""
+    if not runtime_id:
+        return None
+    try:
+        return tuple(int(part) for part in runtime_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def handle_from_runtime_id(runtime_id: RuntimeId | None) -> int | None:
+    """Return the HWND encoded in a runtime id of an HWND-backed element, if any."""
+    if runtime_id and len(runtime_id) == 2 and runtime_id[0] == HWND_RUNTIME_ID_PREFIX:
+        return runtime_id[1]
+    return None
+
+
+@dataclass
+class WindowState:
+    """
+    What a traversal learns about a window besides its nodes. Kept by the snapshot
+    that uses the nodes, on its own thread, never by the worker that traversed it.
+    """
+
+    dom: Any = None
+    dom_bounding_box: Any = None
+    query_window: Any = None  # QueryWindow over the arena of the traversal
+    list_summaries: list = field(default_factory=list)
+    truncated_by: str | None = None  # limit that cut the traversal short, if any
+
+
+@dataclass
+class WindowCacheEntry:
+    handle: int
+    interactive_nodes: Sequence[TreeElementNode]
+    scrollable_nodes: Sequence[ScrollElementNode]
+    dom_informative_nodes: Sequence[TextElementNode]
+    window_rect: tuple[int, int, int, int] | None = None
+    is_browser: bool = False
+    use_dom: bool = False
+    state: WindowState = field(default_factory=WindowState)
+    runtime_ids: set[RuntimeId] = field(default_factory=set)
+    dirty: bool = False
+
+    @property
+    def nodes(
+        self,
+    ) -> tuple[Sequence[TreeElementNode], Sequence[ScrollElementNode], Sequence[TextElementNode]]:
+        return self.interactive_nodes, self.scrollable_nodes, self.dom_informative_nodes
+
+
+class WindowNodeCache:
+    """
+    Thread-safe cache of traversal results per top-level window.
+
+    The cache is disabled until `enable()` is called, which should only happen once
+    UIA event handlers are feeding `invalidate_*` calls; without events a cached
+    window can never be marked dirty and would be served stale.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries: dict[int, WindowCacheEntry] = {}
+        self._runtime_index: dict[RuntimeId, int] = {}
+        # Bumped on every invalidation so results of a traversal that raced an event are stored dirty
+        self._versions: dict[int, int] = {}
+        self._global_version = 0
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            self._entries.clear()
+            self._runtime_index.clear()
+            self._versions.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, handle: int) -> bool:
+        return handle in self._entries
+
+    def get(
+        self,
+        handle: int,
+        window_rect: tuple[int, int, int, int] | None,
+        is_browser: bool = False,
+        use_dom: bool = False,
+    ) -> WindowCacheEntry | None:
+        """Return the clean entry for `handle`, or None if it has to be traversed again."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(handle)
+            if (
+                entry is None
+                or entry.dirty
+                or entry.window_rect != window_rect
+                or entry.is_browser != is_browser
+                or entry.use_dom != use_dom
+            ):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def begin(self, handle: int) -> tuple[int, int]:
+        """Return a token to pass to `put` once the traversal of `handle` is done."""
+        with self._lock:
+            return self._versions.get(handle, 0), self._global_version
+
+    def put(self, entry: WindowCacheEntry, token: tuple[int, int] | None = None):
+        """Store a freshly traversed window, replacing any previous entry.
+
+        If the window was invalidated after `token` was taken, the entry is stored dirty.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if token is not None and token != (
+                self._versions.get(entry.handle, 0),
+                self._global_version,
+            ):
+                entry.dirty = True
+            self._drop(entry.handle)
+            self._entries[entry.handle] = entry
+            for runtime_id in entry.runtime_ids:
+                self._runtime_index[runtime_id] = entry.handle
+
+    def owner_of(self, runtime_id: Iterable[int] | None) -> int | None:
+        """Map a runtime id to the handle of the cached window that contains it."""
+        runtime_id = normalize_runtime_id(runtime_id)
+        if runtime_id is None:
+            return None
+        with self._lock:
+            handle = self._runtime_index.get(runtime_id)
+            if handle is None:
+                # Child HWND controls share the prefix, so only trust it for cached top level windows
+                hwnd = handle_from_runtime_id(runtime_id)
+                if hwnd in self._entries:
+                    handle = hwnd
+            return handle
+
+    def invalidate(self, handle: int) -> bool:
+        """Mark a window dirty. Returns True if the window was cached."""
+        with self._lock:
+            self._versions[handle] = self._versions.get(handle, 0) + 1
+            entry = self._entries.get(handle)
+            if entry is None:
+                return False
+            if not entry.dirty:
+                entry.dirty = True
+                self.invalidations += 1
+                logger.debug(f"Window {handle} marked dirty")
+            return True
+
+    def invalidate_runtime_id(self, runtime_id: Iterable[int] | None) -> int | None:
+        """Mark the window owning `runtime_id` dirty and return its handle, if known."""
+        handle = self.owner_of(runtime_id)
+        if handle is not None:
+            self.invalidate(handle)
+        return handle
+
+    def invalidate_all(self):
+        with self._lock:
+            self._global_version += 1
+            for entry in self._entries.values():
+                if not entry.dirty:
+                    entry.dirty = True
+                    self.invalidations += 1
+
+    def retain(self, handles: Iterable[int]):
+        """Forget windows that are no longer present on the desktop."""
+        live = set(handles)
+        with self._lock:
+            for handle in [h for h in self._entries if h not in live]:
+                self._drop(handle)
+            for handle in [h for h in self._versions if h not in live]:
+                del self._versions[handle]
+
+    def _drop(self, handle: int):
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return
+        for runtime_id in entry.runtime_ids:
+            if self._runtime_index.get(runtime_id) == handle:
+                del self._runtime_index[runtime_id]
@@ -1,4 +1,10 @@
+import sys
+
 from .enums import *
-from .core import *
-from .patterns import *
-from .controls import *
+from .conditions import *
+
+# Only the constants load off Windows, which lets the tree engine run against fake controls
+if sys.platform == "win32":
+    from .core import *
+    from .patterns import *
+    from .controls import *
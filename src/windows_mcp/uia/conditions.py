@@ -0,0 +1,221 @@
+"""
+Condition builder for UI Automation searches.
+
+Conditions are plain descriptions that compile to native IUIAutomationCondition
+objects with `Build`, so FindFirst and FindAll evaluate them inside UI Automation
+in a single call instead of reading properties node by node from Python:
+
+    condition = PropertyCondition(PropertyId.ControlTypeProperty, ControlType.ButtonControl) & (
+        PropertyCondition(PropertyId.NameProperty, "OK")
+        | PropertyCondition(PropertyId.NameProperty, "ok", PropertyConditionFlags.PropertyConditionFlags_IgnoreCase)
+    )
+    control = FindControl(window, condition)
+
+`Matches` evaluates the same condition against a control's live properties, which
+is the fallback when a search cannot be expressed natively (e.g. a fixed depth).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .enums import PropertyConditionFlags, PropertyId, TreeScope
+
+# Search properties of `Control` that map to a property condition
+SEARCH_PROPERTY_IDS = {
+    "Name": PropertyId.NameProperty,
+    "ClassName": PropertyId.ClassNameProperty,
+    "AutomationId": PropertyId.AutomationIdProperty,
+    "ControlType": PropertyId.ControlTypeProperty,
+}
+
+
+def _Automation():
+    from .core import _AutomationClient
+
+    return _AutomationClient.instance().IUIAutomation
+
+
+class Condition:
+    """Base of the condition builder; combine conditions with `&`, `|` and `~`."""
+
+    def __and__(self, other: Condition) -> AndCondition:
+        return AndCondition(self, other)
+
+    def __or__(self, other: Condition) -> OrCondition:
+        return OrCondition(self, other)
+
+    def __invert__(self) -> NotCondition:
+        return NotCondition(self)
+
+    def Build(self, automation=None):
+        """
+        Return the native IUIAutomationCondition.
+        automation: IUIAutomation, the process-wide instance if None.
+        """
+        raise NotImplementedError
+
+    def Matches(self, control) -> bool:
+        """Return bool, True if the live properties of `control` satisfy the condition."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class TrueCondition(Condition):
+    def Build(self, automation=None):
+        return (automation or _Automation()).CreateTrueCondition()
+
+    def Matches(self, control) -> bool:
+        return True
+
+
+@dataclass(frozen=True)
+class PropertyCondition(Condition):
+    """
+    propertyId: int, a value in class `PropertyId`.
+    value: the value to compare with.
+    flags: int, a combination of `PropertyConditionFlags`, only for string properties.
+        MatchSubstring needs Windows 10 1809 or later.
+    """
+
+    propertyId: int
+    value: Any
+    flags: int = PropertyConditionFlags.PropertyConditionFlags_None
+
+    def Build(self, automation=None):
+        automation = automation or _Automation()
+        if self.flags:
+            return automation.CreatePropertyConditionEx(self.propertyId, self.value, self.flags)
+        return automation.CreatePropertyCondition(self.propertyId, self.value)
+
+    def Matches(self, control) -> bool:
+        actual = control.GetPropertyValue(self.propertyId)
+        if not self.flags:
+            return actual == self.value
+        if not isinstance(actual, str) or not isinstance(self.value, str):
+            return False
+        expected = self.value
+        if self.flags & PropertyConditionFlags.PropertyConditionFlags_IgnoreCase:
+            actual, expected = actual.casefold(), expected.casefold()
+        if self.flags & PropertyConditionFlags.PropertyConditionFlags_MatchSubstring:
+            return expected in actual
+        return actual == expected
+
+
+@dataclass(frozen=True, init=False)
+class AndCondition(Condition):
+    conditions: tuple[Condition, ...]
+
+    def __init__(self, *conditions: Condition):
+        # Nested ANDs are flattened, `a & b & c` is one condition of three
+        flat = []
+        for condition in conditions:
+            flat.extend(
+                condition.conditions if isinstance(condition, AndCondition) else [condition]
+            )
+        object.__setattr__(self, "conditions", tuple(flat))
+
+    def Build(self, automation=None):
+        automation = automation or _Automation()
+        native = None
+        for condition in self.conditions:
+            built = condition.Build(automation)
+            native = built if native is None else automation.CreateAndCondition(native, built)
+        return native if native is not None else automation.CreateTrueCondition()
+
+    def Matches(self, control) -> bool:
+        return all(condition.Matches(control) for condition in self.conditions)
+
+
+@dataclass(frozen=True, init=False)
+class OrCondition(Condition):
+    conditions: tuple[Condition, ...]
+
+    def __init__(self, *conditions: Condition):
+        flat = []
+        for condition in conditions:
+            flat.extend(condition.conditions if isinstance(condition, OrCondition) else [condition])
+        object.__setattr__(self, "conditions", tuple(flat))
+
+    def Build(self, automation=None):
+        automation = automation or _Automation()
+        native = None
+        for condition in self.conditions:
+            built = condition.Build(automation)
+            native = built if native is None else automation.CreateOrCondition(native, built)
+        return native if native is not None else automation.CreateFalseCondition()
+
+    def Matches(self, control) -> bool:
+        return any(condition.Matches(control) for condition in self.conditions)
+
+
+@dataclass(frozen=True)
+class NotCondition(Condition):
+    condition: Condition
+
+    def __invert__(self) -> Condition:
+        return self.condition
+
+    def Build(self, automation=None):
+        automation = automation or _Automation()
+        return automation.CreateNotCondition(self.condition.Build(automation))
+
+    def Matches(self, control) -> bool:
+        return not self.condition.Matches(control)
+
+
+def ConditionFromSearchProperties(searchProperties: dict[str, Any]) -> Condition | None:
+    """
+    Translate the searchProperties of a `Control` into a condition.
+    Return None if a property has no native equivalent (RegexName, Depth and Compare).
+    """
+    if not searchProperties:
+        return None
+    conditions = []
+    for key, value in searchProperties.items():
+        if key in SEARCH_PROPERTY_IDS:
+            conditions.append(PropertyCondition(SEARCH_PROPERTY_IDS[key], value))
+        elif key == "SubName":
+            conditions.append(
+                PropertyCondition(
+                    PropertyId.NameProperty,
+                    value,
+                    PropertyConditionFlags.PropertyConditionFlags_MatchSubstring,
+                )
+            )
+        else:
+            return None
+    # The control type is the cheapest test, so it goes first
+    conditions.sort(key=lambda c: c.propertyId != PropertyId.ControlTypeProperty)
+    return conditions[0] if len(conditions) == 1 else AndCondition(*conditions)
+
+
+def SearchScope(maxDepth: int = 0xFFFFFFFF, findFromSelf: bool = False) -> int | None:
+    """
+    Return the `TreeScope` of a search down to `maxDepth`, None if no scope covers exactly
+    that depth (only children or all descendants can be expressed).
+    """
+    if maxDepth == 1:
+        scope = TreeScope.TreeScope_Children
+    elif maxDepth == 0xFFFFFFFF:
+        scope = TreeScope.TreeScope_Descendants
+    elif maxDepth <= 0:
+        scope = TreeScope.TreeScope_None
+    else:
+        return None
+    if findFromSelf:
+        scope |= TreeScope.TreeScope_Element
+    return scope if scope else None
+
+
+__all__ = [
+    "Condition",
+    "TrueCondition",
+    "PropertyCondition",
+    "AndCondition",
+    "OrCondition",
+    "NotCondition",
+    "ConditionFromSearchProperties",
+    "SearchScope",
+]
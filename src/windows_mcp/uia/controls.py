@@ -27,6 +27,7 @@ from .enums import *
 from .core import *
 from .core import _AutomationClient
 from .patterns import *
+from .conditions import *
 
 
 METRO_WINDOW_CLASS_NAME = "Windows.UI.Core.CoreWindow"  # for Windows 8 and 8.1
@@ -190,6 +191,25 @@ class Control:
                 pass
         return None
 
+    @staticmethod
+    def CreateControlFromCachedElement(
+        element: "ctypes.POINTER(IUIAutomationElement)",
+    ) -> "Control" | None:
+        """
+        Create a concreate `Control` from a com type `IUIAutomationElement` whose ControlType is cached.
+        Avoids the cross-process call of `CreateControlFromElement`, falls back to it if not cached.
+        element: `ctypes.POINTER(IUIAutomationElement)`.
+        Return a subclass of `Control`, an instance of the control's real type.
+        """
+        if element:
+            try:
+                controlType = element.CachedControlType
+            except comtypes.COMError:
+                return Control.CreateControlFromElement(element)
+            if controlType in ControlConstructors:
+                return ControlConstructors[controlType](element=element)
+        return None
+
     @staticmethod
     def CreateControlFromControl(control: "Control") -> "Control" | None:
         """
@@ -256,7 +276,7 @@ class Control:
         Return a subclass of `Control`, an instance of the control's real type.
         """
         updatedElement = self.Element.BuildUpdatedCache(cacheRequest.check_request)
-        return Control.CreateControlFromElement(updatedElement)
+        return Control.CreateControlFromCachedElement(updatedElement)
 
     @property
     def CachedAcceleratorKey(self) -> str:
@@ -809,7 +829,7 @@ class Control:
             length = elementArray.Length
             for i in range(length):
                 element = elementArray.GetElement(i)
-                control = Control.CreateControlFromElement(element)
+                control = Control.CreateControlFromCachedElement(element)
                 if control:
                     controls.append(control)
             return controls
@@ -1170,10 +1190,14 @@ class Control:
         startTime2 = ProcessTime()
         if DEBUG_SEARCH_TIME:
             startDateTime = datetime.datetime.now()
+        # Matched inside UI Automation in one call when the search allows it
+        compare = self._CompareFunction
+        if self.foundIndex == 1 and SearchScope(self.searchDepth) is not None:
+            compare = ConditionFromSearchProperties(self.searchProperties) or compare
         while True:
             control = FindControl(
                 self.searchFromControl,
-                self._CompareFunction,
+                compare,
                 self.searchDepth,
                 False,
                 self.foundIndex,
@@ -5575,21 +5599,71 @@ def EnumAndLogControlAncestors(
         LogControl(curr, i, showAllName, showPid)
 
 
+def _SearchCacheRequest() -> CacheRequest:
+    """Cache request of the properties callers of a search usually read right after it."""
+    cacheRequest = CacheRequest()
+    cacheRequest.TreeScope = TreeScope.TreeScope_Element
+    for propertyId in (
+        PropertyId.NameProperty,
+        PropertyId.ControlTypeProperty,
+        PropertyId.ClassNameProperty,
+        PropertyId.AutomationIdProperty,
+        PropertyId.BoundingRectangleProperty,
+    ):
+        cacheRequest.AddProperty(propertyId)
+    return cacheRequest
+
+
+def FindControlByCondition(
+    control: Control | None,
+    condition: Condition,
+    maxDepth: int = 0xFFFFFFFF,
+    findFromSelf: bool = False,
+) -> Control | None:
+    """
+    Find the first control matching `condition` with a single IUIAutomationElement::FindFirstBuildCache,
+    the search runs inside UI Automation.
+    control: `Control` or its subclass, if it is None, search from root control(Desktop).
+    condition: `Condition`.
+    maxDepth: int, 1 or 0xFFFFFFFF, see `SearchScope`.
+    findFromSelf: bool, if False, do not compare self.
+    Return `Control` subclass or None if not find.
+    Raise ValueError if maxDepth can not be expressed as a TreeScope,
+    comtypes.COMError if UI Automation rejects the condition.
+    """
+    scope = SearchScope(maxDepth, findFromSelf)
+    if scope is None:
+        raise ValueError(f"maxDepth {maxDepth} has no TreeScope")
+    if not control:
+        control = GetRootControl()
+    return control.FindFirstBuildCache(scope, condition.Build(), _SearchCacheRequest())
+
+
 def FindControl(
     control: Control | None,
-    compare: Callable[[Control, int], bool],
+    compare: Callable[[Control, int], bool] | Condition,
     maxDepth: int = 0xFFFFFFFF,
     findFromSelf: bool = False,
     foundIndex: int = 1,
 ) -> Control | None:
     """
     control: `Control` or its subclass.
-    compare: Callable[[Control, int], bool], function(control: Control, depth: int) -> bool.
+    compare: Callable[[Control, int], bool], function(control: Control, depth: int) -> bool,
+        or a `Condition`, matched inside UI Automation when the search allows it.
     maxDepth: int, enum depth.
     findFromSelf: bool, if False, do not compare self.
     foundIndex: int, starts with 1, >= 1.
     Return `Control` subclass or None if not find.
     """
+    if isinstance(compare, Condition):
+        condition = compare
+        if foundIndex == 1 and SearchScope(maxDepth, findFromSelf) is not None:
+            try:
+                return FindControlByCondition(control, condition, maxDepth, findFromSelf)
+            except comtypes.COMError:
+                # e.g. MatchSubstring before Windows 10 1809, walk and match in Python instead
+                pass
+        compare = lambda control, depth: condition.Matches(control)  # noqa: E731
     foundCount = 0
     if not control:
         control = GetRootControl()
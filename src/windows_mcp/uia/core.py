@@ -66,10 +66,17 @@ class _AutomationClient:
         for retry in range(tryCount):
             try:
                 self.UIAutomationCore = comtypes.client.GetModule("UIAutomationCore.dll")
-                self.IUIAutomation = comtypes.client.CreateObject(
-                    "{ff48dba4-60ef-4201-aa87-54103eef594e}",
-                    interface=self.UIAutomationCore.IUIAutomation,
-                )
+                try:
+                    # CUIAutomation8 (Windows 8+) also implements IUIAutomation2 and its timeouts
+                    self.IUIAutomation = comtypes.client.CreateObject(
+                        "{e22ad333-b25f-460c-83d0-0581107395c9}",
+                        interface=self.UIAutomationCore.IUIAutomation,
+                    )
+                except Exception:
+                    self.IUIAutomation = comtypes.client.CreateObject(
+                        "{ff48dba4-60ef-4201-aa87-54103eef594e}",
+                        interface=self.UIAutomationCore.IUIAutomation,
+                    )
                 self.ViewWalker = self.IUIAutomation.RawViewWalker
                 # self.ViewWalker = self.IUIAutomation.ControlViewWalker
                 break
@@ -898,6 +905,39 @@ def GetWindowText(handle: int) -> str:
     return values.value
 
 
+def GetClassName(handle: int) -> str:
+    """
+    GetClassName from Win32.
+    handle: int, the handle of a native window.
+    Return str, the window class name, empty if the handle is invalid.
+    """
+    arrayType = ctypes.c_wchar * MAX_PATH
+    values = arrayType()
+    ctypes.windll.user32.GetClassNameW(ctypes.c_void_p(handle), values, ctypes.c_int(MAX_PATH))
+    return values.value
+
+
+def GetWindowProcessId(handle: int) -> int:
+    """
+    GetWindowThreadProcessId from Win32.
+    handle: int, the handle of a native window.
+    Return int, the id of the process that created the window, 0 if the handle is invalid.
+    """
+    processId = ctypes.wintypes.DWORD(0)
+    ctypes.windll.user32.GetWindowThreadProcessId(ctypes.c_void_p(handle), ctypes.byref(processId))
+    return processId.value
+
+
+def IsHungAppWindow(handle: int) -> bool:
+    """
+    IsHungAppWindow from Win32.
+    Determine whether the thread of a window stopped pumping messages (the window is not responding).
+    handle: int, the handle of a native window.
+    Return bool.
+    """
+    return bool(ctypes.windll.user32.IsHungAppWindow(ctypes.c_void_p(handle)))
+
+
 def SetWindowText(handle: int, text: str) -> bool:
     """
     SetWindowText from Win32.
@@ -2407,6 +2447,25 @@ def RemoveAllEventHandlers() -> None:
     _AutomationClient.instance().IUIAutomation.RemoveAllEventHandlers()
 
 
+def SetAutomationTimeouts(connectionTimeoutMs: int, transactionTimeoutMs: int) -> bool:
+    """
+    Set IUIAutomation2::ConnectionTimeout and IUIAutomation2::TransactionTimeout.
+    Calls to a provider that does not answer in time fail with UIA_E_TIMEOUT instead of blocking.
+    connectionTimeoutMs: int, milliseconds to wait for a connection to a provider.
+    transactionTimeoutMs: int, milliseconds to wait for a provider to complete a request.
+    Return bool, True if succeed, False if IUIAutomation2 is not available (before Windows 8).
+    Refer https://docs.microsoft.com/en-us/windows/win32/api/uiautomationclient/nn-uiautomationclient-iuiautomation2
+    """
+    client = _AutomationClient.instance()
+    try:
+        automation2 = client.IUIAutomation.QueryInterface(client.UIAutomationCore.IUIAutomation2)
+        automation2.ConnectionTimeout = connectionTimeoutMs
+        automation2.TransactionTimeout = transactionTimeoutMs
+        return True
+    except (comtypes.COMError, AttributeError):
+        return False
+
+
 # Condition creation helper functions
 
 
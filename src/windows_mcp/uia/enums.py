@@ -31,7 +31,7 @@ DEBUG_EXIST_DISAPPEAR = False
 S_OK = 0
 
 IsPy38OrHigher = sys.version_info[:2] >= (3, 8)
-IsNT6orHigher = os.sys.getwindowsversion().major >= 6
+IsNT6orHigher = sys.platform == "win32" and os.sys.getwindowsversion().major >= 6
 CurrentProcessIs64Bit = sys.maxsize > 0xFFFFFFFF
 ProcessTime = time.perf_counter  # this returns nearly 0 when first call it if python version <= 3.6
 ProcessTime()  # need to call it once if python version <= 3.6
@@ -1720,7 +1720,9 @@ class ClipboardFormat:
     CF_LOCALE = 16
     CF_DIBV5 = 17
     CF_MAX = 18
-    CF_HTML = ctypes.windll.user32.RegisterClipboardFormatW("HTML Format")
+    CF_HTML = (
+        ctypes.windll.user32.RegisterClipboardFormatW("HTML Format") if sys.platform == "win32" else 0
+    )
 
 
 class ActiveEnd(IntEnum):
@@ -0,0 +1,58 @@
+"""
+COM Global Interface Table.
+
+An interface pointer registered in the process-wide Global Interface Table can be
+fetched back on any thread, marshalled for the apartment of that thread. This is
+how UIA elements found on traversal workers are handed to the tool thread.
+"""
+
+from ctypes import HRESULT, POINTER, byref, c_ulong
+from comtypes import CLSCTX_INPROC_SERVER, COMMETHOD, GUID, CoCreateInstance, IUnknown
+
+CLSID_StdGlobalInterfaceTable = GUID("{00000323-0000-0000-C000-000000000046}")
+
+
+class IGlobalInterfaceTable(IUnknown):
+    _iid_ = GUID("{00000146-0000-0000-C000-000000000046}")
+    _methods_ = [
+        COMMETHOD(
+            [],
+            HRESULT,
+            "RegisterInterfaceInGlobal",
+            (["in"], POINTER(IUnknown), "pUnk"),
+            (["in"], POINTER(GUID), "riid"),
+            (["out"], POINTER(c_ulong), "pdwCookie"),
+        ),
+        COMMETHOD([], HRESULT, "RevokeInterfaceFromGlobal", (["in"], c_ulong, "dwCookie")),
+        COMMETHOD(
+            [],
+            HRESULT,
+            "GetInterfaceFromGlobal",
+            (["in"], c_ulong, "dwCookie"),
+            (["in"], POINTER(GUID), "riid"),
+            (["out"], POINTER(POINTER(IUnknown)), "ppv"),
+        ),
+    ]
+
+
+class GlobalInterfaceTable:
+    """Thin wrapper of the standard GIT, usable from any thread that initialized COM."""
+
+    def __init__(self):
+        self._table = CoCreateInstance(
+            CLSID_StdGlobalInterfaceTable,
+            interface=IGlobalInterfaceTable,
+            clsctx=CLSCTX_INPROC_SERVER,
+        )
+
+    def register(self, pointer) -> int:
+        """Register `pointer` (a comtypes interface pointer) and return its cookie."""
+        return self._table.RegisterInterfaceInGlobal(pointer, byref(pointer._iid_))
+
+    def get(self, cookie: int, interface: type):
+        """Return the registered pointer as `interface`, valid on the calling thread."""
+        unknown = self._table.GetInterfaceFromGlobal(cookie, byref(interface._iid_))
+        return unknown.QueryInterface(interface)
+
+    def revoke(self, cookie: int):
+        self._table.RevokeInterfaceFromGlobal(cookie)
@@ -537,16 +537,18 @@ class ItemContainerPattern:
         """Refer https://docs.microsoft.com/en-us/windows/win32/api/uiautomationclient/nn-uiautomationclient-iuiautomationitemcontainerpattern"""
         self.pattern = pattern
 
-    def FindItemByProperty(self, control: "Control", propertyId: int, propertyValue) -> "Control":
+    def FindItemByProperty(self, control: "Control" | None, propertyId: int, propertyValue) -> "Control":
         """
         Call IUIAutomationItemContainerPattern::FindItemByProperty.
-        control: `Control` or its subclass.
+        control: `Control` or its subclass, the item to search after, None to search from the first item.
         propertyValue: COM VARIANT according to propertyId? todo.
         propertyId: int, a value in class `PropertyId`.
         Return `Control` subclass, a control within a containing element, based on a specified property value.
         Refer https://docs.microsoft.com/en-us/windows/win32/api/uiautomationclient/nf-uiautomationclient-iuiautomationitemcontainerpattern-finditembyproperty
         """
-        ele = self.pattern.FindItemByProperty(control.Element, propertyId, propertyValue)
+        ele = self.pattern.FindItemByProperty(
+            control.Element if control else None, propertyId, propertyValue
+        )
         return Control.CreateControlFromElement(ele)
 
 
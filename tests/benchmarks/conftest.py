@@ -0,0 +1,13 @@
+import sys
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    skip_benchmark = pytest.mark.skip(reason="needs --run-benchmarks")
+    skip_windows = pytest.mark.skip(reason="needs a live Windows desktop session")
+    for item in items:
+        if "benchmark" in item.keywords and not config.getoption("--run-benchmarks"):
+            item.add_marker(skip_benchmark)
+        if "windows" in item.keywords and sys.platform != "win32":
+            item.add_marker(skip_windows)
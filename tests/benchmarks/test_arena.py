@@ -0,0 +1,79 @@
+"""
+Memory of a snapshot held as views over the arena, no Windows session needed.
+
+    pytest tests/benchmarks/test_arena.py --run-benchmarks -s
+
+Runs `Tree.get_nodes` on a synthetic window of 4000 buttons through the in-memory
+backend and reports its time (best of 5), the memory it leaves allocated per
+listed element and its peak, with the nodes held as it returns them, views over
+the arena, and with the same nodes built into lists of node objects.
+"""
+
+import gc
+from time import perf_counter
+import tracemalloc
+
+import pytest
+
+from windows_mcp.tree.memory import MemoryElement
+
+from tests.synthetic import WINDOW, synthetic_tree
+
+pytestmark = pytest.mark.benchmark
+
+COLUMNS, ROWS = 80, 50
+
+
+def button_grid() -> MemoryElement:
+    buttons = []
+    for i in range(COLUMNS * ROWS):
+        left, top = (i % COLUMNS) * 24, 40 + (i // COLUMNS) * 20
+        # Names repeat every 1000 elements, as in lists of similar items
+        buttons.append(
+            MemoryElement(
+                "ButtonControl", name=f"Item {i % 1000}", rect=(left, top, left + 20, top + 16)
+            )
+        )
+    pane = MemoryElement("PaneControl", rect=(0, 30, 1920, 1080), children=buttons)
+    return MemoryElement("WindowControl", name="Grid", rect=(0, 0, 1920, 1080), children=[pane])
+
+
+def retained(run) -> tuple[float, float]:
+    """Bytes still allocated per listed element while the result of `run` is held, peak KiB."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        nodes = run()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    elements = len(nodes[0]) + len(nodes[1])
+    return (current - base) / elements, (peak - base) / 1024
+
+
+def test_get_nodes_holds_views_over_the_arena():
+    tree, _ = synthetic_tree(button_grid())
+    try:
+        # Registry entries and cache requests are made by the first traversal
+        tree.get_nodes(WINDOW)
+        seconds = None
+        for _ in range(5):
+            start = perf_counter()
+            tree.get_nodes(WINDOW)
+            elapsed = perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+        results = {
+            "views": retained(lambda: tree.get_nodes(WINDOW)),
+            "node objects": retained(lambda: [list(nodes) for nodes in tree.get_nodes(WINDOW)]),
+        }
+    finally:
+        tree.shutdown()
+
+    print(f"\nget_nodes of {COLUMNS * ROWS} buttons: {seconds * 1000:.1f} ms")
+    print(f"{'nodes held as':<16}{'bytes/element':>15}{'peak KiB':>10}")
+    for name, (per_element, peak) in results.items():
+        print(f"{name:<16}{per_element:>15.0f}{peak:>10.0f}")
+
+    assert results["views"][0] < results["node objects"][0]
@@ -0,0 +1,107 @@
+"""
+Clipping and nested duplicates, no Windows session needed.
+
+    pytest tests/benchmarks/test_boxes.py --run-benchmarks -s
+
+Reports the time (best of 5) to clip 50k rectangles one `iou_bounding_box` call
+at a time and as one batch (an array with NumPy), and to drop the nested
+duplicates of a window of 5k list items, with NumPy when it is installed and
+with the Python loops.
+"""
+
+from time import perf_counter
+
+import pytest
+
+from windows_mcp.tree import boxes
+from windows_mcp.tree.boxes import as_box, clip_boxes, drop_nested_duplicates
+from windows_mcp.tree.memory import MemoryElement
+from windows_mcp.tree.traversal import iou_bounding_box
+from windows_mcp.uia.enums import Rect
+
+from tests.synthetic import SCREEN, traverse_window
+
+pytestmark = pytest.mark.benchmark
+
+BOXES = 50_000
+ITEMS = 5000
+WINDOW = (0, 0, 1500, 900)
+
+
+def best_of(run, repeats: int = 5) -> float:
+    seconds = None
+    for _ in range(repeats):
+        start = perf_counter()
+        run()
+        elapsed = perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds
+
+
+def list_of_items(count: int) -> MemoryElement:
+    items = []
+    for i in range(count):
+        top = i * 20
+        # Every other item is filled by a button, the others end with a small one
+        children = (
+            [MemoryElement("ButtonControl", name=f"Open {i}", rect=(0, top, 400, top + 20))]
+            if i % 2
+            else [MemoryElement("ButtonControl", name="Delete", rect=(370, top, 395, top + 20))]
+        )
+        items.append(
+            MemoryElement(
+                "ListItemControl",
+                name=f"Item {i}",
+                rect=(0, top, 400, top + 20),
+                is_keyboard_focusable=True,
+                children=children,
+            )
+        )
+    return MemoryElement(
+        "WindowControl",
+        name="Files",
+        rect=WINDOW,
+        children=[MemoryElement("ListControl", rect=WINDOW, children=items)],
+    )
+
+
+def test_boxes(monkeypatch):
+    rects = [
+        Rect(i % 50 * 38 - 100, i // 50 * 10, i % 50 * 38 + 30, i // 50 * 10 + 8)
+        for i in range(BOXES)
+    ]
+    tuples = [as_box(rect) for rect in rects]
+    window, screen = Rect(*WINDOW), SCREEN
+    ctx, _ = traverse_window(list_of_items(ITEMS))
+    nodes = ctx.interactive_nodes
+
+    results = {
+        "clip, one at a time": best_of(
+            lambda: [iou_bounding_box(screen, window, rect) for rect in rects]
+        ),
+    }
+    kept = []
+    backends = ["numpy", "python"] if boxes.np is not None else ["python"]
+    for backend in backends:
+        if backend == "python":
+            monkeypatch.setattr(boxes, "np", None)
+        # An array, as the arena rectangles are, the pass does not pay for converting tuples
+        batch = boxes.np.array(tuples) if backend == "numpy" else tuples
+        results[f"clip, batch ({backend})"] = best_of(
+            lambda: clip_boxes(batch, WINDOW, as_box(screen))
+        )
+        results[f"duplicates ({backend})"] = best_of(
+            lambda: drop_nested_duplicates(nodes, ctx.arena, WINDOW, as_box(screen))
+        )
+        kept.append(drop_nested_duplicates(nodes, ctx.arena, WINDOW, as_box(screen)))
+
+    print(
+        f"\n{BOXES} rectangles, {len(nodes)} interactive elements, {len(nodes) - len(kept[0])} dropped"
+    )
+    print(f"{'stage':<24}{'ms':>8}")
+    for name, seconds in results.items():
+        print(f"{name:<24}{seconds * 1000:>8.1f}")
+
+    # Off the screen the rectangles clip to nothing, and are not duplicates
+    assert 0 < len(nodes) - len(kept[0]) < ITEMS // 2
+    assert all(result == kept[0] for result in kept)
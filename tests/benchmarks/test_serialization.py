@@ -0,0 +1,84 @@
+"""
+Snapshot serialization of a 5k element state, no Windows session needed.
+
+    pytest tests/benchmarks/test_serialization.py --run-benchmarks -s
+
+Reports the time (best of 5) and throughput of ranking and serializing the
+elements in full, and of the first page under a token budget, per format,
+against the unranked `TreeState` listing.
+"""
+
+from time import perf_counter
+import json
+
+import pytest
+
+from windows_mcp.tree.serializer import page_to_json, paginate
+from windows_mcp.tree.views import BoundingBox, TreeElementNode, TreeState
+
+pytestmark = pytest.mark.benchmark
+
+ELEMENTS = 5000
+
+
+def state_of(count: int) -> TreeState:
+    nodes = []
+    for i in range(count):
+        left, top = (i % 50) * 38, (i // 50) * 10
+        bounding_box = BoundingBox(
+            left=left, top=top, right=left + 30, bottom=top + 8, width=30, height=8
+        )
+        nodes.append(
+            TreeElementNode(
+                bounding_box=bounding_box,
+                center=bounding_box.get_center(),
+                name=f"Item {i}",
+                control_type="ListItemControl",
+                window_name=f"Window {i % 7}",
+                is_focused=i == count // 2,
+                id=f"{i:08x}",
+            )
+        )
+    return TreeState(interactive_nodes=nodes, generation=1)
+
+
+def best_of(run, repeats: int = 5) -> tuple[float, str]:
+    seconds, output = None, ""
+    for _ in range(repeats):
+        start = perf_counter()
+        output = run()
+        elapsed = perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds, output
+
+
+def render(state: TreeState, format: str, max_tokens: int | None) -> str:
+    page = paginate(state, max_tokens=max_tokens, format=format)
+    if format == "text":
+        return page.interactive_elements_to_string() + page.scrollable_elements_to_string()
+    return page_to_json(page)
+
+
+def test_serialization():
+    state = state_of(ELEMENTS)
+    results = {
+        "unranked text": best_of(state.interactive_elements_to_string),
+        "unranked json": best_of(
+            lambda: json.dumps([node.to_dict() for node in state.interactive_nodes])
+        ),
+    }
+    for format in ("text", "json"):
+        for max_tokens in (None, 2000):
+            name = f"{format}, {max_tokens or 'no'} token budget"
+            results[name] = best_of(lambda: render(state, format, max_tokens))
+
+    print(f"\n{ELEMENTS} elements")
+    print(f"{'serializer':<28}{'ms':>8}{'elements/s':>12}{'KiB':>8}")
+    for name, (seconds, output) in results.items():
+        print(
+            f"{name:<28}{seconds * 1000:>8.1f}{ELEMENTS / seconds:>12.0f}"
+            f"{len(output.encode()) / 1024:>8.1f}"
+        )
+
+    assert len(results["text, 2000 token budget"][1]) <= 2000 * 4
+    assert len(results["json, 2000 token budget"][1]) <= 2000 * 4
@@ -0,0 +1,93 @@
+"""
+Traversal modes on synthetic windows, no Windows session needed.
+
+    pytest tests/benchmarks/test_synthetic_traversal.py --run-benchmarks -s
+
+Runs `Tree.get_nodes` on the in-memory backend and reports wall time (best of 5),
+nodes per second, provider round trips and traced allocations of one window in
+each traversal mode, and with viewport pruning and list summaries on and off.
+"""
+
+import pytest
+
+from windows_mcp.tree.config import (
+    LIST_SUMMARY_EDGE_ITEMS,
+    TRAVERSAL_MODES,
+    TRAVERSAL_VIEWPORT_MARGIN,
+)
+
+from tests.synthetic import chromium_dom, data_grid, measure_get_nodes, synthetic_tree, wpf_app
+
+pytestmark = pytest.mark.benchmark
+
+# name: (generator, is_browser)
+SHAPES = {
+    "wpf app (40 levels)": (wpf_app, False),
+    "datagrid (10k rows)": (data_grid, False),
+    "chromium dom": (chromium_dom, True),
+}
+
+
+def measure_tree(root, mode="per_node", is_browser=False):
+    tree, stats = synthetic_tree(root, mode, is_browser=is_browser)
+    try:
+        return measure_get_nodes(tree, stats, is_browser)
+    finally:
+        tree.shutdown()
+
+
+@pytest.mark.parametrize("shape", list(SHAPES))
+def test_traversal_modes(shape):
+    generate, is_browser = SHAPES[shape]
+    root = generate()
+    results = {mode: measure_tree(root, mode, is_browser) for mode in TRAVERSAL_MODES}
+
+    print(f"\n{shape}, {len(root)} elements")
+    print(
+        f"{'mode':<10}{'nodes':>8}{'ms':>10}{'nodes/s':>12}"
+        f"{'round trips':>13}{'peak KiB':>10}{'kept KiB':>10}"
+    )
+    for mode, result in results.items():
+        print(
+            f"{mode:<10}{result.nodes:>8}{result.seconds * 1000:>10.1f}"
+            f"{result.nodes_per_second:>12.0f}{result.round_trips:>13}"
+            f"{result.peak_kib:>10.0f}{result.retained_kib:>10.0f}"
+        )
+
+    assert results["subtree"].round_trips == 1 < results["per_node"].round_trips
+
+
+def test_viewport_pruning(monkeypatch):
+    root = chromium_dom(sections=2000)
+    results = {}
+    for margin in (None, TRAVERSAL_VIEWPORT_MARGIN):
+        monkeypatch.setattr("windows_mcp.tree.service.TRAVERSAL_VIEWPORT_MARGIN", margin)
+        results[margin] = measure_tree(root, is_browser=True)
+
+    print(f"\nchromium dom (2000 sections), {len(root)} elements")
+    print(f"{'margin':<10}{'nodes':>8}{'ms':>10}{'round trips':>13}{'peak KiB':>10}")
+    for margin, result in results.items():
+        print(
+            f"{str(margin):<10}{result.nodes:>8}{result.seconds * 1000:>10.1f}"
+            f"{result.round_trips:>13}{result.peak_kib:>10.0f}"
+        )
+
+    assert results[TRAVERSAL_VIEWPORT_MARGIN].nodes < results[None].nodes
+
+
+def test_list_summaries(monkeypatch):
+    root = data_grid()
+    results = {}
+    for edge in (None, LIST_SUMMARY_EDGE_ITEMS):
+        monkeypatch.setattr("windows_mcp.tree.service.LIST_SUMMARY_EDGE_ITEMS", edge)
+        results[edge] = measure_tree(root)
+
+    print(f"\ndatagrid (10k rows), {len(root)} elements")
+    print(f"{'edge items':<12}{'nodes':>8}{'ms':>10}{'round trips':>13}{'peak KiB':>10}")
+    for edge, result in results.items():
+        print(
+            f"{str(edge):<12}{result.nodes:>8}{result.seconds * 1000:>10.1f}"
+            f"{result.round_trips:>13}{result.peak_kib:>10.0f}"
+        )
+
+    assert results[LIST_SUMMARY_EDGE_ITEMS].nodes < results[None].nodes
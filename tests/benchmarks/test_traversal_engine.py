@@ -0,0 +1,44 @@
+"""
+Explicit-stack vs recursive traversal on synthetic deep and wide trees.
+
+    pytest tests/benchmarks/test_traversal_engine.py --run-benchmarks -s
+"""
+
+import pytest
+
+from windows_mcp.tree.traversal import traverse
+
+from windows_mcp.tree.memory import MemoryStats
+
+from tests.synthetic import deep_tree, measure, traverse_recursive, traverse_window, wide_tree
+
+pytestmark = pytest.mark.benchmark
+
+TREES = {
+    # Deep enough to matter, shallow enough for the recursive reference to survive
+    "deep (600 levels)": lambda: deep_tree(600),
+    "wide (1 x 20000)": lambda: wide_tree(20000),
+    "bushy (3 levels x 30)": lambda: wide_tree(30, levels=3),
+}
+
+
+@pytest.mark.parametrize("tree", list(TREES))
+def test_iterative_vs_recursive(tree):
+    root = TREES[tree]()
+    engines = {"recursive": traverse_recursive, "iterative": traverse}
+    results = {
+        name: measure(lambda: traverse_window(root, engine=engine)[0].visited, MemoryStats())
+        for name, engine in engines.items()
+    }
+
+    print(f"\n{tree}")
+    print(f"{'engine':<12}{'nodes':>8}{'ms':>10}{'nodes/s':>12}{'peak KiB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<12}{result.nodes:>8}{result.seconds * 1000:>10.1f}"
+            f"{result.nodes_per_second:>12.0f}{result.peak_kib:>10.0f}"
+        )
+
+    recursive, _ = traverse_window(root, engine=traverse_recursive)
+    iterative, _ = traverse_window(root, engine=traverse)
+    assert iterative.arena.runtime_ids == recursive.arena.runtime_ids
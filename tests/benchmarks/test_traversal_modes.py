@@ -0,0 +1,65 @@
+"""
+Per-node vs single round trip subtree traversal on the live desktop.
+
+    pytest tests/benchmarks/test_traversal_modes.py --run-benchmarks -s
+"""
+
+from time import perf_counter
+
+import pytest
+
+REPEATS = 3
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.windows]
+
+
+def _traverse(tree, handles, counter):
+    stats = {"ms": 0.0, "round_trips": 0, "interactive": 0, "scrollable": 0}
+    for _ in range(REPEATS):
+        counter["calls"] = 0
+        start = perf_counter()
+        interactive, scrollable = 0, 0
+        for handle in handles:
+            interactive_nodes, scrollable_nodes, _ = tree.get_nodes(handle)
+            interactive += len(interactive_nodes)
+            scrollable += len(scrollable_nodes)
+        stats["ms"] += (perf_counter() - start) * 1000 / REPEATS
+        stats["round_trips"] = counter["calls"]
+        stats["interactive"], stats["scrollable"] = interactive, scrollable
+    return stats
+
+
+def test_per_node_vs_subtree(monkeypatch):
+    from windows_mcp.desktop.service import Desktop
+    from windows_mcp.tree.service import Tree
+    from windows_mcp.uia import Control
+
+    desktop = Desktop()
+    windows, _ = desktop.get_windows()
+    handles = [window.handle for window in windows]
+    assert handles, "No visible windows to traverse"
+
+    # Count BuildUpdatedCache calls, each one is a cross-process round trip
+    counter = {"calls": 0}
+    build_updated_cache = Control.BuildUpdatedCache
+
+    def counting_build_updated_cache(self, cacheRequest):
+        counter["calls"] += 1
+        return build_updated_cache(self, cacheRequest)
+
+    monkeypatch.setattr(Control, "BuildUpdatedCache", counting_build_updated_cache)
+
+    results = {
+        mode: _traverse(Tree(desktop, traversal_mode=mode), handles, counter)
+        for mode in ("per_node", "subtree")
+    }
+
+    print(f"\n{len(handles)} windows, mean of {REPEATS} runs")
+    print(f"{'mode':<10}{'ms':>10}{'round trips':>14}{'interactive':>13}{'scrollable':>12}")
+    for mode, stats in results.items():
+        print(
+            f"{mode:<10}{stats['ms']:>10.1f}{stats['round_trips']:>14}"
+            f"{stats['interactive']:>13}{stats['scrollable']:>12}"
+        )
+
+    assert results["subtree"]["round_trips"] <= results["per_node"]["round_trips"]
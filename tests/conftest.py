@@ -4,6 +4,20 @@ from windows_mcp.tree.views import BoundingBox, Center, TreeElementNode, ScrollE
 from windows_mcp.desktop.views import Window, Status, DesktopState
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-benchmarks",
+        action="store_true",
+        default=False,
+        help="run the traversal benchmarks in tests/benchmarks",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: performance benchmark, needs --run-benchmarks")
+    config.addinivalue_line("markers", "windows: needs a live Windows desktop session")
+
+
 @pytest.fixture
 def sample_bounding_box():
     return BoundingBox(left=100, top=50, right=300, bottom=150, width=200, height=100)
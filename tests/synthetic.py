@@ -0,0 +1,376 @@
+"""
+Synthetic UIA trees for the in-memory backend.
+
+Shapes: `deep_tree` and `wide_tree` for the engine itself, and realistic
+windows: a deep WPF app, a large DataGrid and a Chromium DOM. Generators are
+seeded so every run traverses the same tree.
+
+`synthetic_tree` serves one of them to a real `Tree` through the replay backend,
+so tests and benchmarks run `Tree.get_nodes` itself; `traverse_window` runs the
+traversal engine alone.
+"""
+
+import random
+import tracemalloc
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable
+
+from windows_mcp.tree.app_profiles import AppProfile
+from windows_mcp.tree.memory import MemoryCacheRequest, MemoryControl, MemoryElement, MemoryStats
+from windows_mcp.tree.arena import NO_PARENT
+from windows_mcp.tree.recording import RecordedWindow, Recording, ReplayBackend
+from windows_mcp.tree.service import Tree
+from windows_mcp.tree.cache_utils import CachedControlHelper
+from windows_mcp.tree.traversal import TraversalContext, TraversalLimits, enter, traverse, visit
+from windows_mcp.uia.enums import Rect, TreeScope
+
+SCREEN = Rect(0, 0, 1920, 1080)
+WINDOW = 1  # handle of the window of a `synthetic_tree`
+VIEWPORT_BOTTOM = 1000
+ROW_HEIGHT = 24
+
+
+def deep_tree(depth: int, leaf: str = "ButtonControl") -> MemoryElement:
+    """A chain of panes `depth` levels deep ending in a single control."""
+    node = MemoryElement(leaf, name="leaf", rect=(0, 0, 100, 20))
+    for level in range(depth):
+        node = MemoryElement(
+            "PaneControl", name=f"pane-{level}", rect=(0, 0, 800, 600), children=[node]
+        )
+    return node
+
+
+def wide_tree(width: int, levels: int = 1, leaf: str = "ButtonControl") -> MemoryElement:
+    """A root with `width` children per level, the last level made of `leaf` controls."""
+
+    def build(level: int, prefix: str) -> MemoryElement:
+        if level == levels:
+            return MemoryElement(leaf, name=prefix, rect=(0, 0, 100, 20))
+        children = [build(level + 1, f"{prefix}.{index}") for index in range(width)]
+        return MemoryElement("PaneControl", name=prefix, rect=(0, 0, 800, 600), children=children)
+
+    return build(0, "root")
+
+
+def wpf_app(depth: int = 40, seed: int = 0) -> MemoryElement:
+    """
+    A WPF window: nested layout containers (Border, Grid, ContentPresenter...) with a
+    few controls at every level, one branch going `depth` levels down.
+    """
+    rng = random.Random(seed)
+    leaves = ["ButtonControl", "TextControl", "EditControl", "CheckBoxControl", "ImageControl"]
+
+    def level(index: int) -> list[MemoryElement]:
+        top = 40 + index * 18
+        children = [
+            MemoryElement(
+                control_type,
+                name=f"{control_type.removesuffix('Control')} {index}.{position}",
+                rect=(20 + position * 90, top, 100 + position * 90, top + 16),
+                is_keyboard_focusable=control_type != "TextControl",
+            )
+            for position, control_type in enumerate(rng.choices(leaves, k=rng.randint(1, 4)))
+        ]
+        if index < depth:
+            container = rng.choice(["PaneControl", "GroupControl", "CustomControl"])
+            children.append(
+                MemoryElement(container, rect=(10, top, 1270, 790), children=level(index + 1))
+            )
+        return children
+
+    return MemoryElement(
+        "WindowControl",
+        name="Inventory - WPF",
+        class_name="Window",
+        rect=(0, 0, 1280, 800),
+        children=level(0),
+    )
+
+
+def data_grid(rows: int = 10_000, columns: int = 5) -> MemoryElement:
+    """A non-virtualized DataGrid, rows below the viewport are offscreen."""
+    header = MemoryElement(
+        "HeaderControl",
+        rect=(10, 60, 1270, 84),
+        children=[
+            MemoryElement(
+                "HeaderItemControl",
+                name=f"Column {column}",
+                rect=(10 + column * 200, 60, 210 + column * 200, 84),
+            )
+            for column in range(columns)
+        ],
+    )
+    grid_rows = []
+    for row in range(rows):
+        top = 84 + row * ROW_HEIGHT
+        offscreen = top >= VIEWPORT_BOTTOM
+        cells = [
+            MemoryElement(
+                "CustomControl",
+                name=f"R{row}C{column}",
+                rect=(10 + column * 200, top, 210 + column * 200, top + ROW_HEIGHT),
+                is_offscreen=offscreen,
+            )
+            for column in range(columns)
+        ]
+        grid_rows.append(
+            MemoryElement(
+                "DataItemControl",
+                name=f"Row {row}",
+                rect=(10, top, 1270, top + ROW_HEIGHT),
+                is_offscreen=offscreen,
+                is_keyboard_focusable=True,
+                children=cells,
+            )
+        )
+    grid = MemoryElement(
+        "DataGridControl",
+        name="Orders",
+        rect=(10, 60, 1270, VIEWPORT_BOTTOM),
+        scrollable=True,
+        children=[header, *grid_rows],
+    )
+    toolbar = MemoryElement(
+        "ToolBarControl",
+        rect=(0, 30, 1280, 58),
+        children=[
+            MemoryElement("ButtonControl", name=name, rect=(10 + i * 80, 32, 80 + i * 80, 56))
+            for i, name in enumerate(["New", "Open", "Save", "Export"])
+        ],
+    )
+    return MemoryElement(
+        "WindowControl", name="Orders", rect=(0, 0, 1280, 1040), children=[toolbar, grid]
+    )
+
+
+def chromium_dom(sections: int = 60, seed: int = 0) -> MemoryElement:
+    """A Chromium window: browser chrome and a long page of sections, lists and links."""
+    rng = random.Random(seed)
+    y = 120
+
+    def block(control_type: str, height: int, **kwargs) -> MemoryElement:
+        nonlocal y
+        element = MemoryElement(
+            control_type,
+            rect=(100, y, 1400, y + height),
+            is_offscreen=y >= VIEWPORT_BOTTOM,
+            **kwargs,
+        )
+        y += height
+        return element
+
+    page = []
+    for section in range(sections):
+        section_top = y
+        children = [block("TextControl", 32, name=f"Heading {section}")]
+        for paragraph in range(rng.randint(1, 4)):
+            children.append(block("TextControl", 60, name=f"Paragraph {section}.{paragraph}"))
+        list_top, items = y, []
+        for item in range(rng.randint(0, 6)):
+            link = MemoryElement(
+                "HyperlinkControl",
+                name=f"Link {section}.{item}",
+                rect=(120, y, 600, y + 22),
+                is_offscreen=y >= VIEWPORT_BOTTOM,
+                is_keyboard_focusable=True,
+            )
+            items.append(block("ListItemControl", 22, children=[link]))
+        if items:
+            children.append(
+                MemoryElement(
+                    "ListControl",
+                    rect=(100, list_top, 1400, y),
+                    is_offscreen=list_top >= VIEWPORT_BOTTOM,
+                    children=items,
+                )
+            )
+        if rng.random() < 0.3:
+            children.append(block("ImageControl", 120, name=f"Figure {section}"))
+        if rng.random() < 0.5:
+            children.append(
+                block("ButtonControl", 30, name=f"Action {section}", is_keyboard_focusable=True)
+            )
+        page.append(
+            MemoryElement(
+                "GroupControl",
+                rect=(100, section_top, 1400, y),
+                is_offscreen=section_top >= VIEWPORT_BOTTOM,
+                children=children,
+            )
+        )
+
+    document = MemoryElement(
+        "DocumentControl",
+        name="Synthetic page",
+        automation_id="RootWebArea",
+        rect=(0, 110, 1920, 1040),
+        scrollable=True,
+        children=page,
+    )
+    browser_ui = MemoryElement(
+        "PaneControl",
+        rect=(0, 0, 1920, 110),
+        children=[
+            MemoryElement("TabItemControl", name="Synthetic page", rect=(0, 0, 240, 36)),
+            MemoryElement("ButtonControl", name="Back", rect=(0, 40, 36, 76)),
+            MemoryElement("ButtonControl", name="Reload", rect=(40, 40, 76, 76)),
+            MemoryElement("EditControl", name="Address and search bar", rect=(80, 40, 1800, 76)),
+        ],
+    )
+    return MemoryElement(
+        "WindowControl",
+        name="Synthetic page - Google Chrome",
+        class_name="Chrome_WidgetWin_1",
+        rect=(0, 0, 1920, 1040),
+        children=[browser_ui, document],
+    )
+
+
+def traverse_recursive(
+    node: MemoryControl,
+    ctx: TraversalContext,
+    is_dom: bool = False,
+    is_dialog: bool = False,
+    depth: int = 0,
+    parent: int = NO_PARENT,
+):
+    """
+    The recursive traversal `traverse` replaced, the reference of the parity tests and
+    engine benchmarks. Only the depth limit applies.
+    """
+    if depth:
+        is_dom, is_dialog = enter(node, ctx, is_dom, is_dialog)
+    node, row = visit(node, ctx, is_dom, parent)
+    if ctx.limits.max_depth is not None and depth >= ctx.limits.max_depth:
+        return
+    children = CachedControlHelper.get_cached_children(node, ctx.children_cache_req)
+    # Right to left for normal apps and left to right for DOM
+    for child in children if is_dom else children[::-1]:
+        traverse_recursive(child, ctx, is_dom, is_dialog, depth + 1, row)
+
+
+def traverse_window(
+    root: MemoryElement,
+    is_browser: bool = False,
+    limits: TraversalLimits | None = None,
+    engine=traverse,
+    viewport_margin: int | None = None,
+    list_summary_items: int | None = None,
+    app_profile: AppProfile | None = None,
+    region: tuple[int, int, int, int] | None = None,
+) -> tuple[TraversalContext, MemoryStats]:
+    """
+    Run the traversal engine alone on a synthetic window, for tests of what it collects.
+    Whole window traversals, traversal modes included, go through `synthetic_tree`.
+    """
+    stats = MemoryStats()
+    ctx = TraversalContext(
+        window_bounding_box=root.rect,
+        window_name=root.name,
+        is_browser=is_browser,
+        screen_box=SCREEN,
+        element_cache_req=MemoryCacheRequest(TreeScope.TreeScope_Element),
+        children_cache_req=MemoryCacheRequest(),
+        limits=limits or TraversalLimits(),
+        viewport_margin=viewport_margin,
+        list_summary_items=list_summary_items,
+        app_profile=app_profile,
+        region=region,
+    )
+    engine(MemoryControl(root, stats), ctx)
+    return ctx, stats
+
+
+def synthetic_tree(
+    root: MemoryElement,
+    mode: str = "per_node",
+    is_browser: bool = False,
+    limits: TraversalLimits | None = None,
+) -> tuple[Tree, MemoryStats]:
+    """A `Tree` serving `root` as window `WINDOW` through the in-memory backend, and its calls."""
+    backend = ReplayBackend(
+        Recording(
+            windows=[RecordedWindow(WINDOW, root.name, root, is_browser)],
+            screen_size=(SCREEN.right, SCREEN.bottom),
+        )
+    )
+    tree = Tree(
+        backend.desktop, traversal_mode=mode, limits=limits or TraversalLimits(), app_profiles=[]
+    )
+    backend.attach(tree)
+    return tree, backend.stats
+
+
+def get_window_nodes(
+    root: MemoryElement, mode: str = "per_node", is_browser: bool = False
+) -> tuple[tuple[list, list, list], MemoryStats, int]:
+    """`Tree.get_nodes` of `root` on a fresh `Tree`: the nodes, provider calls and nodes visited."""
+    tree, stats = synthetic_tree(root, mode, is_browser)
+    try:
+        return tree.get_nodes(WINDOW, is_browser), stats, visited(tree)
+    finally:
+        tree.shutdown()
+
+
+def comparable(nodes: tuple[list, list, list]) -> tuple[list, list, list]:
+    """The nodes of `get_nodes` without the scroll centers, random points within the element."""
+    interactive, scrollable, informative = nodes
+    return interactive, [(node.id, node.bounding_box) for node in scrollable], informative
+
+
+def visited(tree: Tree) -> int:
+    """Nodes the last `get_nodes` of `WINDOW` visited, every one of them is a row of its arena."""
+    return len(tree._query_windows[WINDOW].arena)
+
+
+@dataclass
+class Measurement:
+    nodes: int
+    seconds: float  # best wall time
+    round_trips: int
+    peak_kib: float  # traced allocations, peak during one traversal
+    retained_kib: float  # traced allocations still alive after it
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def measure(run: Callable[[], int], stats: MemoryStats, repeats: int = 5) -> Measurement:
+    """Time `run`, which traverses once and returns the nodes it visited, counted in `stats`."""
+    seconds = None
+    for _ in range(repeats):
+        stats.round_trips = stats.live_calls = 0
+        start = perf_counter()
+        nodes = run()
+        elapsed = perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    round_trips = stats.round_trips
+    # Separate run, tracing allocations slows the traversal down
+    tracemalloc.start()
+    try:
+        run()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(
+        nodes=nodes,
+        seconds=seconds,
+        round_trips=round_trips,
+        peak_kib=peak / 1024,
+        retained_kib=retained / 1024,
+    )
+
+
+def measure_get_nodes(
+    tree: Tree, stats: MemoryStats, is_browser: bool = False, repeats: int = 5
+) -> Measurement:
+    """`measure` on `Tree.get_nodes` of `WINDOW`, the whole pipeline of one window."""
+
+    def run() -> int:
+        tree.get_nodes(WINDOW, is_browser)
+        return visited(tree)
+
+    return measure(run, stats, repeats)
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from windows_mcp.tree.app_profiles import AppProfile, load_app_profiles, match_app_profile
+from windows_mcp.tree.memory import MemoryElement
+
+from tests.synthetic import traverse_window
+
+
+def window(*children):
+    return MemoryElement(
+        "WindowControl", name="Editor", rect=(0, 0, 800, 600), children=list(children)
+    )
+
+
+def button(name, **kwargs):
+    return MemoryElement("ButtonControl", name=name, rect=(0, 0, 100, 20), **kwargs)
+
+
+class TestAppProfile:
+    def test_bundled_profiles_load(self):
+        profiles = load_app_profiles()
+        assert profiles
+        assert len({profile.name for profile in profiles}) == len(profiles)
+
+    def test_from_dict(self):
+        profile = AppProfile.from_dict(
+            {
+                "name": "Code",
+                "process_names": ["Code.exe"],
+                "skip_class_names": ["minimap"],
+                "max_depth": 20,
+                "cache_profiles": ["interactive", "dom"],
+                "use_dom": True,
+            }
+        )
+        assert profile.process_names == {"code.exe"}
+        assert profile.cache_profiles == ("interactive", "dom")
+        assert profile.has_skip_rules
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"name": "Code"},
+            {"process_names": ["Code.exe"]},
+            {"name": "Code", "process_names": ["Code.exe"], "skip": ["minimap"]},
+            {"name": "Code", "process_names": ["Code.exe"], "cache_profiles": ["everything"]},
+        ],
+    )
+    def test_invalid_entries(self, data):
+        with pytest.raises(ValueError):
+            AppProfile.from_dict(data)
+
+    def test_load_file(self, tmp_path):
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps({"profiles": [{"name": "Notes", "class_names": ["Notes"]}]}))
+        [profile] = load_app_profiles(path)
+        assert profile.class_names == {"Notes"}
+
+    def test_match(self):
+        code = AppProfile(name="Code", process_names=frozenset({"code.exe"}))
+        explorer = AppProfile(name="Explorer", class_names=frozenset({"CabinetWClass"}))
+        profiles = [code, explorer]
+        assert match_app_profile(profiles, "Code.exe", "Chrome_WidgetWin_1") is code
+        assert match_app_profile(profiles, "explorer.exe", "CabinetWClass") is explorer
+        assert match_app_profile(profiles, "notepad.exe", "Notepad") is None
+        assert match_app_profile(profiles, None, None) is None
+
+
+class TestSkipRules:
+    def test_skipped_subtrees_are_not_traversed(self):
+        root = window(
+            button("Run"),
+            MemoryElement(
+                "PaneControl", class_name="minimap", rect=(0, 0, 800, 600), children=[button("A")]
+            ),
+            MemoryElement(
+                "PaneControl",
+                automation_id="outline",
+                rect=(0, 0, 800, 600),
+                children=[button("B")],
+            ),
+        )
+        profile = AppProfile(
+            name="Editor",
+            class_names=frozenset({"Editor"}),
+            skip_automation_ids=frozenset({"outline"}),
+            skip_class_names=frozenset({"minimap"}),
+        )
+        ctx, _ = traverse_window(root, app_profile=profile)
+        assert [node.name for node in ctx.interactive_nodes] == ["Run"]
+        assert ctx.skipped == 2
+        assert ctx.visited == 2
+
+    def test_without_profile(self):
+        root = window(button("Run", class_name="minimap"))
+        ctx, _ = traverse_window(root)
+        assert ctx.skipped == 0
+        assert len(ctx.interactive_nodes) == 1
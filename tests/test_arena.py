@@ -0,0 +1,120 @@
+from windows_mcp.tree.arena import INTERACTIVE, TEXT, NodeView, TreeArena
+from windows_mcp.tree.memory import MemoryElement
+
+from tests.synthetic import traverse_window
+
+
+def small_arena():
+    arena = TreeArena()
+    window = arena.append("WindowControl", "Editor", "", "Notepad", (0, 0, 800, 600))
+    pane = arena.append("PaneControl", "", None, "Pane", (0, 40, 800, 600), parent=window)
+    arena.append("ButtonControl", "Save", "SaveButton", "Button", (10, 50, 90, 70), (42, 1), pane)
+    arena.append("ButtonControl", "Open", "OpenButton", "Button", (100, 50, 180, 70), None, pane)
+    return arena
+
+
+class TestTreeArena:
+    def test_rows(self):
+        arena = small_arena()
+        assert len(arena) == 4
+        assert arena.control_type(2) == "ButtonControl"
+        assert arena.name(2) == "Save" and arena.automation_id(2) == "SaveButton"
+        assert arena.automation_id(1) == ""
+        assert arena.rect(3) == (100, 50, 180, 70)
+        assert arena.runtime_ids[2] == (42, 1)
+
+    def test_strings_and_control_types_are_interned(self):
+        arena = small_arena()
+        assert arena.control_type_names == ["WindowControl", "PaneControl", "ButtonControl"]
+        assert arena.class_names[2] == arena.class_names[3]
+        assert arena.strings.count("Button") == 1
+
+    def test_navigation(self):
+        arena = small_arena()
+        assert arena.parent(0) is None and arena.parent(2) == 1
+        assert arena.children(1) == [2, 3]
+        arena.append("TextControl", "Status", "", "", (0, 580, 800, 600), parent=0)
+        # The children are rebuilt after an append
+        assert arena.children(0) == [1, 4]
+
+    def test_node_view(self):
+        save = small_arena().node(2)
+        assert save.name == "Save" and save.rect == (10, 50, 90, 70)
+        assert save.parent.class_name == "Pane"
+        assert save.parent.parent.parent is None
+        assert [child.name for child in save.parent.children] == ["Save", "Open"]
+
+
+def listed_arena():
+    arena = small_arena()
+    view = NodeView(arena)
+    view.append(
+        arena.list_node(INTERACTIVE, 2, (10, 50, 90, 70), (50, 60), "Save", "Button", "Editor")
+    )
+    view.append(arena.list_node(INTERACTIVE, 3, (100, 50, 180, 70), (140, 60), "Open", "Button"))
+    view.append(arena.list_node(TEXT, 1, (0, 40, 800, 600), (400, 320), "Ready"))
+    return arena, view
+
+
+class TestNodeView:
+    def test_nodes_are_built_from_the_columns(self):
+        _, view = listed_arena()
+        save = view[0]
+        assert save.name == "Save" and save.window_name == "Editor"
+        assert save.bounding_box.width == 80 and save.center.x == 50
+        assert save.runtime_id == (42, 1)
+        assert view[-1].text == "Ready"
+        # A new object on every read, equal to the last one
+        assert view[0] is not save and view[0] == save
+
+    def test_columns_are_read_without_nodes(self):
+        _, view = listed_arena()
+        assert view.names() == ["Save", "Open", "Ready"]
+        assert view.runtime_ids()[:2] == [(42, 1), None]
+
+    def test_take_select_and_ids(self):
+        _, view = listed_arena()
+        assert [node.name for node in view.take([1, 0])] == ["Open", "Save"]
+        buttons = view[:2]
+        assert [node.name for node in buttons.select(lambda node: node.name == "Open")] == ["Open"]
+        renamed = buttons.with_ids({1: "open-1"})
+        assert renamed[1].id == "open-1" and buttons[1].id == ""
+
+    def test_views_merge_arenas_and_lists(self):
+        (_, first), (_, second) = listed_arena(), listed_arena()
+        merged = first[:1] + second[1:2]
+        merged.extend([first[2]])
+        assert [getattr(node, "name", None) for node in merged] == ["Save", "Open", None]
+        assert merged == [first[0], second[1], first[2]]
+
+    def test_pop_slot(self):
+        arena, view = listed_arena()
+        assert arena.listed_rows[view.pop_slot()] == 1
+        assert len(view) == 2
+
+
+def test_traversal_fills_the_arena():
+    root = MemoryElement(
+        "WindowControl",
+        name="Editor",
+        rect=(0, 0, 800, 600),
+        children=[
+            MemoryElement(
+                "PaneControl",
+                name="Toolbar",
+                rect=(0, 0, 800, 40),
+                children=[
+                    MemoryElement("ButtonControl", name="Bold", rect=(0, 0, 40, 40)),
+                    MemoryElement("ButtonControl", name="Italic", rect=(40, 0, 80, 40)),
+                ],
+            ),
+            MemoryElement("EditControl", name="Body", rect=(0, 40, 800, 600)),
+        ],
+    )
+    ctx, _ = traverse_window(root)
+    arena = ctx.arena
+    assert len(arena) == ctx.visited == 5
+    assert arena.name(0) == "Editor" and arena.parent(0) is None
+    toolbar = next(row for row in range(len(arena)) if arena.name(row) == "Toolbar")
+    assert sorted(arena.name(child) for child in arena.children(toolbar)) == ["Bold", "Italic"]
+    assert sorted(arena.name(child) for child in arena.children(0)) == ["Body", "Toolbar"]
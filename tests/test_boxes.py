@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+from windows_mcp.tree import boxes
+from windows_mcp.tree.boxes import as_box, clip_boxes, drop_nested_duplicates, overlaps
+from windows_mcp.tree.memory import MemoryElement
+from windows_mcp.tree.traversal import iou_bounding_box
+from windows_mcp.uia.enums import Rect
+
+from tests.synthetic import SCREEN, traverse_window
+
+
+@pytest.fixture(params=["numpy", "python"])
+def batch(request, monkeypatch):
+    """Turns a list of boxes into the input of the backend, and its output back into lists."""
+    if request.param == "numpy":
+        np = pytest.importorskip("numpy")
+        return lambda values: np.array(values), lambda result: [
+            tuple(row) for row in result.tolist()
+        ]
+    monkeypatch.setattr(boxes, "np", None)
+    return lambda values: values, list
+
+
+def random_boxes(count, seed=7):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        left, top = rng.randint(-3000, 3000), rng.randint(-2000, 2000)
+        # Degenerate and inverted boxes too
+        result.append((left, top, left + rng.randint(-50, 1500), top + rng.randint(-50, 900)))
+    return result
+
+
+class TestClipBoxes:
+    @pytest.mark.parametrize(
+        "window", [(0, 0, 1920, 1080), (-200, 100, 900, 1400), (2000, 0, 2400, 600)]
+    )
+    def test_parity_with_iou_bounding_box(self, batch, window):
+        to_input, to_list = batch
+        screen = as_box(SCREEN)
+        elements = random_boxes(2000)
+        expected = [
+            as_box(iou_bounding_box(Rect(*screen), Rect(*window), Rect(*box))) for box in elements
+        ]
+        assert to_list(clip_boxes(to_input(elements), window, screen)) == expected
+
+
+def test_overlaps(batch):
+    to_input, _ = batch
+    ious, containments = overlaps(
+        to_input([(0, 0, 10, 10), (0, 0, 10, 10), (0, 0, 10, 10), (0, 0, 0, 0)]),
+        to_input([(0, 0, 10, 10), (0, 0, 10, 5), (20, 20, 30, 30), (0, 0, 10, 10)]),
+    )
+    assert list(ious) == [1.0, 0.5, 0.0, 0.0]
+    assert list(containments) == [1.0, 1.0, 0.0, 0.0]
+
+
+def list_window(*items):
+    return MemoryElement(
+        "WindowControl",
+        name="Files",
+        rect=(0, 0, 400, 300),
+        children=[MemoryElement("ListControl", rect=(0, 0, 400, 300), children=list(items))],
+    )
+
+
+def item(name, rect, *children, focused=False):
+    return MemoryElement(
+        "ListItemControl",
+        name=name,
+        rect=rect,
+        is_keyboard_focusable=True,
+        has_keyboard_focus=focused,
+        children=list(children),
+    )
+
+
+def button(name, rect):
+    return MemoryElement("ButtonControl", name=name, rect=rect, is_keyboard_focusable=True)
+
+
+def deduplicated(root):
+    ctx, _ = traverse_window(root)
+    kept = drop_nested_duplicates(
+        ctx.interactive_nodes, ctx.arena, as_box(ctx.window_bounding_box), as_box(SCREEN)
+    )
+    return sorted(node.name for node in kept)
+
+
+class TestDropNestedDuplicates:
+    def test_keeps_the_most_actionable(self, batch):
+        root = list_window(
+            item("Report", (0, 0, 400, 30), button("Open report", (0, 0, 400, 30))),
+            item("Notes", (0, 30, 400, 60), button("Open notes", (2, 31, 398, 59))),
+        )
+        assert deduplicated(root) == ["Open notes", "Open report"]
+
+    def test_keeps_distinct_nested_elements(self, batch):
+        root = list_window(item("Report", (0, 0, 400, 30), button("Delete", (370, 5, 395, 25))))
+        assert deduplicated(root) == ["Delete", "Report"]
+
+    def test_keeps_the_focused_one(self, batch):
+        root = list_window(
+            item("Report", (0, 0, 400, 30), button("Open", (0, 0, 400, 30)), focused=True)
+        )
+        assert deduplicated(root) == ["Report"]
+
+    def test_compares_the_visible_parts(self, batch):
+        # The item runs past the window, the button fills its visible part
+        root = list_window(item("Report", (0, 280, 400, 400), button("Open", (0, 280, 400, 300))))
+        assert deduplicated(root) == ["Open"]
+
+    def test_chains_collapse_to_one(self, batch):
+        root = list_window(
+            item(
+                "Report",
+                (0, 0, 400, 30),
+                MemoryElement(
+                    "HyperlinkControl",
+                    name="report.pdf",
+                    rect=(0, 0, 400, 30),
+                    children=[button("Open", (0, 0, 400, 30))],
+                ),
+            )
+        )
+        assert deduplicated(root) == ["Open"]
+
+    def test_without_an_arena(self):
+        ctx, _ = traverse_window(
+            list_window(item("Report", (0, 0, 400, 30), button("Open", (0, 0, 400, 30))))
+        )
+        nodes = ctx.interactive_nodes
+        assert drop_nested_duplicates(nodes, None, (0, 0, 400, 300), as_box(SCREEN)) is nodes
@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from windows_mcp.tree.cache_utils import (
+    CACHE_PROFILES,
+    CacheProfileStats,
+    CachedPattern,
+    cache_profile_stats,
+)
+from windows_mcp.uia import PropertyId
+
+
+def cached_node(values: dict[int, object]):
+    node = MagicMock()
+    node.GetCachedPropertyValue.side_effect = lambda property_id: values.get(property_id)
+    return node
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    cache_profile_stats.reset()
+    yield
+    cache_profile_stats.reset()
+
+
+class TestCacheProfiles:
+    def test_minimal_has_no_pattern_properties(self):
+        assert (
+            PropertyId.LegacyIAccessibleRoleProperty not in CACHE_PROFILES["minimal"].property_ids
+        )
+        assert (
+            PropertyId.IsScrollPatternAvailableProperty
+            not in CACHE_PROFILES["minimal"].property_ids
+        )
+
+    def test_stats_attribute_calls_to_profiles(self):
+        stats = CacheProfileStats()
+        stats.record(PropertyId.ScrollVerticallyScrollableProperty, cached=True)
+        stats.record(PropertyId.LegacyIAccessibleDefaultActionProperty, cached=False)
+        snapshot = stats.snapshot()
+        assert snapshot["scroll"]["avoided_property_calls"] == 1
+        assert snapshot["dom"]["live_property_calls"] == 1
+
+
+class TestCachedPattern:
+    def test_unavailable_pattern_never_goes_live(self):
+        node = cached_node({PropertyId.IsScrollPatternAvailableProperty: False})
+        scroll = CachedPattern.scroll(node)
+        assert not scroll.available
+        with pytest.raises(AttributeError):
+            scroll.VerticallyScrollable
+        node.GetPattern.assert_not_called()
+        assert cache_profile_stats.snapshot()["scroll"]["avoided_pattern_calls"] == 1
+
+    def test_properties_are_read_from_cache(self):
+        node = cached_node(
+            {
+                PropertyId.IsLegacyIAccessiblePatternAvailableProperty: True,
+                PropertyId.LegacyIAccessibleRoleProperty: 43,
+                PropertyId.LegacyIAccessibleValueProperty: "hello",
+            }
+        )
+        legacy = CachedPattern.legacy_accessible(node)
+        assert legacy.Role == 43
+        assert legacy.Value == "hello"
+        node.GetPattern.assert_not_called()
+        assert cache_profile_stats.snapshot()["interactive"]["avoided_property_calls"] == 2
+
+    def test_uncached_node_falls_back_to_live_pattern(self):
+        node = cached_node({})
+        node.GetPattern.return_value = MagicMock(IsModal=True)
+        window = CachedPattern.window(node)
+        assert window.available
+        assert window.IsModal is True
+        node.GetPattern.assert_called_once()
+        snapshot = cache_profile_stats.snapshot()["interactive"]
+        assert snapshot["live_pattern_calls"] == 1
+        assert snapshot["live_property_calls"] == 1
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            CachedPattern.window(cached_node({})).Foo
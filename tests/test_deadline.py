@@ -0,0 +1,26 @@
+from time import sleep
+
+import pytest
+
+from windows_mcp.tree.deadline import Deadline, DeadlineExceeded
+
+
+class TestDeadline:
+    def test_no_budget_never_expires(self):
+        deadline = Deadline()
+        assert not deadline.expired
+        assert deadline.remaining() is None
+        deadline.check()
+
+    def test_budget_expires(self):
+        deadline = Deadline(max_ms=1)
+        sleep(0.005)
+        assert deadline.expired
+        assert deadline.remaining() == 0.0
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+    def test_remaining_within_budget(self):
+        deadline = Deadline(max_ms=10_000)
+        assert 0 < deadline.remaining() <= 10
+        deadline.check()
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import pytest
+
+from windows_mcp.desktop.service import Desktop
+
+
+@pytest.fixture
+def desktop():
+    with patch.object(Desktop, "__init__", lambda self: None):
+        return Desktop()
+
+
+@pytest.fixture
+def screen(desktop):
+    """Window frames, class names and extended styles by handle."""
+    frames, classes, styles = {}, {}, {}
+    with (
+        patch.object(desktop, "get_window_frame", lambda hwnd: frames[hwnd]),
+        patch.object(desktop, "is_window_cloaked", lambda hwnd: False),
+        patch("windows_mcp.desktop.service.win32gui") as win32gui,
+    ):
+        win32gui.GetClassName.side_effect = lambda hwnd: classes.get(hwnd, "Window")
+        win32gui.GetWindowLong.side_effect = lambda hwnd, index: styles.get(hwnd, 0)
+        win32gui.IsIconic.return_value = False
+        yield frames, classes, styles
+
+
+class TestOcclusionMap:
+    def test_layered_overlay_hides_nothing(self, desktop, screen):
+        frames, classes, styles = screen
+        # A full screen layered overlay, not click-through, that get_windows leaves out
+        frames[1], styles[1] = (0, 0, 1920, 1080), 0x00080000
+        frames[2] = (100, 100, 800, 600)
+        occlusion = desktop.get_occlusion_map([1, 2], windows_handles={2})
+        assert not occlusion.is_occluded(2)
+        assert occlusion.is_visible(2, 400, 300)
+
+    def test_app_and_shell_windows_hide_what_is_below(self, desktop, screen):
+        frames, classes, _ = screen
+        frames[1], classes[1] = (0, 1040, 1920, 1080), "Shell_TrayWnd"
+        frames[2] = (0, 0, 1920, 1080)
+        frames[3] = (100, 100, 800, 600)
+        occlusion = desktop.get_occlusion_map([1, 2, 3], windows_handles={2, 3})
+        assert not occlusion.is_visible(2, 500, 1060)
+        assert occlusion.is_occluded(3)
@@ -45,6 +45,16 @@ class TestWindow:
         row = sample_window.to_row()
         assert row == ["Untitled - Notepad", 0, "Normal", 200, 100, 12345]
 
+    def test_to_dict(self, sample_window):
+        assert sample_window.to_dict() == {
+            "name": "Untitled - Notepad",
+            "depth": 0,
+            "status": "Normal",
+            "width": 200,
+            "height": 100,
+            "handle": 12345,
+        }
+
 
 class TestDesktopState:
     def test_active_desktop_to_string(self, sample_desktop_state):
@@ -82,3 +92,11 @@ class TestDesktopState:
     def test_windows_to_string_with_windows(self, sample_desktop_state):
         result = sample_desktop_state.windows_to_string()
         assert "Untitled - Notepad" in result
+
+    def test_to_dict(self, sample_desktop_state):
+        data = sample_desktop_state.to_dict()
+        assert data["active_desktop"] == "Desktop 1"
+        assert data["desktops"] == ["Desktop 1", "Desktop 2"]
+        assert data["focused_window"]["handle"] == 12345
+        assert [window["name"] for window in data["windows"]] == ["Untitled - Notepad"]
+        assert data["truncated_windows"] == [] and data["list_summaries"] == []
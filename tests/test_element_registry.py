@@ -0,0 +1,225 @@
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+
+from windows_mcp.tree.memory import MemoryElement
+from windows_mcp.tree.registry import ElementRegistry, ElementStore, StaleElementError
+from windows_mcp.tree.views import BoundingBox, Center, TreeElementNode
+from windows_mcp.uia.enums import Rect
+
+from tests.synthetic import traverse_window
+
+
+def app():
+    return MemoryElement(
+        "WindowControl",
+        name="App",
+        rect=(0, 0, 800, 600),
+        children=[
+            MemoryElement("ButtonControl", name="OK", rect=(10, 10, 90, 30)),
+            MemoryElement("EditControl", name="Search", rect=(10, 40, 210, 60)),
+        ],
+    )
+
+
+def registry_for(root):
+    ctx, _ = traverse_window(root)
+    registry = ElementRegistry()
+    registry.rebuild(ctx.interactive_nodes + ctx.scrollable_nodes)
+    return registry, ctx
+
+
+class Gone:
+    @property
+    def BoundingRectangle(self):
+        raise RuntimeError("UIA_E_ELEMENTNOTAVAILABLE")
+
+
+def node(name, element=None, element_id="", runtime_id=None):
+    return TreeElementNode(
+        bounding_box=BoundingBox(left=0, top=0, right=10, bottom=10, width=10, height=10),
+        center=Center(x=5, y=5),
+        name=name,
+        id=element_id,
+        runtime_id=runtime_id,
+        element=element,
+    )
+
+
+class TestElementRegistry:
+    def test_resolves_snapshot_ids(self):
+        root = app()
+        registry, ctx = registry_for(root)
+        ok = next(node for node in ctx.interactive_nodes if node.name == "OK")
+        entry, element, center = registry.resolve(ok.id)
+        assert element.element is root.children[0]
+        assert entry.runtime_id == root.children[0].runtime_id
+        assert (center.x, center.y) == (50, 20)
+        assert registry.hits == 1
+
+    def test_follows_moved_element(self):
+        root = app()
+        registry, ctx = registry_for(root)
+        root.children[0].rect = Rect(110, 10, 190, 30)
+        _, _, center = registry.resolve(ctx.interactive_nodes[-1].id)
+        assert (center.x, center.y) == (150, 20)
+
+    def test_collapsed_element_is_stale(self):
+        root = app()
+        registry, ctx = registry_for(root)
+        root.children[0].rect = Rect(0, 0, 0, 0)
+        with pytest.raises(StaleElementError, match="Take a new Snapshot"):
+            registry.resolve(ctx.interactive_nodes[-1].id)
+        assert registry.stale == 1
+
+    def test_center_is_on_the_visible_part(self):
+        root = app()
+        ctx, _ = traverse_window(root)
+        screen = Rect(0, 0, 1000, 700)
+        registry = ElementRegistry(window_rect=lambda handle: root.rect, screen_box=screen)
+        nodes = ctx.interactive_nodes + ctx.scrollable_nodes
+        registry.register(nodes, 1)
+        registry.rebuild(nodes)
+        ok = next(node for node in ctx.interactive_nodes if node.name == "OK")
+        # Half of the button slid out of the window, the rest past the screen
+        root.children[0].rect = Rect(760, 10, 840, 30)
+        _, _, center = registry.resolve(ok.id)
+        assert (center.x, center.y) == (780, 20)
+        root.rect = Rect(0, 0, 1200, 800)
+        root.children[0].rect = Rect(960, 680, 1040, 720)
+        _, _, center = registry.resolve(ok.id)
+        assert (center.x, center.y) == (980, 690)
+
+    def test_element_outside_its_window_is_stale(self):
+        root = app()
+        ctx, _ = traverse_window(root)
+        registry = ElementRegistry(window_rect=lambda handle: root.rect)
+        nodes = ctx.interactive_nodes + ctx.scrollable_nodes
+        registry.register(nodes, 1)
+        registry.rebuild(nodes)
+        ok = next(node for node in ctx.interactive_nodes if node.name == "OK")
+        root.children[0].rect = Rect(810, 10, 890, 30)
+        with pytest.raises(StaleElementError):
+            registry.resolve(ok.id)
+
+    def test_gone_element_is_stale(self):
+        registry = ElementRegistry()
+        registry.rebuild([node("OK", element=Gone(), element_id="a", runtime_id=(1,))])
+        with pytest.raises(StaleElementError):
+            registry.resolve("a")
+
+    def test_unknown_label(self):
+        registry, _ = registry_for(app())
+        with pytest.raises(ValueError, match="not in the last Snapshot"):
+            registry.resolve("nope")
+
+    def test_positional_labels_without_ids(self):
+        registry = ElementRegistry()
+        registry.rebuild([node("A"), node("B")])
+        assert registry.get(1).name == "B"
+        assert registry.get("0").name == "A"
+        assert 2 not in registry
+
+    def test_rebuild_replaces_previous_snapshot(self):
+        registry = ElementRegistry()
+        registry.rebuild([node("A", element_id="a")])
+        registry.rebuild([node("B", element_id="b")])
+        assert "a" not in registry and "b" in registry
+        assert len(registry) == 1
+
+    def test_point_check_without_element(self):
+        at_point = SimpleNamespace(GetRuntimeId=lambda: [42, 7])
+        registry = ElementRegistry(element_from_point=lambda x, y: at_point)
+        registry.rebuild(
+            [
+                node("Same", element_id="a", runtime_id=(42, 7)),
+                node("Other", element_id="b", runtime_id=(42, 8)),
+            ]
+        )
+        assert registry.resolve("a")[2] == Center(x=5, y=5)
+        with pytest.raises(StaleElementError):
+            registry.resolve("b")
+
+
+class CountingStore(ElementStore):
+    """Hands out cookies like the Global Interface Table."""
+
+    def __init__(self):
+        self.elements = {}
+        self.cookies = count(1)
+
+    def register(self, element):
+        cookie = next(self.cookies)
+        self.elements[cookie] = element
+        return cookie
+
+    def get(self, cookie):
+        return self.elements[cookie]
+
+    def revoke(self, cookie):
+        del self.elements[cookie]
+
+
+def nodes(count, handle_offset=0):
+    return [
+        node(f"N{i}", element=object(), element_id=f"n{i}", runtime_id=(handle_offset, i))
+        for i in range(count)
+    ]
+
+
+class TestElementLifetime:
+    def test_register_takes_elements_from_nodes(self):
+        store = CountingStore()
+        registry = ElementRegistry(store=store)
+        window_nodes = nodes(3)
+        registry.register(window_nodes, handle=1)
+        assert all(n.element is None for n in window_nodes)
+        assert len(store.elements) == 3
+        registry.rebuild(window_nodes)
+        entry = registry.get("n1")
+        assert registry.element(entry) is store.elements[entry.reference]
+
+    def test_unchanged_element_keeps_its_reference(self):
+        store = CountingStore()
+        registry = ElementRegistry(store=store)
+        registry.register(nodes(2), handle=1)
+        registry.register(nodes(2), handle=1)
+        assert len(store.elements) == 2
+
+    def test_evicts_least_recently_used_by_count(self):
+        store = CountingStore()
+        registry = ElementRegistry(store=store, max_elements=3)
+        first = nodes(2)
+        registry.register(first, handle=1)
+        registry.rebuild(first[:1])  # n0 used by the last snapshot
+        registry.register(nodes(2, handle_offset=1), handle=2)
+        assert len(store.elements) == 3
+        assert registry.get("n0").reference is not None
+        assert registry.stats()["evictions"] == 1
+
+    def test_evicts_by_memory(self):
+        store = CountingStore()
+        registry = ElementRegistry(store=store, max_bytes=4096)
+        registry.register(nodes(10), handle=1)
+        assert registry.stats()["bytes"] <= 4096
+        assert len(store.elements) == registry.stats()["elements"] < 10
+
+    def test_closed_windows_are_released(self):
+        store = CountingStore()
+        registry = ElementRegistry(store=store)
+        registry.register(nodes(2), handle=1)
+        registry.register(nodes(2, handle_offset=1), handle=2)
+        registry.retain_windows([2])
+        assert len(store.elements) == 2
+        assert registry.stats()["bytes"] == sum(entry.size for entry in registry._entries.values())
+
+    def test_removed_element_is_released(self):
+        store = CountingStore()
+        registry = ElementRegistry(store=store)
+        window_nodes = nodes(2)
+        registry.register(window_nodes, handle=1)
+        registry.rebuild(window_nodes)
+        registry.release([0, 1])
+        assert len(store.elements) == 1
+        assert registry.get("n1").reference is None
@@ -0,0 +1,126 @@
+import pytest
+
+from windows_mcp.tree.cache_utils import CachedControlHelper, CachedPattern
+from windows_mcp.tree.memory import (
+    MemoryCacheRequest,
+    MemoryControl,
+    MemoryElement,
+    localized_control_type,
+    on_screen_control_view,
+)
+from windows_mcp.uia.enums import AccessibleRole, PatternId, PropertyId, TreeScope
+
+from tests.synthetic import chromium_dom, comparable, data_grid, get_window_nodes, wpf_app
+
+
+def window():
+    return MemoryElement(
+        "WindowControl",
+        name="App",
+        rect=(0, 0, 800, 600),
+        children=[
+            MemoryElement("ButtonControl", name="OK", rect=(10, 10, 90, 30)),
+            MemoryElement(
+                "PaneControl",
+                is_offscreen=True,
+                children=[MemoryElement("EditControl", name="Search", rect=(10, 40, 200, 60))],
+            ),
+        ],
+    )
+
+
+class TestMemoryElement:
+    def test_defaults_follow_control_type(self):
+        element = MemoryElement("HyperlinkControl", name="Home")
+        assert element.localized_control_type == "link"
+        assert element.properties[PropertyId.LegacyIAccessibleRoleProperty] == AccessibleRole.Link
+        assert element.properties[PropertyId.IsWindowPatternAvailableProperty] is False
+
+    def test_runtime_ids_are_unique(self):
+        assert MemoryElement().runtime_id != MemoryElement().runtime_id
+
+    def test_walk_is_pre_order(self):
+        root = window()
+        assert [element.name for element in root.walk()] == ["App", "OK", "", "Search"]
+        assert len(root) == 4
+
+    @pytest.mark.parametrize(
+        "control_type, expected",
+        [
+            ("ListItemControl", "list item"),
+            ("ButtonControl", "button"),
+            ("DataItemControl", "item"),
+        ],
+    )
+    def test_localized_control_type(self, control_type, expected):
+        assert localized_control_type(control_type) == expected
+
+
+class TestMemoryControl:
+    def test_build_updated_cache_counts_round_trips(self):
+        control = MemoryControl(window())
+        cached = control.BuildUpdatedCache(MemoryCacheRequest())
+        assert control.stats.round_trips == 1
+        assert [child.CachedName for child in cached.GetCachedChildren()] == ["OK", ""]
+        # Children scope only caches one level
+        assert cached.GetCachedChildren()[1].GetCachedChildren() == []
+
+    def test_subtree_filter_promotes_descendants(self):
+        request = MemoryCacheRequest(TreeScope.TreeScope_Subtree, on_screen_control_view)
+        cached = MemoryControl(window()).BuildUpdatedCache(request)
+        assert [child.CachedName for child in cached.GetCachedChildren()] == ["OK", "Search"]
+
+    def test_element_scope_has_no_cached_children(self):
+        request = MemoryCacheRequest(TreeScope.TreeScope_Element)
+        assert MemoryControl(window()).BuildUpdatedCache(request).GetCachedChildren() == []
+
+    def test_live_calls_are_counted(self):
+        control = MemoryControl(window())
+        assert control.Name == "App"
+        assert control.CachedName == "App"
+        assert len(control.GetChildren()) == 2
+        assert control.stats.live_calls == 2
+
+    def test_cached_property_values(self):
+        control = MemoryControl(MemoryElement("ButtonControl", name="OK", rect=(1, 2, 3, 4)))
+        assert control.GetCachedPropertyValue(PropertyId.NameProperty) == "OK"
+        assert control.GetCachedPropertyValue(PropertyId.BoundingRectangleProperty).right == 3
+        assert control.GetCachedPropertyValue(PropertyId.RuntimeIdProperty) == list(
+            control.element.runtime_id
+        )
+        assert control.CachedControlTypeName == "ButtonControl"
+
+    def test_patterns(self):
+        control = MemoryControl(MemoryElement("PaneControl", scrollable=True))
+        assert control.GetPattern(PatternId.ScrollPattern).VerticallyScrollable is True
+        assert control.GetPattern(PatternId.WindowPattern) is None
+        assert CachedPattern.scroll(control).available
+
+    def test_prefetch_subtree(self):
+        request = MemoryCacheRequest(TreeScope.TreeScope_Subtree, on_screen_control_view)
+        node = CachedControlHelper.prefetch_subtree(MemoryControl(window()), request)
+        children = CachedControlHelper.get_cached_children(node)
+        assert [child.CachedName for child in children] == ["OK", "Search"]
+        assert node.stats.round_trips == 1
+
+
+class TestSyntheticShapes:
+    @pytest.mark.parametrize(
+        "generate, is_browser",
+        [(wpf_app, False), (lambda: data_grid(rows=500), False), (chromium_dom, True)],
+    )
+    def test_modes_agree_on_visible_nodes(self, generate, is_browser):
+        root = generate()
+        per_node, per_node_stats, _ = get_window_nodes(root, "per_node", is_browser)
+        subtree, subtree_stats, _ = get_window_nodes(root, "subtree", is_browser)
+        assert subtree_stats.round_trips == 1 < per_node_stats.round_trips
+        assert comparable(per_node) == comparable(subtree)
+
+    def test_generators_are_deterministic(self):
+        assert len(wpf_app(seed=3)) == len(wpf_app(seed=3))
+        assert [e.name for e in chromium_dom(seed=1).walk()] == [
+            e.name for e in chromium_dom(seed=1).walk()
+        ]
+
+    def test_data_grid_size(self):
+        assert len(data_grid(rows=100, columns=4)) == 1 + 5 + 1 + 4 + 1 + 100 * 5
@@ -0,0 +1,79 @@
+import pytest
+
+from windows_mcp.tree.name_index import NameIndex, trigrams
+from windows_mcp.tree.views import BoundingBox, Center, TreeElementNode
+
+
+def node(name, window="Notepad", element_id=""):
+    return TreeElementNode(
+        bounding_box=BoundingBox(left=0, top=0, right=10, bottom=10, width=10, height=10),
+        center=Center(x=5, y=5),
+        name=name,
+        window_name=window,
+        id=element_id,
+    )
+
+
+@pytest.fixture
+def index():
+    index = NameIndex()
+    index.rebuild(
+        [
+            node("Save", element_id="a"),
+            node("Save As", element_id="b"),
+            node("Search", window="Explorer", element_id="c"),
+            node("", element_id="d"),
+            node("save", window="Explorer", element_id="e"),
+            node("Open recent files"),
+        ]
+    )
+    return index
+
+
+class TestNameIndex:
+    def test_exact(self, index):
+        match = index.lookup("Save")
+        assert (match.label, match.kind) == ("a", "exact")
+
+    def test_exact_beats_casefold(self, index):
+        assert index.lookup("save").label == "e"
+        assert index.lookup("save").kind == "exact"
+
+    def test_casefold(self, index):
+        match = index.lookup("SAVE AS")
+        assert (match.label, match.kind) == ("b", "casefold")
+
+    def test_window_scope(self, index):
+        assert index.lookup("Save", window="explorer").label == "e"
+        assert index.lookup("Save As", window="Explorer") is None
+
+    def test_fuzzy(self, index):
+        match = index.lookup("Open recent file")
+        assert (match.label, match.kind) == ("5", "fuzzy")
+        assert match.score >= index.fuzzy_threshold
+
+    def test_fuzzy_below_threshold_misses(self, index):
+        assert index.lookup("Close") is None
+
+    def test_ambiguous_fuzzy_misses(self):
+        index = NameIndex(fuzzy_threshold=0.5)
+        index.rebuild([node("Tab 1"), node("Tab 2")])
+        assert index.lookup("Tab") is None
+
+    def test_stats(self, index):
+        index.lookup("Save")
+        index.lookup("save as")
+        index.lookup("Nothing like it")
+        stats = index.stats()
+        assert (stats["exact"], stats["casefold"], stats["misses"]) == (1, 1, 1)
+        assert stats["names"] == 5
+
+    def test_rebuild_replaces(self, index):
+        index.rebuild([node("Other")])
+        assert index.lookup("Save") is None
+        assert len(index) == 1
+
+
+def test_trigrams_are_case_insensitive():
+    assert trigrams("OK") == trigrams("ok")
+    assert "  o" in trigrams("ok")
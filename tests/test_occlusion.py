@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+from windows_mcp.tree.occlusion import (
+    OcclusionMap,
+    region_area,
+    region_contains,
+    subtract,
+    visible_region,
+)
+
+
+def node(x, y):
+    return SimpleNamespace(center=SimpleNamespace(x=x, y=y))
+
+
+class TestRectangleAlgebra:
+    def test_subtract_disjoint(self):
+        assert subtract((0, 0, 10, 10), (20, 20, 30, 30)) == [(0, 0, 10, 10)]
+
+    def test_subtract_touching_edges_keeps_rect(self):
+        assert subtract((0, 0, 10, 10), (10, 0, 20, 10)) == [(0, 0, 10, 10)]
+
+    def test_subtract_center_hole(self):
+        pieces = subtract((0, 0, 30, 30), (10, 10, 20, 20))
+        assert len(pieces) == 4
+        assert region_area(pieces) == 900 - 100
+        assert not region_contains(pieces, 15, 15)
+        assert all(region_contains(pieces, x, y) for x, y in [(5, 5), (25, 25), (15, 5), (5, 15)])
+
+    def test_subtract_covering(self):
+        assert subtract((10, 10, 20, 20), (0, 0, 30, 30)) == []
+
+    def test_visible_region_of_several_occluders(self):
+        region = visible_region((0, 0, 100, 100), [(0, 0, 50, 100), (50, 0, 100, 50)])
+        assert region_area(region) == 50 * 50
+        assert region_contains(region, 75, 75)
+        assert not region_contains(region, 25, 75)
+
+    def test_empty_rect_has_no_region(self):
+        assert visible_region((0, 0, 0, 10), []) == []
+
+
+class TestOcclusionMap:
+    def test_z_order(self):
+        occlusion = OcclusionMap.from_z_order(
+            [
+                (1, (0, 0, 100, 100), True),
+                (2, (50, 0, 150, 100), True),
+                (3, (10, 10, 40, 40), True),
+            ]
+        )
+        assert occlusion.regions[1] == [(0, 0, 100, 100)]
+        assert occlusion.regions[2] == [(100, 0, 150, 100)]
+        assert occlusion.is_occluded(3)
+        assert not occlusion.is_occluded(2)
+
+    def test_transparent_windows_hide_nothing(self):
+        occlusion = OcclusionMap.from_z_order(
+            [(1, (0, 0, 100, 100), False), (2, (0, 0, 100, 100), True)]
+        )
+        assert not occlusion.is_occluded(2)
+
+    def test_unknown_windows_are_visible(self):
+        occlusion = OcclusionMap.from_z_order([(1, (0, 0, 10, 10), True)])
+        assert not occlusion.is_occluded(7)
+        assert occlusion.is_visible(7, 5, 5)
+        nodes = [node(5, 5)]
+        assert occlusion.filter(7, nodes) is nodes
+
+    def test_filter_by_center(self):
+        occlusion = OcclusionMap.from_z_order(
+            [(1, (0, 0, 50, 100), True), (2, (0, 0, 100, 100), True)]
+        )
+        covered, uncovered = node(25, 50), node(75, 50)
+        assert occlusion.filter(2, [covered, uncovered]) == [uncovered]
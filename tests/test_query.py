@@ -0,0 +1,142 @@
+import pytest
+
+from windows_mcp.tree.memory import MemoryElement
+from windows_mcp.tree.query import QueryIndex, QueryWindow, compile_selector
+from windows_mcp.uia.enums import PropertyId, ToggleState
+
+from tests.synthetic import traverse_window
+
+
+def checkbox(name, state, top):
+    return MemoryElement(
+        "CheckBoxControl",
+        name=name,
+        rect=(10, top, 200, top + 20),
+        is_keyboard_focusable=True,
+        properties={PropertyId.ToggleToggleStateProperty: state},
+    )
+
+
+def editor():
+    return MemoryElement(
+        "WindowControl",
+        name="Editor",
+        rect=(0, 0, 800, 600),
+        children=[
+            MemoryElement(
+                "EditControl",
+                name="Text Editor",
+                automation_id="Body",
+                rect=(0, 40, 800, 400),
+                is_keyboard_focusable=True,
+            ),
+            MemoryElement(
+                "PaneControl",
+                name="Settings",
+                class_name="SettingsPane",
+                rect=(0, 400, 800, 600),
+                children=[
+                    checkbox("Word wrap", ToggleState.On, 410),
+                    checkbox("Spell check", ToggleState.Off, 440),
+                ],
+            ),
+            MemoryElement(
+                "WindowControl",
+                name="Save As",
+                rect=(200, 100, 600, 300),
+                children=[
+                    MemoryElement(
+                        "PaneControl",
+                        rect=(200, 120, 600, 300),
+                        children=[
+                            MemoryElement(
+                                "EditControl",
+                                name="File name:",
+                                automation_id="FileNameControlHost",
+                                rect=(250, 200, 550, 220),
+                                is_keyboard_focusable=True,
+                                has_keyboard_focus=True,
+                            )
+                        ],
+                    ),
+                    MemoryElement("ButtonControl", name="Save", rect=(450, 260, 520, 280)),
+                ],
+            ),
+        ],
+    )
+
+
+@pytest.fixture
+def index():
+    ctx, _ = traverse_window(editor())
+    index = QueryIndex()
+    index.rebuild(
+        [QueryWindow(1, "Editor", ctx.arena)], ctx.interactive_nodes + ctx.scrollable_nodes
+    )
+    return index
+
+
+def names(matches):
+    return sorted(match.node.name for match in matches)
+
+
+class TestCompileSelector:
+    def test_compounds_and_combinators(self):
+        selector = compile_selector('Window[name="Save As"] > Pane EditControl:focused')
+        assert [c.control_type for c in selector.compounds] == ["window", "pane", "edit"]
+        assert [c.combinator for c in selector.compounds] == [" ", ">", " "]
+        assert selector.compounds[0].tests[0].value == "save as"
+        assert selector.compounds[2].pseudo_classes == ("focused",)
+
+    def test_compiled_once(self):
+        assert compile_selector("Button[id=Ok]") is compile_selector("Button[id=Ok]")
+
+    @pytest.mark.parametrize(
+        "text, message",
+        [
+            ("", "Empty selector"),
+            ("> Edit", "missing element"),
+            ("Edit[value=x]", "Unknown attribute"),
+            ("Edit:hover", "Unknown pseudo-class"),
+            ("Edit[name=x", "Invalid selector"),
+        ],
+    )
+    def test_invalid(self, text, message):
+        with pytest.raises(ValueError, match=message):
+            compile_selector(text)
+
+
+class TestQueryIndex:
+    def test_descendant_of_a_dialog(self, index):
+        matches = index.query('Window[name="Save As"] Edit')
+        assert names(matches) == ["File name:"]
+        assert matches[0].label == matches[0].element.id
+        assert matches[0].center.to_string() == "(400,210)"
+
+    def test_child_combinator(self, index):
+        assert index.query('Window[name="Save As"] > Edit') == []
+        assert names(index.query('Window[name="Save As"] > * > Edit')) == ["File name:"]
+
+    def test_attribute_operators(self, index):
+        assert names(index.query("Edit[id^=file]")) == ["File name:"]
+        assert names(index.query("Edit[name$=editor]")) == ["Text Editor"]
+        assert names(index.query("*[class=settingspane]")) == ["Settings"]
+        assert len(index.query("Edit[window*=edit]")) == 2
+
+    def test_toggle_states(self, index):
+        assert names(index.query("Pane[name=Settings] CheckBox:checked")) == ["Word wrap"]
+        assert names(index.query("CheckBox:unchecked")) == ["Spell check"]
+
+    def test_focused_and_interactive(self, index):
+        assert names(index.query("*:focused")) == ["File name:"]
+        # The pane is traversed but not listed in the snapshot
+        assert index.query("Pane[name=Settings]:interactive") == []
+        [pane] = index.query("Pane[name=Settings]")
+        assert pane.label == "" and pane.center.to_string() == "(400,500)"
+
+    def test_limit(self, index):
+        assert len(index.query("*", limit=3)) == 3
+
+    def test_to_string(self, index):
+        [match] = index.query("Button[name=Save]")
+        assert match.to_string() == f"{match.label}|Editor|Button|Save|(485,270)"
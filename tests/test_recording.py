@@ -0,0 +1,195 @@
+import pytest
+from click.testing import CliRunner
+
+from windows_mcp.tree.cache_utils import PATTERN_PROPERTIES
+from windows_mcp.tree.memory import MemoryCacheRequest, MemoryControl, MemoryElement
+from windows_mcp.tree.recording import (
+    PATTERN_PROPERTY_DEFAULTS,
+    RecordedWindow,
+    Recording,
+    ReplayBackend,
+    decode_element,
+    encode_element,
+    load,
+    main,
+    record_control,
+    save,
+)
+from windows_mcp.uia.enums import AccessibleRole, PropertyId, TreeScope
+
+from tests.synthetic import chromium_dom, comparable, data_grid, get_window_nodes, wpf_app
+
+
+def fingerprint(root: MemoryElement) -> list[tuple]:
+    return [
+        (
+            element.control_type,
+            element.name,
+            (element.rect.left, element.rect.top, element.rect.right, element.rect.bottom),
+            element.localized_control_type,
+            element.is_offscreen,
+            element.is_keyboard_focusable,
+            element.runtime_id,
+            len(element.children),
+            {pid: element.properties[pid] for pid in PATTERN_PROPERTY_DEFAULTS},
+        )
+        for element in root.walk()
+    ]
+
+
+def record(root: MemoryElement) -> MemoryElement:
+    request = MemoryCacheRequest(TreeScope.TreeScope_Subtree)
+    return record_control(MemoryControl(root).BuildUpdatedCache(request))
+
+
+SHAPES = {
+    "wpf": (wpf_app, False),
+    "grid": (lambda: data_grid(rows=200), False),
+    "dom": (chromium_dom, True),
+}
+
+
+def test_pattern_defaults_cover_pattern_properties():
+    recorded = {
+        property_id
+        for availability_property_id, properties in PATTERN_PROPERTIES.values()
+        for property_id in (availability_property_id, *properties.values())
+    }
+    assert set(PATTERN_PROPERTY_DEFAULTS) == recorded
+
+
+class TestEncoding:
+    def test_round_trip(self):
+        root = chromium_dom(sections=5)
+        assert fingerprint(decode_element(encode_element(root))) == fingerprint(root)
+
+    def test_defaults_are_omitted(self):
+        data = encode_element(MemoryElement("TextControl", name="Hello", rect=(0, 0, 10, 10)))
+        assert set(data) == {"type", "name", "rect", "runtime_id", "properties"}
+        assert data["properties"] == {
+            str(PropertyId.IsLegacyIAccessiblePatternAvailableProperty): True,
+            str(PropertyId.LegacyIAccessibleRoleProperty): AccessibleRole.StaticText,
+        }
+
+    def test_recorded_patterns_override_control_type_defaults(self):
+        # A button without LegacyIAccessible support must not get one back on load
+        button = MemoryElement(
+            "ButtonControl",
+            properties={PropertyId.IsLegacyIAccessiblePatternAvailableProperty: False},
+        )
+        decoded = decode_element(encode_element(button))
+        assert decoded.properties[PropertyId.IsLegacyIAccessiblePatternAvailableProperty] is False
+        assert (
+            decoded.properties[PropertyId.LegacyIAccessibleRoleProperty]
+            == AccessibleRole.PushButton
+        )
+
+    @pytest.mark.parametrize("suffix", [".json", ".json.gz"])
+    def test_save_and_load(self, tmp_path, suffix):
+        root = wpf_app(depth=5)
+        recording = Recording(windows=[RecordedWindow(42, root.name, root)], screen_size=(800, 600))
+        path = tmp_path / f"recording{suffix}"
+        save(recording, path)
+        loaded = load(path)
+        assert loaded.screen_size == (800, 600)
+        assert loaded.window(42).name == root.name
+        assert fingerprint(loaded.window(42).root) == fingerprint(root)
+
+    def test_unknown_version_is_rejected(self, tmp_path):
+        path = tmp_path / "recording.json"
+        save(Recording(version=99), path)
+        with pytest.raises(ValueError, match="Unsupported recording version"):
+            load(path)
+
+
+class TestRecordControl:
+    @pytest.mark.parametrize("shape", list(SHAPES))
+    def test_recording_replays_like_the_original(self, shape):
+        generate, is_browser = SHAPES[shape]
+        root = generate()
+        recorded = record(root)
+        assert fingerprint(recorded) == fingerprint(root)
+        for mode in ("per_node", "subtree"):
+            original, _, _ = get_window_nodes(root, mode, is_browser)
+            replayed, _, _ = get_window_nodes(recorded, mode, is_browser)
+            assert comparable(replayed) == comparable(original)
+
+    def test_single_round_trip(self):
+        control = MemoryControl(data_grid(rows=50))
+        record_control(control.BuildUpdatedCache(MemoryCacheRequest(TreeScope.TreeScope_Subtree)))
+        assert control.stats.round_trips == 1
+        assert control.stats.live_calls == 0
+
+
+def notes_window() -> MemoryElement:
+    items = [
+        MemoryElement("ListItemControl", name=name, rect=(0, top, 800, top + 20))
+        for name, top in (("First", 40), ("Second", 60))
+    ]
+    return MemoryElement(
+        "WindowControl",
+        name="Notes",
+        rect=(0, 0, 800, 600),
+        children=[
+            MemoryElement("ButtonControl", name="Save", rect=(10, 10, 90, 30)),
+            MemoryElement("EditControl", name="Title", rect=(100, 10, 400, 30)),
+            MemoryElement(
+                "ListControl",
+                name="Notes list",
+                rect=(0, 40, 800, 600),
+                scrollable=True,
+                vertical_scroll_percent=25,
+                children=items,
+            ),
+        ],
+    )
+
+
+@pytest.fixture
+def notes_recording(tmp_path):
+    root = notes_window()
+    path = tmp_path / "notes.json.gz"
+    save(Recording(windows=[RecordedWindow(0x42, root.name, root)], screen_size=(1280, 720)), path)
+    return path
+
+
+class TestReplayBackend:
+    @pytest.mark.parametrize("mode", ["per_node", "subtree"])
+    def test_tree_replays_a_saved_recording(self, notes_recording, mode):
+        tree = ReplayBackend(load(notes_recording)).create_tree(mode)
+        try:
+            interactive, scrollable, informative = tree.get_nodes(0x42)
+        finally:
+            tree.shutdown()
+        assert sorted((node.name, node.control_type) for node in interactive) == [
+            ("First", "List Item"),
+            ("Save", "Button"),
+            ("Second", "List Item"),
+            ("Title", "Edit"),
+        ]
+        assert {node.window_name for node in interactive} == {"Notes"}
+        assert [(node.name, node.vertical_scroll_percent) for node in scrollable] == [
+            ("Notes list", 25)
+        ]
+        assert informative == []
+
+    def test_cli_replay(self, notes_recording):
+        result = CliRunner().invoke(main, ["replay", str(notes_recording), "--repeat", "2"])
+        assert result.exit_code == 0, result.output
+        assert "0x42 'Notes': 6 elements, 4 interactive, 1 scrollable" in result.output
+
+    def test_control_from_handle(self):
+        root = wpf_app(depth=3)
+        backend = ReplayBackend(Recording(windows=[RecordedWindow(7, root.name, root)]))
+        assert backend.control_from_handle(7).element is root
+        with pytest.raises(KeyError):
+            backend.control_from_handle(8)
+
+    def test_screen_size(self):
+        backend = ReplayBackend(Recording(screen_size=(2560, 1440)))
+        assert backend.desktop.get_screen_size().width == 2560
+
+    def test_cli_help(self):
+        result = CliRunner().invoke(main, ["--help"])
+        assert result.exit_code == 0
+        assert "record" in result.output and "replay" in result.output
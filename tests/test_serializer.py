@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from windows_mcp.tree.serializer import budget_bytes, decode_cursor, paginate, rank_elements
+from windows_mcp.tree.views import BoundingBox, ScrollElementNode, TreeElementNode, TreeState
+
+
+def box(left, top, right, bottom):
+    return BoundingBox(
+        left=left, top=top, right=right, bottom=bottom, width=right - left, height=bottom - top
+    )
+
+
+def node(name, left, top, right, bottom, window="Editor", focused=False):
+    bounding_box = box(left, top, right, bottom)
+    return TreeElementNode(
+        bounding_box=bounding_box,
+        center=bounding_box.get_center(),
+        name=name,
+        control_type="ButtonControl",
+        window_name=window,
+        is_focused=focused,
+        id=name,
+    )
+
+
+def scrollable(name, left, top, right, bottom, window="Editor"):
+    bounding_box = box(left, top, right, bottom)
+    return ScrollElementNode(
+        name=name,
+        control_type="PaneControl",
+        xpath="",
+        window_name=window,
+        bounding_box=bounding_box,
+        center=bounding_box.get_center(),
+        horizontal_scrollable=False,
+        horizontal_scroll_percent=0,
+        vertical_scrollable=True,
+        vertical_scroll_percent=50.0,
+        is_focused=False,
+        id=name,
+    )
+
+
+def many_buttons(count, generation=1):
+    return TreeState(
+        interactive_nodes=[node(f"b{i}", i * 10, 0, i * 10 + 10, 10) for i in range(count)],
+        generation=generation,
+    )
+
+
+class TestRankElements:
+    def test_focused_element_then_its_window(self):
+        state = TreeState(
+            interactive_nodes=[
+                node("huge", 0, 0, 1000, 1000, window="Other"),
+                node("small", 0, 0, 10, 10),
+                node("focus", 500, 500, 510, 510, focused=True),
+            ]
+        )
+        assert [n.name for n in rank_elements(state)] == ["focus", "small", "huge"]
+
+    def test_closer_to_the_focus_ranks_higher(self):
+        state = TreeState(
+            interactive_nodes=[
+                node("far", 2000, 0, 2040, 40),
+                node("near", 120, 0, 160, 40),
+                node("focus", 0, 0, 100, 40, focused=True),
+            ]
+        )
+        assert [n.name for n in rank_elements(state)] == ["focus", "near", "far"]
+
+    def test_larger_ranks_higher_without_focus(self):
+        state = TreeState(
+            interactive_nodes=[node("small", 0, 0, 10, 10), node("large", 0, 0, 100, 100)],
+            scrollable_nodes=[scrollable("list", 0, 0, 50, 50)],
+        )
+        assert [n.name for n in rank_elements(state)] == ["large", "list", "small"]
+
+
+class TestPaginate:
+    def test_without_a_budget_everything_is_listed(self):
+        page = paginate(many_buttons(50))
+        assert page.listed == page.total == 50
+        assert page.next_cursor is None
+        assert page.next_page_to_string() == ""
+
+    def test_pages_fit_the_budget_and_cover_every_element(self):
+        state = many_buttons(200)
+        names, cursor = [], None
+        while True:
+            page = paginate(state, cursor=cursor, max_bytes=1000)
+            text = page.interactive_elements_to_string() + page.scrollable_elements_to_string()
+            assert len(text.encode()) <= 1000
+            names.extend(n.name for n in page.interactive_nodes)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert sorted(names) == sorted(f"b{i}" for i in range(200))
+
+    def test_json_pages_fit_the_budget(self):
+        state = many_buttons(200)
+        page = paginate(state, max_tokens=300, format="json")
+        assert 0 < page.listed < 200
+        assert len(json.dumps(page.to_dict(), separators=(",", ":"))) <= 300 * 4
+
+    def test_a_page_holds_at_least_one_element(self):
+        page = paginate(many_buttons(3), max_bytes=1)
+        assert page.listed == 1
+        assert page.next_cursor == "1:1"
+
+    def test_cursor_of_another_snapshot(self):
+        page = paginate(many_buttons(100), max_bytes=500)
+        with pytest.raises(ValueError, match="earlier Snapshot"):
+            paginate(many_buttons(100, generation=2), cursor=page.next_cursor)
+
+    @pytest.mark.parametrize("cursor", ["abc", "1", "1:-1", "1:101"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor, many_buttons(100))
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError, match="Unknown format"):
+            paginate(many_buttons(1), format="xml")
+        with pytest.raises(ValueError, match="positive"):
+            paginate(many_buttons(1), max_tokens=0)
+
+    def test_budget_bytes(self):
+        assert budget_bytes() is None
+        assert budget_bytes(max_tokens=100) == 400
+        assert budget_bytes(max_tokens=100, max_bytes=300) == 300
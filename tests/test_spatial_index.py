@@ -0,0 +1,87 @@
+from windows_mcp.tree.spatial_index import SpatialIndex
+from windows_mcp.tree.views import BoundingBox, Center, ScrollElementNode, TreeElementNode
+
+
+def box(left, top, right, bottom):
+    return BoundingBox(
+        left=left, top=top, right=right, bottom=bottom, width=right - left, height=bottom - top
+    )
+
+
+def node(name, left, top, right, bottom, element_id=""):
+    bounding_box = box(left, top, right, bottom)
+    return TreeElementNode(
+        bounding_box=bounding_box, center=bounding_box.get_center(), name=name, id=element_id
+    )
+
+
+def scrollable(name, left, top, right, bottom, element_id=""):
+    return ScrollElementNode(
+        name=name,
+        control_type="PaneControl",
+        window_name="App",
+        bounding_box=box(left, top, right, bottom),
+        center=Center(x=0, y=0),
+        xpath="",
+        horizontal_scrollable=False,
+        horizontal_scroll_percent=0,
+        vertical_scrollable=True,
+        vertical_scroll_percent=0,
+        is_focused=False,
+        id=element_id,
+    )
+
+
+def index_of(*nodes, cell_size=64):
+    index = SpatialIndex(cell_size=cell_size)
+    index.rebuild(nodes)
+    return index
+
+
+class TestSpatialIndex:
+    def test_element_at_prefers_innermost(self):
+        index = index_of(
+            node("OK", 110, 110, 190, 130, "ok"),
+            scrollable("List", 100, 100, 400, 400, "list"),
+        )
+        assert index.element_at(150, 120).label == "ok"
+        assert [hit.label for hit in index.at(150, 120)] == ["ok", "list"]
+        assert index.element_at(300, 300).label == "list"
+
+    def test_boxes_are_half_open(self):
+        index = index_of(node("A", 0, 0, 10, 10, "a"))
+        assert index.element_at(0, 0).label == "a"
+        assert index.element_at(9, 9).label == "a"
+        assert index.element_at(10, 5) is None
+
+    def test_spans_cells(self):
+        index = index_of(node("Wide", 10, 10, 500, 20, "w"), cell_size=32)
+        assert index.element_at(480, 15).label == "w"
+        assert index.element_at(480, 25) is None
+
+    def test_negative_coordinates(self):
+        # Monitors left of or above the primary one have negative coordinates
+        index = index_of(node("Left", -300, -50, -100, 50, "l"))
+        assert index.element_at(-200, -10).label == "l"
+        assert index.element_at(-50, 0) is None
+
+    def test_intersecting(self):
+        index = index_of(
+            node("A", 0, 0, 10, 10, "a"),
+            node("B", 100, 100, 110, 110, "b"),
+            node("C", 5, 5, 105, 105, "c"),
+        )
+        assert [hit.label for hit in index.intersecting(8, 8, 102, 102)] == ["a", "b", "c"]
+        assert [hit.label for hit in index.intersecting(20, 20, 30, 30)] == ["c"]
+        assert index.intersecting(10, 10, 10, 20) == []
+
+    def test_positional_labels_and_empty_boxes(self):
+        index = index_of(node("Empty", 0, 0, 0, 0), node("A", 0, 0, 10, 10))
+        assert len(index) == 1
+        assert index.element_at(1, 1).label == "1"
+
+    def test_rebuild_replaces(self):
+        index = index_of(node("A", 0, 0, 10, 10, "a"))
+        index.rebuild([node("B", 50, 50, 60, 60, "b")])
+        assert index.element_at(5, 5) is None
+        assert index.element_at(55, 55).label == "b"
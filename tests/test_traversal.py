@@ -0,0 +1,314 @@
+import sys
+
+import pytest
+
+from windows_mcp.tree.memory import MemoryElement
+from windows_mcp.tree.traversal import TraversalLimits
+from windows_mcp.tree.utils import element_id
+
+from tests.synthetic import (
+    chromium_dom,
+    data_grid,
+    deep_tree,
+    get_window_nodes,
+    traverse_recursive,
+    traverse_window,
+    wide_tree,
+)
+
+
+def element(control_type, **kwargs):
+    kwargs.setdefault("rect", (0, 0, 100, 20))
+    return MemoryElement(control_type, **kwargs)
+
+
+def names(nodes):
+    return [node.name for node in nodes]
+
+
+def app_tree():
+    return element(
+        "WindowControl",
+        name="App",
+        children=[
+            element("ButtonControl", name="A"),
+            element(
+                "PaneControl",
+                children=[
+                    element("ButtonControl", name="B1"),
+                    element("ButtonControl", name="B2"),
+                ],
+            ),
+            element("ButtonControl", name="C"),
+            element("PaneControl", name="List", scrollable=True, rect=(0, 0, 400, 300)),
+        ],
+    )
+
+
+def browser_tree():
+    document = element(
+        "DocumentControl",
+        name="Page",
+        automation_id="RootWebArea",
+        rect=(0, 100, 800, 600),
+        children=[
+            element("HyperlinkControl", name="first"),
+            element("TextControl", name="Some text"),
+            element("HyperlinkControl", name="second"),
+        ],
+    )
+    return element(
+        "WindowControl",
+        name="Browser",
+        children=[element("ButtonControl", name="Back"), document],
+    )
+
+
+class TestOrdering:
+    def test_normal_apps_are_visited_right_to_left(self):
+        ctx, _ = traverse_window(app_tree())
+        assert names(ctx.interactive_nodes) == ["C", "B2", "B1", "A"]
+        assert names(ctx.scrollable_nodes) == ["List"]
+
+    def test_dom_is_visited_left_to_right(self):
+        ctx, _ = traverse_window(browser_tree(), is_browser=True)
+        assert names(ctx.dom_interactive_nodes) == ["first", "second"]
+        assert [node.text for node in ctx.dom_informative_nodes] == ["Some text"]
+        assert names(ctx.interactive_nodes) == ["Back"]
+        assert ctx.dom.CachedAutomationId == "RootWebArea"
+        assert ctx.dom_bounding_box.top == 100
+
+    @pytest.mark.parametrize("tree", [app_tree, browser_tree])
+    def test_same_visit_order_as_recursive(self, tree):
+        root = tree()
+        iterative, _ = traverse_window(root, is_browser=True)
+        recursive, _ = traverse_window(root, is_browser=True, engine=traverse_recursive)
+        assert iterative.arena.runtime_ids == recursive.arena.runtime_ids
+        assert iterative.interactive_nodes == recursive.interactive_nodes
+        assert iterative.dom_interactive_nodes == recursive.dom_interactive_nodes
+        assert iterative.visited == recursive.visited
+
+    def test_modal_dialog_clears_nodes_visited_before_it(self):
+        dialog = element(
+            "WindowControl",
+            name="Save",
+            modal=True,
+            children=[element("ButtonControl", name="OK")],
+        )
+        root = element(
+            "WindowControl",
+            name="App",
+            children=[
+                element("ButtonControl", name="Behind"),
+                dialog,
+                element("ButtonControl", name="Top"),
+            ],
+        )
+        ctx, _ = traverse_window(root)
+        # "Top" is visited before the dialog and cleared, "Behind" comes after it
+        assert names(ctx.interactive_nodes) == ["OK", "Behind"]
+
+
+class TestElementIds:
+    def test_ids_come_from_runtime_ids(self):
+        root = app_tree()
+        ctx, _ = traverse_window(root)
+        button = next(e for e in root.walk() if e.name == "C")
+        node = next(node for node in ctx.interactive_nodes if node.name == "C")
+        assert node.runtime_id == button.runtime_id
+        assert node.id == element_id(button.runtime_id)
+        assert ctx.scrollable_nodes[0].id
+
+    def test_ids_are_stable_across_traversals(self):
+        root = browser_tree()
+        (first, _, _), _, _ = get_window_nodes(root, is_browser=True)
+        root.children[1].children[1].name = "Changed text"
+        (second, _, _), _, _ = get_window_nodes(root, "subtree", is_browser=True)
+        ids = [node.id for node in first]
+        assert ids == [node.id for node in second]
+        assert len(set(ids)) == len(ids)
+
+
+class TestLimits:
+    def test_deeper_than_recursion_limit(self):
+        ctx, _ = traverse_window(deep_tree(sys.getrecursionlimit() + 100))
+        assert names(ctx.interactive_nodes) == ["leaf"]
+        assert ctx.truncated_by is None
+
+    def test_max_depth(self):
+        ctx, _ = traverse_window(deep_tree(10), limits=TraversalLimits(max_depth=5))
+        assert ctx.visited == 6
+        assert ctx.interactive_nodes == []
+
+    def test_max_nodes(self):
+        ctx, _ = traverse_window(wide_tree(50), limits=TraversalLimits(max_nodes=10))
+        assert ctx.visited == 10
+        assert ctx.truncated_by == "node limit"
+        # Right to left: the root and then the last nine children
+        assert names(ctx.interactive_nodes) == [f"root.{index}" for index in range(49, 40, -1)]
+
+    def test_max_nodes_not_reached(self):
+        ctx, _ = traverse_window(wide_tree(50), limits=TraversalLimits(max_nodes=51))
+        assert ctx.truncated_by is None
+
+    def test_max_children_keeps_first_children(self):
+        ctx, _ = traverse_window(wide_tree(50), limits=TraversalLimits(max_children=3))
+        assert ctx.truncated_by == "children limit"
+        assert names(ctx.interactive_nodes) == ["root.2", "root.1", "root.0"]
+
+    def test_with_max_depth_only_tightens(self):
+        limits = TraversalLimits(max_depth=10, max_nodes=100)
+        assert limits.with_max_depth(None) is limits
+        assert limits.with_max_depth(20) is limits
+        assert limits.with_max_depth(4) == TraversalLimits(max_depth=4, max_nodes=100)
+        assert TraversalLimits().with_max_depth(4).max_depth == 4
+
+
+class TestViewportPruning:
+    def offscreen_app(self, **kwargs):
+        return element(
+            "WindowControl",
+            name="App",
+            rect=(0, 0, 800, 600),
+            children=[
+                element("ButtonControl", name="Visible"),
+                element(
+                    "PaneControl",
+                    rect=(0, 2000, 800, 2600),
+                    children=[element("ButtonControl", name="Far", rect=(0, 2000, 100, 2020))],
+                    **kwargs,
+                ),
+            ],
+        )
+
+    def test_offscreen_subtree_is_skipped(self):
+        ctx, _ = traverse_window(self.offscreen_app(), viewport_margin=100)
+        assert names(ctx.interactive_nodes) == ["Visible"]
+        assert ctx.pruned == 1
+        assert ctx.visited == 2
+
+    def test_disabled_without_margin(self):
+        ctx, _ = traverse_window(self.offscreen_app())
+        assert ctx.pruned == 0
+        assert ctx.visited == 4
+
+    def test_margin_keeps_nearby_subtrees(self):
+        ctx, _ = traverse_window(self.offscreen_app(), viewport_margin=1500)
+        assert ctx.pruned == 0
+
+    def test_scroll_containers_are_kept(self):
+        ctx, _ = traverse_window(self.offscreen_app(scrollable=True), viewport_margin=100)
+        assert len(ctx.scrollable_nodes) == 1
+        # The container is entered, its offscreen content is still pruned
+        assert ctx.pruned == 1
+
+    def test_elements_without_rectangle_are_kept(self):
+        root = element(
+            "WindowControl",
+            name="App",
+            rect=(0, 0, 800, 600),
+            children=[
+                element(
+                    "PaneControl",
+                    rect=(0, 0, 0, 0),
+                    children=[element("ButtonControl", name="Inside")],
+                )
+            ],
+        )
+        ctx, _ = traverse_window(root, viewport_margin=0)
+        assert names(ctx.interactive_nodes) == ["Inside"]
+
+    def test_region_narrows_the_viewport(self):
+        root = element(
+            "WindowControl",
+            name="App",
+            rect=(0, 0, 800, 600),
+            children=[
+                element(
+                    "PaneControl",
+                    rect=(0, 0, 400, 600),
+                    children=[element("ButtonControl", name="Left")],
+                ),
+                element(
+                    "PaneControl",
+                    rect=(400, 0, 800, 600),
+                    children=[element("ButtonControl", name="Right", rect=(400, 0, 500, 20))],
+                ),
+            ],
+        )
+        ctx, _ = traverse_window(root, viewport_margin=0, region=(0, 0, 300, 300))
+        assert names(ctx.interactive_nodes) == ["Left"]
+        assert ctx.pruned == 1
+
+    def test_long_page_keeps_the_same_elements(self):
+        root = chromium_dom(sections=200)
+        full, _ = traverse_window(root, is_browser=True)
+        pruned, _ = traverse_window(root, is_browser=True, viewport_margin=100)
+        assert pruned.pruned > 0
+        assert pruned.visited < full.visited / 5
+        assert [node.id for node in pruned.dom_interactive_nodes] == [
+            node.id for node in full.dom_interactive_nodes
+        ]
+        assert [node.id for node in pruned.interactive_nodes] == [
+            node.id for node in full.interactive_nodes
+        ]
+        assert len(pruned.scrollable_nodes) == len(full.scrollable_nodes)
+
+
+class TestListSummaries:
+    def file_list(self, count, scrollable=True):
+        # 24 px rows from y=0 in a 600 px high window, rows 0 to 24 are on screen
+        items = [
+            element(
+                "ListItemControl",
+                name=f"File {i}",
+                rect=(0, i * 24, 400, i * 24 + 24),
+                is_offscreen=i * 24 >= 600,
+            )
+            for i in range(count)
+        ]
+        return element(
+            "WindowControl",
+            name="Explorer",
+            rect=(0, 0, 800, 600),
+            children=[
+                element(
+                    "ListControl",
+                    name="Items View",
+                    rect=(0, 0, 400, 600),
+                    scrollable=scrollable,
+                    children=items,
+                )
+            ],
+        )
+
+    def test_long_list_keeps_first_and_last_visible_items(self):
+        ctx, _ = traverse_window(self.file_list(5000), list_summary_items=5)
+        assert sorted(names(ctx.interactive_nodes), key=lambda name: int(name.split()[1])) == [
+            f"File {i}" for i in [*range(5), *range(20, 25)]
+        ]
+        [summary] = ctx.list_summaries
+        assert (summary.name, summary.items, summary.listed) == ("Items View", 5000, 10)
+        assert summary.container == ctx.scrollable_nodes[0]
+
+    def test_short_lists_are_listed_in_full(self):
+        ctx, _ = traverse_window(self.file_list(20), list_summary_items=5)
+        assert ctx.list_summaries == []
+        assert len(ctx.interactive_nodes) == 20
+
+    def test_list_without_scroll_pattern(self):
+        ctx, _ = traverse_window(self.file_list(60, scrollable=False), list_summary_items=2)
+        [summary] = ctx.list_summaries
+        assert summary.container is None
+        assert summary.listed == 4
+
+    def test_disabled_without_edge_items(self):
+        ctx, _ = traverse_window(self.file_list(60))
+        assert ctx.list_summaries == []
+        assert len(ctx.interactive_nodes) == 25
+
+    def test_skipped_items_are_not_traversed(self):
+        full, _ = traverse_window(data_grid(rows=500))
+        summarized, _ = traverse_window(data_grid(rows=500), list_summary_items=5)
+        assert summarized.visited < full.visited / 10
+        assert summarized.list_summaries[0].items == 500
@@ -0,0 +1,108 @@
+import pytest
+
+from windows_mcp.tree.health import TraversalHealth, TraversalPlan
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def health(clock):
+    return TraversalHealth(
+        slow_ms=500, skip_after_strikes=2, base_backoff_s=5, max_backoff_s=40, clock=clock
+    )
+
+
+class TestTraversalHealth:
+    def test_unknown_window_is_normal(self, health):
+        assert health.plan(1, 10) is TraversalPlan.NORMAL
+
+    def test_fast_success_stays_normal(self, health):
+        health.record_success(1, 10, latency_ms=50)
+        assert health.plan(1, 10) is TraversalPlan.NORMAL
+
+    def test_slow_success_degrades(self, health):
+        health.record_success(1, 10, latency_ms=800)
+        assert health.plan(1, 10) is TraversalPlan.DEGRADED
+
+    def test_repeat_offender_is_skipped_with_exponential_backoff(self, health, clock):
+        health.record_failure(1, 10, latency_ms=3000)
+        health.record_failure(1, 10, latency_ms=3000)
+        assert health.plan(1, 10) is TraversalPlan.SKIP
+        clock.now += 5
+        # back-off elapsed: probed again with a cheaper traversal
+        assert health.plan(1, 10) is TraversalPlan.DEGRADED
+        health.record_failure(1, 10, latency_ms=3000)
+        clock.now += 5
+        assert health.plan(1, 10) is TraversalPlan.SKIP
+        clock.now += 5
+        assert health.plan(1, 10) is TraversalPlan.DEGRADED
+
+    def test_backoff_is_capped(self, health, clock):
+        for _ in range(20):
+            health.record_failure(1, 10, latency_ms=3000)
+        clock.now += 40
+        assert health.plan(1, 10) is TraversalPlan.DEGRADED
+
+    def test_process_strikes_affect_its_other_windows(self, health):
+        health.record_failure(1, 10, latency_ms=3000)
+        assert health.plan(2, 10) is TraversalPlan.DEGRADED
+        assert health.plan(3, 11) is TraversalPlan.NORMAL
+
+    def test_process_strikes_are_kept_per_window_class(self, health):
+        # A slow File Explorer window leaves the taskbar and desktop of explorer.exe alone
+        health.record_failure(1, 10, latency_ms=3000, class_name="CabinetWClass")
+        assert health.plan(2, 10, "CabinetWClass") is TraversalPlan.DEGRADED
+        assert health.plan(3, 10, "Shell_TrayWnd") is TraversalPlan.NORMAL
+        assert health.plan(4, 10, "Progman") is TraversalPlan.NORMAL
+
+    def test_recovery_clears_strikes(self, health, clock):
+        health.record_failure(1, 10, latency_ms=3000)
+        health.record_failure(1, 10, latency_ms=3000)
+        clock.now += 5
+        health.record_success(1, 10, latency_ms=20)
+        assert health.plan(1, 10) is TraversalPlan.NORMAL
+        assert health.stats() == {"windows": {}, "processes": {}}
+
+    def test_only_fast_failures_are_retried(self, health):
+        health.record_failure(1, 10, latency_ms=20)
+        assert health.should_retry(1)
+        health.record_failure(1, 10, latency_ms=3000)
+        assert not health.should_retry(1)
+
+    def test_latency_is_averaged(self, health):
+        health.record_success(1, None, latency_ms=100)
+        health.record_success(1, None, latency_ms=200)
+        health.record_success(1, None, latency_ms=2000)
+        record = health.stats()["windows"][1]
+        assert 100 < record.latency_ms < 2000
+        assert record.traversals == 3
+
+    def test_retain_forgets_closed_windows(self, health):
+        health.record_failure(1, None, latency_ms=3000)
+        health.retain([2])
+        assert health.plan(1) is TraversalPlan.NORMAL
+
+    def test_retain_prunes_process_records(self, clock):
+        running = {10, 20}
+        health = TraversalHealth(slow_ms=500, clock=clock, process_exists=running.__contains__)
+        health.record_success(1, 10, latency_ms=50)
+        health.record_failure(2, 20, latency_ms=3000)
+        health.record_failure(3, 30, latency_ms=3000)
+        health.retain([1, 2, 3])
+        # Without strikes there is nothing to keep, without a process nothing to apply to
+        assert set(health._processes) == {(20, None)}
+        running.discard(20)
+        health.retain([1, 2, 3])
+        assert health._processes == {}
+        assert health.plan(4, 20) is TraversalPlan.NORMAL
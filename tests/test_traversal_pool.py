@@ -0,0 +1,67 @@
+from threading import Event, current_thread
+
+import pytest
+
+from windows_mcp.tree.pool import TraversalPool, default_max_workers
+
+
+@pytest.fixture
+def pool():
+    traversal_pool = TraversalPool(max_workers=4)
+    yield traversal_pool
+    traversal_pool.shutdown()
+
+
+class TestTraversalPool:
+    def test_default_size_is_bounded(self):
+        assert 1 <= default_max_workers() <= 32
+        assert default_max_workers(cap=2) <= 2
+
+    def test_returns_results(self, pool):
+        futures = [pool.submit(pow, n, 2) for n in range(10)]
+        assert [future.result(timeout=5) for future in futures] == [n * n for n in range(10)]
+
+    def test_exceptions_are_propagated(self, pool):
+        future = pool.submit(int, "not a number")
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+        pool.submit(int, "1").result(timeout=5)
+        assert pool.stats.failed == 1
+        assert pool.stats.completed == 1
+
+    def test_threads_are_reused_between_snapshots(self, pool):
+        for _ in range(3):
+            [pool.submit(current_thread).result(timeout=5) for _ in range(2)]
+        assert pool.stats.workers <= 2
+        assert pool.stats.submitted == 6
+
+    def test_grows_up_to_max_workers(self, pool):
+        release = Event()
+        futures = [pool.submit(release.wait, 5) for _ in range(6)]
+        try:
+            assert pool.stats.workers == 4
+            assert pool.stats.queue_depth + pool.stats.busy_workers == 6
+        finally:
+            release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert pool.stats.busy_workers == 0
+        assert pool.stats.queue_depth == 0
+
+    def test_initializer_and_finalizer_run_once_per_thread(self):
+        initialized, finalized = [], []
+        traversal_pool = TraversalPool(
+            max_workers=2,
+            initializer=lambda: initialized.append(current_thread().name),
+            finalizer=lambda: finalized.append(current_thread().name),
+        )
+        for _ in range(5):
+            traversal_pool.submit(current_thread).result(timeout=5)
+        traversal_pool.shutdown()
+        assert len(initialized) == traversal_pool.stats.workers
+        assert sorted(finalized) == sorted(initialized)
+
+    def test_submit_after_shutdown(self, pool):
+        pool.shutdown()
+        with pytest.raises(RuntimeError):
+            pool.submit(int, "1")
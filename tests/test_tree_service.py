@@ -1,17 +1,31 @@
+from threading import Event, get_ident
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
 
 from windows_mcp.desktop.views import Size
+from windows_mcp.tree.app_profiles import AppProfile
+from windows_mcp.tree.cache_utils import CachedControlHelper
+from windows_mcp.tree.config import DEGRADED_MAX_DEPTH
+from windows_mcp.tree.deadline import Deadline, DeadlineExceeded
+from windows_mcp.tree.health import TraversalPlan
 from windows_mcp.tree.service import Tree
+from windows_mcp.tree.memory import MemoryCacheRequestFactory, MemoryControl, MemoryElement
+from windows_mcp.tree.occlusion import OcclusionMap
+from windows_mcp.tree.recording import RecordedWindow, Recording, ReplayBackend
+from windows_mcp.tree.traversal import TraversalLimits
+from windows_mcp.tree.views import BoundingBox, SnapshotScope, TreeElementNode
+
+from tests.synthetic import chromium_dom, traverse_window, wide_tree, wpf_app
 
 
 @pytest.fixture
 def tree_instance():
     mock_desktop = MagicMock()
     mock_desktop.get_screen_size.return_value = Size(width=1920, height=1080)
-    return Tree(mock_desktop)
+    # Tree only keeps a weak proxy of the desktop
+    yield Tree(mock_desktop)
 
 
 class TestAppNameCorrection:
@@ -76,3 +90,511 @@ class TestIouBoundingBox:
         assert result.bottom == 1080
         assert result.width == 20
         assert result.height == 20
+
+
+class TestTraversalMode:
+    def test_default_is_per_node(self, tree_instance):
+        assert tree_instance.traversal_mode == "per_node"
+
+    def test_unknown_mode_is_rejected(self):
+        mock_desktop = MagicMock()
+        mock_desktop.get_screen_size.return_value = Size(width=1920, height=1080)
+        with pytest.raises(ValueError):
+            Tree(mock_desktop, traversal_mode="breadth_first")
+
+    def test_prefetched_children_skip_round_trip(self):
+        child = SimpleNamespace()
+        node = MagicMock(_subtree_cached=True)
+        node.GetCachedChildren.return_value = [child]
+        children = CachedControlHelper.get_cached_children(node, MagicMock())
+        assert children == [child]
+        assert child._is_cached and child._subtree_cached
+        node.BuildUpdatedCache.assert_not_called()
+
+    def test_failed_prefetch_returns_uncached_node(self):
+        node = MagicMock()
+        node.BuildUpdatedCache.side_effect = OSError("provider hung")
+        assert CachedControlHelper.prefetch_subtree(node, MagicMock()) is node
+        assert node._subtree_cached is not True
+
+
+@pytest.fixture
+def windows(monkeypatch):
+    """Two top level windows, handle 2 can be flagged hung by the OS through the returned set."""
+    names = {1: "Editor", 2: "Hung App"}
+    hung = set()
+
+    def control_from_handle(handle):
+        return MagicMock(ClassName="Window", Name=names[handle])
+
+    monkeypatch.setattr("windows_mcp.tree.service.ControlFromHandle", control_from_handle)
+    monkeypatch.setattr("windows_mcp.tree.service.GetClassName", lambda handle: "Window")
+    monkeypatch.setattr("windows_mcp.tree.service.GetWindowProcessId", lambda handle: 100 + handle)
+    monkeypatch.setattr("windows_mcp.tree.service.GetWindowText", lambda handle: names[handle])
+    monkeypatch.setattr("windows_mcp.tree.service.IsHungAppWindow", lambda handle: handle in hung)
+    return hung
+
+
+class TestDeadline:
+    def test_slow_window_is_truncated(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        release = Event()
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, max_depth=None, **kwargs
+        ):
+            if handle == 2:
+                release.wait(5)
+                raise DeadlineExceeded()
+            return ([f"node-{handle}"], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        truncated = []
+        try:
+            interactive, _, _ = tree_instance.get_window_wise_nodes(
+                [1, 2], False, deadline=Deadline(max_ms=200), truncated_windows=truncated
+            )
+        finally:
+            release.set()
+            tree_instance.shutdown()
+        assert interactive == ["node-1"]
+        assert [(window.handle, window.name) for window in truncated] == [(2, "Hung App")]
+
+    def test_late_window_leaves_no_state_behind(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        release, finished = Event(), Event()
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, window_state=None, **kwargs
+        ):
+            if handle == 2:
+                release.wait(5)
+                finished.set()
+            window_state.list_summaries = [f"summary-{handle}"]
+            window_state.truncated_by = "node limit"
+            return ([f"node-{handle}"], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        summaries = []
+        try:
+            tree_instance.get_window_wise_nodes(
+                [1, 2], False, deadline=Deadline(max_ms=200), list_summaries=summaries
+            )
+            # The abandoned worker completes after the snapshot was built
+            release.set()
+            assert finished.wait(5)
+        finally:
+            release.set()
+            tree_instance.shutdown()
+        assert summaries == ["summary-1"]
+        assert list(tree_instance._list_summaries) == [1]
+        assert list(tree_instance._limit_truncations) == [1]
+
+    def test_no_deadline_waits_for_all_windows(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        monkeypatch.setattr(
+            tree_instance,
+            "get_nodes",
+            lambda handle, is_browser=False, use_dom=False, deadline=None, **kwargs: (
+                [f"node-{handle}"],
+                [],
+                [],
+            ),
+        )
+        truncated = []
+        interactive, _, _ = tree_instance.get_window_wise_nodes(
+            [1, 2], False, truncated_windows=truncated
+        )
+        tree_instance.shutdown()
+        assert interactive == ["node-1", "node-2"]
+        assert truncated == []
+
+
+class TestOcclusion:
+    def test_occluded_window_skipped_and_hidden_nodes_dropped(
+        self, tree_instance, windows, monkeypatch
+    ):
+        tree_instance.desktop.is_window_browser.return_value = False
+        calls = []
+        visible = SimpleNamespace(center=SimpleNamespace(x=50, y=50))
+        hidden = SimpleNamespace(center=SimpleNamespace(x=150, y=50))
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, max_depth=None, **kwargs
+        ):
+            calls.append(handle)
+            return ([visible, hidden], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        # Window 1 is half covered by an untraversed window 3, window 2 fully by window 1
+        occlusion = OcclusionMap.from_z_order(
+            [
+                (3, (100, 0, 300, 100), True),
+                (1, (0, 0, 200, 100), True),
+                (2, (10, 10, 90, 90), True),
+            ]
+        )
+        try:
+            interactive, _, _ = tree_instance.get_window_wise_nodes(
+                [1, 2], False, occlusion=occlusion
+            )
+        finally:
+            tree_instance.shutdown()
+        assert calls == [1]
+        assert interactive == [visible]
+
+    def test_occluded_active_window_is_reported(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        calls = []
+        node = SimpleNamespace(center=SimpleNamespace(x=150, y=50))
+
+        def get_nodes(handle, is_browser=False, use_dom=False, deadline=None, **kwargs):
+            calls.append(handle)
+            return ([node], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        # Window 2, asked for, is fully covered by window 1
+        occlusion = OcclusionMap.from_z_order(
+            [(1, (0, 0, 200, 100), True), (2, (10, 10, 90, 90), True)]
+        )
+        truncated = []
+        try:
+            interactive, _, _ = tree_instance.get_window_wise_nodes(
+                [2, 1], True, occlusion=occlusion, truncated_windows=truncated
+            )
+        finally:
+            tree_instance.shutdown()
+        assert calls == [1] and interactive == [node]
+        assert [(window.handle, window.name, window.reason) for window in truncated] == [
+            (2, "Hung App", "occluded")
+        ]
+
+
+class TestListSummaries:
+    def test_merged_in_window_order_and_dropped_with_window(
+        self, tree_instance, windows, monkeypatch
+    ):
+        tree_instance.desktop.is_window_browser.return_value = False
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, window_state=None, **kwargs
+        ):
+            window_state.list_summaries = [f"summary-{handle}"]
+            return ([], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        summaries = []
+        try:
+            tree_instance.get_window_wise_nodes([2, 1], False, list_summaries=summaries)
+            tree_instance.get_window_wise_nodes([1], False)
+        finally:
+            tree_instance.shutdown()
+        assert summaries == ["summary-2", "summary-1"]
+        assert list(tree_instance._list_summaries) == [1]
+
+
+class TestHungWindows:
+    @pytest.fixture
+    def calls(self, tree_instance, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        calls = []
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, max_depth=None, **kwargs
+        ):
+            calls.append((handle, max_depth))
+            if handle == 2:
+                raise TimeoutError("UIA_E_TIMEOUT")
+            return ([f"node-{handle}"], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        yield calls
+        tree_instance.shutdown()
+
+    def test_os_hung_window_is_never_traversed(self, tree_instance, windows, calls):
+        windows.add(2)
+        truncated = []
+        interactive, _, _ = tree_instance.get_window_wise_nodes(
+            [1, 2], False, truncated_windows=truncated
+        )
+        assert interactive == ["node-1"]
+        assert [handle for handle, _ in calls] == [1]
+        assert [(window.name, window.reason) for window in truncated] == [
+            ("Hung App", "not responding")
+        ]
+
+    def test_slow_failure_is_not_retried(self, tree_instance, windows, calls):
+        tree_instance.health.slow_ms = 0  # every failure counts as a stall
+        tree_instance.get_window_wise_nodes([1, 2], False)
+        assert calls.count((2, None)) == 1
+
+    def test_repeat_offender_is_degraded_then_skipped(self, tree_instance, windows, calls):
+        tree_instance.health.skip_after_strikes = 2
+        tree_instance.get_window_wise_nodes([2], False)
+        # fast failures are retried, the strikes put the window on the skip list
+        assert calls.count((2, None)) == 3
+        calls.clear()
+        truncated = []
+        tree_instance.get_window_wise_nodes([1, 2], False, truncated_windows=truncated)
+        assert calls == [(1, None)]
+        assert truncated[0].reason == "skipped, slow or failing"
+
+    def test_single_strike_traverses_last_at_reduced_depth(self, tree_instance, windows, calls):
+        tree_instance.health.record_failure(1, 101, latency_ms=10, class_name="Window")
+        tree_instance.get_window_wise_nodes([1], False)
+        assert calls == [(1, DEGRADED_MAX_DEPTH)]
+        # the fast successful probe clears the strike
+        assert tree_instance.health.plan(1, 101, "Window") is TraversalPlan.NORMAL
+
+    def test_active_window_is_never_skipped_nor_degraded(self, tree_instance, windows, calls):
+        tree_instance.health.skip_after_strikes = 2
+        for _ in range(2):
+            tree_instance.health.record_failure(1, 101, latency_ms=3000, class_name="Window")
+        # In the background it is skipped
+        tree_instance.get_window_wise_nodes([1], False)
+        assert calls == []
+        truncated = []
+        interactive, _, _ = tree_instance.get_window_wise_nodes(
+            [1], True, truncated_windows=truncated
+        )
+        assert calls == [(1, None)]
+        assert interactive == ["node-1"] and truncated == []
+
+
+class TestTraversalLimits:
+    def test_node_limit_is_reported_truncated(self, windows, monkeypatch):
+        desktop = MagicMock()
+        desktop.get_screen_size.return_value = Size(width=1920, height=1080)
+        desktop.is_window_browser.return_value = False
+        tree = Tree(desktop, limits=TraversalLimits(max_nodes=10))
+        root = wide_tree(50)
+        monkeypatch.setattr(
+            "windows_mcp.tree.service.ControlFromHandle", lambda handle: MemoryControl(root)
+        )
+        tree.set_backend(lambda handle: MemoryControl(root), MemoryCacheRequestFactory)
+        truncated = []
+        try:
+            interactive, _, _ = tree.get_window_wise_nodes([1], False, truncated_windows=truncated)
+        finally:
+            tree.shutdown()
+        assert len(interactive) == 9
+        assert [(window.name, window.reason) for window in truncated] == [("root", "node limit")]
+
+
+class TestScopes:
+    def test_region_and_scope(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        regions = []
+
+        def node(name, x):
+            box = BoundingBox(left=x, top=0, right=x + 10, bottom=10, width=10, height=10)
+            return TreeElementNode(bounding_box=box, center=box.get_center(), name=name)
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, max_depth=None, **kwargs
+        ):
+            regions.append(kwargs["region"])
+            return ([node(f"in-{handle}", 10), node(f"out-{handle}", 500)], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        try:
+            state = tree_instance.get_state(1, [2], region=(0, 0, 100, 100), scoped=True)
+        finally:
+            tree_instance.shutdown()
+        assert [node.name for node in state.interactive_nodes] == ["in-1", "in-2"]
+        assert regions == [(0, 0, 100, 100)] * 2
+        assert state.scope == SnapshotScope(
+            window_names={"Editor", "Hung App"}, region=(0, 0, 100, 100)
+        )
+
+
+class TestStreaming:
+    def test_active_window_is_reported_first_from_the_calling_thread(
+        self, tree_instance, windows, monkeypatch
+    ):
+        tree_instance.desktop.is_window_browser.return_value = False
+        threads = {}
+        reports = []
+
+        def get_nodes(handle, is_browser=False, use_dom=False, deadline=None, **kwargs):
+            threads[handle] = get_ident()
+            box = BoundingBox(left=0, top=0, right=10, bottom=10, width=10, height=10)
+            node = TreeElementNode(bounding_box=box, center=box.get_center(), name=f"n{handle}")
+            return ([node], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        try:
+            state = tree_instance.get_state(1, [2], on_window=reports.append)
+        finally:
+            tree_instance.shutdown()
+        assert threads[1] == get_ident()
+        assert threads[2] != get_ident()
+        assert [(r.handle, r.is_active, r.done, r.total) for r in reports] == [
+            (1, True, 1, 2),
+            (2, False, 2, 2),
+        ]
+        assert [node.name for node in reports[0].interactive_nodes] == ["n1"]
+        assert [node.name for node in state.interactive_nodes] == ["n1", "n2"]
+
+    def test_colliding_ids_are_suffixed_on_copies(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        box = BoundingBox(left=0, top=0, right=10, bottom=10, width=10, height=10)
+        # The same node objects every time, as windows reused from the cache give them
+        nodes = {
+            handle: [
+                TreeElementNode(bounding_box=box, center=box.get_center(), name=name, id="x")
+                for name in names
+            ]
+            for handle, names in {1: ["a", "b"], 2: ["c"]}.items()
+        }
+        monkeypatch.setattr(
+            tree_instance,
+            "get_nodes",
+            lambda handle, is_browser=False, use_dom=False, deadline=None, **kwargs: (
+                nodes[handle],
+                [],
+                [],
+            ),
+        )
+        reports = []
+        try:
+            for _ in range(2):
+                state = tree_instance.get_state(1, [2], on_window=reports.append)
+        finally:
+            tree_instance.shutdown()
+        assert [node.id for node in state.interactive_nodes] == ["x", "x-2", "x-3"]
+        assert [node.id for node in reports[-2].interactive_nodes] == ["x", "x-2"]
+        assert [node.id for node in nodes[1] + nodes[2]] == ["x", "x", "x"]
+
+    def test_failed_active_window_is_retried_on_a_worker(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        calls = []
+        reports = []
+
+        def get_nodes(handle, is_browser=False, use_dom=False, deadline=None, **kwargs):
+            calls.append(handle)
+            if calls.count(handle) == 1 and handle == 1:
+                raise RuntimeError("element not available")
+            return ([], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        try:
+            tree_instance.get_state(1, [2], on_window=reports.append)
+        finally:
+            tree_instance.shutdown()
+        assert calls.count(1) == 2
+        assert sorted(report.handle for report in reports) == [1, 2]
+
+
+class TestAppProfiles:
+    def test_skip_rules_of_the_matching_profile(self, windows, monkeypatch):
+        desktop = MagicMock()
+        desktop.get_screen_size.return_value = Size(width=1920, height=1080)
+        desktop.is_window_browser.return_value = False
+        root = MemoryElement(
+            "WindowControl",
+            name="Editor",
+            rect=(0, 0, 800, 600),
+            children=[
+                MemoryElement("ButtonControl", name="Run", rect=(0, 0, 100, 20)),
+                MemoryElement(
+                    "PaneControl",
+                    class_name="minimap",
+                    rect=(700, 0, 800, 600),
+                    children=[
+                        MemoryElement("ButtonControl", name="Slider", rect=(700, 0, 800, 20))
+                    ],
+                ),
+            ],
+        )
+        profile = AppProfile(
+            name="Editor",
+            class_names=frozenset({"Window"}),
+            skip_class_names=frozenset({"minimap"}),
+        )
+        tree = Tree(desktop, app_profiles=[profile])
+        tree.set_backend(lambda handle: MemoryControl(root), MemoryCacheRequestFactory)
+        try:
+            interactive, _, _ = tree.get_window_wise_nodes([1], False)
+        finally:
+            tree.shutdown()
+        assert [node.name for node in interactive] == ["Run"]
+
+    def test_use_dom_overrides_browser_detection(self, tree_instance, windows, monkeypatch):
+        tree_instance.desktop.is_window_browser.return_value = False
+        profile = AppProfile(name="Electron", class_names=frozenset({"Window"}), use_dom=True)
+        tree_instance.app_profiles = [profile]
+        calls = []
+
+        def get_nodes(
+            handle, is_browser=False, use_dom=False, deadline=None, max_depth=None, **kwargs
+        ):
+            calls.append((is_browser, kwargs["app_profile"]))
+            return ([], [], [])
+
+        monkeypatch.setattr(tree_instance, "get_nodes", get_nodes)
+        try:
+            tree_instance.get_window_wise_nodes([1], False)
+        finally:
+            tree_instance.shutdown()
+        assert calls == [(True, profile)]
+
+
+class TestQuery:
+    def test_query_runs_on_the_windows_of_the_last_snapshot(self, windows):
+        desktop = MagicMock()
+        desktop.get_screen_size.return_value = Size(width=1920, height=1080)
+        desktop.is_window_browser.return_value = False
+        root = MemoryElement(
+            "WindowControl",
+            name="Editor",
+            rect=(0, 0, 800, 600),
+            children=[
+                MemoryElement(
+                    "PaneControl",
+                    name="Toolbar",
+                    rect=(0, 0, 800, 40),
+                    children=[MemoryElement("ButtonControl", name="Run", rect=(0, 0, 100, 20))],
+                ),
+                MemoryElement("ButtonControl", name="Stop", rect=(0, 100, 100, 120)),
+            ],
+        )
+        tree = Tree(desktop, app_profiles=[])
+        tree.set_backend(lambda handle: MemoryControl(root), MemoryCacheRequestFactory)
+        try:
+            state = tree.get_state(1, [])
+        finally:
+            tree.shutdown()
+        [match] = tree.query_index.query("Pane[name=Toolbar] Button")
+        assert match.window_name == "Editor"
+        assert match.element == next(n for n in state.interactive_nodes if n.name == "Run")
+
+
+class TestReplay:
+    @pytest.mark.parametrize("mode", ["per_node", "subtree"])
+    def test_get_nodes_on_a_recording(self, mode):
+        app, page = wpf_app(depth=10), chromium_dom(sections=10)
+        backend = ReplayBackend(
+            Recording(
+                windows=[
+                    RecordedWindow(1, app.name, app),
+                    RecordedWindow(2, page.name, page, is_browser=True),
+                ]
+            )
+        )
+        tree = backend.create_tree(mode)
+        try:
+            app_nodes, _, _ = tree.get_nodes(1)
+            page_nodes, _, page_text = tree.get_nodes(2, is_browser=True)
+        finally:
+            tree.shutdown()
+        expected, _ = traverse_window(app)
+        assert [node.name for node in app_nodes] == [
+            node.name for node in expected.interactive_nodes
+        ]
+        expected, _ = traverse_window(page, is_browser=True)
+        assert len(page_nodes) == len(expected.interactive_nodes + expected.dom_interactive_nodes)
+        assert page_text == expected.dom_informative_nodes
+        assert tree.dom is not None
+        if mode == "subtree":
+            assert backend.stats.round_trips == 2
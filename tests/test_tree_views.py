@@ -1,13 +1,30 @@
 from types import SimpleNamespace
 
+from windows_mcp.tree.utils import deduplicate_ids, element_id
 from windows_mcp.tree.views import (
     BoundingBox,
     Center,
     TreeElementNode,
     TreeState,
+    TruncatedWindow,
+    WindowProgress,
+    ListSummary,
+    SnapshotScope,
 )
 
 
+def button(name, element_id="", x=10, window="Notepad", focused=False):
+    return TreeElementNode(
+        bounding_box=BoundingBox(left=x, top=0, right=x + 10, bottom=10, width=10, height=10),
+        center=Center(x=x + 5, y=5),
+        name=name,
+        control_type="Button",
+        window_name=window,
+        is_focused=focused,
+        id=element_id,
+    )
+
+
 class TestBoundingBox:
     def test_get_center_standard(self, sample_bounding_box):
         center = sample_bounding_box.get_center()
@@ -116,6 +133,138 @@ class TestTreeState:
         # base_index = 3 (three interactive nodes)
         assert lines[1].startswith("3|")
 
+    def test_truncated_windows_to_string_empty(self):
+        assert TreeState().truncated_windows_to_string() == ""
+
+    def test_truncated_windows_to_string(self):
+        ts = TreeState(truncated_windows=[TruncatedWindow(handle=1, name="Slack")])
+        lines = ts.truncated_windows_to_string().split("\n")
+        assert lines == ["# window|reason", "Slack|deadline"]
+
+    def test_list_summaries_to_string(self):
+        summary = ListSummary(
+            window_name="Explorer", name="Items View", item_type="List Item", items=5000, listed=20
+        )
+        assert TreeState().list_summaries_to_string() == ""
+        lines = TreeState(list_summaries=[summary]).list_summaries_to_string().split("\n")
+        assert lines == [
+            "# id|window|name|item_type|items|listed|v_pct",
+            "|Explorer|Items View|List Item|5000|20|",
+        ]
+
+    def test_window_progress_to_string(self):
+        progress = WindowProgress(
+            handle=1,
+            name="Notepad",
+            interactive_nodes=[button("OK", "a")],
+            scrollable_nodes=[],
+            done=1,
+            total=3,
+        )
+        assert progress.to_string() == "Notepad: 1 interactive and 0 scrollable elements"
+        progress.is_active = True
+        lines = progress.to_string().split("\n")
+        assert lines[0] == "Focused Window Notepad:"
+        assert lines[2:4] == [
+            "# id|window|control_type|name|coords|focus",
+            button("OK", "a").to_string("a"),
+        ]
+        assert lines[-1] == "No scrollable elements"
+
+    def test_stable_ids_replace_indices(self, sample_tree_element_node):
+        ts = TreeState(interactive_nodes=[button("OK", "k3x9"), sample_tree_element_node])
+        lines = ts.interactive_elements_to_string().split("\n")
+        assert lines[1] == "k3x9|Notepad|Button|OK|(15,5)|False"
+        # Nodes without an id keep their index
+        assert lines[2].startswith("1|")
+
+
+class TestTreeStateDiff:
+    def test_added_removed_changed(self):
+        previous = TreeState(interactive_nodes=[button("OK", "a"), button("Cancel", "b")])
+        current = TreeState(
+            interactive_nodes=[button("OK", "a", focused=True), button("Help", "c")]
+        )
+        diff = current.diff(previous)
+        assert [node.id for node in diff.interactive_added] == ["c"]
+        assert [node.id for node in diff.interactive_removed] == ["b"]
+        assert [node.id for node in diff.interactive_changed] == ["a"]
+        assert diff.interactive_elements_to_string().split("\n") == [
+            "# change|id|window|control_type|name|coords|focus",
+            "+|c|Notepad|Button|Help|(15,5)|False",
+            "~|a|Notepad|Button|OK|(15,5)|True",
+            "-|b|Notepad|Button|Cancel|(15,5)|False",
+        ]
+        assert diff.scrollable_elements_to_string() == "No changes in scrollable elements"
+
+    def test_unchanged_state_is_empty(self):
+        state = TreeState(interactive_nodes=[button("OK", "a")])
+        diff = TreeState(interactive_nodes=[button("OK", "a")]).diff(state)
+        assert diff.is_empty
+        assert not diff.is_initial
+        assert diff.interactive_elements_to_string() == "No changes in interactive elements"
+
+    def test_first_snapshot_is_all_added(self):
+        diff = TreeState(interactive_nodes=[button("OK", "a")]).diff(None)
+        assert diff.is_initial
+        assert len(diff.interactive_added) == 1
+
+    def test_moved_element_is_changed_not_replaced(self):
+        previous = TreeState(interactive_nodes=[button("OK", "a", x=10)])
+        diff = TreeState(interactive_nodes=[button("OK", "a", x=50)]).diff(previous)
+        assert diff.interactive_changed and not diff.interactive_added
+
+    def test_truncated_windows_do_not_remove_elements(self):
+        previous = TreeState(
+            interactive_nodes=[button("OK", "a"), button("Send", "b", window="Slack")]
+        )
+        current = TreeState(
+            interactive_nodes=[button("OK", "a")],
+            truncated_windows=[TruncatedWindow(handle=1, name="Slack")],
+        )
+        assert current.diff(previous).is_empty
+
+    def test_elements_outside_the_scope_are_not_removed(self):
+        previous = TreeState(
+            interactive_nodes=[
+                button("OK", "a"),
+                button("Far", "b", x=500),
+                button("Send", "c", window="Slack"),
+            ]
+        )
+        current = TreeState(
+            interactive_nodes=[button("OK", "a")],
+            scope=SnapshotScope(window_names={"Notepad"}, region=(0, 0, 100, 100)),
+        )
+        assert current.diff(previous).is_empty
+        # A window closed inside the scope still counts as removed
+        current.scope = SnapshotScope(window_names={"Notepad", "Slack"})
+        assert [node.id for node in current.diff(previous).interactive_removed] == ["b", "c"]
+
+
+class TestElementId:
+    def test_deterministic(self):
+        assert element_id((42, 1234)) == element_id((42, 1234))
+        assert element_id((42, 1234)) != element_id((42, 1235))
+        assert element_id((42, 1234)).isalnum()
+
+    def test_fallback_without_runtime_id(self):
+        assert element_id(None, "Notepad", "Button", "OK") == element_id(
+            None, "Notepad", "Button", "OK"
+        )
+        assert element_id(None, "Notepad", "Button", "OK") != element_id(
+            None, "Notepad", "Button", "Cancel"
+        )
+
+    def test_deduplicate_ids(self):
+        nodes = [button("A", "x"), button("B", "x"), button("C", ""), button("D", "x")]
+        deduplicated = deduplicate_ids(nodes)
+        assert [node.id for node in deduplicated] == ["x", "x-2", "", "x-3"]
+        assert [node.name for node in deduplicated] == ["A", "B", "C", "D"]
+        # Shared nodes are copied, not renamed
+        assert [node.id for node in nodes] == ["x", "x", "", "x"]
+        assert deduplicated[0] is nodes[0] and deduplicated[1] is not nodes[1]
+
 
 class TestTreeElementNode:
     def test_to_row(self, sample_tree_element_node):
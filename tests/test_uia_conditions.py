@@ -0,0 +1,141 @@
+import pytest
+
+from windows_mcp.tree.memory import MemoryControl, MemoryElement
+from windows_mcp.uia.conditions import (
+    AndCondition,
+    ConditionFromSearchProperties,
+    NotCondition,
+    OrCondition,
+    PropertyCondition,
+    SearchScope,
+    TrueCondition,
+)
+from windows_mcp.uia.enums import ControlType, PropertyConditionFlags, PropertyId, TreeScope
+
+IGNORE_CASE = PropertyConditionFlags.PropertyConditionFlags_IgnoreCase
+SUBSTRING = PropertyConditionFlags.PropertyConditionFlags_MatchSubstring
+
+
+def name(value, flags=0):
+    return PropertyCondition(PropertyId.NameProperty, value, flags)
+
+
+def control_type(value):
+    return PropertyCondition(PropertyId.ControlTypeProperty, value)
+
+
+class FakeAutomation:
+    """Records the IUIAutomation factory calls as nested tuples."""
+
+    def CreatePropertyCondition(self, property_id, value):
+        return ("property", property_id, value)
+
+    def CreatePropertyConditionEx(self, property_id, value, flags):
+        return ("property", property_id, value, flags)
+
+    def CreateAndCondition(self, first, second):
+        return ("and", first, second)
+
+    def CreateOrCondition(self, first, second):
+        return ("or", first, second)
+
+    def CreateNotCondition(self, condition):
+        return ("not", condition)
+
+    def CreateTrueCondition(self):
+        return ("true",)
+
+    def CreateFalseCondition(self):
+        return ("false",)
+
+
+@pytest.fixture
+def button():
+    return MemoryControl(MemoryElement("ButtonControl", name="Save As"))
+
+
+class TestMatches:
+    def test_property(self, button):
+        assert name("Save As").Matches(button)
+        assert not name("save as").Matches(button)
+        assert control_type(ControlType.ButtonControl).Matches(button)
+
+    def test_flags(self, button):
+        assert name("save as", IGNORE_CASE).Matches(button)
+        assert name("As", SUBSTRING).Matches(button)
+        assert name("SAVE", IGNORE_CASE | SUBSTRING).Matches(button)
+        assert not name("Open", SUBSTRING).Matches(button)
+
+    def test_operators(self, button):
+        assert (control_type(ControlType.ButtonControl) & name("Save As")).Matches(button)
+        assert (name("Open") | name("Save As")).Matches(button)
+        assert (~name("Open")).Matches(button)
+        assert not (~TrueCondition()).Matches(button)
+
+    def test_operators_flatten(self):
+        a, b, c = name("a"), name("b"), name("c")
+        assert (a & b & c).conditions == (a, b, c)
+        assert (a | b | c).conditions == (a, b, c)
+        assert ~~a == a
+
+
+class TestBuild:
+    def test_property_with_flags(self):
+        assert name("x", SUBSTRING).Build(FakeAutomation()) == (
+            "property",
+            PropertyId.NameProperty,
+            "x",
+            SUBSTRING,
+        )
+
+    def test_nested(self):
+        condition = control_type(ControlType.ButtonControl) & (name("a") | ~name("b"))
+        assert condition.Build(FakeAutomation()) == (
+            "and",
+            ("property", PropertyId.ControlTypeProperty, ControlType.ButtonControl),
+            (
+                "or",
+                ("property", PropertyId.NameProperty, "a"),
+                ("not", ("property", PropertyId.NameProperty, "b")),
+            ),
+        )
+
+    def test_empty(self):
+        assert AndCondition().Build(FakeAutomation()) == ("true",)
+        assert OrCondition().Build(FakeAutomation()) == ("false",)
+
+
+class TestSearchProperties:
+    def test_control_type_first(self):
+        condition = ConditionFromSearchProperties(
+            {"SubName": "Notepad", "ControlType": ControlType.WindowControl}
+        )
+        assert condition == AndCondition(
+            control_type(ControlType.WindowControl), name("Notepad", SUBSTRING)
+        )
+
+    def test_single_property(self):
+        assert ConditionFromSearchProperties({"Name": "OK"}) == name("OK")
+
+    @pytest.mark.parametrize("key", ["RegexName", "Depth", "Compare"])
+    def test_python_only_properties(self, key):
+        assert ConditionFromSearchProperties({"Name": "OK", key: 1}) is None
+
+    def test_empty(self):
+        assert ConditionFromSearchProperties({}) is None
+
+    def test_not_condition_equality(self):
+        assert NotCondition(name("a")) == ~name("a")
+
+
+class TestSearchScope:
+    def test_scopes(self):
+        assert SearchScope() == TreeScope.TreeScope_Descendants
+        assert SearchScope(1) == TreeScope.TreeScope_Children
+        assert SearchScope(1, findFromSelf=True) == (
+            TreeScope.TreeScope_Children | TreeScope.TreeScope_Element
+        )
+
+    def test_fixed_depth_has_no_scope(self):
+        assert SearchScope(3) is None
+        assert SearchScope(0) is None
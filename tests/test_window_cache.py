@@ -0,0 +1,153 @@
+import pytest
+
+from windows_mcp.tree.views import BoundingBox, TreeElementNode
+from windows_mcp.tree.window_cache import (
+    WindowCacheEntry,
+    WindowNodeCache,
+    handle_from_runtime_id,
+    normalize_runtime_id,
+)
+
+RECT = (0, 0, 800, 600)
+
+
+def make_entry(handle, runtime_ids=(), rect=RECT, **kwargs):
+    box = BoundingBox(left=0, top=0, right=10, bottom=10, width=10, height=10)
+    node = TreeElementNode(bounding_box=box, center=box.get_center(), name=f"node-{handle}")
+    return WindowCacheEntry(
+        handle=handle,
+        interactive_nodes=[node],
+        scrollable_nodes=[],
+        dom_informative_nodes=[],
+        window_rect=rect,
+        runtime_ids=set(runtime_ids),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def cache():
+    window_cache = WindowNodeCache()
+    window_cache.enable()
+    return window_cache
+
+
+class TestRuntimeIdHelpers:
+    def test_normalize_list(self):
+        assert normalize_runtime_id([7, 1234, 5]) == (7, 1234, 5)
+
+    def test_normalize_empty(self):
+        assert normalize_runtime_id(None) is None
+        assert normalize_runtime_id([]) is None
+
+    def test_handle_from_hwnd_runtime_id(self):
+        assert handle_from_runtime_id((42, 0x1234)) == 0x1234
+
+    def test_handle_from_non_hwnd_runtime_id(self):
+        assert handle_from_runtime_id((7, 1234, 5)) is None
+
+
+class TestWindowNodeCache:
+    def test_disabled_cache_never_hits(self):
+        window_cache = WindowNodeCache()
+        window_cache.put(make_entry(1))
+        assert window_cache.get(1, RECT) is None
+        assert len(window_cache) == 0
+
+    def test_clean_window_is_reused(self, cache):
+        entry = make_entry(1)
+        cache.put(entry)
+        assert cache.get(1, RECT) is entry
+        assert cache.hits == 1
+
+    def test_moved_window_is_traversed_again(self, cache):
+        cache.put(make_entry(1))
+        assert cache.get(1, (10, 10, 810, 610)) is None
+        assert cache.misses == 1
+
+    def test_dom_mode_change_is_a_miss(self, cache):
+        cache.put(make_entry(1, is_browser=True, use_dom=False))
+        assert cache.get(1, RECT, is_browser=True, use_dom=True) is None
+
+    def test_structure_event_marks_only_owner_dirty(self, cache):
+        cache.put(make_entry(1, runtime_ids=[(7, 100, 1), (7, 100, 2)]))
+        cache.put(make_entry(2, runtime_ids=[(7, 200, 1)]))
+
+        assert cache.invalidate_runtime_id([7, 100, 2]) == 1
+
+        assert cache.get(1, RECT) is None
+        assert cache.get(2, RECT) is not None
+
+    def test_unknown_runtime_id_is_ignored(self, cache):
+        cache.put(make_entry(1, runtime_ids=[(7, 100, 1)]))
+        assert cache.invalidate_runtime_id([7, 999, 1]) is None
+        assert cache.get(1, RECT) is not None
+
+    def test_hwnd_runtime_id_of_cached_window(self, cache):
+        cache.put(make_entry(0x1234))
+        assert cache.invalidate_runtime_id([42, 0x1234]) == 0x1234
+        assert cache.get(0x1234, RECT) is None
+
+    def test_hwnd_runtime_id_of_child_control_uses_index(self, cache):
+        # Child HWND controls also carry the prefix but belong to their top level window
+        cache.put(make_entry(1, runtime_ids=[(42, 0x99)]))
+        assert cache.invalidate_runtime_id([42, 0x99]) == 1
+
+    def test_event_during_traversal_keeps_entry_dirty(self, cache):
+        token = cache.begin(1)
+        cache.invalidate(1)  # event arrives while window 1 is being traversed
+        cache.put(make_entry(1), token)
+        assert cache.get(1, RECT) is None
+
+    def test_global_invalidation_during_traversal(self, cache):
+        token = cache.begin(1)
+        cache.invalidate_all()
+        cache.put(make_entry(1), token)
+        assert cache.get(1, RECT) is None
+
+    def test_retraversal_replaces_dirty_entry(self, cache):
+        cache.put(make_entry(1, runtime_ids=[(7, 1)]))
+        cache.invalidate(1)
+        fresh = make_entry(1, runtime_ids=[(7, 2)])
+        cache.put(fresh, cache.begin(1))
+        assert cache.get(1, RECT) is fresh
+        # Runtime ids of the replaced entry no longer map to the window
+        assert cache.owner_of([7, 1]) is None
+        assert cache.owner_of([7, 2]) == 1
+
+    def test_invalidate_all(self, cache):
+        cache.put(make_entry(1))
+        cache.put(make_entry(2))
+        cache.invalidate_all()
+        assert cache.get(1, RECT) is None
+        assert cache.get(2, RECT) is None
+
+    def test_retain_drops_closed_windows(self, cache):
+        cache.put(make_entry(1, runtime_ids=[(7, 1)]))
+        cache.put(make_entry(2, runtime_ids=[(7, 2)]))
+        cache.retain([2])
+        assert 1 not in cache
+        assert 2 in cache
+        assert cache.owner_of([7, 1]) is None
+
+    def test_disable_clears_entries(self, cache):
+        cache.put(make_entry(1))
+        cache.disable()
+        assert len(cache) == 0
+        assert cache.get(1, RECT) is None
+
+    def test_event_sequence(self, cache):
+        # snapshot 1: both windows traversed
+        cache.put(make_entry(1, runtime_ids=[(7, 1, 1)]), cache.begin(1))
+        cache.put(make_entry(2, runtime_ids=[(7, 2, 1)]), cache.begin(2))
+        # property change in window 2, then focus moves from window 2 to window 1
+        cache.invalidate_runtime_id([7, 2, 1])
+        cache.invalidate(2)
+        cache.invalidate_runtime_id([7, 1, 1])
+        assert cache.get(1, RECT) is None
+        assert cache.get(2, RECT) is None
+        # snapshot 2 re-traverses both, snapshot 3 reuses both
+        cache.put(make_entry(1, runtime_ids=[(7, 1, 1)]), cache.begin(1))
+        cache.put(make_entry(2, runtime_ids=[(7, 2, 1)]), cache.begin(2))
+        assert cache.get(1, RECT) is not None
+        assert cache.get(2, RECT) is not None